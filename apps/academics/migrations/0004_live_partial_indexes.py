@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_initial'),
+        ('core', '0004_document_batch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('status', 'active')), fields=['student_id'], name='student_active_idx'),
+        ),
+    ]
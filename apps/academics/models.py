@@ -8,6 +8,8 @@ from django.utils import timezone
 
 from apps.core.models import CoreBaseModel, AddressModel, ContactModel
 
+from . import registry
+
 
 class AcademicSession(CoreBaseModel):
     """
@@ -90,6 +92,16 @@ class AcademicSession(CoreBaseModel):
             # Set all other sessions to not current
             AcademicSession.objects.filter(is_current=True).update(is_current=False)
         super().save(*args, **kwargs)
+        registry.invalidate()
+
+    def hard_delete(self, using=None, keep_parents=False):
+        super().hard_delete(using=using, keep_parents=keep_parents)
+        registry.invalidate()
+
+    @classmethod
+    def current(cls):
+        """The current session, served by :func:`apps.academics.registry.current_session`."""
+        return registry.current_session()
 
     @property
     def semester_name(self):
@@ -372,11 +384,26 @@ class Class(CoreBaseModel):
     @property
     def current_student_count(self):
         """Return current number of students in this class."""
+        if hasattr(self, 'active_student_count'):
+            # Annotated by list views, see Class.with_student_count()
+            return self.active_student_count
         return self.enrollments.filter(
             status='active',
             academic_session=self.academic_session
         ).count()
 
+    @staticmethod
+    def with_student_count(queryset):
+        """Annotate each class in ``queryset`` with its current number of students."""
+        return queryset.annotate(active_student_count=models.Count(
+            'enrollments',
+            filter=models.Q(
+                enrollments__status='active',
+                enrollments__academic_session=models.F('academic_session'),
+                enrollments__is_deleted=False,
+            ),
+        ))
+
     @property
     def available_seats(self):
         """Return number of available seats."""
@@ -492,6 +519,12 @@ class Student(CoreBaseModel, AddressModel, ContactModel):
             models.Index(fields=['student_id', 'status']),
             models.Index(fields=['admission_number']),
             models.Index(fields=['user', 'status']),
+            # Class lists and pickers only show enrolled, undeleted students
+            models.Index(
+                fields=['student_id'],
+                condition=models.Q(is_deleted=False, status='active'),
+                name='student_active_idx'
+            ),
         ]
 
     def __str__(self):
@@ -528,12 +561,27 @@ class Student(CoreBaseModel, AddressModel, ContactModel):
     @property
     def current_class(self):
         """Get current class enrollment for active session."""
-        current_enrollment = self.enrollments.filter(
-            status='active',
-            academic_session__is_current=True
-        ).first()
+        if hasattr(self, 'current_enrollments'):
+            # Prefetched by list views, see Student.with_current_class()
+            current_enrollment = self.current_enrollments[0] if self.current_enrollments else None
+        else:
+            current_enrollment = self.enrollments.filter(
+                status='active',
+                academic_session__is_current=True
+            ).first()
         return current_enrollment.class_enrolled if current_enrollment else None
 
+    @staticmethod
+    def with_current_class(queryset):
+        """Prefetch the current enrollment (and class) of each student in ``queryset``."""
+        return queryset.prefetch_related(models.Prefetch(
+            'enrollments',
+            queryset=Enrollment.objects.filter(
+                status='active', academic_session__is_current=True
+            ).select_related('class_enrolled__grade_level'),
+            to_attr='current_enrollments',
+        ))
+
     @property
     def age(self):
         """Calculate current age from date of birth."""
@@ -2843,3 +2891,17 @@ class DepartmentBudget(CoreBaseModel):
         if self.allocated_amount > 0:
             return (self.spent_amount / self.allocated_amount) * 100
         return 0
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_academic_calendar(sender, instance, **kwargs):
+    """
+    Drop cached calendar holidays whenever a holiday changes.
+    """
+    from apps.core.caching import invalidate
+    invalidate('academics.calendar')
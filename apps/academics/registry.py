@@ -0,0 +1,102 @@
+"""
+Current academic session registry.
+
+Almost every dashboard, list view and import needs the current
+:class:`~apps.academics.models.AcademicSession`. :func:`current_session`
+serves it from a process-local copy that is checked against a version key in
+the shared cache, and memoises it for the rest of the request, so a warm
+request never queries for it.
+
+Saving or deleting a session bumps the version once the change commits,
+which makes every process reload the session on its next lookup. A session
+read inside a transaction is only kept once that transaction commits, so a
+rolled back change is never served.
+"""
+
+import copy
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'academics:current_session:version'
+
+# (version, session) as last loaded in this process
+_cached = (None, None)
+# Per-request memo; a context variable so it follows the request into
+# sync_to_async threads and stays out of other requests on the same thread
+_memo = ContextVar('current_session_memo', default=None)
+
+
+def _shared_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _remember(version, session):
+    global _cached
+    _cached = (version, session)
+
+
+def current_session():
+    """
+    The current AcademicSession, or None if no session is marked current.
+
+    Each call returns a copy, so callers may change attributes freely.
+    """
+    memo = _memo.get()
+    if memo is not None and 'session' in memo:
+        return memo['session']
+
+    version = _shared_version()
+    cached_version, session = _cached
+    if cached_version != version:
+        from .models import AcademicSession
+
+        session = AcademicSession.objects.filter(is_current=True).first()
+        transaction.on_commit(lambda: _remember(version, session))
+
+    session = copy.copy(session) if session else None
+    if memo is not None:
+        memo['session'] = session
+    return session
+
+
+def _bump():
+    _remember(None, None)
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate():
+    """Forget the current session in this process now and everywhere on commit."""
+    _remember(None, None)
+    memo = _memo.get()
+    if memo is not None:
+        memo.pop('session', None)
+    transaction.on_commit(_bump)
+
+
+@contextmanager
+def memoize():
+    """Serve one session lookup for the duration of the block."""
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+class CurrentSessionMiddleware:
+    """Memoise the current session for each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with memoize():
+            return self.get_response(request)
@@ -0,0 +1,69 @@
+# apps/academics/tests.py
+
+from datetime import date
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from apps.core.models import Institution
+from . import registry
+from .models import AcademicSession
+
+
+class CurrentSessionRegistryTestCase(TestCase):
+    """Test cases for the current academic session registry"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        # A new version makes every process reload, dropping sessions cached by earlier tests
+        cache.delete(registry.VERSION_KEY)
+        self.addCleanup(cache.delete, registry.VERSION_KEY)
+
+    def create_session(self, name, year, is_current=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return AcademicSession.objects.create(
+                name=name, start_date=date(year, 9, 1), end_date=date(year + 1, 7, 31), is_current=is_current,
+            )
+
+    def test_warm_lookup_takes_no_queries(self):
+        session = self.create_session('2024/2025', 2024)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(AcademicSession.current(), session)
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.current_session(), session)
+
+        # Callers get their own copy
+        registry.current_session().name = 'Changed'
+        self.assertEqual(registry.current_session().name, '2024/2025')
+
+    def test_saving_a_session_invalidates(self):
+        first = self.create_session('2023/2024', 2023)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(registry.current_session(), first)
+
+        second = self.create_session('2024/2025', 2024)
+        self.assertEqual(registry.current_session(), second)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.is_current = False
+            second.save()
+        self.assertIsNone(registry.current_session())
+
+    def test_uncommitted_lookups_are_not_kept(self):
+        session = self.create_session('2024/2025', 2024)
+        self.assertEqual(registry.current_session(), session)
+        with self.assertNumQueries(1):
+            registry.current_session()
+
+    def test_memoized_per_request(self):
+        session = self.create_session('2024/2025', 2024)
+
+        def view(request):
+            with self.assertNumQueries(1):
+                for _ in range(5):
+                    self.assertEqual(AcademicSession.current(), session)
+            return 'response'
+
+        middleware = registry.CurrentSessionMiddleware(view)
+        self.assertEqual(middleware(RequestFactory().get('/')), 'response')
+        self.assertIsNone(registry._memo.get())
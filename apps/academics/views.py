@@ -31,6 +31,7 @@ from .forms import (
 )
 from apps.users.forms import UserCreationForm, UserUpdateForm, UserProfileForm, RoleForm, UserRoleAssignmentForm # Import user-related forms
 from apps.core.mixins import InstitutionPermissionMixin  # Import for tenant filtering
+from apps.core.caching import get_or_set
 
 
 # =============================================================================
@@ -176,7 +177,7 @@ class StudentAcademicRecordsView(StudentRequiredMixin, View):
         from apps.attendance.models import DailyAttendance, AttendanceSummary
 
         # Current session attendance
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if current_session:
             attendance_records = DailyAttendance.objects.filter(
                 student=student,
@@ -219,7 +220,7 @@ class StudentDashboardView(StudentRequiredMixin, View):
 
     def get(self, request):
         student = request.user.student_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Get current enrollment
         current_enrollment = student.enrollments.filter(
@@ -323,7 +324,7 @@ class StudentDashboardView(StudentRequiredMixin, View):
         from django.utils import timezone
 
         today = timezone.now().date()
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         if current_session:
             attendance = DailyAttendance.objects.filter(
@@ -418,7 +419,7 @@ class StudentMaterialsView(StudentRequiredMixin, View):
 
     def get(self, request):
         student = request.user.student_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Get current enrollment
         current_enrollment = student.enrollments.filter(
@@ -472,7 +473,7 @@ class StudentPerformanceView(StudentRequiredMixin, View):
 
     def get(self, request):
         student = request.user.student_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Get all academic records (historical results)
         academic_records = AcademicRecord.objects.filter(
@@ -560,7 +561,7 @@ class StudentPerformanceView(StudentRequiredMixin, View):
         from apps.attendance.models import DailyAttendance, AttendanceSummary
 
         # Current session attendance
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if current_session:
             attendance_records = DailyAttendance.objects.filter(
                 student=student,
@@ -635,7 +636,7 @@ class StudentAttendanceView(StudentRequiredMixin, View):
 
     def get(self, request):
         student = request.user.student_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Get attendance records for current session
         attendance_records = []
@@ -758,7 +759,7 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
         context['is_super_admin_context'] = is_super_admin_context
 
         # Common context for all users
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         context['current_session'] = current_session
 
         # Get category filter from GET parameters
@@ -934,9 +935,9 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
             try:
                 selected_session = AcademicSession.objects.get(id=session_id)
             except AcademicSession.DoesNotExist:
-                selected_session = AcademicSession.objects.filter(is_current=True).first()
+                selected_session = AcademicSession.current()
         else:
-            selected_session = AcademicSession.objects.filter(is_current=True).first()
+            selected_session = AcademicSession.current()
 
         # Filter assignments by selected session and subject if provided
         filtered_assignments = teacher.subject_assignments.filter(
@@ -1001,9 +1002,9 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
             try:
                 selected_session = AcademicSession.objects.get(id=session_id)
             except AcademicSession.DoesNotExist:
-                selected_session = AcademicSession.objects.filter(is_current=True).first()
+                selected_session = AcademicSession.current()
         else:
-            selected_session = AcademicSession.objects.filter(is_current=True).first()
+            selected_session = AcademicSession.current()
 
         base_stats = {
             'total_students': Student.objects.filter(status='active').count(),
@@ -1018,7 +1019,9 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
             recent_enrollments = Enrollment.objects.filter(enrollment_status='active')
             if selected_session:
                 recent_enrollments = recent_enrollments.filter(academic_session=selected_session)
-            recent_enrollments = recent_enrollments.order_by('-enrollment_date')[:10]
+            recent_enrollments = recent_enrollments.select_related(
+                'student__user', 'class_enrolled'
+            ).order_by('-enrollment_date')[:10]
 
             upcoming_holidays = Holiday.objects.filter(date__gte=timezone.now().date())
             if selected_session:
@@ -1041,7 +1044,9 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
             recent_enrollments = Enrollment.objects.filter(enrollment_status='active')
             if selected_session:
                 recent_enrollments = recent_enrollments.filter(academic_session=selected_session)
-            recent_enrollments = recent_enrollments.order_by('-enrollment_date')[:10]
+            recent_enrollments = recent_enrollments.select_related(
+                'student__user', 'class_enrolled'
+            ).order_by('-enrollment_date')[:10]
 
             context.update({
                 'total_assignments': assignments_query.count(),
@@ -1066,7 +1071,7 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
         from apps.attendance.models import DailyAttendance
 
         # Use selected session or default to current
-        session_filter = selected_session or AcademicSession.objects.filter(is_current=True).first()
+        session_filter = selected_session or AcademicSession.current()
         if session_filter:
             attendance_records = DailyAttendance.objects.filter(
                 student=student,
@@ -1093,7 +1098,7 @@ class AcademicsDashboardView(AcademicsAccessMixin, View):
     
     def _get_teacher_student_count(self, teacher, selected_session=None):
         """Get total students taught by teacher."""
-        session_filter = selected_session or AcademicSession.objects.filter(is_current=True).first()
+        session_filter = selected_session or AcademicSession.current()
         if not session_filter:
             return 0
 
@@ -1460,7 +1465,7 @@ class SubjectListView(AcademicsAccessMixin, ListView):
     paginate_by = 15
     
     def get_queryset(self):
-        queryset = Subject.objects.filter(status='active').select_related('department')
+        queryset = Subject.objects.filter(status='active').select_related('department').prefetch_related('prerequisites')
         
         # Filter by department if provided
         department_id = self.request.GET.get('department')
@@ -1483,7 +1488,7 @@ class SubjectDetailView(AcademicsAccessMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         if current_session:
             context['current_assignments'] = self.object.subject_assignments.filter(
@@ -1544,9 +1549,9 @@ class ClassListView(AcademicsAccessMixin, ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        queryset = Class.objects.filter(status='active').select_related(
-            'grade_level', 'class_teacher', 'academic_session'
-        )
+        queryset = Class.with_student_count(Class.objects.filter(status='active').select_related(
+            'grade_level', 'class_teacher__user', 'academic_session'
+        )).order_by('grade_level__name', 'name')
         
         # Filter by grade level if provided
         grade_level_id = self.request.GET.get('grade_level')
@@ -1636,7 +1641,7 @@ class StudentListView(AcademicsAccessMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = Student.objects.filter(status='active').select_related('user')
+        queryset = Student.with_current_class(Student.objects.filter(status='active').select_related('user'))
         
         # Apply search filters
         form = StudentSearchForm(self.request.GET)
@@ -1792,7 +1797,7 @@ class TeacherDetailView(AcademicsAccessMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         teacher = self.object
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         if current_session:
             # Current subject assignments
@@ -1851,7 +1856,7 @@ class EnrollmentListView(StaffRequiredMixin, ListView):
     
     def get_queryset(self):
         queryset = Enrollment.objects.select_related(
-            'student__user', 'class_enrolled', 'academic_session'
+            'student__user', 'class_enrolled__grade_level', 'academic_session'
         )
         
         # Filter by class if provided
@@ -2006,7 +2011,7 @@ class TimetableDetailView(AcademicsAccessMixin, DetailView):
             queryset = queryset.filter(academic_session_id=session_id)
         else:
             # Default to current session
-            current_session = AcademicSession.objects.filter(is_current=True).first()
+            current_session = AcademicSession.current()
             if current_session:
                 queryset = queryset.filter(academic_session=current_session)
         
@@ -2050,7 +2055,7 @@ class StudentTimetableView(StudentRequiredMixin, View):
                 'current_term': None,
             })
 
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         timetable_entries = Timetable.objects.filter(
             class_assigned=current_enrollment.class_enrolled,
@@ -2101,7 +2106,7 @@ class TeacherTimetableView(TeacherRequiredMixin, View):
     
     def get(self, request):
         teacher = request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         timetable_entries = Timetable.objects.filter(
             teacher=teacher,
@@ -2435,7 +2440,7 @@ class GetTimetableByClassView(AcademicsAccessMixin, View):
         if session_id:
             timetable_entries = timetable_entries.filter(academic_session_id=session_id)
         else:
-            current_session = AcademicSession.objects.filter(is_current=True).first()
+            current_session = AcademicSession.current()
             if current_session:
                 timetable_entries = timetable_entries.filter(academic_session=current_session)
         
@@ -2458,8 +2463,12 @@ class AcademicCalendarView(AcademicsAccessMixin, View):
     """Academic calendar view."""
 
     def get(self, request):
-        current_session = AcademicSession.objects.filter(is_current=True).first()
-        holidays = Holiday.objects.filter(academic_session=current_session)
+        current_session = AcademicSession.current()
+        holidays = get_or_set(
+            'academics.calendar',
+            [current_session.pk if current_session else None],
+            lambda: list(Holiday.objects.filter(academic_session=current_session)),
+        )
 
         context = {
             'current_session': current_session,
@@ -2812,7 +2821,7 @@ class EnrollmentReportsDashboardView(StaffRequiredMixin, View):
 
     def get(self, request):
         # Get current session or use the most recent one
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if not current_session:
             current_session = AcademicSession.objects.order_by('-start_date').first()
 
@@ -3046,7 +3055,7 @@ class DepartmentHeadDashboardView(DepartmentHeadRequiredMixin, View):
     def get(self, request):
         department_head = request.user.teacher_profile
         department = department_head.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Department statistics
         department_stats = self._get_department_stats(department, current_session)
@@ -3283,7 +3292,7 @@ class DepartmentTeachersView(DepartmentHeadRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         department = self.request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Add subject assignment information
         for teacher in context['teachers']:
@@ -3310,7 +3319,7 @@ class DepartmentStudentsView(DepartmentHeadRequiredMixin, ListView):
 
     def get_queryset(self):
         department = self.request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         if not current_session:
             return Student.objects.none()
@@ -3333,7 +3342,7 @@ class DepartmentStudentsView(DepartmentHeadRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         department = self.request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         context['department'] = department
         context['current_session'] = current_session
@@ -3355,7 +3364,7 @@ class DepartmentSubjectsView(DepartmentHeadRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         department = self.request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Add assignment information for current session
         for subject in context['subjects']:
@@ -3382,7 +3391,7 @@ class DepartmentBudgetView(DepartmentHeadRequiredMixin, ListView):
 
     def get_queryset(self):
         department = self.request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         if current_session:
             return department.budgets.filter(academic_session=current_session)
@@ -3391,7 +3400,7 @@ class DepartmentBudgetView(DepartmentHeadRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         department = self.request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Budget summary
         budget_items = context['budget_items']
@@ -3415,7 +3424,7 @@ class DepartmentReportsView(DepartmentHeadRequiredMixin, View):
 
     def get(self, request):
         department = request.user.teacher_profile.department
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Performance report data
         performance_data = self._get_performance_report(department, current_session)
@@ -3568,7 +3577,7 @@ class CounselorDashboardView(CounselorRequiredMixin, View):
 
     def get(self, request):
         counselor = request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Counseling statistics
         counseling_stats = self._get_counseling_stats(counselor, current_session)
@@ -3904,7 +3913,7 @@ class BehaviorRecordsView(CounselorRequiredMixin, ListView):
 
     def get_queryset(self):
         counselor = self.request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         queryset = BehaviorRecord.objects.filter(
             status='active'
@@ -3949,7 +3958,7 @@ class AcademicWarningsView(CounselorRequiredMixin, ListView):
 
     def get_queryset(self):
         counselor = self.request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         queryset = AcademicWarning.objects.filter(
             status='active'
@@ -4006,7 +4015,7 @@ class CommitteeDashboardView(CommitteeRequiredMixin, View):
 
     def get(self, request):
         user = request.user
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Get committees where user is a member
         committees = AcademicPlanningCommittee.objects.filter(
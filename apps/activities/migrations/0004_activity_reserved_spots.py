@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_reserved_spots(apps, schema_editor):
+    Activity = apps.get_model('activities', 'Activity')
+    counts = Activity.objects.annotate(
+        holding=Count('enrollments', filter=Q(
+            enrollments__status__in=['pending', 'active'],
+            enrollments__is_deleted=False,
+        ))
+    ).filter(holding__gt=0).values_list('pk', 'holding')
+    for pk, holding in counts:
+        Activity.objects.filter(pk=pk).update(reserved_spots=holding)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='reserved_spots',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Pending and active enrollments holding a spot (maintained automatically)', verbose_name='reserved spots'),
+        ),
+        migrations.RunPython(backfill_reserved_spots, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 # apps/activities/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -91,6 +91,12 @@ class Activity(CoreBaseModel):
     )
     max_participants = models.PositiveIntegerField(_('maximum participants'), null=True, blank=True)
     min_participants = models.PositiveIntegerField(_('minimum participants'), default=1)
+    reserved_spots = models.PositiveIntegerField(
+        _('reserved spots'),
+        default=0,
+        editable=False,
+        help_text=_('Pending and active enrollments holding a spot (maintained automatically)')
+    )
 
     # Scheduling
     start_date = models.DateField(_('start date'))
@@ -168,20 +174,20 @@ class Activity(CoreBaseModel):
 
     @property
     def current_participants(self):
-        """Return current number of enrolled participants."""
-        return self.enrollments.filter(status='active').count()
+        """Return current number of participants holding a spot."""
+        return self.reserved_spots
 
     @property
     def available_spots(self):
         """Return number of available spots."""
         if not self.max_participants:
             return None
-        return max(0, self.max_participants - self.current_participants)
+        return max(0, self.max_participants - self.reserved_spots)
 
     @property
     def is_full(self):
         """Check if activity is at capacity."""
-        return self.max_participants and self.current_participants >= self.max_participants
+        return bool(self.max_participants) and self.reserved_spots >= self.max_participants
 
     @property
     def is_registration_open(self):
@@ -267,6 +273,33 @@ class ActivityEnrollment(CoreBaseModel):
     def __str__(self):
         return f"{self.student} - {self.activity}"
 
+    def save(self, *args, **kwargs):
+        """
+        Reserve or release a spot on the activity when the enrollment starts
+        or stops holding one. An enrollment that cannot get a spot is
+        waitlisted instead.
+        """
+        from .services import EnrollmentService, holds_spot
+
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = ActivityEnrollment.all_objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('status', 'is_deleted', 'activity_id').first()
+            held = previous is not None and holds_spot(previous[0], previous[1])
+            holds = holds_spot(self.status, self.is_deleted)
+
+            if held and previous[2] != self.activity_id:
+                # Moved to another activity: give the old spot back first
+                EnrollmentService.release_spot(previous[2])
+                held = False
+            if holds and not held and not EnrollmentService.reserve_spot(self.activity_id):
+                self.status = self.EnrollmentStatus.WAITLISTED
+            super().save(*args, **kwargs)
+            if held and not holds:
+                EnrollmentService.release_spot(self.activity_id)
+
     @property
     def attendance_percentage(self):
         """Calculate attendance percentage."""
@@ -802,3 +835,17 @@ class ActivityAchievement(CoreBaseModel):
 
     def __str__(self):
         return f"{self.enrollment.student} - {self.title}"
+
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_delete, sender=ActivityEnrollment)
+def release_activity_spot(sender, instance, **kwargs):
+    """
+    Give the spot back (and promote the waitlist) when an enrollment holding one is deleted.
+    """
+    from .services import EnrollmentService, holds_spot
+    if holds_spot(instance.status, instance.is_deleted):
+        EnrollmentService.release_spot(instance.activity_id)
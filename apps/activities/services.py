@@ -0,0 +1,168 @@
+"""
+Enrollment services for the activities app.
+
+Capacity is tracked by ``Activity.reserved_spots``. A spot is taken with a
+single conditional UPDATE (``reserved_spots < max_participants``), so
+concurrent enrollments can never push an activity past its capacity.
+Enrollments that do not get a spot are waitlisted and promoted in order as
+spots are released.
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+
+from .models import Activity, ActivityEnrollment
+
+logger = logging.getLogger(__name__)
+
+SPOT_STATUSES = (
+    ActivityEnrollment.EnrollmentStatus.PENDING,
+    ActivityEnrollment.EnrollmentStatus.ACTIVE,
+)
+
+
+def holds_spot(status, is_deleted=False):
+    """Whether an enrollment in this state occupies a spot."""
+    return status in SPOT_STATUSES and not is_deleted
+
+
+class EnrollmentService:
+    """
+    Reserves activity spots and manages the waitlist.
+    """
+
+    @staticmethod
+    def reserve_spot(activity_id):
+        """
+        Atomically take a spot on the activity.
+
+        Returns False when the activity is full. Activities without a
+        maximum have unlimited spots.
+        """
+        updated = Activity.objects.filter(pk=activity_id).filter(
+            Q(max_participants__isnull=True) |
+            Q(max_participants=0) |
+            Q(reserved_spots__lt=F('max_participants'))
+        ).update(reserved_spots=F('reserved_spots') + 1)
+        return updated == 1
+
+    @classmethod
+    def release_spot(cls, activity_id, promote=True):
+        """Give a spot back and, by default, promote the next waitlisted student."""
+        Activity.objects.filter(pk=activity_id, reserved_spots__gt=0).update(
+            reserved_spots=F('reserved_spots') - 1
+        )
+        if promote:
+            cls.promote_waitlist(activity_id)
+
+    @staticmethod
+    def promote_waitlist(activity_id):
+        """
+        Move waitlisted enrollments to pending, oldest first, while spots remain.
+
+        Returns the promoted enrollments.
+        """
+        promoted = []
+        with transaction.atomic():
+            while True:
+                candidate = ActivityEnrollment.objects.select_for_update().filter(
+                    activity_id=activity_id,
+                    status=ActivityEnrollment.EnrollmentStatus.WAITLISTED,
+                    is_deleted=False,
+                ).order_by('created_at').first()
+                if candidate is None:
+                    break
+                candidate.status = ActivityEnrollment.EnrollmentStatus.PENDING
+                candidate.save()
+                if candidate.status == ActivityEnrollment.EnrollmentStatus.WAITLISTED:
+                    # No spot was free after all
+                    break
+                promoted.append(candidate)
+        if promoted:
+            logger.info(f"Promoted {len(promoted)} waitlisted enrollment(s) for activity {activity_id}")
+        return promoted
+
+    @staticmethod
+    def enroll(student, activity, **details):
+        """
+        Enroll a student, reserving a spot or joining the waitlist.
+
+        Idempotent: repeating the request returns the existing enrollment
+        unchanged. A cancelled enrollment is reactivated. Returns
+        ``(enrollment, created)``.
+        """
+        existing = ActivityEnrollment.all_objects.filter(student=student, activity=activity).first()
+        if existing is not None and existing.status != ActivityEnrollment.EnrollmentStatus.CANCELLED \
+                and not existing.is_deleted:
+            return existing, False
+
+        if existing is not None:
+            existing.status = ActivityEnrollment.EnrollmentStatus.PENDING
+            existing.is_deleted = False
+            existing.deleted_at = None
+            for field, value in details.items():
+                setattr(existing, field, value)
+            existing.save()
+            return existing, False
+
+        try:
+            with transaction.atomic():
+                enrollment = ActivityEnrollment(
+                    student=student,
+                    activity=activity,
+                    status=ActivityEnrollment.EnrollmentStatus.PENDING,
+                    **details
+                )
+                enrollment.save()
+        except IntegrityError:
+            # A concurrent duplicate request won the insert; the spot it
+            # reserved inside the rolled-back savepoint was rolled back too
+            return ActivityEnrollment.objects.get(student=student, activity=activity), False
+        return enrollment, True
+
+    @staticmethod
+    def unenroll(enrollment):
+        """
+        Cancel an enrollment. If it held a spot, the next waitlisted student is promoted.
+        """
+        enrollment.status = ActivityEnrollment.EnrollmentStatus.CANCELLED
+        enrollment.save()
+        return enrollment
+
+    @staticmethod
+    def recount(activities=None):
+        """
+        Recompute ``reserved_spots`` from enrollments (reconciliation).
+
+        Returns the number of activities corrected.
+        """
+        queryset = Activity.objects.all() if activities is None else Activity.objects.filter(pk__in=activities)
+        actual = queryset.annotate(
+            actual=Count('enrollments', filter=Q(
+                enrollments__status__in=SPOT_STATUSES,
+                enrollments__is_deleted=False,
+            ))
+        ).values_list('pk', 'reserved_spots', 'actual')
+        corrected = 0
+        for pk, reserved, count in actual:
+            if reserved != count:
+                Activity.objects.filter(pk=pk).update(reserved_spots=count)
+                corrected += 1
+        return corrected
+
+
+def annotate_for_student(queryset, student):
+    """
+    Annotate an Activity queryset with the student's enrollment state
+    (``is_enrolled`` and ``enrollment_status``) so list pages need no
+    per-activity queries.
+    """
+    enrollments = ActivityEnrollment.objects.filter(
+        activity=OuterRef('pk'), student=student, is_deleted=False
+    )
+    return queryset.annotate(
+        is_enrolled=Exists(enrollments.filter(status__in=SPOT_STATUSES)),
+        enrollment_status=Subquery(enrollments.values('status')[:1]),
+    )
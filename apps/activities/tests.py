@@ -0,0 +1,159 @@
+# apps/activities/tests.py
+
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+
+from apps.academics.models import AcademicSession, Student
+from apps.core.models import Institution
+from .models import ActivityCategory, Activity
+from .services import EnrollmentService
+
+User = get_user_model()
+
+
+def create_students(count, prefix='S'):
+    students = []
+    for i in range(count):
+        user = User.objects.create_user(
+            username=f'{prefix.lower()}{i}',
+            email=f'{prefix.lower()}{i}@example.com',
+            password='testpass123'
+        )
+        students.append(Student.objects.create(
+            user=user,
+            student_id=f'{prefix}{i:04d}',
+            admission_number=f'{prefix}{i:04d}',
+            admission_date=date(2024, 1, 1),
+            date_of_birth=date(2010, 1, 1)
+        ))
+    return students
+
+
+def create_activity(max_participants):
+    Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+    session = AcademicSession.objects.create(
+        name='2024/2025',
+        start_date=date(2024, 9, 1),
+        end_date=date(2025, 7, 31),
+        is_current=True
+    )
+    category = ActivityCategory.objects.create(name='Clubs', category_type='clubs')
+    return Activity.objects.create(
+        title='Chess Club',
+        description='Weekly chess',
+        category=category,
+        max_participants=max_participants,
+        start_date=date.today() + timedelta(days=30),
+        academic_session=session
+    )
+
+
+class EnrollmentReservationTestCase(TestCase):
+    """Test cases for spot reservation and the waitlist"""
+
+    def setUp(self):
+        self.activity = create_activity(max_participants=2)
+        self.students = create_students(4)
+
+    def holding_count(self):
+        return self.activity.enrollments.filter(
+            status__in=['pending', 'active'], is_deleted=False
+        ).count()
+
+    def test_enroll_until_full_then_waitlist(self):
+        statuses = [EnrollmentService.enroll(s, self.activity)[0].status for s in self.students]
+
+        self.assertEqual(statuses, ['pending', 'pending', 'waitlisted', 'waitlisted'])
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.reserved_spots, 2)
+        self.assertTrue(self.activity.is_full)
+
+    def test_enroll_is_idempotent(self):
+        first, created = EnrollmentService.enroll(self.students[0], self.activity)
+        again, created_again = EnrollmentService.enroll(self.students[0], self.activity)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, again.pk)
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.reserved_spots, 1)
+
+    def test_unenroll_promotes_oldest_waitlisted(self):
+        enrollments = [EnrollmentService.enroll(s, self.activity)[0] for s in self.students]
+
+        EnrollmentService.unenroll(enrollments[0])
+
+        statuses = dict(self.activity.enrollments.values_list('student_id', 'status'))
+        self.assertEqual(statuses[self.students[0].pk], 'cancelled')
+        self.assertEqual(statuses[self.students[2].pk], 'pending')
+        self.assertEqual(statuses[self.students[3].pk], 'waitlisted')
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.reserved_spots, 2)
+
+    def test_status_change_cannot_exceed_capacity(self):
+        enrollments = [EnrollmentService.enroll(s, self.activity)[0] for s in self.students]
+
+        waitlisted = enrollments[3]
+        waitlisted.status = 'active'
+        waitlisted.save()
+
+        self.assertEqual(waitlisted.status, 'waitlisted')
+        self.assertEqual(self.holding_count(), 2)
+
+    def test_soft_delete_releases_spot(self):
+        enrollments = [EnrollmentService.enroll(s, self.activity)[0] for s in self.students[:3]]
+
+        enrollments[1].delete()
+
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.reserved_spots, 2)
+        self.assertEqual(self.holding_count(), 2)
+        self.assertEqual(EnrollmentService.recount([self.activity.pk]), 0)
+
+
+class ConcurrentEnrollmentTestCase(TransactionTestCase):
+    """Simultaneous enrollments must never exceed capacity"""
+
+    CAPACITY = 25
+    STUDENTS = 200
+
+    def setUp(self):
+        self.activity = create_activity(max_participants=self.CAPACITY)
+        self.students = create_students(self.STUDENTS)
+
+    def test_simultaneous_enrollments_never_exceed_capacity(self):
+        barrier = threading.Barrier(len(self.students))
+        errors = []
+
+        def enroll(student):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        EnrollmentService.enroll(student, self.activity)
+                        return
+                    except OperationalError:
+                        # SQLite serialises writers; retry when the database is locked
+                        time.sleep(0.01 * (attempt + 1))
+                errors.append(student.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=enroll, args=(s,)) for s in self.students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.activity.refresh_from_db()
+        holding = self.activity.enrollments.filter(status__in=['pending', 'active']).count()
+        waitlisted = self.activity.enrollments.filter(status='waitlisted').count()
+        self.assertEqual(holding, self.CAPACITY)
+        self.assertEqual(self.activity.reserved_spots, self.CAPACITY)
+        self.assertEqual(waitlisted, self.STUDENTS - self.CAPACITY)
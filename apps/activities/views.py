@@ -25,6 +25,7 @@ from .forms import (
     EquipmentForm, ActivityBudgetForm, ActivityAttendanceForm,
     ActivityAttendanceBulkForm, ActivityAchievementForm, ActivitySearchForm
 )
+from .services import EnrollmentService, annotate_for_student
 
 
 class ActivityCoordinatorRequiredMixin(UserPassesTestMixin):
@@ -46,7 +47,12 @@ class ActivityListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         queryset = Activity.objects.select_related(
             'category', 'coordinator', 'academic_session'
-        ).prefetch_related('enrollments')
+        )
+
+        # Enrollment state comes from annotations and participant counts from
+        # Activity.reserved_spots, so rendering needs no per-activity queries
+        if hasattr(self.request.user, 'student_profile'):
+            queryset = annotate_for_student(queryset, self.request.user.student_profile)
 
         # Apply search and filters
         search_form = ActivitySearchForm(self.request.GET)
@@ -91,19 +97,6 @@ class ActivityListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['search_form'] = ActivitySearchForm(self.request.GET)
         context['categories'] = ActivityCategory.objects.filter(is_active=True)
-
-        # Add enrollment status for each activity if user is a student
-        if hasattr(self.request.user, 'student_profile'):
-            student = self.request.user.student_profile
-            enrolled_activity_ids = set(
-                ActivityEnrollment.objects.filter(
-                    student=student,
-                    status__in=['active', 'pending']
-                ).values_list('activity_id', flat=True)
-            )
-            for activity in context['activities']:
-                activity.is_enrolled = activity.id in enrolled_activity_ids
-
         return context
 
 
@@ -188,9 +181,13 @@ def activity_enroll(request, pk):
 
     if existing_enrollment:
         if existing_enrollment.status == 'cancelled':
-            existing_enrollment.status = 'pending'
-            existing_enrollment.save()
-            messages.success(request, _('Your enrollment request has been reactivated.'))
+            enrollment, _created = EnrollmentService.enroll(student, activity)
+            if enrollment.status == 'waitlisted':
+                messages.warning(request, _('This activity is full. You have been added to the waitlist.'))
+            else:
+                messages.success(request, _('Your enrollment request has been reactivated.'))
+        elif existing_enrollment.status == 'waitlisted':
+            messages.info(request, _('You are already on the waitlist for this activity.'))
         else:
             messages.info(request, _('You are already enrolled in this activity.'))
         return redirect('activities:activity_detail', pk=pk)
@@ -198,11 +195,11 @@ def activity_enroll(request, pk):
     if request.method == 'POST':
         form = StudentActivityEnrollmentForm(request.POST)
         if form.is_valid():
-            enrollment = form.save(commit=False)
-            enrollment.student = student
-            enrollment.activity = activity
-            enrollment.save()
-            messages.success(request, _('Successfully enrolled in the activity.'))
+            enrollment, _created = EnrollmentService.enroll(student, activity, **form.cleaned_data)
+            if enrollment.status == 'waitlisted':
+                messages.warning(request, _('This activity is full. You have been added to the waitlist.'))
+            else:
+                messages.success(request, _('Successfully enrolled in the activity.'))
             return redirect('activities:my_activities')
     else:
         form = StudentActivityEnrollmentForm()
@@ -226,12 +223,11 @@ def activity_unenroll(request, pk):
         ActivityEnrollment,
         student=request.user.student_profile,
         activity=activity,
-        status__in=['active', 'pending']
+        status__in=['active', 'pending', 'waitlisted']
     )
 
     if request.method == 'POST':
-        enrollment.status = 'cancelled'
-        enrollment.save()
+        EnrollmentService.unenroll(enrollment)
         messages.success(request, _('Successfully unenrolled from the activity.'))
         return redirect('activities:my_activities')
 
@@ -308,6 +304,15 @@ def update_enrollment_status(request, pk):
     enrollment.status = new_status
     enrollment.save()
 
+    # Saving may waitlist the enrollment instead if the activity is full
+    if enrollment.status != new_status:
+        return JsonResponse({
+            'success': False,
+            'error': 'Activity is full; enrollment was waitlisted',
+            'status': enrollment.get_status_display(),
+            'status_class': enrollment.status
+        })
+
     return JsonResponse({
         'success': True,
         'status': enrollment.get_status_display(),
@@ -0,0 +1,115 @@
+"""
+Report card PDFs.
+
+:func:`report_card_documents` turns report cards into renderable documents
+with a fixed number of queries however many cards there are, so a whole class
+(or school) can be rendered in one batch with
+:class:`~apps.core.documents.DocumentRenderer`.
+"""
+
+from typing import Dict, List
+
+from django.db.models import Prefetch
+
+from apps.core.documents import Document, DocumentTemplate
+
+from .models import ReportCard, ResultSubject
+
+TEMPLATE = 'apps.assessment.documents.ReportCardTemplate'
+
+
+class ReportCardTemplate(DocumentTemplate):
+    """Single-page report card: student details, subject table and remarks."""
+
+    name = 'report_card'
+    version = 1
+    title = 'Report Card'
+
+    def draw(self, payload: Dict):
+        self.heading(payload['institution'], 'Report Card', f"{payload['exam_type']} - {payload['session']}")
+        self.fields([
+            ('Student', payload['student_name']),
+            ('Student ID', payload['student_id']),
+            ('Class', payload['class_name']),
+            ('Position', payload['position']),
+            ('Attendance', payload['attendance']),
+            ('Promoted', 'Yes' if payload['is_promoted'] else 'No'),
+        ])
+        self.table(
+            ['Subject', 'Marks', 'Out of', '%', 'Grade'],
+            payload['subjects'],
+            [0.44, 0.14, 0.14, 0.14, 0.14],
+        )
+        self.fields([
+            ('Total', f"{payload['marks_obtained']} / {payload['total_marks']}"),
+            ('Average', f"{payload['percentage']}%"),
+            ('Overall grade', payload['grade']),
+        ])
+        self.paragraph('Remarks', payload['remarks'])
+        self.paragraph("Teacher's comments", payload['comments'])
+        self.footer(payload['approval'])
+
+
+def report_card_documents(report_cards) -> List[Document]:
+    """
+    Build report card documents in a fixed number of queries.
+
+    Args:
+        report_cards: ReportCard queryset, in the order to bundle them
+
+    Returns:
+        Documents for :class:`~apps.core.documents.DocumentRenderer`
+    """
+    report_cards = report_cards.select_related(
+        'student__user', 'academic_class__academic_session', 'exam_type', 'institution',
+        'result__grade', 'approved_by__user',
+    ).prefetch_related(
+        Prefetch(
+            'result__subject_marks',
+            queryset=ResultSubject.objects.select_related('subject', 'grade').order_by('subject__name'),
+        )
+    )
+    documents = []
+    for report_card in report_cards:
+        result = report_card.result
+        student = report_card.student
+        approval = 'Pending approval'
+        if report_card.is_approved:
+            approver = report_card.approved_by.user.get_full_name() if report_card.approved_by else ''
+            approved_on = report_card.approved_at.date().isoformat() if report_card.approved_at else ''
+            approval = f"Approved {approved_on} {approver}".strip()
+        documents.append(Document(
+            template=TEMPLATE,
+            payload={
+                'institution': report_card.institution.name,
+                'exam_type': report_card.exam_type.name,
+                'session': report_card.academic_class.academic_session.name,
+                'student_name': student.user.get_full_name() or student.user.username,
+                'student_id': student.student_id,
+                'class_name': report_card.academic_class.name,
+                'position': f"{result.rank} of {result.total_students}" if result.rank else '-',
+                'attendance': f"{result.attendance_percentage}%",
+                'is_promoted': result.is_promoted,
+                'subjects': [
+                    [
+                        mark.subject.name, str(mark.marks_obtained), str(mark.max_marks),
+                        str(mark.percentage), mark.grade.grade if mark.grade else '-',
+                    ]
+                    for mark in result.subject_marks.all()
+                ],
+                'marks_obtained': str(result.marks_obtained),
+                'total_marks': str(result.total_marks),
+                'percentage': str(result.percentage),
+                'grade': result.grade.grade if result.grade else '-',
+                'remarks': result.remarks,
+                'comments': report_card.comments,
+                'approval': approval,
+            },
+            filename=f"{student.student_id}-{report_card.exam_type.code}.pdf".replace('/', '-'),
+        ))
+    return documents
+
+
+def report_card_document(report_card: ReportCard) -> Document:
+    """Document for a single report card."""
+    return report_card_documents(ReportCard.objects.filter(pk=report_card.pk))[0]
@@ -0,0 +1,72 @@
+"""
+Management command to render a class's report cards into one bundle.
+
+Renders every report card of a class (optionally one exam type) to PDF in a
+process pool, reusing unchanged cards from the document cache, and bundles
+them into a ZIP archive or a single merged PDF in default storage. Progress
+is recorded on a DocumentBatch.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academics.models import Class
+from apps.assessment.documents import report_card_documents
+from apps.assessment.models import ReportCard
+from apps.core.documents import DocumentRenderer
+from apps.core.models import DocumentBatch
+
+
+class Command(BaseCommand):
+    help = 'Render report cards for a class into a ZIP archive or merged PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'class_code',
+            help='Code of the class to render',
+        )
+        parser.add_argument(
+            '--exam-type',
+            help='Only render report cards for this exam type code',
+        )
+        parser.add_argument(
+            '--format',
+            choices=DocumentBatch.OutputFormat.values,
+            default=DocumentBatch.OutputFormat.ZIP,
+            help='Bundle format (default: zip)',
+        )
+        parser.add_argument(
+            '--approved-only',
+            action='store_true',
+            help='Skip report cards that have not been approved',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Rendering processes (default: DOCUMENT_RENDER_WORKERS or the CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            academic_class = Class.objects.get(code=options['class_code'])
+        except Class.DoesNotExist:
+            raise CommandError(f"Class {options['class_code']} does not exist")
+
+        report_cards = ReportCard.objects.filter(academic_class=academic_class, is_deleted=False)
+        if options['exam_type']:
+            report_cards = report_cards.filter(exam_type__code=options['exam_type'])
+        if options['approved_only']:
+            report_cards = report_cards.filter(is_approved=True)
+        documents = report_card_documents(report_cards.order_by('student__student_id', 'exam_type__order'))
+        if not documents:
+            raise CommandError('No report cards to render')
+
+        batch = DocumentBatch.objects.create(
+            name=f"report-cards-{academic_class.code}",
+            document_type='report_card',
+            output_format=options['format'],
+            institution=academic_class.institution,
+        )
+        batch = DocumentRenderer.run_batch(batch, documents, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {batch.total} report card(s) ({batch.cached} from cache) into {batch.output.name}'
+        ))
@@ -1383,7 +1383,7 @@ def notify_parents_result_created(sender, instance, created, **kwargs):
 def notify_parents_report_card(sender, instance, created, **kwargs):
     """Notify parents when a report card is generated or approved."""
     if created or (instance.is_approved and not instance.approved_at):
-        from apps.notification.views import create_notification
+        from apps.communication.views import create_notification
         from apps.academics.models import StudentParentRelationship
 
         student = instance.student
@@ -1413,7 +1413,7 @@ def notify_parents_report_card(sender, instance, created, **kwargs):
 def notify_parents_low_grades(sender, instance, created, **kwargs):
     """Notify parents when student receives low grades."""
     if created and instance.percentage < 50:  # Notify for grades below 50%
-        from apps.notification.views import create_notification
+        from apps.communication.views import create_notification
         from apps.academics.models import StudentParentRelationship
 
         student = instance.student
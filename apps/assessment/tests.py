@@ -0,0 +1,139 @@
+# apps/assessment/tests.py
+
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.academics.models import AcademicSession, Class, Department, GradeLevel, Student, Subject
+from apps.core.documents import DocumentRenderer
+from apps.core.models import DocumentBatch, Institution
+from .documents import report_card_document, report_card_documents
+from .models import ExamType, Grade, GradingSystem, ReportCard, Result, ResultSubject
+
+User = get_user_model()
+
+
+class ReportCardRenderingTestCase(TestCase):
+    """Test cases for report card PDF rendering"""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media, DOCUMENT_RENDER_WORKERS=1)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        session = AcademicSession.objects.create(
+            name='2024/2025',
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31),
+            is_current=True
+        )
+        self.academic_class = Class.objects.create(
+            name='JSS 1A',
+            code='JSS1A',
+            grade_level=GradeLevel.objects.create(name='JSS 1', code='JSS1', education_stage='middle_school'),
+            academic_session=session,
+        )
+        department = Department.objects.create(name='Sciences', code='SCI')
+        self.subjects = [
+            Subject.objects.create(name=name, code=name[:4].upper(), department=department)
+            for name in ('Mathematics', 'English', 'Biology')
+        ]
+        self.exam_type = ExamType.objects.create(name='First Term', code='T1', weightage=Decimal('100'))
+        grading = GradingSystem.objects.create(name='Standard', code='STD')
+        self.grade = Grade.objects.create(
+            grading_system=grading, grade='A', description='Excellent',
+            min_mark=Decimal('70'), max_mark=Decimal('100'), grade_point=Decimal('4'),
+        )
+
+    def create_report_card(self, number):
+        user = User.objects.create_user(
+            username=f'student{number}', email=f'student{number}@example.com',
+            password='testpass123', first_name='Student', last_name=str(number),
+        )
+        student = Student.objects.create(
+            user=user,
+            student_id=f'S{number:04d}',
+            admission_number=f'S{number:04d}',
+            admission_date=date(2024, 1, 1),
+            date_of_birth=date(2010, 1, 1)
+        )
+        result = Result.objects.create(
+            student=student, academic_class=self.academic_class, exam_type=self.exam_type,
+            total_marks=Decimal('300'), marks_obtained=Decimal('240'), grade=self.grade,
+            rank=number, total_students=30, attendance_percentage=Decimal('96'),
+            remarks='A steady term.',
+        )
+        for subject in self.subjects:
+            ResultSubject.objects.create(
+                result=result, subject=subject, marks_obtained=Decimal('80'),
+                max_marks=Decimal('100'), grade=self.grade,
+            )
+        return ReportCard.objects.create(
+            student=student, academic_class=self.academic_class, exam_type=self.exam_type, result=result,
+        )
+
+    def test_documents_take_a_fixed_number_of_queries(self):
+        self.create_report_card(1)
+        with self.assertNumQueries(2):
+            documents = report_card_documents(ReportCard.objects.all())
+        self.assertEqual(len(documents[0].payload['subjects']), 3)
+
+        for number in range(2, 6):
+            self.create_report_card(number)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(report_card_documents(ReportCard.objects.all())), 5)
+
+    def test_output_is_cached_by_content(self):
+        report_card = self.create_report_card(1)
+        document = report_card_document(report_card)
+        content = DocumentRenderer.render(document)
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertTrue(default_storage.exists(DocumentRenderer.cache_path(document)))
+        self.assertEqual(DocumentRenderer.cache_path(report_card_document(report_card)),
+                         DocumentRenderer.cache_path(document))
+
+        report_card.result.remarks = 'Much improved.'
+        report_card.result.save()
+        self.assertNotEqual(DocumentRenderer.cache_path(report_card_document(report_card)),
+                            DocumentRenderer.cache_path(document))
+
+    def test_class_batch_bundles(self):
+        from pypdf import PdfReader
+
+        for number in range(1, 4):
+            self.create_report_card(number)
+
+        call_command('render_report_cards', 'JSS1A', stdout=StringIO())
+        batch = DocumentBatch.objects.get()
+        self.assertEqual((batch.state, batch.total, batch.completed, batch.cached), ('done', 3, 3, 0))
+        with default_storage.open(batch.output.name) as output:
+            self.assertEqual(len(zipfile.ZipFile(output).namelist()), 3)
+
+        call_command('render_report_cards', 'JSS1A', '--format', 'pdf', stdout=StringIO())
+        batch = DocumentBatch.objects.filter(output_format='pdf').get()
+        self.assertEqual(batch.cached, 3)
+        with default_storage.open(batch.output.name) as output:
+            self.assertEqual(len(PdfReader(BytesIO(output.read())).pages), 3)
+
+    def test_pdf_view(self):
+        report_card = self.create_report_card(1)
+        self.client.force_login(report_card.student.user)
+        response = self.client.get(reverse('assessment:reportcard_pdf', kwargs={'pk': report_card.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        other = self.create_report_card(2)
+        response = self.client.get(reverse('assessment:reportcard_pdf', kwargs={'pk': other.pk}))
+        self.assertEqual(response.status_code, 403)
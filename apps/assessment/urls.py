@@ -27,6 +27,7 @@ urlpatterns = [
     # Report Card URLs
     path('report-cards/', views.ReportCardListView.as_view(), name='reportcard_list'),
     path('report-cards/<uuid:pk>/', views.ReportCardDetailView.as_view(), name='reportcard_detail'),
+    path('report-cards/<uuid:pk>/pdf/', views.ReportCardPDFView.as_view(), name='reportcard_pdf'),
     path('results/<uuid:result_id>/generate-report/', views.generate_report_card, name='generate_report_card'),
     path('report-cards/<uuid:reportcard_id>/approve/', views.approve_report_card, name='approve_report_card'),
 
@@ -26,6 +26,8 @@ from .forms import (
     QuestionBankForm, QuestionForm, ExamCompositionForm, ExamForm
 )
 from apps.academics.models import Student, Teacher, Class, Subject
+from apps.core.documents import DocumentRenderer
+from .documents import report_card_document
 from apps.users.models import User
 
 
@@ -633,7 +635,7 @@ class AssignmentCreateView(LoginRequiredMixin, TeacherRequiredMixin, CreateView)
     def get_current_academic_session(self):
         """Get current academic session."""
         from apps.academics.models import AcademicSession
-        return AcademicSession.objects.filter(is_current=True).first()
+        return AcademicSession.current()
 
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
@@ -974,6 +976,17 @@ class ReportCardDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
+class ReportCardPDFView(ReportCardDetailView):
+    """Download a report card as PDF (same access rules as the detail view)."""
+
+    def get(self, request, *args, **kwargs):
+        report_card = self.get_object()
+        document = report_card_document(report_card)
+        response = HttpResponse(DocumentRenderer.render(document), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{document.filename}"'
+        return response
+
+
 @login_required
 @user_passes_test(is_teacher)
 def generate_report_card(request, result_id):
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_live_partial_indexes'),
+        ('attendance', '0003_initial'),
+        ('core', '0004_document_batch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyattendance',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-date', 'student'], name='dailyattendance_live_idx'),
+        ),
+    ]
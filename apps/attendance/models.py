@@ -8,7 +8,7 @@ from django.utils.translation import gettext_lazy as _
 
 from datetime import datetime
 
-from apps.core.models import CoreBaseModel
+from apps.core.models import NOT_DELETED, CoreBaseModel
 
 
 class AttendanceConfig(CoreBaseModel):
@@ -168,6 +168,12 @@ class DailyAttendance(CoreBaseModel):
             models.Index(fields=['date', 'status']),
             models.Index(fields=['student', 'date']),
             models.Index(fields=['status', 'date']),
+            # Registers and reports list the rows the default manager returns
+            models.Index(
+                fields=['-date', 'student'],
+                condition=NOT_DELETED,
+                name='dailyattendance_live_idx'
+            ),
         ]
 
     def __str__(self):
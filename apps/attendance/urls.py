@@ -44,7 +44,7 @@ urlpatterns = [
     path('bulk/', 
          views.BulkAttendanceView.as_view(), 
          name='bulk_class_select'),
-    path('bulk/<int:class_id>/', 
+    path('bulk/<uuid:class_id>/', 
          views.BulkAttendanceView.as_view(), 
          name='bulk_mark'),
     
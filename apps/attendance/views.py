@@ -73,7 +73,7 @@ class AttendanceConfigUpdateView(UpdateView):
     
     def get_object(self):
         # Get or create config for current academic session
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if current_session:
             obj, created = AttendanceConfig.objects.get_or_create(
                 academic_session=current_session,
@@ -92,7 +92,7 @@ class AttendanceConfigUpdateView(UpdateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['current_session'] = AcademicSession.objects.filter(is_current=True).first()
+        context['current_session'] = AcademicSession.current()
         return context
 
 
@@ -114,7 +114,7 @@ class AttendanceSessionListView(ListView):
         if academic_session:
             queryset = queryset.filter(academic_session_id=academic_session)
         else:
-            current_session = AcademicSession.objects.filter(is_current=True).first()
+            current_session = AcademicSession.current()
             if current_session:
                 queryset = queryset.filter(academic_session=current_session)
         
@@ -123,7 +123,7 @@ class AttendanceSessionListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['academic_sessions'] = AcademicSession.objects.all()
-        context['current_session'] = AcademicSession.objects.filter(is_current=True).first()
+        context['current_session'] = AcademicSession.current()
         return context
 
 
@@ -138,7 +138,7 @@ class AttendanceSessionCreateView(CreateView):
     
     def get_initial(self):
         initial = super().get_initial()
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if current_session:
             initial['academic_session'] = current_session
         return initial
@@ -322,7 +322,7 @@ class StudentAttendanceView(AttendancePermissionMixin, DetailView):
         student = self.get_object()
         
         # Get attendance summary for current academic session
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if current_session:
             attendance_data = DailyAttendance.objects.filter(
                 student=student,
@@ -382,7 +382,7 @@ class BulkAttendanceView(TeacherRequiredMixin, View):
         
         if not date or not attendance_session_id:
             messages.error(request, "Please provide both date and attendance session.")
-            return redirect('bulk_mark', class_id=class_id)
+            return redirect('attendance:bulk_mark', class_id=class_id)
         
         attendance_session = get_object_or_404(AttendanceSession, pk=attendance_session_id)
         students = Student.objects.filter(
@@ -413,7 +413,7 @@ class BulkAttendanceView(TeacherRequiredMixin, View):
                 marked_count += 1
         
         messages.success(request, f"Successfully marked attendance for {marked_count} students.")
-        return redirect('bulk_mark', class_id=class_id)
+        return redirect('attendance:bulk_mark', class_id=class_id)
 
 
 # ==================== PERIOD ATTENDANCE VIEWS ====================
@@ -572,7 +572,7 @@ class AttendanceSummaryView(AttendancePermissionMixin, View):
         context = {}
         
         # Get current academic session
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if not current_session:
             messages.error(request, "No active academic session found.")
             return render(request, 'attendance/summary/summary.html', context)
@@ -672,7 +672,7 @@ def api_student_attendance(request, student_id):
         not request.user.is_staff):
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
     if not current_session:
         return JsonResponse({'error': 'No active session'}, status=404)
     
@@ -762,7 +762,7 @@ def attendance_dashboard(request):
     if hasattr(request.user, 'student_profile'):
         # Student dashboard
         student = request.user.student_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         if current_session:
             recent_attendances = DailyAttendance.objects.filter(
@@ -806,7 +806,7 @@ def attendance_dashboard(request):
     
     elif request.user.is_staff:
         # Admin dashboard
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         if current_session:
             today = timezone.now().date()
             today_attendances = DailyAttendance.objects.filter(
@@ -1084,7 +1084,7 @@ class TeacherAttendanceInterfaceView(TeacherRequiredMixin, View):
     
     def get(self, request):
         teacher = request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         # Get classes taught by this teacher
         classes = Class.objects.filter(
@@ -1375,7 +1375,7 @@ class TeacherAttendanceHistoryView(TeacherRequiredMixin, ListView):
     
     def get_queryset(self):
         teacher = self.request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         # Get classes taught by this teacher
         classes = Class.objects.filter(
@@ -1414,7 +1414,7 @@ class TeacherAttendanceHistoryView(TeacherRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         teacher = self.request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         
         # Get classes taught by this teacher
         classes = Class.objects.filter(
@@ -1438,7 +1438,7 @@ class AttendanceValidationView(TeacherRequiredMixin, View):
     
     def get(self, request):
         teacher = request.user.teacher_profile
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         today = timezone.now().date()
         
         # Get classes taught by this teacher
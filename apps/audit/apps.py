@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class AuditConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.audit'
+
+    def ready(self):
+        # Decide once whether this process audits; see apps.audit.switch
+        from django.db.models.signals import post_migrate
+
+        from . import switch
+
+        switch.configure()
+        post_migrate.connect(switch.refresh, sender=self, dispatch_uid='apps.audit.switch.refresh')
@@ -1,7 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-from apps.core.models import CoreBaseModel
+from apps.core.models import NOT_DELETED, CoreBaseModel
 
 
 
@@ -43,6 +43,12 @@ class AuditLog(CoreBaseModel):
             models.Index(fields=['user', 'timestamp']),
             models.Index(fields=['model_name', 'object_id']),
             models.Index(fields=['action', 'timestamp']),
+            # The audit trail lists undeleted entries, newest first
+            models.Index(
+                fields=['-timestamp'],
+                condition=NOT_DELETED,
+                name='auditlog_live_idx'
+            ),
         ]
 
     def __str__(self):
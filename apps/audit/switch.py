@@ -0,0 +1,82 @@
+"""
+Whether model saves and deletes are written to the audit log.
+
+The audit signal handlers run on every save and delete, so this check has
+to be cheap. The parts that cannot change while a process runs are worked
+out once, not per save:
+
+- whether the process is a migration command (``migrate``,
+  ``makemigrations``, ``showmigrations``) and whether ``AUDIT_LOG_ENABLED``
+  is set, when the audit app is ready;
+- whether the audit log table exists, on the first check and again after
+  every ``post_migrate`` (listing tables in ``AppConfig.ready()`` would hit
+  the database before it may be ready).
+
+On top of that, :func:`audit_disabled` switches logging off for the current
+thread or asyncio task only, for bulk jobs that should not write one audit
+row per object. Unlike disconnecting the signal handlers, it cannot turn
+logging off for requests served by other threads at the same time.
+
+Usage:
+    with audit_disabled():
+        for student in students:
+            student.save()
+"""
+
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+MIGRATION_COMMANDS = ('migrate', 'makemigrations', 'showmigrations')
+
+_state = {'process': True, 'table': None}
+_disabled = ContextVar('audit_disabled', default=False)
+
+
+def configure(argv=None):
+    """Decide whether this process audits at all; called from AuditConfig.ready()."""
+    argv = sys.argv if argv is None else argv
+    _state['process'] = (
+        getattr(settings, 'AUDIT_LOG_ENABLED', True)
+        and not any(command in argv for command in MIGRATION_COMMANDS)
+    )
+    _state['table'] = None
+
+
+def refresh(**kwargs):
+    """Check for the audit log table again; connected to ``post_migrate``."""
+    _state['table'] = None
+
+
+def _table_exists():
+    if _state['table'] is None:
+        from .models import AuditLog
+
+        try:
+            _state['table'] = AuditLog._meta.db_table in connection.introspection.table_names()
+        except DatabaseError:
+            return False
+    return _state['table']
+
+
+def is_enabled() -> bool:
+    """True if saves and deletes made in the current context are audited."""
+    return not _disabled.get() and _state['process'] and _table_exists()
+
+
+def set_enabled(enabled: bool):
+    """Turn auditing on or off for the current thread or task, until changed back."""
+    _disabled.set(not enabled)
+
+
+@contextmanager
+def audit_disabled():
+    """Don't audit saves and deletes made in the current thread or task inside the block."""
+    token = _disabled.set(True)
+    try:
+        yield
+    finally:
+        _disabled.reset(token)
@@ -0,0 +1,66 @@
+# apps/audit/tests.py
+
+import threading
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.middleware import set_current_institution
+from apps.core.models import Institution, SystemConfig
+from . import switch
+from . import views  # noqa: F401 (connects the audit signal handlers)
+from .models import AuditLog
+from .switch import audit_disabled
+
+
+class AuditSwitchTestCase(TestCase):
+    """Test cases for the audit enablement switch"""
+
+    def setUp(self):
+        institution, _ = Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        set_current_institution(institution)
+        self.addCleanup(set_current_institution, None)
+        self.addCleanup(switch.configure)
+
+    def save_config(self, key):
+        SystemConfig.objects.create(key=key, value={'on': True})
+        return AuditLog.objects.filter(model_name='SystemConfig', details__new_values__key=key).exists()
+
+    def test_saves_are_audited(self):
+        self.assertTrue(self.save_config('audited'))
+
+    def test_audit_disabled_block(self):
+        with audit_disabled():
+            self.assertFalse(self.save_config('bulk'))
+            with audit_disabled():
+                pass
+            self.assertFalse(switch.is_enabled())
+        self.assertTrue(self.save_config('after'))
+
+    def test_disabled_only_in_current_thread(self):
+        seen = []
+        with audit_disabled():
+            thread = threading.Thread(target=lambda: seen.append(switch.is_enabled()))
+            thread.start()
+            thread.join()
+            self.assertFalse(switch.is_enabled())
+        self.assertEqual(seen, [True])
+
+    def test_save_does_not_list_tables(self):
+        self.save_config('warm')
+        with CaptureQueriesContext(connection) as context:
+            self.save_config('checked')
+        self.assertFalse([q for q in context.captured_queries if 'sqlite_master' in q['sql']])
+
+    def test_migration_commands_are_not_audited(self):
+        switch.configure(['manage.py', 'migrate'])
+        self.assertFalse(self.save_config('migrating'))
+        switch.configure(['manage.py', 'runserver'])
+        self.assertTrue(self.save_config('serving'))
+
+    def test_post_migrate_checks_table_again(self):
+        switch._state['table'] = False
+        self.assertFalse(switch.is_enabled())
+        switch.refresh()
+        self.assertTrue(switch.is_enabled())
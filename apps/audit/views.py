@@ -9,12 +9,12 @@ from django.core.paginator import Paginator
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.views import View
-from django.db import connection,ProgrammingError
-import sys
 
 from .models import AuditLog
 from apps.core.models import SystemConfig
-from apps.core.middleware import filter_queryset_by_institution
+from apps.core.context import RequestContextMiddleware, get_context
+from apps.core.middleware import filter_queryset_by_institution, get_current_institution
+from .switch import is_enabled, set_enabled
 
 
 class AuditLogListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -391,29 +391,12 @@ class AuditLogMixin:
 
 
 # Signal handler utilities
-def _is_migration_running():
-    """
-    Check if migrations are currently running
-    """
-    return 'migrate' in sys.argv or 'makemigrations' in sys.argv or 'showmigrations' in sys.argv
-
-def _audit_log_table_exists():
-    """
-    Check if the audit_auditlog table exists
-    """
-    try:
-        with connection.cursor() as cursor:
-            table_names = connection.introspection.table_names()
-            return 'audit_auditlog' in table_names
-    except (ProgrammingError, Exception):
-        return False
-
 def _can_create_audit_log():
     """
-    Check if it's safe to create audit logs
+    Check if it's safe to create audit logs. Cheap enough to run on every
+    save: see apps.audit.switch.
     """
-    from apps.core.middleware import get_current_institution
-    return not _is_migration_running() and _audit_log_table_exists() and get_current_institution() is not None
+    return is_enabled() and get_current_institution() is not None
 
 
 # Signal handlers for automatic audit logging
@@ -451,27 +434,23 @@ def log_model_save(sender, instance, created, **kwargs):
     
     action = 'create' if created else 'update'
     
-    # Get request from thread local if available
-    import threading
-    
-    request = None
-    thread_local = threading.current_thread()
-    if hasattr(thread_local, 'request'):
-        request = thread_local.request
+    # Who and where from, as set by RequestContextMiddleware
+    context = get_context()
     
     try:
         # Create audit log entry
         AuditLog.objects.create(
-            user=request.user if request and hasattr(request, 'user') and request.user.is_authenticated else None,
+            user=context.authenticated_user,
             action=action,
             model_name=sender.__name__,
             object_id=str(instance.pk),
             details={
                 'fields_changed': getattr(instance, '_changed_fields', []),
-                'new_values': _get_changed_field_values(instance) if not created else _get_all_field_values(instance)
+                'new_values': _get_changed_field_values(instance) if not created else _get_all_field_values(instance),
+                'request_id': context.request_id,
             },
-            ip_address=_get_client_ip(request) if request else None,
-            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else ''
+            ip_address=context.ip_address,
+            user_agent=context.user_agent
         )
     except Exception as e:
         # Log the error but don't break the application
@@ -503,24 +482,20 @@ def log_model_delete(sender, instance, **kwargs):
     if kwargs.get('raw', False):
         return
     
-    import threading
-    
-    request = None
-    thread_local = threading.current_thread()
-    if hasattr(thread_local, 'request'):
-        request = thread_local.request
+    context = get_context()
     
     try:
         AuditLog.objects.create(
-            user=request.user if request and hasattr(request, 'user') and request.user.is_authenticated else None,
+            user=context.authenticated_user,
             action='delete',
             model_name=sender.__name__,
             object_id=str(instance.pk),
             details={
-                'deleted_data': _get_all_field_values(instance)
+                'deleted_data': _get_all_field_values(instance),
+                'request_id': context.request_id,
             },
-            ip_address=_get_client_ip(request) if request else None,
-            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else ''
+            ip_address=context.ip_address,
+            user_agent=context.user_agent
         )
     except Exception as e:
         # Log the error but don't break the application
@@ -556,56 +531,27 @@ def _get_all_field_values(instance):
                 data[field.name] = '[Unable to serialize]'
     return data
 
-def _get_client_ip(request):
-    """
-    Extract client IP from request.
-    """
-    if not request:
-        return None
-    
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
 
 # Middleware to make request available in signals
-class AuditLogMiddleware:
+class AuditLogMiddleware(RequestContextMiddleware):
     """
     Middleware to make request available in model signals for audit logging.
+    Kept for settings that list it; the request context
+    (apps.core.context.RequestContextMiddleware) is what the signals read.
     """
-    def __init__(self, get_response):
-        self.get_response = get_response
-    
-    def __call__(self, request):
-        # Store request in thread local
-        import threading
-        thread_local = threading.current_thread()
-        thread_local.request = request
-        
-        response = self.get_response(request)
-        
-        # Clean up
-        if hasattr(thread_local, 'request'):
-            del thread_local.request
-        
-        return response
 
 
 # Optional: Function to temporarily disable audit logging
 def disable_audit_logging():
     """
-    Temporarily disable audit logging signals.
-    Useful for bulk operations or data migrations.
+    Disable audit logging in the current thread or task until
+    enable_audit_logging() is called. Prefer the audit_disabled() context
+    manager, which cannot leave logging off by mistake.
     """
-    post_save.disconnect(receiver=log_model_save)
-    post_delete.disconnect(receiver=log_model_delete)
+    set_enabled(False)
 
 def enable_audit_logging():
     """
-    Re-enable audit logging signals.
+    Re-enable audit logging in the current thread or task.
     """
-    post_save.connect(receiver=log_model_save)
-    post_delete.connect(receiver=log_model_delete)
+    set_enabled(True)
@@ -1,13 +1,22 @@
+import asyncio
 import json
+import logging
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
-from django.db import models
+
+from apps.core.images import thumbnail_url
 from .models import (
     RealTimeNotification, NotificationPreference,
-    ChatRoom, ChatMessage, ChatParticipant, TypingIndicator
+    ChatRoom, ChatMessage, ChatParticipant
 )
+from .feed import NotificationFeed, serialize_notification
+from .history import DEFAULT_PAGE_SIZE, ChatHistoryService
+from .presence import get_presence_service, heartbeat_interval
+
+logger = logging.getLogger(__name__)
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -97,63 +106,51 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         # Update unread count
         await self.send_unread_count()
 
-    # Database operations
-    @database_sync_to_async
-    def send_unread_count(self):
+    async def send_unread_count(self):
         """Send current unread notifications count."""
-        count = RealTimeNotification.objects.filter(recipient=self.user, is_read=False).count()
+        count = await self.get_unread_count()
         await self.send(text_data=json.dumps({
             'type': 'unread_count',
             'count': count
         }))
 
-    @database_sync_to_async
-    def send_recent_notifications(self):
+    async def send_recent_notifications(self):
         """Send recent unread notifications."""
-        notifications = RealTimeNotification.objects.filter(
-            recipient=self.user,
-            is_read=False
-        ).exclude(
-            # Exclude expired notifications
-            models.Q(expires_at__isnull=False) &
-            models.Q(expires_at__lt=models.functions.Now())
-        ).select_related().order_by('-created_at')[:10]  # Last 10 notifications
-
-        for notification in notifications:
-            formatted_notification = await self.format_notification(notification)
+        for formatted_notification in await self.get_recent_notifications():
             await self.send(text_data=json.dumps({
                 'type': 'notification',
                 'notification': formatted_notification
             }))
 
+    # Database operations
+    @database_sync_to_async
+    def get_unread_count(self):
+        """Count unread notifications."""
+        return NotificationFeed.unread_count(self.user)
+
+    @database_sync_to_async
+    def get_recent_notifications(self):
+        """Fetch and format recent unread notifications."""
+        return NotificationFeed.page(self.user, limit=10, unread_only=True)['notifications']
+
     @database_sync_to_async
     def mark_notifications_read(self, notification_ids):
         """Mark specific notifications as read."""
         RealTimeNotification.objects.filter(
             id__in=notification_ids,
-            recipient=self.user
-        ).update(is_read=True)
+            recipient=self.user,
+            is_read=False
+        ).update(is_read=True, read_at=timezone.now())
 
     @database_sync_to_async
     def mark_all_notifications_read(self):
         """Mark all notifications as read for user."""
-        RealTimeNotification.objects.filter(recipient=self.user).update(is_read=True)
+        NotificationFeed.mark_all_read(self.user)
 
     @database_sync_to_async
     def format_notification(self, notification):
         """Format notification for WebSocket transmission."""
-        return {
-            'id': notification.id,
-            'type': notification.notification_type,
-            'title': notification.title,
-            'message': notification.message,
-            'priority': notification.priority,
-            'created_at': notification.created_at.isoformat(),
-            'action_url': notification.action_url,
-            'action_text': notification.action_text,
-            'content_type': notification.content_type.app_label + '.' + notification.content_type.model if notification.content_type else None,
-            'object_id': notification.object_id,
-        }
+        return serialize_notification(notification)
 
 
 class BulkNotificationConsumer(AsyncWebsocketConsumer):
@@ -329,17 +326,44 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
-        # Update user's last seen
-        await self.update_last_seen()
+        # Register presence (last seen is written back in batches)
+        self.presence = get_presence_service()
+        await self.presence.store.connect(self.room_key, self.user_key, self.channel_name)
 
-        # Send recent messages
-        await self.send_recent_messages()
+        # Send the latest page of history as one frame
+        await self.send_history()
 
         # Send room info
         await self.send_room_info()
 
+        # Send who is here now; others get the change as a debounced diff
+        snapshot = await self.presence.store.snapshot(self.room_key)
+        await self.send(text_data=json.dumps({
+            'type': 'presence',
+            'snapshot': True,
+            'online': sorted(snapshot['online']),
+            'typing': sorted(snapshot['typing']),
+        }))
+        self.presence.schedule_broadcast(self.room_key, self.channel_layer, self.room_group_name)
+
+        # Keep the connection online while it is open, even if the client is idle
+        self.heartbeat_task = asyncio.ensure_future(self.keep_alive())
+
+    async def keep_alive(self):
+        """Refresh this connection's presence well within the TTL until disconnect."""
+        while True:
+            await asyncio.sleep(heartbeat_interval())
+            try:
+                await self.presence.store.heartbeat(self.room_key, self.user_key, self.channel_name)
+                await self.presence.maybe_flush()
+            except Exception:
+                logger.exception(f"Presence heartbeat failed for room {self.room_key}")
+
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
+        if hasattr(self, 'heartbeat_task'):
+            self.heartbeat_task.cancel()
+
         # Leave room group
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
@@ -347,13 +371,32 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
 
+        if hasattr(self, 'presence'):
+            await self.presence.store.disconnect(self.room_key, self.user_key, self.channel_name)
+            self.presence.schedule_broadcast(self.room_key, self.channel_layer, self.room_group_name)
+            await self.presence.maybe_flush()
+
+    @property
+    def room_key(self):
+        return str(self.room_id)
+
+    @property
+    def user_key(self):
+        return str(self.user.id)
+
     async def receive(self, text_data):
         """Handle incoming WebSocket messages."""
         try:
             data = json.loads(text_data)
             message_type = data.get('type')
 
-            if message_type == 'chat_message':
+            # Any frame counts as activity
+            await self.presence.store.heartbeat(self.room_key, self.user_key, self.channel_name)
+            await self.presence.maybe_flush()
+
+            if message_type == 'ping':
+                await self.send(text_data=json.dumps({'type': 'pong'}))
+            elif message_type == 'chat_message':
                 await self.handle_chat_message(data)
             elif message_type == 'typing_start':
                 await self.handle_typing_start()
@@ -361,6 +404,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 await self.handle_typing_stop()
             elif message_type == 'mark_read':
                 await self.handle_mark_read(data)
+            elif message_type == 'load_history':
+                await self.send_history(data.get('before'), data.get('after'), data.get('limit', DEFAULT_PAGE_SIZE))
             elif message_type == 'edit_message':
                 await self.handle_edit_message(data)
             elif message_type == 'delete_message':
@@ -401,35 +446,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
         """Handle typing start indicator."""
         await self.update_typing_indicator(True)
 
-        # Broadcast typing indicator
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'typing_indicator',
-                'user': {
-                    'id': self.user.id,
-                    'name': self.user.get_full_name(),
-                },
-                'is_typing': True
-            }
-        )
-
     async def handle_typing_stop(self):
         """Handle typing stop indicator."""
         await self.update_typing_indicator(False)
 
-        # Broadcast typing indicator
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'typing_indicator',
-                'user': {
-                    'id': self.user.id,
-                    'name': self.user.get_full_name(),
-                },
-                'is_typing': False
-            }
-        )
+    async def update_typing_indicator(self, is_typing):
+        """
+        Record typing state and broadcast only when it changed; repeated
+        typing_start frames just refresh the TTL.
+        """
+        changed = await self.presence.store.set_typing(self.room_key, self.user_key, is_typing)
+        if changed:
+            self.presence.schedule_broadcast(self.room_key, self.channel_layer, self.room_group_name)
 
     async def handle_mark_read(self, data):
         """Handle mark messages as read."""
@@ -479,11 +507,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': event['message']
         }))
 
-    async def typing_indicator(self, event):
-        """Send typing indicator to WebSocket."""
+    async def presence_diff(self, event):
+        """Send presence changes (online/offline/typing) to WebSocket."""
         await self.send(text_data=json.dumps({
-            'type': 'typing',
-            'data': event
+            'type': 'presence',
+            **event['diff']
         }))
 
     async def message_edited(self, event):
@@ -527,86 +555,61 @@ class ChatConsumer(AsyncWebsocketConsumer):
             reply_to=reply_to
         )
 
-    @database_sync_to_async
-    def update_last_seen(self):
-        """Update user's last seen timestamp."""
-        ChatParticipant.objects.filter(
-            room_id=self.room_id,
-            user=self.user
-        ).update(last_seen_at=timezone.now())
+    async def send_history(self, before=None, after=None, limit=DEFAULT_PAGE_SIZE):
+        """Send a page of history as a single frame (see ChatHistoryService.page)."""
+        await self.send(text_data=await self.get_history_frame(before, after, limit))
 
-    @database_sync_to_async
-    def update_typing_indicator(self, is_typing):
-        """Update typing indicator."""
-        if is_typing:
-            TypingIndicator.objects.update_or_create(
-                room_id=self.room_id,
-                user=self.user,
-                defaults={'timestamp': timezone.now()}
-            )
-        else:
-            TypingIndicator.objects.filter(
-                room_id=self.room_id,
-                user=self.user
-            ).delete()
-
-    @database_sync_to_async
-    def send_recent_messages(self):
-        """Send recent messages to the user."""
-        messages = ChatMessage.objects.filter(
-            room_id=self.room_id
-        ).select_related('sender', 'sender__profile').order_by('-created_at')[:50][::-1]
-
-        for message in messages:
-            formatted_message = await self.format_message(message)
+    async def send_room_info(self):
+        """Send room information."""
+        room_data = await self.get_room_info()
+        if room_data is not None:
             await self.send(text_data=json.dumps({
-                'type': 'message',
-                'message': formatted_message
+                'type': 'room_info',
+                'room': room_data
             }))
 
     @database_sync_to_async
-    def send_room_info(self):
-        """Send room information."""
+    def get_history_frame(self, before, after, limit):
+        """Fetch a history page and serialise the frame off the event loop."""
+        try:
+            page = ChatHistoryService.page(self.room_id, self.user, before=before, after=after, limit=limit)
+        except ValueError as e:
+            return json.dumps({'type': 'error', 'message': str(e)})
+        return json.dumps({'type': 'history', **page})
+
+    @database_sync_to_async
+    def get_room_info(self):
+        """Fetch room information."""
         try:
             room = ChatRoom.objects.get(id=self.room_id)
-            participants = ChatParticipant.objects.filter(
-                room=room
-            ).select_related('user', 'user__profile')
-
-            room_data = {
-                'id': room.id,
-                'name': room.name,
-                'description': room.description,
-                'room_type': room.room_type,
-                'member_count': room.member_count,
-                'participants': [
-                    {
-                        'id': p.user.id,
-                        'name': p.user.get_full_name(),
-                        'avatar': p.user.profile.profile_picture.url if p.user.profile and p.user.profile.profile_picture else None,
-                        'role': p.role,
-                        'last_seen': p.last_seen_at.isoformat()
-                    } for p in participants
-                ]
-            }
+        except ChatRoom.DoesNotExist:
+            return None
 
-            await self.send(text_data=json.dumps({
-                'type': 'room_info',
-                'room': room_data
-            }))
+        participants = ChatParticipant.objects.filter(
+            room=room
+        ).select_related('user', 'user__profile')
 
-        except ChatRoom.DoesNotExist:
-            pass
+        return {
+            'id': str(room.id),
+            'name': room.name,
+            'description': room.description,
+            'room_type': room.room_type,
+            'member_count': room.member_count,
+            'participants': [
+                {
+                    'id': str(p.user.id),
+                    'name': p.user.get_full_name(),
+                    'avatar': thumbnail_url(p.user.profile.profile_picture.name) if p.user.profile else None,
+                    'role': p.role,
+                    'last_seen': p.last_seen_at.isoformat()
+                } for p in participants
+            ]
+        }
 
     @database_sync_to_async
     def mark_messages_read(self, message_ids):
         """Mark messages as read."""
-        messages = ChatMessage.objects.filter(
-            id__in=message_ids,
-            room_id=self.room_id
-        )
-        for message in messages:
-            message.mark_as_read(self.user)
+        return ChatHistoryService.mark_read(self.room_id, self.user, message_ids)
 
     @database_sync_to_async
     def edit_message(self, message_id, new_content):
@@ -642,22 +645,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def format_message(self, message):
         """Format message for WebSocket transmission."""
+        return self._format_message(message)
+
+    def _format_message(self, message):
         return {
-            'id': message.id,
+            'id': str(message.id),
             'content': message.content,
             'message_type': message.message_type,
             'sender': {
-                'id': message.sender.id,
+                'id': str(message.sender.id),
                 'name': message.sender.get_full_name(),
-                'avatar': (
-                    message.sender.profile.profile_picture.url
-                    if message.sender.profile and message.sender.profile.profile_picture
-                    else None
-                ),
+                'avatar': thumbnail_url(message.sender.profile.profile_picture.name) if message.sender.profile else None,
             },
             'timestamp': message.created_at.isoformat(),
             'is_edited': message.is_edited,
             'edited_at': message.edited_at.isoformat() if message.edited_at else None,
-            'reply_to': message.reply_to.id if message.reply_to else None,
-            'is_read': message.is_read_by_user(self.user),
+            'reply_to': str(message.reply_to_id) if message.reply_to_id else None,
         }
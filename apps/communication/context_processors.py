@@ -1,4 +1,4 @@
-from .models import RealTimeNotification
+from .feed import NotificationFeed
 
 
 def notification_count(request):
@@ -6,9 +6,6 @@ def notification_count(request):
     Context processor to add notification count to all templates.
     """
     if request.user.is_authenticated:
-        unread_count = RealTimeNotification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
+        unread_count = NotificationFeed.unread_count(request.user)
         return {'unread_notification_count': unread_count}
     return {'unread_notification_count': 0}
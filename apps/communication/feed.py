@@ -0,0 +1,258 @@
+"""
+Per-user notification feed for the communication app.
+
+A notification enters its recipient's feed when ``delivered_at`` is set:
+immediately on creation, or by :class:`NotificationScheduler` once
+``scheduled_for`` comes due. Feed reads are therefore a plain index range scan
+on ``(recipient, [is_read,] created_at)`` with a keyset cursor, and never
+compare schedules against the clock.
+
+Read and expired notifications older than ``NOTIFICATION_RETENTION_DAYS`` are
+archived (status ``archived``, dropped from the feed) and archived rows older
+than ``NOTIFICATION_PURGE_DAYS`` are deleted, both in bounded batches by
+:class:`NotificationArchiver`.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Dict, Optional
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .history import decode_cursor, encode_cursor
+from .models import RealTimeNotification
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEED_SIZE = 20
+MAX_FEED_SIZE = 100
+
+
+def serialize_notification(notification: RealTimeNotification) -> Dict:
+    """Format a notification for JSON/WebSocket transmission."""
+    content_type = notification.content_type
+    return {
+        'id': str(notification.id),
+        'type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'priority': notification.priority,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'action_url': notification.action_url,
+        'action_text': notification.action_text,
+        'content_type': f'{content_type.app_label}.{content_type.model}' if content_type else None,
+        'object_id': notification.object_id,
+    }
+
+
+class NotificationFeed:
+    """
+    Read side of the notification feed.
+    """
+
+    @staticmethod
+    def visible(user, unread_only: bool = False):
+        """Delivered, unexpired, unarchived notifications of ``user``."""
+        queryset = RealTimeNotification.objects.filter(
+            recipient=user,
+            is_deleted=False,
+            delivered_at__isnull=False,
+        ).exclude(
+            status=RealTimeNotification.Status.ARCHIVED
+        ).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        )
+        if unread_only:
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    @classmethod
+    def page(cls, user, before: Optional[str] = None, limit: int = DEFAULT_FEED_SIZE,
+             unread_only: bool = False, **filters) -> Dict:
+        """
+        Get a page of the feed, newest first.
+
+        Args:
+            user: Recipient
+            before: ``next_cursor`` of the previous page
+            limit: Page size, capped at ``MAX_FEED_SIZE``
+            unread_only: Only unread notifications
+            **filters: Extra field filters, e.g. ``notification_type`` or ``priority``
+
+        Returns:
+            Dict with ``notifications``, ``next_cursor`` and ``has_more``
+
+        Raises:
+            ValueError: if ``before`` is not a valid cursor
+        """
+        limit = max(1, min(int(limit), MAX_FEED_SIZE))
+        queryset = cls.visible(user, unread_only).filter(**filters)
+        if before:
+            created_at, notification_id = decode_cursor(before)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, id__lt=notification_id)
+            )
+
+        notifications = list(
+            queryset.select_related('content_type').order_by('-created_at', '-id')[:limit + 1]
+        )
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+        last = notifications[-1] if notifications else None
+        return {
+            'notifications': [serialize_notification(n) for n in notifications],
+            'next_cursor': encode_cursor(last.created_at, last.id) if has_more else None,
+            'has_more': has_more,
+        }
+
+    @classmethod
+    def unread_count(cls, user) -> int:
+        """Number of unread notifications in the feed."""
+        return cls.visible(user, unread_only=True).count()
+
+    @classmethod
+    def mark_all_read(cls, user) -> int:
+        """Mark every unread notification in the feed as read."""
+        return cls.visible(user, unread_only=True).update(
+            is_read=True,
+            read_at=timezone.now()
+        )
+
+
+class NotificationScheduler:
+    """
+    Delivers scheduled notifications when they come due.
+
+    Run continuously with ``manage.py deliver_scheduled_notifications --loop``.
+    Delivery claims each row with a conditional UPDATE, so several workers can
+    run at once without delivering a notification twice.
+    """
+
+    @staticmethod
+    def pending(now=None):
+        """Undelivered notifications that are due."""
+        return RealTimeNotification.objects.filter(
+            delivered_at__isnull=True,
+            scheduled_for__lte=now or timezone.now(),
+            is_deleted=False,
+        )
+
+    @classmethod
+    def deliver_due(cls, now=None, batch_size: int = 500, push: bool = True) -> int:
+        """
+        Deliver every due notification in batches.
+
+        Args:
+            now: Reference time (defaults to the current time)
+            batch_size: Rows claimed per UPDATE
+            push: Send each delivered notification to the recipient's WebSocket group
+
+        Returns:
+            Number of notifications delivered
+        """
+        now = now or timezone.now()
+        delivered = 0
+        while True:
+            ids = list(cls.pending(now).order_by('scheduled_for').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            claimed = RealTimeNotification.objects.filter(
+                pk__in=ids, delivered_at__isnull=True
+            ).update(delivered_at=now)
+            delivered += claimed
+            if push and claimed:
+                cls.push(RealTimeNotification.objects.filter(
+                    pk__in=ids, delivered_at=now
+                ).select_related('content_type'))
+        if delivered:
+            logger.info(f"Delivered {delivered} scheduled notification(s)")
+        return delivered
+
+    @staticmethod
+    def push(notifications):
+        """Send notifications to their recipients' WebSocket groups."""
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        send = async_to_sync(channel_layer.group_send)
+        for notification in notifications:
+            try:
+                send(f'notifications_{notification.recipient_id}', {
+                    'type': 'send_notification',
+                    'notification': serialize_notification(notification),
+                })
+            except Exception as e:
+                logger.warning(f"Failed to push notification {notification.pk}: {e}")
+
+
+class NotificationArchiver:
+    """
+    Archives and compacts old notifications in bounded batches.
+    """
+
+    @staticmethod
+    def _batched(queryset, batch_size, apply):
+        total = 0
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return total
+            total += apply(RealTimeNotification.objects.filter(pk__in=ids))
+
+    @classmethod
+    def archivable(cls, retention_days: Optional[int] = None, now=None):
+        """Read or expired notifications older than the retention window."""
+        now = now or timezone.now()
+        if retention_days is None:
+            retention_days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+        return RealTimeNotification.objects.filter(
+            created_at__lt=now - timedelta(days=retention_days)
+        ).exclude(
+            status=RealTimeNotification.Status.ARCHIVED
+        ).filter(
+            Q(is_read=True) | Q(expires_at__lt=now)
+        )
+
+    @classmethod
+    def purgeable(cls, purge_days: Optional[int] = None, now=None):
+        """Archived notifications older than the purge window."""
+        now = now or timezone.now()
+        if purge_days is None:
+            purge_days = getattr(settings, 'NOTIFICATION_PURGE_DAYS', 365)
+        return RealTimeNotification.objects.filter(
+            status=RealTimeNotification.Status.ARCHIVED,
+            created_at__lt=now - timedelta(days=purge_days),
+        )
+
+    @classmethod
+    def archive(cls, retention_days: Optional[int] = None, batch_size: int = 1000,
+                dry_run: bool = False) -> int:
+        """Archive old read/expired notifications. Returns the number archived."""
+        queryset = cls.archivable(retention_days)
+        if dry_run:
+            return queryset.count()
+        now = timezone.now()
+        archived = cls._batched(queryset, batch_size, lambda batch: batch.update(
+            status=RealTimeNotification.Status.ARCHIVED,
+            status_changed_at=now,
+        ))
+        logger.info(f"Archived {archived} notification(s)")
+        return archived
+
+    @classmethod
+    def purge(cls, purge_days: Optional[int] = None, batch_size: int = 1000,
+              dry_run: bool = False) -> int:
+        """Delete long-archived notifications. Returns the number deleted."""
+        queryset = cls.purgeable(purge_days)
+        if dry_run:
+            return queryset.count()
+        deleted = cls._batched(queryset, batch_size, lambda batch: batch.delete()[0])
+        logger.info(f"Purged {deleted} archived notification(s)")
+        return deleted
@@ -0,0 +1,203 @@
+"""
+Chat history delivery for the communication app.
+
+History is paged with a keyset cursor on ``(created_at, id)`` so every page
+costs the same regardless of how deep the client has scrolled. A page is
+serialised in one pass together with the requesting user's read state and
+per-message read counts (one grouped query over the read-receipt table), and
+messages are marked read with a single ``bulk_create`` into that table.
+"""
+
+import base64
+import binascii
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Count, Q
+
+from apps.core.images import thumbnail_url
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+ReadReceipt = ChatMessage.read_by.through
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+MESSAGE_FIELDS = (
+    'id', 'content', 'message_type', 'created_at', 'is_edited', 'edited_at',
+    'reply_to_id', 'sender_id', 'sender__first_name', 'sender__last_name',
+    'sender__profile__profile_picture',
+)
+
+
+def encode_cursor(created_at: datetime, message_id) -> str:
+    """Encode a message position as an opaque cursor."""
+    raw = f'{created_at.isoformat()}|{message_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
+
+
+def _serialize_row(row: Dict) -> Dict:
+    picture = row['sender__profile__profile_picture']
+    name = f"{row['sender__first_name']} {row['sender__last_name']}".strip()
+    return {
+        'id': str(row['id']),
+        'content': row['content'],
+        'message_type': row['message_type'],
+        'sender': {
+            'id': str(row['sender_id']),
+            'name': name,
+            'avatar': thumbnail_url(picture),
+        },
+        'timestamp': row['created_at'].isoformat(),
+        'is_edited': row['is_edited'],
+        'edited_at': row['edited_at'].isoformat() if row['edited_at'] else None,
+        'reply_to': str(row['reply_to_id']) if row['reply_to_id'] else None,
+    }
+
+
+class ChatHistoryService:
+    """
+    Keyset-paginated chat history and bulk read receipts.
+    """
+
+    @staticmethod
+    def messages(room_id):
+        """Visible messages of a room."""
+        return ChatMessage.objects.filter(room_id=room_id, is_deleted=False)
+
+    @classmethod
+    def page(cls, room_id, user, before: Optional[str] = None, after: Optional[str] = None,
+             limit: int = DEFAULT_PAGE_SIZE) -> Dict:
+        """
+        Get a page of history.
+
+        Without cursors this is the latest page. ``before`` walks back through
+        older messages; ``after`` fetches messages newer than a position (for
+        catching up after a reconnect). Messages within a page are always
+        oldest first and carry their own ``cursor``; ``next_cursor`` continues in
+        the same direction.
+
+        Args:
+            room_id: Chat room primary key
+            user: User whose read state is embedded
+            before: Cursor from a previous backwards page
+            after: Cursor from a previous forwards page, or of the newest message held
+            limit: Page size, capped at ``MAX_PAGE_SIZE``
+
+        Returns:
+            Dict with ``messages``, ``next_cursor`` and ``has_more``
+
+        Raises:
+            ValueError: if a cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        queryset = cls.messages(room_id)
+        if after:
+            created_at, message_id = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) |
+                Q(created_at=created_at, id__gt=message_id)
+            ).order_by('created_at', 'id')
+        else:
+            if before:
+                created_at, message_id = decode_cursor(before)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) |
+                    Q(created_at=created_at, id__lt=message_id)
+                )
+            queryset = queryset.order_by('-created_at', '-id')
+
+        rows = list(queryset.values(*MESSAGE_FIELDS)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        edge = rows[-1] if rows else None
+        if not after:
+            rows.reverse()
+
+        receipts = cls.read_receipts([row['id'] for row in rows], user)
+        messages = []
+        for row in rows:
+            data = _serialize_row(row)
+            data['cursor'] = encode_cursor(row['created_at'], row['id'])
+            read_count, is_read = receipts.get(row['id'], (0, False))
+            data['read_count'] = read_count
+            data['is_read'] = is_read or row['sender_id'] == user.pk
+            messages.append(data)
+
+        return {
+            'messages': messages,
+            'next_cursor': encode_cursor(edge['created_at'], edge['id']) if has_more else None,
+            'has_more': has_more,
+        }
+
+    @staticmethod
+    def read_receipts(message_ids: List, user) -> Dict:
+        """
+        Read state for a batch of messages in one query.
+
+        Returns:
+            ``{message_id: (read_count, read_by_user)}`` for messages with any receipt
+        """
+        if not message_ids:
+            return {}
+        rows = ReadReceipt.objects.filter(chatmessage_id__in=message_ids).values(
+            'chatmessage_id'
+        ).annotate(
+            read_count=Count('user_id'),
+            mine=Count('user_id', filter=Q(user_id=user.pk)),
+        ).order_by()
+        return {row['chatmessage_id']: (row['read_count'], row['mine'] > 0) for row in rows}
+
+    @classmethod
+    def mark_read(cls, room_id, user, message_ids: Optional[List] = None,
+                  batch_size: int = 1000) -> int:
+        """
+        Mark messages in a room as read by ``user``.
+
+        With ``message_ids`` only those messages are marked; otherwise every
+        unread message in the room is. Receipts are inserted with one
+        ``bulk_create(ignore_conflicts=True)``, so repeats are harmless.
+
+        Returns:
+            Number of messages that were unread
+        """
+        unread = cls.messages(room_id).exclude(read_by=user)
+        if message_ids is not None:
+            valid_ids = []
+            for message_id in message_ids:
+                try:
+                    valid_ids.append(uuid.UUID(str(message_id)))
+                except ValueError:
+                    continue
+            if not valid_ids:
+                return 0
+            unread = unread.filter(id__in=valid_ids)
+
+        ids = list(unread.values_list('id', flat=True))
+        if ids:
+            ReadReceipt.objects.bulk_create(
+                [ReadReceipt(chatmessage_id=message_id, user_id=user.pk) for message_id in ids],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        return len(ids)
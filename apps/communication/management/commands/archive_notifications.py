@@ -0,0 +1,61 @@
+"""
+Management command to archive and compact real-time notifications.
+
+Read or expired notifications older than the retention window are archived
+(removed from feeds); archived notifications older than the purge window are
+deleted. Both steps work in batches so they can run against large tables
+without long locks.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.communication.feed import NotificationArchiver
+
+
+class Command(BaseCommand):
+    help = 'Archive old read/expired notifications and purge long-archived ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            help='Archive read/expired notifications older than this (default: NOTIFICATION_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            help='Delete archived notifications older than this (default: NOTIFICATION_PURGE_DAYS)',
+        )
+        parser.add_argument(
+            '--no-purge',
+            action='store_true',
+            help='Only archive, never delete',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows updated or deleted per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be archived or purged',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        archived = NotificationArchiver.archive(
+            options['retention_days'], batch_size=options['batch_size'], dry_run=dry_run
+        )
+        purged = 0
+        if not options['no_purge']:
+            purged = NotificationArchiver.purge(
+                options['purge_days'], batch_size=options['batch_size'], dry_run=dry_run
+            )
+
+        prefix = 'Would archive' if dry_run else 'Archived'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {archived} notification(s); '
+            f'{"would purge" if dry_run else "purged"} {purged}'
+        ))
@@ -0,0 +1,48 @@
+"""
+Management command to deliver scheduled real-time notifications.
+
+Notifications created with a future scheduled_for stay out of the feed until
+this command delivers them. Run it once from cron, or as a long-running worker
+with --loop.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.communication.feed import NotificationScheduler
+
+
+class Command(BaseCommand):
+    help = 'Deliver scheduled notifications that have come due'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, checking every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=15,
+            help='Seconds between checks when looping (default: 15)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Notifications delivered per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = NotificationScheduler.deliver_due(batch_size=options['batch_size'])
+            if delivered or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} notification(s)'))
+            if not options['loop']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0003_initial'),
+        ('core', '0003_alter_institution_database_schema'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='communicati_room_id_565731_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', 'created_at', 'id'], name='communicati_room_id_6ed96f_idx'),
+        ),
+    ]
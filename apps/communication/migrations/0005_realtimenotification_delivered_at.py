@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_delivered_at(apps, schema_editor):
+    # Everything already visible counts as delivered; future schedules are
+    # left for the scheduler
+    RealTimeNotification = apps.get_model('communication', 'RealTimeNotification')
+    RealTimeNotification.objects.filter(scheduled_for__isnull=True).update(delivered_at=F('created_at'))
+    RealTimeNotification.objects.filter(scheduled_for__lte=timezone.now()).update(delivered_at=F('scheduled_for'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0004_chatmessage_room_created_id_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0003_alter_institution_database_schema'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='realtimenotification',
+            name='communicati_recipie_6eeb4b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='realtimenotification',
+            name='communicati_schedul_dad13c_idx',
+        ),
+        migrations.AddField(
+            model_name='realtimenotification',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='delivered at'),
+        ),
+        migrations.RunPython(backfill_delivered_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='realtimenotification',
+            index=models.Index(fields=['recipient', 'is_read', 'created_at', 'id'], name='communicati_recipie_7004f5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='realtimenotification',
+            index=models.Index(fields=['recipient', 'created_at', 'id'], name='communicati_recipie_fde62c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='realtimenotification',
+            index=models.Index(condition=models.Q(('delivered_at__isnull', True)), fields=['scheduled_for'], name='rtnotification_pending_idx'),
+        ),
+    ]
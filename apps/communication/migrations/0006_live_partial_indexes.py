@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0005_realtimenotification_delivered_at'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0004_document_batch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='communicati_room_id_6ed96f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='realtimenotification',
+            name='communicati_recipie_fde62c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['room', 'created_at', 'id'], name='chatmessage_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='realtimenotification',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['recipient', 'created_at', 'id'], name='rtnotification_live_idx'),
+        ),
+    ]
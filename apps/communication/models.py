@@ -5,7 +5,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinLengthValidator, MaxLengthValidator, MinValueValidator, MaxValueValidator
 
-from apps.core.models import CoreBaseModel
+from apps.core.models import NOT_DELETED, CoreBaseModel
 
 
 class Announcement(CoreBaseModel):
@@ -772,6 +772,13 @@ class RealTimeNotification(CoreBaseModel):
         blank=True,
         verbose_name='expires at'
     )
+    # Set when the notification enters the recipient's feed: on creation, or
+    # by the scheduler once scheduled_for comes due
+    delivered_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='delivered at'
+    )
 
     # Actions
     action_url = models.URLField(
@@ -791,16 +798,33 @@ class RealTimeNotification(CoreBaseModel):
         verbose_name_plural = 'Real-time Notifications'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['recipient', 'is_read', 'created_at']),
+            # Feed pages (keyset on created_at, id): unread feed and full feed
+            models.Index(fields=['recipient', 'is_read', 'created_at', 'id']),
+            # Feeds only ever show undeleted notifications
+            models.Index(
+                fields=['recipient', 'created_at', 'id'],
+                condition=NOT_DELETED,
+                name='rtnotification_live_idx'
+            ),
             models.Index(fields=['notification_type', 'created_at']),
             models.Index(fields=['priority', 'created_at']),
-            models.Index(fields=['scheduled_for']),
+            # Only undelivered rows are ever looked up by schedule
+            models.Index(
+                fields=['scheduled_for'],
+                condition=models.Q(delivered_at__isnull=True),
+                name='rtnotification_pending_idx'
+            ),
             models.Index(fields=['expires_at']),
         ]
 
     def __str__(self):
         return f"{self.notification_type}: {self.title} -> {self.recipient}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.delivered_at is None and not self.is_scheduled:
+            self.delivered_at = timezone.now()
+        super().save(*args, **kwargs)
+
     @property
     def is_expired(self):
         """Check if notification has expired."""
@@ -851,24 +875,14 @@ class RealTimeNotification(CoreBaseModel):
     @classmethod
     def get_unread_count(cls, user):
         """Get count of unread notifications for a user."""
-        return cls.objects.filter(
-            recipient=user,
-            is_read=False
-        ).exclude(
-            models.Q(expires_at__isnull=False) &
-            models.Q(expires_at__lt=models.functions.Now())
-        ).count()
+        from .feed import NotificationFeed
+        return NotificationFeed.unread_count(user)
 
     @classmethod
     def mark_all_read(cls, user):
         """Mark all notifications as read for a user."""
-        return cls.objects.filter(
-            recipient=user,
-            is_read=False
-        ).update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        from .feed import NotificationFeed
+        return NotificationFeed.mark_all_read(user)
 
 
 class NotificationPreference(CoreBaseModel):
@@ -1181,22 +1195,29 @@ class ChatMessage(CoreBaseModel):
         verbose_name_plural = 'Chat Messages'
         ordering = ['created_at']
         indexes = [
-            models.Index(fields=['room', 'created_at']),
             models.Index(fields=['sender', 'created_at']),
+            # Keyset pagination of history orders by (created_at, id) within a
+            # room, over the undeleted messages the default manager returns
+            models.Index(
+                fields=['room', 'created_at', 'id'],
+                condition=NOT_DELETED,
+                name='chatmessage_live_idx'
+            ),
         ]
 
     def __str__(self):
         return f"{self.sender.get_full_name()}: {self.content[:50]}..."
 
-    @property
     def is_read_by_user(self, user):
         """Check if message is read by a specific user."""
         return self.read_by.filter(id=user.id).exists()
 
     def mark_as_read(self, user):
         """Mark message as read by a user."""
-        if not self.is_read_by_user(user):
-            self.read_by.add(user)
+        self.read_by.through.objects.bulk_create(
+            [self.read_by.through(chatmessage_id=self.pk, user_id=user.pk)],
+            ignore_conflicts=True
+        )
 
 
 class ChatParticipant(CoreBaseModel):
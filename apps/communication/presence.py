@@ -0,0 +1,325 @@
+"""
+Ephemeral chat presence: who is online in a room and who is typing.
+
+This state is kept out of the database, in process memory or in Redis when
+``CHAT_PRESENCE_REDIS_URL`` is set, and every entry carries a TTL so that
+dropped connections age out on their own. Changes are broadcast to the room
+group as debounced diffs, and last-seen times are written back to
+``ChatParticipant`` in periodic batches.
+
+Settings (all optional):
+
+- ``CHAT_PRESENCE_REDIS_URL``: Redis URL; in-memory store when unset
+- ``CHAT_PRESENCE_TTL``: seconds a connection stays online without a heartbeat (60);
+  open connections refresh themselves every third of it, see :func:`heartbeat_interval`
+- ``CHAT_TYPING_TTL``: seconds a typing indicator lasts without a refresh (5)
+- ``CHAT_PRESENCE_DEBOUNCE``: seconds to coalesce changes before broadcasting (0.25)
+- ``CHAT_LAST_SEEN_FLUSH_INTERVAL``: seconds between last-seen writes (30)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def presence_ttl():
+    return _setting('CHAT_PRESENCE_TTL', 60)
+
+
+def heartbeat_interval():
+    """
+    Seconds between the heartbeats a consumer sends for its own connection,
+    so an idle but open connection never reaches the presence TTL.
+    """
+    return presence_ttl() / 3
+
+
+def typing_ttl():
+    return _setting('CHAT_TYPING_TTL', 5)
+
+
+class InMemoryPresenceStore:
+    """
+    Process-local presence store. Suitable for a single worker and for tests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = defaultdict(dict)  # room -> {(user, channel): expires}
+        self._typing = defaultdict(dict)       # room -> {user: expires}
+        self._last_seen = {}                   # (room, user) -> timestamp
+
+    def _online(self, room, now):
+        connections = self._connections[room]
+        for key in [key for key, expires in connections.items() if expires <= now]:
+            del connections[key]
+        return {user for user, _channel in connections}
+
+    def _typing_users(self, room, now):
+        typing = self._typing[room]
+        for user in [user for user, expires in typing.items() if expires <= now]:
+            del typing[user]
+        return set(typing)
+
+    async def connect(self, room, user, channel):
+        """Register a connection. Returns True if the user just came online."""
+        now = time.time()
+        with self._lock:
+            was_online = user in self._online(room, now)
+            self._connections[room][(user, channel)] = now + presence_ttl()
+            self._last_seen[(room, user)] = now
+        return not was_online
+
+    async def disconnect(self, room, user, channel):
+        """Drop a connection. Returns True if the user is now offline."""
+        now = time.time()
+        with self._lock:
+            self._connections[room].pop((user, channel), None)
+            self._typing[room].pop(user, None)
+            self._last_seen[(room, user)] = now
+            return user not in self._online(room, now)
+
+    async def heartbeat(self, room, user, channel):
+        """Keep a connection alive and record activity."""
+        now = time.time()
+        with self._lock:
+            self._connections[room][(user, channel)] = now + presence_ttl()
+            self._last_seen[(room, user)] = now
+
+    async def set_typing(self, room, user, is_typing):
+        """Start or stop typing. Returns True if the visible state changed."""
+        now = time.time()
+        with self._lock:
+            was_typing = user in self._typing_users(room, now)
+            if is_typing:
+                self._typing[room][user] = now + typing_ttl()
+            else:
+                self._typing[room].pop(user, None)
+        return was_typing != is_typing
+
+    async def snapshot(self, room):
+        """Current ``{'online': set, 'typing': set}`` for a room."""
+        now = time.time()
+        with self._lock:
+            return {'online': self._online(room, now), 'typing': self._typing_users(room, now)}
+
+    async def drain_last_seen(self):
+        """Return and clear pending ``{(room, user): timestamp}`` last-seen updates."""
+        with self._lock:
+            pending, self._last_seen = self._last_seen, {}
+        return pending
+
+
+class RedisPresenceStore:
+    """
+    Presence store shared by all workers through Redis sorted sets scored by
+    expiry time.
+    """
+
+    def __init__(self, url, prefix='chat:presence'):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self._last_seen_key = f'{prefix}:last_seen'
+
+    def _key(self, room, kind):
+        return f'{self._prefix}:{room}:{kind}'
+
+    @staticmethod
+    def _users(members):
+        return {member.split(' ', 1)[0] for member in members}
+
+    async def connect(self, room, user, channel):
+        now = time.time()
+        key = self._key(room, 'connections')
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, '-inf', now)
+            pipe.zrange(key, 0, -1)
+            pipe.zadd(key, {f'{user} {channel}': now + presence_ttl()})
+            pipe.expire(key, presence_ttl() * 2)
+            pipe.hset(self._last_seen_key, f'{room} {user}', now)
+            _removed, members, *_rest = await pipe.execute()
+        return user not in self._users(members)
+
+    async def disconnect(self, room, user, channel):
+        now = time.time()
+        key = self._key(room, 'connections')
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(key, f'{user} {channel}')
+            pipe.zrem(self._key(room, 'typing'), user)
+            pipe.zremrangebyscore(key, '-inf', now)
+            pipe.zrange(key, 0, -1)
+            pipe.hset(self._last_seen_key, f'{room} {user}', now)
+            *_head, members, _set = await pipe.execute()
+        return user not in self._users(members)
+
+    async def heartbeat(self, room, user, channel):
+        now = time.time()
+        key = self._key(room, 'connections')
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {f'{user} {channel}': now + presence_ttl()})
+            pipe.expire(key, presence_ttl() * 2)
+            pipe.hset(self._last_seen_key, f'{room} {user}', now)
+            await pipe.execute()
+
+    async def set_typing(self, room, user, is_typing):
+        now = time.time()
+        key = self._key(room, 'typing')
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, '-inf', now)
+            pipe.zscore(key, user)
+            if is_typing:
+                pipe.zadd(key, {user: now + typing_ttl()})
+                pipe.expire(key, typing_ttl() * 2)
+            else:
+                pipe.zrem(key, user)
+            _removed, score, *_rest = await pipe.execute()
+        return (score is not None) != is_typing
+
+    async def snapshot(self, room):
+        now = time.time()
+        connections, typing = self._key(room, 'connections'), self._key(room, 'typing')
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(connections, '-inf', now)
+            pipe.zremrangebyscore(typing, '-inf', now)
+            pipe.zrange(connections, 0, -1)
+            pipe.zrange(typing, 0, -1)
+            _a, _b, members, typing_users = await pipe.execute()
+        return {'online': self._users(members), 'typing': set(typing_users)}
+
+    async def drain_last_seen(self):
+        import redis
+
+        # Rename first so updates arriving during the read go to a fresh hash
+        draining = f'{self._last_seen_key}:{uuid.uuid4().hex}'
+        try:
+            await self._redis.rename(self._last_seen_key, draining)
+        except redis.ResponseError:
+            return {}
+        data = await self._redis.hgetall(draining)
+        await self._redis.delete(draining)
+        pending = {}
+        for field, value in data.items():
+            room, user = field.split(' ', 1)
+            pending[(room, user)] = float(value)
+        return pending
+
+
+def write_last_seen(pending, batch_size=500):
+    """
+    Write ``{(room_id, user_id): timestamp}`` to ChatParticipant.last_seen_at
+    with batched ``bulk_update`` calls (no per-row save or signals).
+    """
+    from .models import ChatParticipant
+
+    items = list(pending.items())
+    updated = 0
+    for start in range(0, len(items), batch_size):
+        chunk = dict(items[start:start + batch_size])
+        condition = Q()
+        for room, user in chunk:
+            condition |= Q(room_id=room, user_id=user)
+        participants = list(ChatParticipant.objects.filter(condition).only('id', 'room_id', 'user_id'))
+        for participant in participants:
+            timestamp = chunk[(str(participant.room_id), str(participant.user_id))]
+            participant.last_seen_at = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+        ChatParticipant.objects.bulk_update(participants, ['last_seen_at'])
+        updated += len(participants)
+    return updated
+
+
+class PresenceService:
+    """
+    Coordinates the store, debounced broadcasting and last-seen flushing for
+    the chat consumers of this process.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._sent = {}      # room -> snapshot last broadcast from this process
+        self._pending = {}   # room -> (deadline, task)
+        self._last_flush = time.monotonic()
+
+    def schedule_broadcast(self, room, channel_layer, group, delay=None):
+        """
+        Broadcast the room's presence diff after ``delay`` seconds, coalescing
+        any changes made in the meantime.
+        """
+        if delay is None:
+            delay = _setting('CHAT_PRESENCE_DEBOUNCE', 0.25)
+        deadline = time.monotonic() + delay
+        pending = self._pending.get(room)
+        if pending and not pending[1].done():
+            if pending[0] <= deadline:
+                return
+            pending[1].cancel()
+        task = asyncio.ensure_future(self._broadcast_later(room, channel_layer, group, delay))
+        self._pending[room] = (deadline, task)
+
+    async def _broadcast_later(self, room, channel_layer, group, delay):
+        await asyncio.sleep(delay)
+        self._pending.pop(room, None)
+        try:
+            await self.broadcast(room, channel_layer, group)
+        except Exception:
+            logger.exception(f"Presence broadcast failed for room {room}")
+
+    async def broadcast(self, room, channel_layer, group):
+        """Send what changed since the last broadcast to the room group."""
+        current = await self.store.snapshot(room)
+        previous = self._sent.get(room, {'online': set(), 'typing': set()})
+        diff = {
+            'online': sorted(current['online'] - previous['online']),
+            'offline': sorted(previous['online'] - current['online']),
+            'typing': sorted(current['typing'] - previous['typing']),
+            'stopped_typing': sorted(previous['typing'] - current['typing']),
+        }
+        if current['online'] or current['typing']:
+            self._sent[room] = current
+        else:
+            self._sent.pop(room, None)
+
+        if any(diff.values()):
+            await channel_layer.group_send(group, {'type': 'presence_diff', 'diff': diff})
+        if current['typing']:
+            # Typing entries lapse silently; look again once they could have expired
+            self.schedule_broadcast(room, channel_layer, group, delay=typing_ttl())
+
+    async def maybe_flush(self, force=False):
+        """Write pending last-seen times if the flush interval has passed."""
+        interval = _setting('CHAT_LAST_SEEN_FLUSH_INTERVAL', 30)
+        if not force and time.monotonic() - self._last_flush < interval:
+            return 0
+        self._last_flush = time.monotonic()
+        pending = await self.store.drain_last_seen()
+        if not pending:
+            return 0
+        return await database_sync_to_async(write_last_seen)(pending)
+
+
+_presence_service = None
+
+
+def get_presence_service():
+    """Get the process-wide presence service."""
+    global _presence_service
+    if _presence_service is None:
+        url = _setting('CHAT_PRESENCE_REDIS_URL', None)
+        store = RedisPresenceStore(url) if url else InMemoryPresenceStore()
+        _presence_service = PresenceService(store)
+    return _presence_service
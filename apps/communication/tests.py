@@ -0,0 +1,320 @@
+# apps/communication/tests.py
+
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.auth import AuthMiddlewareStack
+from channels.layers import InMemoryChannelLayer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.models import Institution
+from config.routing import websocket_urlpatterns
+from . import presence
+from .feed import NotificationArchiver, NotificationFeed, NotificationScheduler
+from .history import ChatHistoryService, ReadReceipt, decode_cursor
+from .models import ChatRoom, ChatMessage, ChatParticipant, RealTimeNotification
+from .presence import InMemoryPresenceStore, PresenceService
+
+User = get_user_model()
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class InMemoryPresenceStoreTestCase(SimpleTestCase):
+    """Test cases for the in-memory presence store"""
+
+    def setUp(self):
+        self.store = InMemoryPresenceStore()
+
+    def test_connect_and_disconnect_track_online_users(self):
+        came_online = async_to_sync(self.store.connect)('room', 'u1', 'c1')
+        second_tab = async_to_sync(self.store.connect)('room', 'u1', 'c2')
+        still_online = not async_to_sync(self.store.disconnect)('room', 'u1', 'c1')
+        went_offline = async_to_sync(self.store.disconnect)('room', 'u1', 'c2')
+
+        self.assertTrue(came_online)
+        self.assertFalse(second_tab)
+        self.assertTrue(still_online)
+        self.assertTrue(went_offline)
+
+    def test_typing_reports_only_state_changes(self):
+        changes = [
+            async_to_sync(self.store.set_typing)('room', 'u1', True),
+            async_to_sync(self.store.set_typing)('room', 'u1', True),
+            async_to_sync(self.store.set_typing)('room', 'u1', False),
+        ]
+
+        self.assertEqual(changes, [True, False, True])
+
+    @override_settings(CHAT_TYPING_TTL=0, CHAT_PRESENCE_TTL=0)
+    def test_entries_expire(self):
+        async_to_sync(self.store.connect)('room', 'u1', 'c1')
+        async_to_sync(self.store.set_typing)('room', 'u1', True)
+
+        snapshot = async_to_sync(self.store.snapshot)('room')
+
+        self.assertEqual(snapshot, {'online': set(), 'typing': set()})
+
+    def test_broadcast_sends_diff_once(self):
+        service = PresenceService(self.store)
+        layer = InMemoryChannelLayer()
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add('chat_room', channel)
+            await self.store.connect('room', 'u1', 'c1')
+            await self.store.set_typing('room', 'u1', True)
+            await service.broadcast('room', layer, 'chat_room')
+            first = await layer.receive(channel)
+            await service.broadcast('room', layer, 'chat_room')
+            await self.store.set_typing('room', 'u1', False)
+            await service.broadcast('room', layer, 'chat_room')
+            second = await layer.receive(channel)
+            for _deadline, task in service._pending.values():
+                task.cancel()
+            return first, second
+
+        first, second = async_to_sync(scenario)()
+
+        self.assertEqual(first['diff']['online'], ['u1'])
+        self.assertEqual(first['diff']['typing'], ['u1'])
+        self.assertEqual(second['diff'], {
+            'online': [], 'offline': [], 'typing': [], 'stopped_typing': ['u1']
+        })
+
+
+class ChatHistoryServiceTestCase(TestCase):
+    """Test cases for keyset-paginated history and bulk read receipts"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='x')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='x')
+        self.room = ChatRoom.objects.create(name='Staff room', room_type='group')
+        self.room.members.add(self.alice, self.bob)
+        start = timezone.now() - timedelta(hours=1)
+        self.messages = []
+        for i in range(25):
+            message = ChatMessage.objects.create(room=self.room, sender=self.alice, content=f'm{i}')
+            self.messages.append(message)
+        # Give several messages the same timestamp so the id tiebreak matters
+        for i, message in enumerate(self.messages):
+            message.created_at = start + timedelta(seconds=i // 3)
+        ChatMessage.objects.bulk_update(self.messages, ['created_at'])
+        self.ordered = [str(m.pk) for m in sorted(self.messages, key=lambda m: (m.created_at, m.pk))]
+
+    def test_pages_walk_history_without_gaps_or_repeats(self):
+        seen = []
+        cursor = None
+        while True:
+            page = ChatHistoryService.page(self.room.pk, self.bob, before=cursor, limit=10)
+            seen = [m['id'] for m in page['messages']] + seen
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                break
+
+        self.assertEqual(seen, self.ordered)
+        self.assertIsNone(cursor)
+
+    def test_after_cursor_returns_newer_messages(self):
+        middle = ChatHistoryService.page(self.room.pk, self.bob, limit=25)['messages'][9]
+
+        page = ChatHistoryService.page(self.room.pk, self.bob, after=middle['cursor'], limit=100)
+
+        self.assertEqual([m['id'] for m in page['messages']], self.ordered[10:])
+
+    def test_page_embeds_read_state_in_constant_queries(self):
+        ChatHistoryService.mark_read(self.room.pk, self.bob, self.ordered[-5:])
+
+        with CaptureQueriesContext(connection) as queries:
+            page = ChatHistoryService.page(self.room.pk, self.bob, limit=10)
+
+        self.assertEqual(len(queries), 2)
+        read = [m['is_read'] for m in page['messages']]
+        self.assertEqual(read, [False] * 5 + [True] * 5)
+        self.assertEqual(page['messages'][-1]['read_count'], 1)
+
+    def test_mark_read_is_bulk_and_idempotent(self):
+        with CaptureQueriesContext(connection) as queries:
+            marked = ChatHistoryService.mark_read(self.room.pk, self.bob)
+
+        self.assertEqual(marked, 25)
+        self.assertLessEqual(len(queries), 2)
+        self.assertEqual(ChatHistoryService.mark_read(self.room.pk, self.bob), 0)
+        self.assertEqual(ReadReceipt.objects.filter(user_id=self.bob.pk).count(), 25)
+
+    def test_invalid_cursor_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+
+class NotificationFeedTestCase(TestCase):
+    """Test cases for the notification feed, scheduler and archiver"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.user = User.objects.create_user(username='carol', email='carol@example.com', password='x')
+        RealTimeNotification.objects.filter(recipient=self.user).delete()
+
+    def notify(self, title, **kwargs):
+        return RealTimeNotification.create_notification(
+            self.user, 'announcement', title, 'Body', **kwargs
+        )
+
+    def test_scheduled_notification_enters_feed_when_delivered(self):
+        now = timezone.now()
+        self.notify('Later', scheduled_for=now + timedelta(hours=1))
+        self.notify('Now')
+
+        self.assertEqual(NotificationFeed.unread_count(self.user), 1)
+        self.assertEqual(NotificationScheduler.deliver_due(now=now, push=False), 0)
+
+        delivered = NotificationScheduler.deliver_due(now=now + timedelta(hours=2), push=False)
+
+        self.assertEqual(delivered, 1)
+        self.assertEqual(NotificationFeed.unread_count(self.user), 2)
+        self.assertEqual(NotificationScheduler.deliver_due(now=now + timedelta(hours=2), push=False), 0)
+
+    def test_feed_pages_with_cursor_and_skips_expired(self):
+        for i in range(7):
+            self.notify(f'n{i}')
+        self.notify('Expired', expires_at=timezone.now() - timedelta(minutes=1))
+
+        first = NotificationFeed.page(self.user, limit=5)
+        second = NotificationFeed.page(self.user, before=first['next_cursor'], limit=5)
+
+        titles = [n['title'] for n in first['notifications'] + second['notifications']]
+        self.assertEqual(sorted(titles), [f'n{i}' for i in range(7)])
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+
+    def test_archive_then_purge_old_read_notifications(self):
+        old = [self.notify(f'old{i}') for i in range(5)]
+        recent = self.notify('recent')
+        unread_old = self.notify('unread old')
+        RealTimeNotification.objects.filter(pk__in=[n.pk for n in old]).update(is_read=True)
+        RealTimeNotification.objects.filter(pk__in=[n.pk for n in old] + [unread_old.pk]).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+
+        archived = NotificationArchiver.archive(retention_days=90, batch_size=2)
+
+        self.assertEqual(archived, 5)
+        feed_ids = {n['id'] for n in NotificationFeed.page(self.user, limit=50)['notifications']}
+        self.assertEqual(feed_ids, {str(recent.pk), str(unread_old.pk)})
+
+        purged = NotificationArchiver.purge(purge_days=365, batch_size=2)
+
+        self.assertEqual(purged, 5)
+        self.assertEqual(RealTimeNotification.objects.filter(recipient=self.user).count(), 2)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, CHAT_PRESENCE_DEBOUNCE=0.05)
+class ChatPresenceConsumerTestCase(TransactionTestCase):
+    """Presence and typing over the chat WebSocket"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='x')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='x')
+        self.room = ChatRoom.objects.create(name='Staff room', room_type='group')
+        self.room.members.add(self.alice, self.bob)
+        for user in (self.alice, self.bob):
+            ChatParticipant.objects.create(room=self.room, user=user)
+        presence._presence_service = None
+        self.application = AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def tearDown(self):
+        presence._presence_service = None
+
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(self.application, f'/ws/chat/{self.room.pk}/')
+        communicator.scope['user'] = user
+        return communicator
+
+    async def receive_type(self, communicator, frame_type):
+        while True:
+            frame = await communicator.receive_json_from(timeout=2)
+            if frame['type'] == frame_type:
+                return frame
+
+    def test_typing_is_broadcast_as_presence_diff(self):
+        async def scenario():
+            alice, bob = self.communicator(self.alice), self.communicator(self.bob)
+            self.assertTrue((await alice.connect())[0])
+            self.assertTrue((await bob.connect())[0])
+            history = await self.receive_type(bob, 'history')
+            snapshot = await self.receive_type(bob, 'presence')
+
+            for _ in range(5):
+                await alice.send_json_to({'type': 'typing_start'})
+            typing = await self.receive_type(bob, 'presence')
+            while str(self.alice.pk) not in typing['typing']:
+                typing = await self.receive_type(bob, 'presence')
+
+            await alice.send_json_to({'type': 'typing_stop'})
+            stopped = await self.receive_type(bob, 'presence')
+            while not stopped['stopped_typing']:
+                stopped = await self.receive_type(bob, 'presence')
+
+            await alice.disconnect()
+            offline = await self.receive_type(bob, 'presence')
+            while not offline['offline']:
+                offline = await self.receive_type(bob, 'presence')
+            await bob.disconnect()
+            await asyncio.sleep(0.1)
+            return history, snapshot, typing, stopped, offline
+
+        history, snapshot, typing, stopped, offline = async_to_sync(scenario)()
+
+        self.assertEqual(history['messages'], [])
+        self.assertFalse(history['has_more'])
+        self.assertTrue(snapshot['snapshot'])
+        self.assertIn(str(self.bob.pk), snapshot['online'])
+        self.assertEqual(typing['typing'], [str(self.alice.pk)])
+        self.assertEqual(stopped['stopped_typing'], [str(self.alice.pk)])
+        self.assertEqual(offline['offline'], [str(self.alice.pk)])
+
+    @override_settings(CHAT_PRESENCE_TTL=0.3)
+    def test_idle_connection_stays_online_past_ttl(self):
+        async def scenario():
+            alice = self.communicator(self.alice)
+            await alice.connect()
+            await self.receive_type(alice, 'presence')
+            await asyncio.sleep(1)
+            snapshot = await presence.get_presence_service().store.snapshot(str(self.room.pk))
+            await alice.send_json_to({'type': 'ping'})
+            pong = await self.receive_type(alice, 'pong')
+            await alice.disconnect()
+            return snapshot, pong
+
+        snapshot, pong = async_to_sync(scenario)()
+
+        self.assertEqual(snapshot['online'], {str(self.alice.pk)})
+        self.assertEqual(pong, {'type': 'pong'})
+
+    def test_last_seen_is_written_in_batches(self):
+        stale = timezone.now() - timedelta(days=1)
+        ChatParticipant.objects.filter(room=self.room).update(last_seen_at=stale)
+
+        async def scenario():
+            alice, bob = self.communicator(self.alice), self.communicator(self.bob)
+            await alice.connect()
+            await bob.connect()
+            await alice.disconnect()
+            await bob.disconnect()
+            return await presence.get_presence_service().maybe_flush(force=True)
+
+        with override_settings(CHAT_LAST_SEEN_FLUSH_INTERVAL=3600):
+            flushed = async_to_sync(scenario)()
+
+        self.assertEqual(flushed, 2)
+        for participant in ChatParticipant.objects.filter(room=self.room):
+            self.assertGreater(participant.last_seen_at, stale)
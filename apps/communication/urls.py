@@ -83,11 +83,11 @@ urlpatterns = [
 
     # Chat Rooms
     path('chat/', views.ChatRoomListView.as_view(), name='chat_room_list'),
-    path('chat/<int:pk>/', views.ChatRoomDetailView.as_view(), name='chat_room_detail'),
+    path('chat/<uuid:pk>/', views.ChatRoomDetailView.as_view(), name='chat_room_detail'),
     path('chat/create/', views.ChatRoomCreateView.as_view(), name='chat_room_create'),
 
     # Chat Messages (AJAX)
-    path('chat/<int:room_pk>/send/', views.send_chat_message, name='send_chat_message'),
-    path('chat/<int:room_pk>/messages/', views.get_chat_messages, name='get_chat_messages'),
-    path('chat/<int:room_pk>/mark-read/', views.mark_chat_messages_read, name='mark_chat_messages_read'),
+    path('chat/<uuid:room_pk>/send/', views.send_chat_message, name='send_chat_message'),
+    path('chat/<uuid:room_pk>/messages/', views.get_chat_messages, name='get_chat_messages'),
+    path('chat/<uuid:room_pk>/mark-read/', views.mark_chat_messages_read, name='mark_chat_messages_read'),
 ]
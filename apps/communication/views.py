@@ -19,6 +19,8 @@ from .models import (
     NotificationPreference, NotificationTemplate, ChatRoom, ChatMessage,
     ChatParticipant, TypingIndicator
 )
+from .feed import DEFAULT_FEED_SIZE, NotificationFeed
+from .history import DEFAULT_PAGE_SIZE, ChatHistoryService
 from apps.users.models import User
 from apps.academics.models import Class, Student
 
@@ -761,7 +763,7 @@ class ParentCalendarView(LoginRequiredMixin, View):
 
         # Get current session
         from apps.academics.models import AcademicSession, Holiday
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Get holidays for current session
         holidays = Holiday.objects.filter(
@@ -824,9 +826,7 @@ class NotificationListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        return RealTimeNotification.objects.filter(
-            recipient=self.request.user
-        ).order_by('-created_at')
+        return NotificationFeed.visible(self.request.user).order_by('-created_at', '-id')
 
 
 class UnreadNotificationListView(LoginRequiredMixin, ListView):
@@ -839,10 +839,7 @@ class UnreadNotificationListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        return RealTimeNotification.objects.filter(
-            recipient=self.request.user,
-            is_read=False
-        ).order_by('-created_at')
+        return NotificationFeed.visible(self.request.user, unread_only=True).order_by('-created_at', '-id')
 
 
 class NotificationDetailView(LoginRequiredMixin, DetailView):
@@ -955,51 +952,30 @@ class NotificationAPIView(LoginRequiredMixin, View):
         Get notifications with filtering and pagination
         """
         # Get filter parameters
-        notification_type = request.GET.get('type')
-        priority = request.GET.get('priority')
+        filters = {}
+        if request.GET.get('type'):
+            filters['notification_type'] = request.GET['type']
+        if request.GET.get('priority'):
+            filters['priority'] = request.GET['priority']
         is_read = request.GET.get('is_read')
-        page = request.GET.get('page', 1)
-
-        # Base queryset
-        notifications = RealTimeNotification.objects.filter(recipient=request.user)
-
-        # Apply filters
-        if notification_type:
-            notifications = notifications.filter(notification_type=notification_type)
-
-        if priority:
-            notifications = notifications.filter(priority=priority)
-
         if is_read is not None:
-            is_read_bool = is_read.lower() == 'true'
-            notifications = notifications.filter(is_read=is_read_bool)
-
-        # Order and paginate
-        notifications = notifications.order_by('-created_at')
-        paginator = Paginator(notifications, 20)
-        page_obj = paginator.get_page(page)
-
-        # Prepare response data
-        notifications_data = []
-        for notification in page_obj:
-            notifications_data.append({
-                'id': str(notification.id),
-                'title': notification.title,
-                'message': notification.message,
-                'type': notification.notification_type,
-                'priority': notification.priority,
-                'is_read': notification.is_read,
-                'created_at': notification.created_at.isoformat(),
-                'action_url': notification.action_url,
-            })
+            filters['is_read'] = is_read.lower() == 'true'
+
+        # Keyset page through the feed; pass next_cursor back as ?before=
+        try:
+            page = NotificationFeed.page(
+                request.user,
+                before=request.GET.get('before'),
+                limit=int(request.GET.get('limit', DEFAULT_FEED_SIZE)),
+                **filters
+            )
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
         return JsonResponse({
-            'notifications': notifications_data,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-            'current_page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_count': paginator.count,
+            'notifications': page['notifications'],
+            'next_cursor': page['next_cursor'],
+            'has_next': page['has_more'],
         })
 
 
@@ -1033,9 +1009,7 @@ class RealTimeNotificationListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        return RealTimeNotification.objects.filter(
-            recipient=self.request.user
-        ).order_by('-created_at')
+        return NotificationFeed.visible(self.request.user).order_by('-created_at', '-id')
 
 
 class RealTimeNotificationDetailView(LoginRequiredMixin, DetailView):
@@ -1200,34 +1174,25 @@ def send_chat_message(request, room_pk):
 @login_required
 def get_chat_messages(request, room_pk):
     """
-    Get messages for a chat room via AJAX
+    Get a page of messages for a chat room via AJAX.
+
+    Accepts ``before``/``after`` cursors and ``limit`` (see ChatHistoryService.page).
     """
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         room = get_object_or_404(ChatRoom, pk=room_pk, members=request.user)
 
-        # Get messages after a certain timestamp if provided
-        after_timestamp = request.GET.get('after')
-        if after_timestamp:
-            messages_queryset = room.messages.filter(created_at__gt=after_timestamp)
-        else:
-            messages_queryset = room.messages.all()
-
-        messages_data = []
-        for message in messages_queryset.order_by('created_at'):
-            messages_data.append({
-                'id': str(message.id),
-                'content': message.content,
-                'sender': message.sender.get_full_name(),
-                'sender_id': str(message.sender.id),
-                'created_at': message.created_at.isoformat(),
-                'message_type': message.message_type,
-                'is_edited': message.is_edited,
-            })
+        try:
+            page = ChatHistoryService.page(
+                room.pk,
+                request.user,
+                before=request.GET.get('before'),
+                after=request.GET.get('after'),
+                limit=int(request.GET.get('limit', DEFAULT_PAGE_SIZE)),
+            )
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
-        return JsonResponse({
-            'success': True,
-            'messages': messages_data
-        })
+        return JsonResponse({'success': True, **page})
 
     return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
 
@@ -1235,17 +1200,17 @@ def get_chat_messages(request, room_pk):
 @login_required
 def mark_chat_messages_read(request, room_pk):
     """
-    Mark all messages in a chat room as read for the current user
+    Mark messages in a chat room as read for the current user.
+
+    Marks the posted ``message_ids`` if given, otherwise every unread message.
     """
     if request.method == 'POST' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         room = get_object_or_404(ChatRoom, pk=room_pk, members=request.user)
 
-        # Mark all unread messages as read
-        unread_messages = room.messages.exclude(read_by=request.user)
-        for message in unread_messages:
-            message.read_by.add(request.user)
+        message_ids = request.POST.getlist('message_ids') or None
+        marked = ChatHistoryService.mark_read(room.pk, request.user, message_ids)
 
-        return JsonResponse({'success': True})
+        return JsonResponse({'success': True, 'marked': marked})
 
     return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
 
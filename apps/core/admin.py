@@ -3,7 +3,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import Permission
 from django.utils.translation import gettext_lazy as _
-from .models import (SystemConfig, SequenceGenerator)
+from .models import (SystemConfig, SequenceGenerator, DocumentBatch, ArchivedRecord)
 
 @admin.register(SystemConfig)
 class SystemConfigAdmin(admin.ModelAdmin):
@@ -67,6 +67,40 @@ class SequenceGeneratorAdmin(admin.ModelAdmin):
         return self.readonly_fields
 
 
+@admin.register(DocumentBatch)
+class DocumentBatchAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for rendered document batches and their progress.
+    """
+    list_display = ('name', 'document_type', 'output_format', 'state', 'completed', 'total', 'cached', 'created_at')
+    list_filter = ('state', 'document_type', 'output_format')
+    search_fields = ('name',)
+    readonly_fields = (
+        'name', 'document_type', 'output_format', 'state', 'total', 'completed', 'cached',
+        'output', 'error', 'requested_by', 'started_at', 'finished_at', 'created_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedRecord)
+class ArchivedRecordAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for rows moved out of hot tables by archive_records.
+    """
+    list_display = ('model', 'object_id', 'deleted_at', 'archived_at')
+    list_filter = ('model',)
+    search_fields = ('object_id',)
+    readonly_fields = ('model', 'object_id', 'data', 'deleted_at', 'archived_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Register Permission model if not already registered
 if not admin.site.is_registered(Permission):
     @admin.register(Permission)
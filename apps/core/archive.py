@@ -0,0 +1,112 @@
+"""
+Archival of long-deleted and closed rows.
+
+Soft-deleted rows stay in their tables, so the busiest tables keep growing
+with rows no page shows. :func:`archive` moves rows matching a policy into
+:class:`~apps.core.models.ArchivedRecord` in small batches, each in its own
+transaction, so the hot tables and their indexes only hold live data.
+
+A policy maps a model label to a function of the cutoff datetime returning
+the condition for rows to move. Rows that other rows still depend on through
+a cascading foreign key are never archived.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedRecord
+
+logger = logging.getLogger(__name__)
+
+
+def deleted_before(cutoff) -> Q:
+    """Rows soft-deleted before ``cutoff``."""
+    return Q(is_deleted=True) & (
+        Q(deleted_at__lt=cutoff) | Q(deleted_at__isnull=True, updated_at__lt=cutoff)
+    )
+
+
+POLICIES: Dict[str, Callable] = {
+    'attendance.DailyAttendance': lambda cutoff: (
+        deleted_before(cutoff)
+        & Q(period_attendances__isnull=True, exceptions__isnull=True)
+    ),
+    'audit.AuditLog': lambda cutoff: (
+        deleted_before(cutoff)
+        | Q(status='archived', status_changed_at__lt=cutoff)
+    ),
+    'communication.ChatMessage': lambda cutoff: (
+        deleted_before(cutoff)
+        | Q(room__is_active=False, created_at__lt=cutoff)
+    ),
+    'communication.RealTimeNotification': deleted_before,
+}
+
+
+def archive_cutoff(days: Optional[int] = None):
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 180)
+    return timezone.now() - timedelta(days=days)
+
+
+def pending(label: str, cutoff):
+    """Queryset of the rows of ``label`` its policy would archive."""
+    model = apps.get_model(label)
+    return model.all_objects.filter(POLICIES[label](cutoff))
+
+
+def archive_batch(label: str, cutoff, batch_size: int = 1000) -> int:
+    """
+    Move up to ``batch_size`` rows of ``label`` to the archive.
+
+    Returns:
+        The number of rows moved
+    """
+    model = apps.get_model(label)
+    pk_name = model._meta.pk.attname
+    with transaction.atomic():
+        pks = list(
+            pending(label, cutoff).order_by(pk_name).values_list(pk_name, flat=True).distinct()[:batch_size]
+        )
+        if not pks:
+            return 0
+        rows = model.all_objects.filter(pk__in=pks).values()
+        ArchivedRecord.objects.bulk_create([
+            ArchivedRecord(
+                model=label,
+                object_id=str(row[pk_name]),
+                data=row,
+                deleted_at=row.get('deleted_at'),
+            )
+            for row in rows
+        ])
+        model.all_objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def archive(labels: Optional[Iterable[str]] = None, days: Optional[int] = None,
+            batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Archive every row matching the policies of ``labels`` (default: all).
+
+    Returns:
+        Rows moved per model label
+    """
+    cutoff = archive_cutoff(days)
+    moved = {}
+    for label in labels or POLICIES:
+        moved[label] = 0
+        while True:
+            count = archive_batch(label, cutoff, batch_size)
+            moved[label] += count
+            if count < batch_size:
+                break
+        logger.info(f"Archived {moved[label]} {label} row(s) older than {cutoff:%Y-%m-%d}")
+    return moved
@@ -0,0 +1,158 @@
+"""
+Cache keys, namespaces and hit/miss counters.
+
+Cached values are grouped in namespaces (``'support'``,
+``'academics.calendar'``, ...). Each namespace has a version number in the
+shared cache and every key built by :func:`make_key` includes it, so
+:func:`invalidate` drops everything cached under a namespace, in every
+process, by bumping the version; the old entries simply age out. Models
+call :func:`invalidate` from their ``post_save``/``post_delete`` receivers.
+
+Two cache tiers are configured in ``settings.CACHES``:
+
+- ``default``: shared between processes (Redis or files in production,
+  process memory in development and tests);
+- ``local``: process memory, for small and hot values that depend only on
+  their key, such as rendered navigation menus.
+
+Lookups through :func:`get_or_set`, :func:`cache_view` and the ``{% cached %}``
+template tag are counted per namespace; :func:`stats` returns the counters
+of the current process.
+"""
+
+import hashlib
+import threading
+from collections import Counter
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.views.decorators.cache import cache_page
+
+LOCAL = 'local'
+
+_counts = Counter()
+_lock = threading.Lock()
+
+
+def get_cache(using: str = 'default'):
+    """The cache for tier ``using``, falling back to the default cache."""
+    return caches[using if using in settings.CACHES else 'default']
+
+
+def _version_key(namespace: str) -> str:
+    return f'{namespace}:version'
+
+
+def version(namespace: str) -> int:
+    """Current version of ``namespace`` in the shared cache."""
+    cache = get_cache()
+    current = cache.get(_version_key(namespace))
+    if current is None:
+        cache.add(_version_key(namespace), 1, None)
+        current = cache.get(_version_key(namespace), 1)
+    return current
+
+
+def make_key(namespace: str, *parts) -> str:
+    """
+    Versioned key for ``parts`` within ``namespace``.
+
+    Parts are hashed, so any values with a stable ``str()`` may be used.
+    """
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'{namespace}:v{version(namespace)}:{digest}'
+
+
+def _bump(namespace: str):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.add(_version_key(namespace), 1, None)
+
+
+def invalidate(namespace: str):
+    """Drop everything cached under ``namespace`` once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def record(namespace: str, hit: bool):
+    with _lock:
+        _counts[(namespace, 'hits' if hit else 'misses')] += 1
+
+
+def stats() -> Dict[str, Dict]:
+    """Hits, misses and hit rate per namespace, counted in this process."""
+    with _lock:
+        counts = dict(_counts)
+    result = {}
+    for namespace in sorted({namespace for namespace, _kind in counts}):
+        hits = counts.get((namespace, 'hits'), 0)
+        misses = counts.get((namespace, 'misses'), 0)
+        result[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+    return result
+
+
+def reset_stats():
+    with _lock:
+        _counts.clear()
+
+
+def default_timeout() -> int:
+    return getattr(settings, 'CACHE_DEFAULT_TIMEOUT', 300)
+
+
+def get_or_set(namespace: str, parts, compute: Callable, timeout: Optional[int] = None,
+               using: str = 'default'):
+    """
+    Cached value of ``compute()`` for ``parts`` within ``namespace``.
+
+    ``compute`` must not return None, which cannot be told apart from a miss.
+    """
+    cache = get_cache(using)
+    key = make_key(namespace, *parts)
+    value = cache.get(key)
+    record(namespace, value is not None)
+    if value is None:
+        value = compute()
+        cache.set(key, value, default_timeout() if timeout is None else timeout)
+    return value
+
+
+def cache_view(namespace: str, timeout: Optional[int] = None):
+    """
+    ``cache_page`` for a public view whose output depends on ``namespace``.
+
+    Responses are keyed by URL (and the headers they vary on) under the
+    current version of ``namespace``, so :func:`invalidate` also drops cached
+    pages. Only anonymous requests are cached: pages for signed-in users show
+    per-user counters and menus.
+    """
+    def decorator(view):
+        cached_views = {}
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            prefix = f'{namespace}.v{version(namespace)}'
+            cached = cached_views.get(prefix)
+            if cached is None:
+                cached_views.clear()
+                cached = cached_views[prefix] = cache_page(
+                    default_timeout() if timeout is None else timeout, key_prefix=prefix
+                )(view)
+            response = cached(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # CacheMiddleware marks requests it could not answer from the cache
+                record(namespace, not getattr(request, '_cache_update_cache', False))
+            return response
+        return wrapped
+    return decorator
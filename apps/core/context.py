@@ -0,0 +1,205 @@
+"""
+Request context shared by audit logging, tenancy and instrumentation.
+
+The user, client IP, user agent, institution and a request id of the
+request (or WebSocket connection) being served live in a
+:class:`~contextvars.ContextVar`, not in thread-locals. Context variables
+follow the work wherever it runs: into ``sync_to_async`` and
+``database_sync_to_async`` threads, into tasks started from an async view,
+and into thread pools started with :func:`contextvars.copy_context`.
+Thread-locals are lost or, with a reused worker thread, leak into the next
+request.
+
+- :class:`RequestContextMiddleware` (HTTP, sync and async) and
+  :class:`RequestContextASGIMiddleware` (Channels) set the context for each
+  request and connection, and reset it afterwards.
+- :func:`get_context` returns it anywhere below them, or None.
+- :func:`request_context` sets one for a block, e.g. in a management
+  command or a test.
+
+The request id is taken from a valid ``X-Request-ID`` header, or generated,
+and sent back in the ``X-Request-ID`` response header so log lines and audit
+rows of one request can be correlated.
+"""
+
+import logging
+import re
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+_current: ContextVar[Optional['RequestContext']] = ContextVar('request_context', default=None)
+
+
+class RequestContext:
+    """
+    What audit logging, tenancy and logging need to know about a request.
+
+    Attributes:
+        request_id: Correlation id of the request, None for a context not
+            tied to a request
+        user: The user, possibly a lazy object, or None. For HTTP requests
+            it is read from the request when first needed, so the context
+            can be set before AuthenticationMiddleware runs
+        ip_address: Client IP address
+        user_agent: Client user agent
+        institution: The institution being served, or None
+    """
+
+    def __init__(self, request_id: Optional[str] = None, user=None, ip_address: Optional[str] = None,
+                 user_agent: str = '', institution=None, request=None):
+        self.request_id = request_id
+        self._user = user
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.institution = institution
+        self.request = request
+
+    def __repr__(self):
+        return f'<RequestContext {self.request_id}>'
+
+    @property
+    def user(self):
+        if self._user is None and self.request is not None:
+            return getattr(self.request, 'user', None)
+        return self._user
+
+    @user.setter
+    def user(self, user):
+        self._user = user
+
+    @property
+    def authenticated_user(self):
+        """The user if they are signed in, else None."""
+        user = self.user
+        return user if user is not None and getattr(user, 'is_authenticated', False) else None
+
+    @classmethod
+    def from_request(cls, request) -> 'RequestContext':
+        """Context of a Django HttpRequest."""
+        return cls(
+            request_id=_request_id(request.headers.get(REQUEST_ID_HEADER)),
+            ip_address=client_ip(request.META.get('HTTP_X_FORWARDED_FOR'), request.META.get('REMOTE_ADDR')),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            institution=getattr(request, 'institution', None),
+            request=request,
+        )
+
+    @classmethod
+    def from_scope(cls, scope) -> 'RequestContext':
+        """Context of an ASGI (Channels) connection scope."""
+        headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope.get('headers', [])}
+        client = scope.get('client') or (None, None)
+        return cls(
+            request_id=_request_id(headers.get(REQUEST_ID_HEADER.lower())),
+            user=scope.get('user'),
+            ip_address=client_ip(headers.get('x-forwarded-for'), client[0]),
+            user_agent=headers.get('user-agent', ''),
+        )
+
+
+def _request_id(value: Optional[str]) -> str:
+    # Ids from clients end up in logs and headers; replace anything unusual
+    return value if value and _REQUEST_ID.match(value) else uuid.uuid4().hex
+
+
+def client_ip(forwarded_for: Optional[str], remote_addr: Optional[str]) -> Optional[str]:
+    """The client IP: the first X-Forwarded-For address, else the peer address."""
+    if forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr
+
+
+def get_context() -> Optional[RequestContext]:
+    """The context of the request being served, or None outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def request_context(context: Optional[RequestContext] = None, **values):
+    """
+    Make ``context`` (or a new RequestContext built from ``values``) current
+    for the block.
+    """
+    context = context or RequestContext(**values)
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def set_institution(institution):
+    """
+    Set the institution of the current context. Outside a request this
+    starts a context without a request id, which setting the institution
+    back to None ends.
+    """
+    context = _current.get()
+    if context is None:
+        if institution is not None:
+            _current.set(RequestContext(institution=institution))
+    elif institution is None and context.request_id is None:
+        _current.set(None)
+    else:
+        context.institution = institution
+
+
+class RequestContextMiddleware:
+    """
+    Set the request context for each HTTP request, in sync and async stacks.
+
+    Listed first, so the context covers the other middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_context(RequestContext.from_request(request)) as context:
+            response = self.get_response(request)
+        response[REQUEST_ID_HEADER] = context.request_id
+        return response
+
+    async def __acall__(self, request):
+        with request_context(RequestContext.from_request(request)) as context:
+            response = await self.get_response(request)
+        response[REQUEST_ID_HEADER] = context.request_id
+        return response
+
+
+class RequestContextASGIMiddleware:
+    """
+    Set the request context for each Channels connection. Wrap it inside
+    AuthMiddlewareStack so the scope's user is resolved first.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        with request_context(RequestContext.from_scope(scope)):
+            return await self.inner(scope, receive, send)
+
+
+class RequestContextFilter(logging.Filter):
+    """Add ``request_id`` to log records ('-' outside a request)."""
+
+    def filter(self, record):
+        context = _current.get()
+        record.request_id = (context.request_id if context else None) or '-'
+        return True
@@ -0,0 +1,321 @@
+"""
+PDF document rendering.
+
+Documents (receipts, report cards, ...) are drawn with ReportLab from a
+:class:`DocumentTemplate` subclass and a plain-data payload that the calling
+app builds with batched queries. Rendering never touches the database, so
+:meth:`DocumentRenderer.render_many` can farm it out to a process pool.
+
+Output is cached in default storage under a hash of the template name,
+template version and payload. A document is only re-rendered when something
+printed on it changes, e.g. a result is re-computed or a payment is updated.
+Batches can be bundled into a ZIP archive or a single merged PDF, and record
+their progress on a :class:`~apps.core.models.DocumentBatch`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PAGE_MARGIN = 50
+
+
+class Document(NamedTuple):
+    """One document to render: template dotted path, payload and file name."""
+    template: str
+    payload: Dict
+    filename: str
+
+
+class DocumentTemplate:
+    """
+    Base class for PDF layouts.
+
+    Subclasses set ``name`` and ``version`` (bump it whenever the layout
+    changes, so cached files are re-rendered) and implement :meth:`draw`.
+    """
+
+    name = 'document'
+    version = 1
+    title = ''
+
+    def __init__(self, canvas):
+        from reportlab.lib.pagesizes import A4
+
+        self.canvas = canvas
+        self.width, self.height = A4
+        self.y = self.height - PAGE_MARGIN
+
+    @classmethod
+    def render(cls, payload: Dict) -> bytes:
+        """Draw ``payload`` and return the PDF bytes."""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen.canvas import Canvas
+
+        buffer = BytesIO()
+        canvas = Canvas(buffer, pagesize=A4, pageCompression=1, invariant=1)
+        canvas.setTitle(payload.get('title') or cls.title)
+        cls(canvas).draw(payload)
+        canvas.showPage()
+        canvas.save()
+        return buffer.getvalue()
+
+    def draw(self, payload: Dict):
+        raise NotImplementedError
+
+    # Layout helpers
+
+    def ensure_space(self, height: float):
+        if self.y - height < PAGE_MARGIN:
+            self.canvas.showPage()
+            self.y = self.height - PAGE_MARGIN
+
+    def heading(self, institution: str, title: str, subtitle: str = ''):
+        self.canvas.setFont('Helvetica-Bold', 16)
+        self.canvas.drawCentredString(self.width / 2, self.y, institution)
+        self.y -= 22
+        self.canvas.setFont('Helvetica-Bold', 13)
+        self.canvas.drawCentredString(self.width / 2, self.y, title)
+        if subtitle:
+            self.y -= 16
+            self.canvas.setFont('Helvetica', 10)
+            self.canvas.drawCentredString(self.width / 2, self.y, subtitle)
+        self.y -= 12
+        self.canvas.line(PAGE_MARGIN, self.y, self.width - PAGE_MARGIN, self.y)
+        self.y -= 20
+
+    def fields(self, rows: Iterable, columns: int = 2):
+        """Label/value pairs laid out in ``columns`` columns."""
+        rows = list(rows)
+        column_width = (self.width - 2 * PAGE_MARGIN) / columns
+        for start in range(0, len(rows), columns):
+            self.ensure_space(16)
+            for offset, (label, value) in enumerate(rows[start:start + columns]):
+                x = PAGE_MARGIN + offset * column_width
+                self.canvas.setFont('Helvetica-Bold', 9)
+                self.canvas.drawString(x, self.y, f'{label}:')
+                self.canvas.setFont('Helvetica', 9)
+                self.canvas.drawString(x + 90, self.y, str(value))
+            self.y -= 16
+        self.y -= 6
+
+    def table(self, headers: List[str], rows: Iterable, widths: List[float]):
+        """A ruled table; ``widths`` are fractions of the printable width."""
+        printable = self.width - 2 * PAGE_MARGIN
+        offsets = [PAGE_MARGIN]
+        for fraction in widths[:-1]:
+            offsets.append(offsets[-1] + fraction * printable)
+
+        def line(values, font):
+            self.ensure_space(18)
+            self.canvas.setFont(font, 9)
+            for x, value in zip(offsets, values):
+                self.canvas.drawString(x + 3, self.y, str(value))
+            self.y -= 5
+            self.canvas.line(PAGE_MARGIN, self.y, PAGE_MARGIN + printable, self.y)
+            self.y -= 12
+
+        line(headers, 'Helvetica-Bold')
+        for row in rows:
+            line(row, 'Helvetica')
+        self.y -= 8
+
+    def paragraph(self, label: str, text: str, width: int = 100):
+        if not text:
+            return
+        self.ensure_space(30)
+        self.canvas.setFont('Helvetica-Bold', 9)
+        self.canvas.drawString(PAGE_MARGIN, self.y, f'{label}:')
+        self.y -= 14
+        self.canvas.setFont('Helvetica', 9)
+        words, current = text.split(), ''
+        for word in words:
+            if len(current) + len(word) + 1 > width:
+                self.ensure_space(12)
+                self.canvas.drawString(PAGE_MARGIN, self.y, current)
+                self.y -= 12
+                current = word
+            else:
+                current = f'{current} {word}'.strip()
+        if current:
+            self.ensure_space(12)
+            self.canvas.drawString(PAGE_MARGIN, self.y, current)
+            self.y -= 12
+        self.y -= 8
+
+    def footer(self, text: str):
+        self.canvas.setFont('Helvetica-Oblique', 8)
+        self.canvas.drawCentredString(self.width / 2, PAGE_MARGIN / 2, text)
+
+
+def _init_worker():
+    # Workers started with spawn/forkserver import templates from scratch
+    import django
+    django.setup()
+
+
+def _render(task):
+    template, payload = task
+    return import_string(template).render(payload)
+
+
+class DocumentRenderer:
+    """
+    Renders documents with output caching, in a process pool for batches.
+    """
+
+    @staticmethod
+    def digest(document: Document) -> str:
+        """Content hash identifying the rendered output of a document."""
+        template = import_string(document.template)
+        content = json.dumps(
+            {'template': template.name, 'version': template.version, 'payload': document.payload},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def cache_path(cls, document: Document) -> str:
+        template = import_string(document.template)
+        prefix = getattr(settings, 'DOCUMENT_CACHE_DIR', 'documents/cache')
+        digest = cls.digest(document)
+        return f'{prefix}/{template.name}/{digest[:2]}/{digest}.pdf'
+
+    @classmethod
+    def render(cls, document: Document) -> bytes:
+        """Render a single document, reusing the cached file if there is one."""
+        path = cls.cache_path(document)
+        if default_storage.exists(path):
+            with default_storage.open(path, 'rb') as cached:
+                return cached.read()
+        content = _render((document.template, document.payload))
+        default_storage.save(path, ContentFile(content))
+        return content
+
+    @classmethod
+    def render_many(cls, documents: List[Document], workers: Optional[int] = None,
+                    progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        Render documents into the cache.
+
+        Args:
+            documents: Documents to render
+            workers: Processes to render with (``DOCUMENT_RENDER_WORKERS``
+                by default; 1 renders in this process)
+            progress: Called as ``progress(done, cached)`` after each chunk
+
+        Returns:
+            Storage paths of the rendered files, in the order given
+        """
+        paths = [cls.cache_path(document) for document in documents]
+        missing = [
+            (document, path) for document, path in zip(documents, paths)
+            if not default_storage.exists(path)
+        ]
+        cached = len(documents) - len(missing)
+        done = cached
+        if progress:
+            progress(done, cached)
+        if not missing:
+            return paths
+
+        workers = workers or getattr(settings, 'DOCUMENT_RENDER_WORKERS', None) or os.cpu_count() or 1
+        tasks = [(document.template, document.payload) for document, _path in missing]
+        chunk = max(1, min(50, len(tasks) // (workers * 4) or 1))
+
+        def store(rendered):
+            nonlocal done
+            for (_document, path), content in zip(missing, rendered):
+                default_storage.save(path, ContentFile(content))
+                done += 1
+                if progress and done % chunk == 0:
+                    progress(done, cached)
+
+        if workers == 1:
+            store(map(_render, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                store(pool.map(_render, tasks, chunksize=chunk))
+        if progress:
+            progress(done, cached)
+        return paths
+
+    @staticmethod
+    def bundle(documents: List[Document], paths: List[str], output_format: str, name: str) -> str:
+        """
+        Combine rendered files into one ZIP or merged PDF in default storage.
+
+        The bundle is assembled in a temporary file and streamed to storage,
+        so it is never held in memory as a whole.
+
+        Returns:
+            Storage path of the bundle
+        """
+        with tempfile.TemporaryFile() as output:
+            if output_format == 'pdf':
+                from pypdf import PdfWriter
+
+                writer = PdfWriter()
+                for path in paths:
+                    with default_storage.open(path, 'rb') as part:
+                        writer.append(BytesIO(part.read()))
+                writer.write(output)
+                extension = 'pdf'
+            else:
+                # Pages are already compressed, so store without deflating
+                with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+                    for document, path in zip(documents, paths):
+                        with default_storage.open(path, 'rb') as part:
+                            archive.writestr(document.filename, part.read())
+                extension = 'zip'
+            output.seek(0)
+            return default_storage.save(f'documents/batches/{name}.{extension}', File(output))
+
+    @classmethod
+    def run_batch(cls, batch, documents: List[Document], workers: Optional[int] = None):
+        """
+        Render ``documents`` and bundle them, recording progress on ``batch``.
+
+        Args:
+            batch: DocumentBatch to update
+            documents: Documents in bundle order
+            workers: Processes to render with
+
+        Returns:
+            The updated batch
+        """
+        from .models import DocumentBatch
+
+        batches = DocumentBatch.objects.filter(pk=batch.pk)
+        batches.update(state=DocumentBatch.State.RUNNING, total=len(documents), started_at=timezone.now())
+
+        def progress(done, cached):
+            batches.update(completed=done, cached=cached)
+
+        try:
+            paths = cls.render_many(documents, workers=workers, progress=progress)
+            output = cls.bundle(documents, paths, batch.output_format, f'{batch.name}-{batch.pk}')
+        except Exception as e:
+            logger.error(f"Document batch {batch.pk} failed: {e}")
+            batches.update(state=DocumentBatch.State.FAILED, error=str(e), finished_at=timezone.now())
+            raise
+        batches.update(state=DocumentBatch.State.DONE, output=output, finished_at=timezone.now())
+        batch.refresh_from_db()
+        logger.info(f"Document batch {batch.name}: {batch.completed} rendered ({batch.cached} cached)")
+        return batch
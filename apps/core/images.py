@@ -0,0 +1,266 @@
+"""
+Responsive image variants.
+
+Large images are re-encoded as WebP (and AVIF where Pillow supports it) at a
+few sizes so browsers can pick the smallest file that fits:
+
+- static images get one variant per ``IMAGE_VARIANT_WIDTHS`` entry, generated
+  by :class:`apps.core.static_storage.VariantStaticFilesStorage` during
+  ``collectstatic`` and listed in an index file next to the static manifest;
+- uploaded pictures get square thumbnails per ``IMAGE_UPLOAD_SIZES``,
+  generated in a background thread after the upload is committed (or by the
+  ``backfill_image_variants`` command for existing files).
+
+Variant names are derived from the original name
+(``images/Banner.png`` -> ``images/Banner.w640.webp``), so templates can build
+``srcset`` attributes with the ``responsive_images`` tags without querying
+the database.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Written next to the static manifest by VariantStaticFilesStorage
+VARIANTS_INDEX_NAME = 'image-variants.json'
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+ENCODER_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 60, 'speed': 6},
+}
+
+
+def variant_formats() -> Tuple[str, ...]:
+    """Configured output formats this Pillow build can encode, best first."""
+    from PIL import features
+
+    formats = getattr(settings, 'IMAGE_VARIANT_FORMATS', ('avif', 'webp'))
+    return tuple(fmt for fmt in formats if fmt in ENCODER_OPTIONS and features.check(fmt))
+
+
+def variant_name(name: str, width: int, fmt: str) -> str:
+    """Storage name of the ``width`` pixel ``fmt`` variant of ``name``."""
+    root, _extension = os.path.splitext(name)
+    return f'{root}.w{width}.{fmt}'
+
+
+def encode(image, fmt: str) -> bytes:
+    buffer = BytesIO()
+    if fmt == 'avif' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    image.save(buffer, **ENCODER_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def _open(file):
+    from PIL import Image, ImageOps
+
+    image = Image.open(file)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+    return image
+
+
+def resized_variants(file, widths: Iterable[int], formats: Iterable[str]) -> Dict[str, Dict[int, bytes]]:
+    """
+    Encode an image at each of ``widths``, keeping its aspect ratio.
+
+    Widths above the original are dropped and replaced by the original
+    width, so an image is never upscaled.
+
+    Returns:
+        ``{format: {width: content}}``
+    """
+    from PIL import Image
+
+    image = _open(file)
+    targets = sorted({min(width, image.width) for width in widths})
+    output = {fmt: {} for fmt in formats}
+    for width in targets:
+        if width == image.width:
+            resized = image
+        else:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            output[fmt][width] = encode(resized, fmt)
+    return output
+
+
+def thumbnail_variants(file, sizes: Iterable[int], formats: Iterable[str]) -> Dict[str, Dict[int, bytes]]:
+    """Encode centre-cropped square thumbnails, ``{format: {size: content}}``."""
+    from PIL import Image, ImageOps
+
+    image = _open(file)
+    output = {fmt: {} for fmt in formats}
+    for size in sorted(set(sizes)):
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            output[fmt][size] = encode(thumbnail, fmt)
+    return output
+
+
+def replace_file(storage, name: str, content: bytes):
+    # Storage.save() would pick a new name instead of overwriting
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+# Static images
+
+@lru_cache(maxsize=1)
+def static_variants() -> Dict:
+    """The variants index written at collectstatic, or ``{}`` without one."""
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    try:
+        with staticfiles_storage.open(VARIANTS_INDEX_NAME) as index:
+            return json.loads(index.read().decode())
+    except (OSError, ValueError):
+        return {}
+
+
+def static_srcset(name: str, fmt: str) -> List[Tuple[int, str]]:
+    """``(width, url)`` pairs for a static image's variants in ``fmt``."""
+    from django.templatetags.static import static
+
+    entry = static_variants().get(name)
+    if not entry:
+        return []
+    return [(width, static(variant_name(name, width, fmt))) for width in entry.get(fmt, [])]
+
+
+# Uploaded images
+
+_available = set()
+_executor = None
+_executor_pid = None
+
+
+def upload_sizes() -> Tuple[int, ...]:
+    return tuple(sorted(getattr(settings, 'IMAGE_UPLOAD_SIZES', (48, 96, 192))))
+
+
+def generate_upload_variants(name: str, storage=None) -> List[str]:
+    """
+    Write thumbnail variants of an uploaded image.
+
+    Returns:
+        Storage names written; empty if the file is missing or unreadable
+    """
+    storage = storage or default_storage
+    formats = variant_formats()
+    try:
+        with storage.open(name, 'rb') as source:
+            encoded = thumbnail_variants(source, upload_sizes(), formats)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not create image variants for {name}: {e}")
+        return []
+
+    written = []
+    for fmt in formats:
+        for size, data in encoded[fmt].items():
+            variant = variant_name(name, size, fmt)
+            replace_file(storage, variant, data)
+            written.append(variant)
+    _available.update(written)
+    return written
+
+
+def upload_variants_exist(name: str, storage=None) -> bool:
+    storage = storage or default_storage
+    return all(
+        storage.exists(variant_name(name, size, fmt))
+        for fmt in variant_formats() for size in upload_sizes()
+    )
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2) or 1,
+            thread_name_prefix='image-variants',
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def schedule_upload_variants(name: str):
+    """
+    Generate an upload's variants once the current transaction commits.
+
+    The work runs in a background thread so the request that saved the file
+    is not held up; with ``IMAGE_VARIANT_WORKERS = 0`` it runs inline.
+    """
+    def run():
+        if getattr(settings, 'IMAGE_VARIANT_WORKERS', 2) == 0:
+            generate_upload_variants(name)
+        else:
+            _get_executor().submit(generate_upload_variants, name)
+
+    transaction.on_commit(run)
+
+
+def _variant_available(name: str, storage) -> bool:
+    # Only positive lookups are remembered: variants of a fresh upload appear
+    # a moment after it is saved
+    if name in _available:
+        return True
+    if storage.exists(name):
+        if len(_available) > 10000:
+            _available.clear()
+        _available.add(name)
+        return True
+    return False
+
+
+def upload_srcset(name: str, fmt: str, storage=None) -> List[Tuple[int, str]]:
+    """``(size, url)`` pairs for an upload's thumbnails that exist in ``fmt``."""
+    storage = storage or default_storage
+    variants = [(size, variant_name(name, size, fmt)) for size in upload_sizes()]
+    return [(size, storage.url(variant)) for size, variant in variants if _variant_available(variant, storage)]
+
+
+def thumbnail_url(name: Optional[str], size: int = 96, storage=None) -> Optional[str]:
+    """
+    URL of the smallest WebP thumbnail at least ``size`` pixels wide.
+
+    Falls back to the original upload until its variants have been generated.
+    """
+    if not name:
+        return None
+    storage = storage or default_storage
+    for width in upload_sizes():
+        if width >= size:
+            variant = variant_name(name, width, 'webp')
+            if 'webp' in variant_formats() and _variant_available(variant, storage):
+                return storage.url(variant)
+            break
+    return storage.url(name)
+
+
+@receiver(setting_changed)
+def _reset_caches(setting, **kwargs):
+    if setting in ('STORAGES', 'STATIC_ROOT', 'STATIC_URL', 'MEDIA_ROOT', 'MEDIA_URL'):
+        static_variants.cache_clear()
+        _available.clear()
@@ -0,0 +1,140 @@
+"""
+Import-time profiling of the Django process.
+
+:func:`profile` starts a fresh interpreter with ``python -X importtime``,
+brings Django up to one of the :data:`TARGETS` (settings and apps loaded,
+URLconf loaded, or the ASGI application built) and parses the report
+Python writes to stderr. Each :class:`ImportRecord` knows which module
+imported it, so a heavy third-party package can be traced back to the
+project module that pulled it in.
+
+Used by the ``profile_imports`` command and ``benchmarks/bench_startup.py``.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# What a worker or a management command loads before it can do any work
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'urls': (
+        'import django; django.setup(); '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+    'asgi': 'import config.asgi',
+}
+
+FIRST_PARTY = ('apps', 'config')
+
+# Heavy optional dependencies that must only be imported where they are
+# used. requests is not listed: Django REST framework imports it anyway.
+LAZY_PACKAGES = ('numpy', 'openpyxl', 'pandas', 'psutil')
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+class ImportRecord:
+    """
+    One module in an import-time report.
+
+    Attributes:
+        name: Dotted module name
+        self_us: Time spent in the module's own body, in microseconds
+        cumulative_us: Time including the modules it imported
+        parent: The record of the module that imported it, or None
+    """
+
+    def __init__(self, name: str, self_us: int, cumulative_us: int, level: int):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.level = level
+        self.parent: Optional['ImportRecord'] = None
+
+    def __repr__(self):
+        return f'<ImportRecord {self.name} {self.cumulative_us}us>'
+
+    @property
+    def package(self) -> str:
+        return self.name.split('.')[0]
+
+    @property
+    def is_first_party(self) -> bool:
+        return self.package in FIRST_PARTY
+
+    def imported_by(self) -> Optional['ImportRecord']:
+        """The nearest project module above this one, if any."""
+        record = self.parent
+        while record is not None and not record.is_first_party:
+            record = record.parent
+        return record
+
+
+def parse(report: str) -> List[ImportRecord]:
+    """
+    Records of an ``-X importtime`` report, in the order they finished
+    importing. Lines that are not part of the report are ignored.
+    """
+    records = []
+    # Children finish (and are printed) before their parent, one level deeper
+    waiting: List[ImportRecord] = []
+    for line in report.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        record = ImportRecord(name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+        while waiting and waiting[-1].level > record.level:
+            waiting.pop().parent = record
+        waiting.append(record)
+        records.append(record)
+    return records
+
+
+def profile(target: str = 'urls', settings_module: Optional[str] = None) -> List[ImportRecord]:
+    """
+    Import ``target`` (a key of :data:`TARGETS`) in a new interpreter.
+
+    Raises:
+        RuntimeError: If the interpreter exits with an error
+    """
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = (
+        settings_module or os.environ.get('DJANGO_SETTINGS_MODULE') or 'config.development'
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', TARGETS[target]],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f'Importing {target} failed:\n{result.stderr[-2000:]}')
+    return parse(result.stderr)
+
+
+def heaviest(records: List[ImportRecord], limit: int = 20, by: str = 'cumulative') -> List[ImportRecord]:
+    """The ``limit`` slowest modules, by ``'cumulative'`` or ``'self'`` time."""
+    key = (lambda r: r.cumulative_us) if by == 'cumulative' else (lambda r: r.self_us)
+    return sorted(records, key=key, reverse=True)[:limit]
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, int]:
+    """Own import time of every top-level package, in microseconds, slowest first."""
+    totals = defaultdict(int)
+    for record in records:
+        totals[record.package] += record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def entry_points(records: List[ImportRecord], package: str) -> List[ImportRecord]:
+    """The outermost imports of ``package``: where it first got pulled in."""
+    return [
+        record for record in records
+        if record.package == package and (record.parent is None or record.parent.package != package)
+    ]
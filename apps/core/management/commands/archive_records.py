@@ -0,0 +1,60 @@
+"""
+Management command to move long-deleted and closed rows to the archive.
+
+Soft-deleted attendance, notifications, chat messages and audit entries,
+archived audit entries and messages of closed chat rooms are copied to
+ArchivedRecord and removed from their tables once they are older than
+--days (ARCHIVE_AFTER_DAYS by default). Rows are moved in batches of
+--batch-size, one transaction per batch, so the command can run alongside
+normal traffic.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.archive import POLICIES, archive, archive_cutoff, pending
+
+
+class Command(BaseCommand):
+    help = 'Move long-deleted and closed rows out of hot tables into the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Archive rows deleted or closed more than this many days ago (default: ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows moved per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=sorted(POLICIES),
+            dest='models',
+            help='Only archive this model; may be repeated',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the rows that would be archived without moving them',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        labels = options['models'] or list(POLICIES)
+
+        if options['dry_run']:
+            cutoff = archive_cutoff(options['days'])
+            for label in labels:
+                count = pending(label, cutoff).values('pk').distinct().count()
+                self.stdout.write(f'{label}: {count} row(s) would be archived')
+            return
+
+        moved = archive(labels, days=options['days'], batch_size=options['batch_size'])
+        for label, count in moved.items():
+            self.stdout.write(f'{label}: {count} row(s) archived')
+        self.stdout.write(self.style.SUCCESS(f'Archived {sum(moved.values())} row(s).'))
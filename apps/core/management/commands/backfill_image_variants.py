@@ -0,0 +1,59 @@
+"""
+Management command to create thumbnail variants for existing uploads.
+
+New profile pictures get their WebP/AVIF thumbnails in the background when
+they are saved; this covers pictures uploaded before that, or whose variants
+were lost. Pictures that already have every variant are skipped unless
+--force is given. Static images get their variants from collectstatic.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.core.images import generate_upload_variants, upload_variants_exist
+from apps.users.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/AVIF thumbnails for existing profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-encode pictures that already have variants',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Encoding threads (default: 2)',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            UserProfile.objects.exclude(profile_picture__isnull=True).exclude(profile_picture='')
+            .values_list('profile_picture', flat=True).iterator(chunk_size=500)
+        )
+        pending = [
+            name for name in names
+            if options['force'] or not upload_variants_exist(name, default_storage)
+        ]
+        if not pending:
+            self.stdout.write('All profile pictures already have variants.')
+            return
+
+        created = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            for name, written in zip(pending, pool.map(generate_upload_variants, pending)):
+                if written:
+                    created += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f'Skipped {name}: missing or not an image')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created variants for {created} profile picture(s); {failed} skipped.'
+        ))
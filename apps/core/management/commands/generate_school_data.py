@@ -0,0 +1,59 @@
+"""
+Management command to generate a synthetic school for load testing.
+
+Creates --students students (with teachers, classes, subject assignments,
+--days school days of attendance, exams and marks, invoices, library loans
+and class chat rooms) in the current academic session, using bulk inserts.
+Usernames, codes and invoice numbers start with --prefix; users sign in with
+the password "synthetic". Meant for development and benchmark databases,
+never production.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.synthetic import PASSWORD, SchoolGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic school (students, attendance, marks, invoices, loans, chats)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500, help='Number of students (default: 500)')
+        parser.add_argument('--teachers', type=int, help='Number of teachers (default: one per 20 students)')
+        parser.add_argument('--classes', type=int, help='Number of classes (default: one per 30 students)')
+        parser.add_argument('--days', type=int, default=20, help='School days of attendance (default: 20)')
+        parser.add_argument('--exams', type=int, default=2, help='Exams per class (default: 2)')
+        parser.add_argument('--loans', type=float, default=0.3,
+                            help='Share of students with a book on loan (default: 0.3)')
+        parser.add_argument('--messages', type=int, default=50, help='Chat messages per class (default: 50)')
+        parser.add_argument('--prefix', default='syn', help='Prefix of usernames and codes (default: syn)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT (default: 1000)')
+        parser.add_argument('--force', action='store_true', help='Run even when DEBUG is off')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Refusing to generate synthetic data with DEBUG off; use --force')
+        if options['students'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--students and --batch-size must be at least 1')
+
+        generator = SchoolGenerator(
+            students=options['students'], teachers=options['teachers'], classes=options['classes'],
+            days=options['days'], exams=options['exams'], loans=options['loans'],
+            messages=options['messages'], prefix=options['prefix'], seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        start = time.perf_counter()
+        counts = generator.generate()
+        elapsed = time.perf_counter() - start
+
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total} rows in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} rows/s). '
+            f'Users sign in as {options["prefix"]}-student-0 etc. with password "{PASSWORD}".'
+        ))
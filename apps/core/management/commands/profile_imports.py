@@ -0,0 +1,51 @@
+"""
+Management command to report the modules that slow down process startup.
+
+Imports the chosen target (django.setup(), the URLconf, or the ASGI
+application) in a fresh interpreter with ``python -X importtime`` and lists
+the heaviest modules, or with --packages the heaviest top-level packages
+and the project module that first imported each of them.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.importtime import TARGETS, by_package, entry_points, heaviest, profile
+
+
+class Command(BaseCommand):
+    help = 'Report the slowest imports at process startup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='urls',
+                            help='What to import (default: urls)')
+        parser.add_argument('--limit', type=int, default=20, help='Rows to show (default: 20)')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative',
+                            help='Order modules by time including their imports, or their own (default: cumulative)')
+        parser.add_argument('--packages', action='store_true',
+                            help='Group by top-level package and show where each was first imported')
+
+    def handle(self, *args, **options):
+        try:
+            records = profile(options['target'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if options['packages']:
+            for package, own_us in list(by_package(records).items())[:options['limit']]:
+                first = entry_points(records, package)[0]
+                importer = first.imported_by()
+                via = f' <- {importer.name}' if importer and importer.package != package else ''
+                self.stdout.write(f'{own_us / 1000:8.1f}ms  {package}{via}')
+        else:
+            self.stdout.write(f"{'self':>9} {'cumulative':>11}  module")
+            for record in heaviest(records, options['limit'], by=options['sort']):
+                importer = record.imported_by()
+                via = f' <- {importer.name}' if importer and not record.is_first_party else ''
+                self.stdout.write(
+                    f'{record.self_us / 1000:7.1f}ms {record.cumulative_us / 1000:9.1f}ms  {record.name}{via}'
+                )
+
+        total = sum(record.cumulative_us for record in records if record.parent is None)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(records)} modules imported in {total / 1000:.0f}ms ({options['target']})"
+        ))
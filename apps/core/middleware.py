@@ -1,13 +1,9 @@
-import threading
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from .context import get_context, set_institution
 from .models import Institution
 
 
-# Thread-local storage for current institution
-_local = threading.local()
-
-
 def get_default_institution():
     """Return the primary institution for this deployment.
 
@@ -26,36 +22,32 @@ class TenantMiddleware(MiddlewareMixin):
         """Set the default institution for this request."""
         institution = get_default_institution()
 
-        if institution:
-            _local.current_institution = institution
-            request.institution = institution
-        else:
-            _local.current_institution = None
-            request.institution = None
+        set_institution(institution)
+        request.institution = institution
 
         return None
 
     def process_response(self, request, response):
-        """Clean up thread-local storage after request processing."""
-        if hasattr(_local, 'current_institution'):
-            del _local.current_institution
+        """Clear the institution of the request context after request processing."""
+        set_institution(None)
         return response
 
 
 def get_current_institution():
     """
-    Get the current institution from thread-local storage.
+    Get the current institution from the request context (apps.core.context).
     In single-tenant mode, this returns the configured institution (if any).
     """
-    return getattr(_local, 'current_institution', None)
+    context = get_context()
+    return context.institution if context else None
 
 
 def set_current_institution(institution):
     """
-    Manually set the current institution in thread-local storage.
+    Manually set the current institution in the request context.
     (Generally not needed in single-tenant mode)
     """
-    _local.current_institution = institution
+    set_institution(institution)
 
 
 def user_can_access_institution(user, institution):
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:41
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_institution_database_schema'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='updated at')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('inactive', 'Inactive'), ('pending', 'Pending'), ('suspended', 'Suspended'), ('archived', 'Archived')], db_index=True, default='active', max_length=20, verbose_name='status')),
+                ('status_changed_at', models.DateTimeField(auto_now_add=True, verbose_name='status changed at')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, verbose_name='is deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='deleted at')),
+                ('name', models.CharField(max_length=200, verbose_name='name')),
+                ('document_type', models.CharField(max_length=50, verbose_name='document type')),
+                ('output_format', models.CharField(choices=[('zip', 'ZIP archive'), ('pdf', 'Merged PDF')], default='zip', max_length=3, verbose_name='output format')),
+                ('state', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10, verbose_name='state')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='total documents')),
+                ('completed', models.PositiveIntegerField(default=0, verbose_name='completed documents')),
+                ('cached', models.PositiveIntegerField(default=0, verbose_name='documents served from cache')),
+                ('output', models.FileField(blank=True, upload_to='documents/batches/', verbose_name='output')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+                ('institution', models.ForeignKey(help_text='Institution this record belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_records', to='core.institution', verbose_name='institution')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='document_batches', to=settings.AUTH_USER_MODEL, verbose_name='requested by')),
+            ],
+            options={
+                'verbose_name': 'Document Batch',
+                'verbose_name_plural': 'Document Batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:36
+
+import django.core.serializers.json
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_document_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=100, verbose_name='model')),
+                ('object_id', models.CharField(max_length=64, verbose_name='object ID')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='data')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='deleted at')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='archived at')),
+            ],
+            options={
+                'verbose_name': 'Archived Record',
+                'verbose_name_plural': 'Archived Records',
+                'ordering': ['-archived_at'],
+                'indexes': [models.Index(fields=['model', 'object_id'], name='core_archiv_model_60230c_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,14 @@
 # apps/core/models.py
+import copy
+import time
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
@@ -206,6 +213,74 @@ class Institution(AddressModel, ContactModel):
             return 0
         return (self.current_student_count / self.max_students) * 100
 
+    @classmethod
+    def get_default_id(cls):
+        """
+        Id of the first active institution, used for new records that do not
+        name one.
+
+        Cached per process for ``INSTITUTION_CACHE_TIMEOUT`` seconds once the
+        transaction it was read in commits, and cleared whenever an
+        institution is saved or deleted.
+        """
+        if _default_institution['expires'] > time.monotonic():
+            return _default_institution['id']
+        institution_id = cls.objects.filter(is_active=True).order_by('name').values_list('id', flat=True).first()
+        if institution_id:
+            # A rolled back institution must never be remembered
+            transaction.on_commit(lambda: _remember_default_institution(institution_id))
+        return institution_id
+
+
+def _remember_default_institution(institution_id):
+    timeout = getattr(settings, 'INSTITUTION_CACHE_TIMEOUT', 3600)
+    _default_institution.update(id=institution_id, expires=time.monotonic() + timeout)
+
+
+_default_institution = {'id': None, 'expires': 0.0}
+
+
+@receiver(post_save, sender=Institution)
+@receiver(post_delete, sender=Institution)
+def clear_default_institution(sender, **kwargs):
+    _default_institution['expires'] = 0.0
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet for soft-deletable models.
+
+    ``delete()`` keeps Django's meaning and removes rows; soft deletion of a
+    whole queryset is :meth:`soft_delete`.
+    """
+
+    def soft_delete(self):
+        """Mark every row deleted in one UPDATE. Returns the number of rows."""
+        return self.update(is_deleted=True, deleted_at=timezone.now())
+
+    def restore(self):
+        return self.update(is_deleted=False, deleted_at=None)
+
+    def deleted(self):
+        return self.filter(is_deleted=True)
+
+    def live(self):
+        """Rows that are neither deleted nor inactive, archived, etc."""
+        return self.filter(is_deleted=False, status=CoreBaseModel.Status.ACTIVE)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Default manager of CoreBaseModel: hides soft-deleted rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+AllObjectsManager = models.Manager.from_queryset(SoftDeleteQuerySet)
+
+# Condition for partial indexes over the rows default managers return
+NOT_DELETED = models.Q(is_deleted=False)
+
 
 class CoreBaseModel(models.Model):
     """
@@ -253,32 +328,154 @@ class CoreBaseModel(models.Model):
         help_text=_('Institution this record belongs to')
     )
 
+    # Soft-deleted rows are hidden from ``objects`` (and so from related
+    # managers, forms and the admin); ``all_objects`` includes them
+    objects = SoftDeleteManager()
+    all_objects = AllObjectsManager()
+
+    # Fields whose loaded values are snapshotted for has_changed() and
+    # changed_fields(); None tracks every concrete field, () disables tracking
+    tracked_fields = None
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def _tracked_attnames(cls):
+        attnames = cls.__dict__.get('_tracked_attnames_cache')
+        if attnames is None:
+            fields = cls._meta.concrete_fields
+            if cls.tracked_fields is not None:
+                fields = [field for field in fields if field.name in cls.tracked_fields]
+            attnames = {field.attname: field.name for field in fields if not field.primary_key}
+            cls._tracked_attnames_cache = attnames
+        return attnames
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot(dict(zip(field_names, values)))
+        return instance
+
+    def _take_snapshot(self, values=None, fields=None):
+        """
+        Remember field values as the ones last read from or written to the
+        database: ``values`` as loaded, or else the instance's current values
+        (only for ``fields``, when given).
+        """
+        tracked = self._tracked_attnames()
+        if values is None:
+            if fields is not None:
+                fields = {self._meta.get_field(field).attname for field in fields}
+            values = {
+                attname: self.__dict__[attname] for attname in tracked
+                if attname in self.__dict__ and (fields is None or attname in fields)
+            }
+            snapshot = (getattr(self, '_snapshot', None) or {}) if fields is not None else {}
+        else:
+            snapshot = {}
+        for attname, value in values.items():
+            if attname not in tracked or value is models.DEFERRED:
+                continue
+            if isinstance(value, FieldFile):
+                value = value.name
+            elif isinstance(value, (dict, list)):
+                # Copy mutable values (JSONField) so in-place edits are seen
+                value = copy.deepcopy(value)
+            snapshot[attname] = value
+        self._snapshot = snapshot
+
+    def _get_snapshot(self):
+        if getattr(self, '_snapshot', None) is None:
+            if self._state.adding:
+                return {}
+            # Built by hand rather than loaded: read the stored row once
+            row = self.__class__._base_manager.filter(pk=self.pk).values(*self._tracked_attnames()).first()
+            self._take_snapshot(row or {})
+        return self._snapshot
+
+    def changed_fields(self):
+        """
+        Names of tracked fields whose value differs from the one loaded.
+
+        New records report no changes.
+        """
+        snapshot = self._get_snapshot()
+        return [
+            name for attname, name in self._tracked_attnames().items()
+            if attname in snapshot and attname in self.__dict__ and getattr(self, attname) != snapshot[attname]
+        ]
+
+    def has_changed(self, field=None):
+        """Whether ``field`` (or any tracked field) changed since it was loaded."""
+        if field is None:
+            return bool(self.changed_fields())
+        attname = self._meta.get_field(field).attname
+        snapshot = self._get_snapshot()
+        return attname in snapshot and getattr(self, attname) != snapshot[attname]
+
+    def original_value(self, field):
+        """Value of ``field`` when the record was loaded (None if unknown)."""
+        return self._get_snapshot().get(self._meta.get_field(field).attname)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if getattr(self, '_snapshot', None) is not None:
+            self._take_snapshot(fields=fields)
+
     def save(self, *args, **kwargs):
         """
         Update status_changed_at when status changes.
         Set default institution if none is set during creation.
+
+        Changes are found from the snapshot taken when the record was loaded
+        and exposed to post_save receivers as ``_changed_fields``.
         """
-        if self.pk and not self._state.adding:  # Check if object exists and is not being added
-            try:
-                original = self.__class__.objects.get(pk=self.pk)
-                if original.status != self.status:
-                    self.status_changed_at = timezone.now()
-            except self.__class__.DoesNotExist:
-                # Object doesn't exist yet (shouldn't happen in normal flow)
-                pass
+        if not self._state.adding:
+            self._changed_fields = self.changed_fields()
+            if 'status' in self._changed_fields:
+                self.status_changed_at = timezone.now()
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None and 'status' in update_fields:
+                    kwargs['update_fields'] = {*update_fields, 'status_changed_at'}
+        else:
+            self._changed_fields = []
 
         # Set default institution if none is set and this is a new instance.
         # Do not assume a pre-created default institution code; use the first active
         # institution if one exists.
         if self._state.adding and getattr(self, 'institution_id', None) is None:
-            any_institution = Institution.objects.filter(is_active=True).first()
-            if any_institution:
-                self.institution = any_institution
+            self.institution_id = Institution.get_default_id()
 
         super().save(*args, **kwargs)
+        self._take_snapshot(fields=kwargs.get('update_fields'))
+
+    def validate_unique(self, exclude=None):
+        """
+        Also check unique values against soft-deleted rows, which the default
+        manager hides from Django's own checks but which still hold them.
+        """
+        super().validate_unique(exclude=exclude)
+        errors = {}
+        unique_checks, _date_checks = self._get_unique_checks(exclude=exclude)
+        for model_class, unique_check in unique_checks:
+            manager = getattr(model_class, 'all_objects', None)
+            lookup = {}
+            for field_name in unique_check:
+                value = getattr(self, self._meta.get_field(field_name).attname)
+                if value is None:
+                    break
+                lookup[str(field_name)] = value
+            if manager is None or len(lookup) != len(unique_check):
+                continue
+            deleted = manager.filter(is_deleted=True, **lookup)
+            if not self._state.adding and self.pk is not None:
+                deleted = deleted.exclude(pk=self.pk)
+            if deleted.exists():
+                key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                errors.setdefault(key, []).append(self.unique_error_message(model_class, unique_check))
+        if errors:
+            raise ValidationError(errors)
 
     def delete(self, using=None, keep_parents=False):
         """
@@ -497,3 +694,91 @@ class SequenceGenerator(CoreBaseModel):
         
         number_str = str(self.last_number).zfill(self.padding)
         return f"{self.prefix}{number_str}{self.suffix}"
+
+
+class DocumentBatch(CoreBaseModel):
+    """
+    A batch of rendered documents (e.g. a class's report cards) bundled into
+    one ZIP archive or merged PDF, with its rendering progress.
+    """
+    class State(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    class OutputFormat(models.TextChoices):
+        ZIP = 'zip', _('ZIP archive')
+        PDF = 'pdf', _('Merged PDF')
+
+    name = models.CharField(_('name'), max_length=200)
+    document_type = models.CharField(_('document type'), max_length=50)
+    output_format = models.CharField(
+        _('output format'),
+        max_length=3,
+        choices=OutputFormat.choices,
+        default=OutputFormat.ZIP
+    )
+    state = models.CharField(
+        _('state'),
+        max_length=10,
+        choices=State.choices,
+        default=State.QUEUED,
+        db_index=True
+    )
+    total = models.PositiveIntegerField(_('total documents'), default=0)
+    completed = models.PositiveIntegerField(_('completed documents'), default=0)
+    cached = models.PositiveIntegerField(_('documents served from cache'), default=0)
+    output = models.FileField(_('output'), upload_to='documents/batches/', blank=True)
+    error = models.TextField(_('error'), blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='document_batches',
+        verbose_name=_('requested by')
+    )
+    started_at = models.DateTimeField(_('started at'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Document Batch')
+        verbose_name_plural = _('Document Batches')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.get_state_display()})"
+
+    @property
+    def progress(self):
+        """Percentage of documents rendered."""
+        if not self.total:
+            return 100 if self.state == self.State.DONE else 0
+        return round(self.completed * 100 / self.total)
+
+
+class ArchivedRecord(models.Model):
+    """
+    A row moved out of a hot table by the ``archive_records`` command.
+
+    The row's column values are kept as JSON, keyed by the model label and
+    primary key it had, so it can still be looked up for audits.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model = models.CharField(_('model'), max_length=100)
+    object_id = models.CharField(_('object ID'), max_length=64)
+    data = models.JSONField(_('data'), encoder=DjangoJSONEncoder)
+    deleted_at = models.DateTimeField(_('deleted at'), null=True, blank=True)
+    archived_at = models.DateTimeField(_('archived at'), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('Archived Record')
+        verbose_name_plural = _('Archived Records')
+        ordering = ['-archived_at']
+        indexes = [
+            models.Index(fields=['model', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
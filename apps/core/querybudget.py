@@ -0,0 +1,229 @@
+"""
+Query budgets and N+1 detection.
+
+:class:`QueryRecorder` records the SQL run on every database connection
+while it is active. It hooks ``connection.execute_wrapper``, so it works
+with DEBUG off. Each statement is reduced to a fingerprint with parameters
+and literal lists collapsed, so a query run once per row of a list shows
+up as one fingerprint repeated many times.
+
+Views declare the most queries a request may take, either with the
+:func:`query_budget` decorator or in ``settings.QUERY_BUDGETS`` keyed by
+URL name (``'support:faq_list'``). :class:`QueryBudgetMiddleware` (enabled
+with DEBUG) logs a report for every request that goes over its budget or
+repeats a statement ``QUERY_REPEAT_THRESHOLD`` times. It also sets an
+``X-Query-Count`` header. :class:`QueryBudgetTestMixin` asserts the same
+in tests.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .context import get_context
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN \((?:\s*(?:%s|\?|[-\d.]+|\'[^\']*\')\s*,?)+\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """``sql`` with literals and parameter lists collapsed."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def repeat_threshold() -> int:
+    return getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than its view's budget."""
+
+
+class QueryReport:
+    """
+    Summary of the queries recorded for one request or block.
+
+    Attributes:
+        count: Number of statements
+        duration: Total time spent in the database, in milliseconds
+        budget: The budget checked against, or None
+        repeated: ``(fingerprint, times, sample SQL)`` for statements run at
+            least the repeat threshold times, most repeated first
+        counts: Times each fingerprint ran
+    """
+
+    def __init__(self, queries: List[Tuple[str, float]], budget: Optional[int] = None,
+                 threshold: Optional[int] = None):
+        self.count = len(queries)
+        self.duration = sum(duration for _sql, duration in queries)
+        self.budget = budget
+        threshold = repeat_threshold() if threshold is None else threshold
+        self.counts = Counter()
+        samples = {}
+        for sql, _duration in queries:
+            key = fingerprint(sql)
+            self.counts[key] += 1
+            samples.setdefault(key, sql)
+        self.repeated = [
+            (key, times, samples[key]) for key, times in self.counts.most_common() if times >= threshold
+        ]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def __str__(self):
+        budget = f' (budget {self.budget})' if self.budget is not None else ''
+        lines = [f'{self.count} queries in {self.duration:.1f}ms{budget}']
+        for key, times, _sample in self.repeated:
+            lines.append(f'  {times}x {key[:200]}')
+        return '\n'.join(lines)
+
+
+class QueryRecorder:
+    """
+    Record the SQL run on every connection inside a ``with`` block.
+
+    Usage:
+        with QueryRecorder() as recorder:
+            client.get(url)
+        print(recorder.report(budget=20))
+    """
+
+    def __init__(self):
+        self.queries: List[Tuple[str, float]] = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - start) * 1000))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def report(self, budget: Optional[int] = None, threshold: Optional[int] = None) -> QueryReport:
+        return QueryReport(self.queries, budget, threshold)
+
+
+def query_budget(limit: int):
+    """
+    Declare the most queries one request to a view may take.
+
+    Works on view functions and on class-based views (before ``as_view()``).
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def budget_for(resolver_match) -> Optional[int]:
+    """The budget of the view a request resolved to, or QUERY_BUDGET_DEFAULT."""
+    default = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+    if resolver_match is None:
+        return default
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if resolver_match.view_name in budgets:
+        return budgets[resolver_match.view_name]
+    func = resolver_match.func
+    for view in (func, getattr(func, 'view_class', None)):
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None:
+            return budget
+    return default
+
+
+class QueryBudgetMiddleware:
+    """
+    Log requests that go over their query budget or repeat a statement.
+
+    Enabled when ``QUERY_BUDGET_ENABLED`` (default: DEBUG) is set; with
+    ``QUERY_BUDGET_STRICT`` a request over budget raises QueryBudgetExceeded.
+    Place it first so queries made by other middleware are counted too.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        report = recorder.report(budget_for(getattr(request, 'resolver_match', None)))
+        response['X-Query-Count'] = str(report.count)
+        if report.over_budget or report.repeated:
+            context = get_context()
+            request_id = f" [{context.request_id}]" if context and context.request_id else ''
+            logger.warning(f"{request.method} {request.path}{request_id}: {report}")
+            if report.over_budget and getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(f"{request.path}: {report}")
+        return response
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin asserting query budgets and the absence of N+1 patterns."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget: Optional[int], max_repeats: Optional[int] = None):
+        """
+        Fail if the block runs more than ``budget`` queries, or runs one
+        statement more than ``max_repeats`` times (default: below the repeat
+        threshold).
+        """
+        with QueryRecorder() as recorder:
+            yield recorder
+        self._check_report(recorder.report(budget), max_repeats, 'block')
+
+    def assertPageWithinBudget(self, url: str, budget: Optional[int] = None,
+                               max_repeats: Optional[int] = None, status: int = 200):
+        """
+        GET ``url`` with the test client and check it against ``budget`` (by
+        default the budget declared for its view).
+
+        Returns:
+            The QueryReport for the request
+        """
+        with QueryRecorder() as recorder:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status, f'GET {url}')
+        if budget is None:
+            budget = budget_for(response.resolver_match)
+        report = recorder.report(budget)
+        self._check_report(report, max_repeats, f'GET {url}')
+        return report
+
+    def _check_report(self, report: QueryReport, max_repeats: Optional[int], label: str):
+        if report.over_budget:
+            self.fail(f'{label} went over its query budget: {report}')
+        limit = repeat_threshold() - 1 if max_repeats is None else max_repeats
+        key, times = report.counts.most_common(1)[0] if report.counts else ('', 0)
+        if times > limit:
+            self.fail(f'{label} ran one query {times} times (N+1?): {key[:200]}\n{report}')
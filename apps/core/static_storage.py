@@ -0,0 +1,93 @@
+"""
+Static files storage that writes responsive image variants at collectstatic.
+
+Kept apart from :mod:`apps.core.images` so the upload and thumbnail helpers
+there can be imported without WhiteNoise, which only the static files
+storage needs.
+"""
+
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict
+
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .images import (
+    SOURCE_EXTENSIONS, VARIANTS_INDEX_NAME, replace_file, resized_variants, variant_formats, variant_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class VariantStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise manifest storage that also writes responsive image variants.
+
+    Variants are generated for PNG/JPEG files under ``IMAGE_VARIANT_STATIC_DIRS``
+    before hashing, so they get hashed names and compressed copies like any
+    other static file. Unchanged images keep the variants from the previous
+    run, keyed by a hash of their content.
+    """
+
+    variants_index_name = VARIANTS_INDEX_NAME
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.write_variants(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def load_variants_index(self) -> Dict:
+        try:
+            with self.open(self.variants_index_name) as index:
+                return json.loads(index.read().decode())
+        except (OSError, ValueError):
+            return {}
+
+    def write_variants(self, paths: Dict):
+        """Generate variants for collected images and add them to ``paths``."""
+        prefixes = tuple(getattr(settings, 'IMAGE_VARIANT_STATIC_DIRS', ('images/',)))
+        widths = getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1024, 1600))
+        formats = variant_formats()
+        previous = self.load_variants_index()
+        sources = [
+            name for name in sorted(paths)
+            if name.startswith(prefixes) and name.lower().endswith(SOURCE_EXTENSIONS)
+        ]
+
+        def process(name):
+            source_storage, path = paths[name]
+            with source_storage.open(path) as source:
+                content = source.read()
+            digest = hashlib.md5(content).hexdigest()
+            entry = previous.get(name)
+            if (
+                entry and entry['hash'] == digest
+                and all(fmt in entry for fmt in formats)
+                and all(self.exists(variant_name(name, width, fmt)) for fmt in formats for width in entry[fmt])
+            ):
+                return name, entry, False
+            entry = {'hash': digest}
+            for fmt, encoded in resized_variants(BytesIO(content), widths, formats).items():
+                for width, data in encoded.items():
+                    replace_file(self, variant_name(name, width, fmt), data)
+                entry[fmt] = sorted(encoded)
+            return name, entry, True
+
+        index, generated = {}, 0
+        workers = getattr(settings, 'IMAGE_VARIANT_WORKERS', 2) or 1
+        # Pillow releases the GIL while resizing and encoding
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for name, entry, created in pool.map(process, sources):
+                index[name] = entry
+                generated += created
+                for fmt in formats:
+                    for width in entry[fmt]:
+                        variant = variant_name(name, width, fmt)
+                        paths[variant] = (self, variant)
+
+        replace_file(self, self.variants_index_name, json.dumps(index, sort_keys=True).encode())
+        logger.info(f"Image variants: {generated} of {len(sources)} static images re-encoded")
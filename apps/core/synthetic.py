@@ -0,0 +1,385 @@
+"""
+Synthetic school data for load tests and benchmarks.
+
+:class:`SchoolGenerator` fills the database with a school of a given size:
+users with roles, teachers, classes with enrolled students and subject
+assignments, daily attendance, exams with marks, invoices, library loans and
+class chat rooms. Rows are written with ``bulk_create``, so ``save()`` hooks
+and signals do not run; the generator sets what they would (institution,
+user profiles, percentages, invoice balances) itself and reconciles the
+library counters once the loans are in.
+
+Every username, code and number is prefixed, so a school can be generated
+next to existing data, and the same seed always produces the same school.
+"""
+
+import logging
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.academics.models import (
+    AcademicSession, Class, Department, Enrollment, GradeLevel, Student, Subject, SubjectAssignment, Teacher,
+)
+from apps.assessment.models import Exam, ExamType, Mark
+from apps.attendance.models import AttendanceSession, DailyAttendance
+from apps.communication.models import ChatMessage, ChatParticipant, ChatRoom
+from apps.finance.models import FeeStructure, Invoice, InvoiceItem
+from apps.library.models import Book, BookCopy, BorrowRecord, Library, LibraryMember
+from apps.library.services import CirculationService
+from apps.users.models import Role, UserProfile, UserRole
+
+from .models import Institution
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Ada', 'Bola', 'Chidi', 'Dayo', 'Emeka', 'Funmi', 'Gozie', 'Halima', 'Ife', 'Jide',
+    'Kemi', 'Lola', 'Musa', 'Ngozi', 'Ola', 'Remi', 'Sade', 'Tunde', 'Uche', 'Zainab',
+]
+LAST_NAMES = [
+    'Adeyemi', 'Bello', 'Chukwu', 'Danjuma', 'Eze', 'Fashola', 'Garba', 'Ibrahim',
+    'Johnson', 'Kalu', 'Lawal', 'Musa', 'Nwosu', 'Okafor', 'Ogunleye', 'Yusuf',
+]
+SUBJECTS = [
+    ('Mathematics', 'Sciences'), ('Physics', 'Sciences'), ('Chemistry', 'Sciences'), ('Biology', 'Sciences'),
+    ('English', 'Languages'), ('French', 'Languages'), ('History', 'Humanities'), ('Geography', 'Humanities'),
+]
+ATTENDANCE_STATUSES = ['present'] * 18 + ['absent', 'late']
+PASSWORD = 'synthetic'
+
+
+class SchoolGenerator:
+    """
+    Generate a school with ``students`` students.
+
+    Args:
+        students: Number of students
+        teachers: Number of teachers (default: one per 20 students)
+        classes: Number of classes (default: one per 30 students)
+        days: School days of attendance, counted back from today
+        exams: Exams per class, one subject each
+        loans: Share of students with a book on loan
+        messages: Chat messages per class room
+        prefix: Prefix of usernames, codes and numbers
+        seed: Random seed
+        batch_size: Rows per INSERT
+    """
+
+    def __init__(self, students: int = 500, teachers: int = None, classes: int = None, days: int = 20,
+                 exams: int = 2, loans: float = 0.3, messages: int = 50, prefix: str = 'syn',
+                 seed: int = 42, batch_size: int = 1000):
+        self.students = students
+        self.teachers = teachers or max(1, students // 20)
+        self.classes = classes or max(1, students // 30)
+        self.days = days
+        self.exams = min(exams, len(SUBJECTS))
+        self.loans = loans
+        self.messages = messages
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.counts: Dict[str, int] = {}
+
+    def generate(self) -> Dict[str, int]:
+        """
+        Write the school in one transaction.
+
+        Returns:
+            Rows created per model label
+        """
+        start = time.perf_counter()
+        with transaction.atomic():
+            self.institution = self._institution()
+            self.session = self._session()
+            self.roles = self._roles()
+            self._teachers()
+            self._classes()
+            self._students()
+            self._attendance()
+            self._exams()
+            self._invoices()
+            self._library()
+            self._chat()
+        logger.info(f"Generated a school of {self.students} students in {time.perf_counter() - start:.1f}s")
+        return self.counts
+
+    # Helpers
+
+    def _create(self, model, rows: Iterable) -> List:
+        """bulk_create ``rows`` in batches, stamping the institution."""
+        created = []
+        batch = []
+        for row in rows:
+            if hasattr(row, 'institution_id'):
+                row.institution_id = self.institution.pk
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                created.extend(model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created.extend(model.objects.bulk_create(batch))
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(created)
+        return created
+
+    def _name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def _users(self, kind: str, count: int, role_type: str) -> List:
+        password = make_password(PASSWORD)
+        users = []
+        for number in range(count):
+            first_name, last_name = self._name()
+            username = f'{self.prefix}-{kind}-{number}'
+            users.append(User(
+                username=username, email=f'{username}@example.com', password=password,
+                first_name=first_name, last_name=last_name,
+            ))
+        users = self._create(User, users)
+        self._create(UserProfile, (UserProfile(user=user) for user in users))
+        self._create(UserRole, (
+            UserRole(user=user, role=self.roles[role_type], is_primary=True) for user in users
+        ))
+        return users
+
+    def _school_days(self) -> List[date]:
+        days = []
+        day = timezone.localdate()
+        while len(days) < self.days:
+            day -= timedelta(days=1)
+            if day.weekday() < 5:
+                days.append(day)
+        return days
+
+    # Structure
+
+    def _institution(self):
+        institution_id = Institution.get_default_id()
+        if institution_id:
+            return Institution.objects.get(pk=institution_id)
+        return Institution.objects.create(name='Synthetic School', code=self.prefix.upper())
+
+    def _session(self):
+        session = AcademicSession.current()
+        if session is None:
+            today = timezone.localdate()
+            start_year = today.year if today.month >= 9 else today.year - 1
+            session = AcademicSession.objects.create(
+                name=f'{start_year}/{start_year + 1}', start_date=date(start_year, 9, 1),
+                end_date=date(start_year + 1, 7, 31), is_current=True,
+            )
+        return session
+
+    def _roles(self):
+        roles = {}
+        for role_type in ('admin', 'teacher', 'student', 'parent'):
+            roles[role_type], _ = Role.objects.get_or_create(
+                role_type=role_type, defaults={'name': str(Role.RoleType(role_type).label)},
+            )
+        return roles
+
+    def _teachers(self):
+        users = self._users('teacher', self.teachers, 'teacher')
+        self.teacher_list = self._create(Teacher, (
+            Teacher(
+                user=user, teacher_id=f'{self.prefix.upper()}T{number:05d}',
+                employee_id=f'{self.prefix.upper()}E{number:05d}',
+                gender=self.rng.choice(['male', 'female']), joining_date=date(2015, 1, 1),
+            )
+            for number, user in enumerate(users)
+        ))
+
+    def _classes(self):
+        departments = {}
+        for _name, department in SUBJECTS:
+            if department not in departments:
+                # Department names are unique, so cohorts share them
+                departments[department], _ = Department.objects.get_or_create(
+                    name=department, defaults={'code': f'{self.prefix.upper()}-{department[:3].upper()}'},
+                )
+        self.subject_list = self._create(Subject, (
+            Subject(name=name, code=f'{self.prefix.upper()}-{name[:4].upper()}', department=departments[department])
+            for name, department in SUBJECTS
+        ))
+        grade_levels = self._create(GradeLevel, (
+            GradeLevel(name=f'Grade {number + 1}', code=f'{self.prefix.upper()}G{number + 1}',
+                       education_stage='middle_school')
+            for number in range(self.classes)
+        ))
+        self.class_list = self._create(Class, (
+            Class(
+                name=f'Grade {number + 1}', code=f'{self.prefix.upper()}C{number + 1}',
+                grade_level=grade_level, academic_session=self.session,
+                class_teacher=self.teacher_list[number % len(self.teacher_list)],
+                capacity=max(40, self.students // self.classes + 5),
+            )
+            for number, grade_level in enumerate(grade_levels)
+        ))
+        self._create(SubjectAssignment, (
+            SubjectAssignment(
+                teacher=self.teacher_list[(number + offset) % len(self.teacher_list)],
+                subject=subject, class_assigned=class_obj, academic_session=self.session,
+            )
+            for number, class_obj in enumerate(self.class_list)
+            for offset, subject in enumerate(self.subject_list)
+        ))
+
+    def _students(self):
+        users = self._users('student', self.students, 'student')
+        self.student_list = self._create(Student, (
+            Student(
+                user=user, student_id=f'{self.prefix.upper()}S{number:06d}',
+                admission_number=f'{self.prefix.upper()}A{number:06d}', admission_date=date(2020, 9, 1),
+                date_of_birth=date(2008 + number % 6, 1 + number % 12, 1 + number % 28),
+                gender=self.rng.choice(['male', 'female']),
+            )
+            for number, user in enumerate(users)
+        ))
+        self.class_of = {}
+        enrollments = []
+        for number, student in enumerate(self.student_list):
+            class_obj = self.class_list[number % len(self.class_list)]
+            self.class_of[student.pk] = class_obj
+            enrollments.append(Enrollment(
+                student=student, class_enrolled=class_obj, academic_session=self.session,
+                enrollment_date=self.session.start_date, roll_number=number // len(self.class_list) + 1,
+            ))
+        self._create(Enrollment, enrollments)
+
+    # Activity
+
+    def _attendance(self):
+        attendance_session, _ = AttendanceSession.objects.get_or_create(
+            name='Morning', academic_session=self.session,
+            defaults={'start_time': '08:00', 'end_time': '12:00'},
+        )
+        days = self._school_days()
+        self._create(DailyAttendance, (
+            DailyAttendance(
+                student=student, date=day, attendance_session=attendance_session,
+                status=self.rng.choice(ATTENDANCE_STATUSES),
+            )
+            for day in days
+            for student in self.student_list
+        ))
+
+    def _exams(self):
+        exam_type, _ = ExamType.objects.get_or_create(
+            code=f'{self.prefix.upper()}-MID', defaults={'name': 'Mid-term', 'weightage': Decimal('30')},
+        )
+        exams = self._create(Exam, (
+            Exam(
+                name=f'{subject.name} mid-term', code=f'{self.prefix.upper()}X{number}-{offset}',
+                exam_type=exam_type, academic_class=class_obj, subject=subject,
+                exam_date=timezone.localdate() - timedelta(days=7), start_time='09:00', end_time='11:00',
+                total_marks=Decimal('100'), passing_marks=Decimal('40'),
+            )
+            for number, class_obj in enumerate(self.class_list)
+            for offset, subject in enumerate(self.subject_list[:self.exams])
+        ))
+        exams_of = {}
+        for exam in exams:
+            exams_of.setdefault(exam.academic_class_id, []).append(exam)
+        marks = []
+        for student in self.student_list:
+            for exam in exams_of[self.class_of[student.pk].pk]:
+                obtained = Decimal(self.rng.randint(20, 100))
+                marks.append(Mark(
+                    exam=exam, student=student, marks_obtained=obtained,
+                    max_marks=exam.total_marks, percentage=obtained,
+                ))
+        self._create(Mark, marks)
+
+    def _invoices(self):
+        tuition = self._create(FeeStructure, [FeeStructure(
+            name='Tuition', code=f'{self.prefix.upper()}-TUITION', academic_session=self.session,
+            amount=Decimal('150000'),
+        )])[0]
+        issue_date = self.session.start_date
+        invoices = []
+        for number, student in enumerate(self.student_list):
+            paid = self.rng.choice([Decimal('0'), Decimal('50000'), tuition.amount])
+            invoices.append(Invoice(
+                invoice_number=f'{self.prefix.upper()}-INV-{number:06d}', student=student,
+                academic_session=self.session, billing_period='term_1', issue_date=issue_date,
+                due_date=issue_date + timedelta(days=30),
+                status='paid' if paid == tuition.amount else 'partial' if paid else 'issued',
+                subtotal=tuition.amount, total_amount=tuition.amount, amount_paid=paid,
+                balance_due=tuition.amount - paid,
+            ))
+        invoices = self._create(Invoice, invoices)
+        self._create(InvoiceItem, (
+            InvoiceItem(invoice=invoice, fee_structure=tuition, unit_price=tuition.amount, line_total=tuition.amount)
+            for invoice in invoices
+        ))
+
+    def _library(self):
+        library = self._create(Library, [Library(
+            name='Main Library', code=f'{self.prefix.upper()}-LIB', opening_time='08:00', closing_time='16:00',
+        )])[0]
+        books = self._create(Book, (
+            Book(title=f'{subject.name} volume {number + 1}', library=library, total_copies=2, available_copies=2)
+            for number in range(max(1, self.students // 4))
+            for subject in self.subject_list[:1]
+        ))
+        copies = self._create(BookCopy, (
+            BookCopy(book=book, copy_number=copy, barcode=f'{self.prefix.upper()}-{number:06d}-{copy}')
+            for number, book in enumerate(books)
+            for copy in (1, 2)
+        ))
+        members = self._create(LibraryMember, (
+            LibraryMember(
+                user_id=student.user_id, student=student, member_id=f'{self.prefix.upper()}-M{number:06d}',
+                member_type='student', expiry_date=self.session.end_date,
+            )
+            for number, student in enumerate(self.student_list)
+        ))
+        today = timezone.localdate()
+        borrowers = self.rng.sample(members, min(len(copies), int(len(members) * self.loans)))
+        self._create(BorrowRecord, (
+            BorrowRecord(
+                member=member, book_copy=copy,
+                due_date=today + timedelta(days=self.rng.randint(-10, 14)),
+            )
+            for member, copy in zip(borrowers, copies)
+        ))
+        CirculationService.reconcile()
+
+    def _chat(self):
+        rooms = self._create(ChatRoom, (
+            ChatRoom(name=f'{class_obj.name} discussion', room_type='class', academic_class=class_obj)
+            for class_obj in self.class_list
+        ))
+        members_of = {room.pk: [room.academic_class.class_teacher.user_id] for room in rooms}
+        room_of_class = {room.academic_class_id: room for room in rooms}
+        for student in self.student_list:
+            members_of[room_of_class[self.class_of[student.pk].pk].pk].append(student.user_id)
+        through = ChatRoom.members.through
+        self._create(through, (
+            through(chatroom_id=room_id, user_id=user_id)
+            for room_id, user_ids in members_of.items()
+            for user_id in user_ids
+        ))
+        self._create(ChatParticipant, (
+            ChatParticipant(room_id=room_id, user_id=user_id)
+            for room_id, user_ids in members_of.items()
+            for user_id in user_ids
+        ))
+        self._create(ChatMessage, (
+            ChatMessage(
+                room=room, sender_id=self.rng.choice(members_of[room.pk]),
+                content=f'Message {number} about {self.rng.choice(SUBJECTS)[0]}',
+            )
+            for room in rooms
+            for number in range(self.messages)
+        ))
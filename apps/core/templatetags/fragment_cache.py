@@ -0,0 +1,47 @@
+from django import template
+from django.conf import settings
+from django.utils.translation import get_language
+
+from apps.core.caching import LOCAL, get_cache, make_key, record
+
+register = template.Library()
+
+NAMESPACE = 'fragments'
+
+
+class CachedNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        parts = [self.name.resolve(context), get_language()]
+        parts.extend(var.resolve(context) for var in self.vary_on)
+        cache = get_cache(LOCAL)
+        key = make_key(NAMESPACE, *parts)
+        content = cache.get(key)
+        record(NAMESPACE, content is not None)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600))
+        return content
+
+
+@register.tag
+def cached(parser, token):
+    """
+    Cache a template fragment in the per-process cache.
+
+    Usage: {% cached 'sidebar_nav' nav_cache_key request.resolver_match.url_name %}...{% endcached %}
+
+    The fragment is cached per name, active language and the values of the
+    remaining arguments, which must cover everything it renders differently
+    on; per-user values such as counters belong outside it.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least a fragment name.")
+    nodelist = parser.parse(('endcached',))
+    parser.delete_first_token()
+    return CachedNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,61 @@
+from django import template
+from django.db.models.fields.files import FieldFile
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from apps.core.images import MIME_TYPES, static_srcset, upload_srcset, variant_formats
+
+register = template.Library()
+
+
+def _variants(image, fmt):
+    """(width, url) pairs for a static path or an uploaded file."""
+    if isinstance(image, FieldFile):
+        return upload_srcset(image.name, fmt, image.storage) if image else []
+    return static_srcset(image, fmt)
+
+
+def _srcset(variants):
+    return ', '.join(f'{url} {width}w' for width, url in variants)
+
+
+@register.simple_tag
+def srcset(image, fmt='webp'):
+    """
+    ``srcset`` value for the variants of a static image or an uploaded file.
+
+    Usage: <img src="{{ profile.profile_picture.url }}" srcset="{% srcset profile.profile_picture %}" sizes="48px">
+
+    Empty until the variants exist, in which case browsers use ``src``.
+    """
+    return _srcset(_variants(image, fmt))
+
+
+@register.simple_tag
+def picture(image, alt='', sizes='100vw', **attrs):
+    """
+    ``<picture>`` element with AVIF/WebP sources and the original as fallback.
+
+    Usage: {% picture 'images/Banner.png' alt='School Banner' class='hero-bg-image' %}
+
+    Extra keyword arguments become attributes of the ``<img>``; images are
+    lazy-loaded unless ``loading`` is given.
+    """
+    if isinstance(image, FieldFile):
+        src = image.url if image else ''
+    else:
+        src = static(image)
+    sources = [
+        (MIME_TYPES[fmt], _srcset(variants), sizes)
+        for fmt in variant_formats()
+        for variants in [_variants(image, fmt)]
+        if variants
+    ]
+    attrs.setdefault('loading', 'lazy')
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}"{}></picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', sources),
+        src,
+        alt,
+        format_html_join('', ' {}="{}"', sorted(attrs.items())),
+    )
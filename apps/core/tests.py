@@ -0,0 +1,721 @@
+# apps/core/tests.py
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from contextvars import copy_context
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.academics.models import (
+    AcademicSession, Class, Department, Enrollment, GradeLevel, Holiday, Student, Subject, Teacher,
+)
+from apps.attendance.models import DailyAttendance
+from apps.audit.models import AuditLog
+from apps.communication.models import Announcement, RealTimeNotification
+from apps.core.models import ArchivedRecord, Institution, SystemConfig
+from apps.finance.models import Invoice
+from apps.library.models import Book, BorrowRecord, Library, LibraryMember
+from apps.support.models import FAQ, Category, HelpCenterArticle, LegalDocument
+from apps.transport.models import Route, RouteStop
+from apps.users.models import ParentStudentRelationship, Role, UserRole
+from apps.core.middleware import get_current_institution, set_current_institution
+from . import caching
+from .context import (
+    RequestContextASGIMiddleware, RequestContextFilter, RequestContextMiddleware, get_context, request_context,
+)
+from .images import static_variants, thumbnail_url, variant_formats, variant_name
+from .importtime import LAZY_PACKAGES, by_package, entry_points, parse, profile
+from .querybudget import QueryBudgetTestMixin, QueryRecorder, fingerprint
+
+User = get_user_model()
+
+
+def png(width, height, color=(200, 80, 40)):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageVariantsTestCase(TestCase):
+    """Test cases for responsive image variants"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        image_settings = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp, 'media'),
+            IMAGE_VARIANT_WORKERS=0,
+            IMAGE_VARIANT_WIDTHS=(320, 640, 1600),
+            IMAGE_UPLOAD_SIZES=(48, 96),
+        )
+        image_settings.enable()
+        self.addCleanup(image_settings.disable)
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+
+    @contextmanager
+    def collectstatic(self):
+        source = os.path.join(self.tmp, 'source')
+        os.makedirs(os.path.join(source, 'images'), exist_ok=True)
+        with open(os.path.join(source, 'images', 'banner.png'), 'wb') as f:
+            f.write(png(1000, 500))
+        with override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=os.path.join(self.tmp, 'static'),
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'apps.core.static_storage.VariantStaticFilesStorage'},
+            },
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0, stdout=StringIO())
+            yield
+
+    def test_collectstatic_writes_hashed_variants(self):
+        static_root = os.path.join(self.tmp, 'static')
+        with self.collectstatic():
+            index = static_variants()
+            self.assertEqual(index['images/banner.png']['webp'], [320, 640, 1000])
+            with Image.open(os.path.join(static_root, 'images', 'banner.w320.webp')) as variant:
+                self.assertEqual(variant.size, (320, 160))
+            with open(os.path.join(static_root, 'staticfiles.json')) as manifest:
+                self.assertIn('images/banner.w640.webp', json.load(manifest)['paths'])
+
+            html = Template("{% load responsive_images %}{% picture 'images/banner.png' alt='Banner' %}").render(Context())
+            self.assertIn('type="image/webp"', html)
+            self.assertRegex(html, r'/static/images/banner\.w320\.[0-9a-f]{12}\.webp 320w')
+            self.assertRegex(html, r'<img src="/static/images/banner\.[0-9a-f]{12}\.png" alt="Banner" loading="lazy">')
+            if 'avif' in variant_formats():
+                self.assertIn('type="image/avif"', html)
+
+        # Unchanged images are not re-encoded on the next run
+        variant = os.path.join(static_root, 'images', 'banner.w320.webp')
+        modified = os.path.getmtime(variant)
+        os.utime(variant, (modified - 100, modified - 100))
+        with self.collectstatic():
+            self.assertEqual(os.path.getmtime(variant), modified - 100)
+
+    def test_picture_without_variants_falls_back_to_original(self):
+        html = Template("{% load responsive_images %}{% picture 'images/missing.png' %}").render(Context())
+        self.assertNotIn('<source', html)
+        self.assertIn('<img src="/static/images/missing.png"', html)
+
+    def test_profile_picture_thumbnails_after_commit(self):
+        user = User.objects.create_user(username='pic', email='pic@example.com', password='testpass123')
+        profile = user.profile
+        profile.profile_picture = SimpleUploadedFile('me.png', png(400, 300), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        name = profile.profile_picture.name
+        for fmt in variant_formats():
+            for size in (48, 96):
+                with default_storage.open(variant_name(name, size, fmt)) as variant:
+                    self.assertEqual(Image.open(variant).size, (size, size))
+        self.assertTrue(thumbnail_url(name, 64).endswith('.w96.webp'))
+        self.assertEqual(thumbnail_url(name, 500), profile.profile_picture.url)
+
+        html = Template('{% load responsive_images %}{% srcset picture %}').render(
+            Context({'picture': profile.profile_picture})
+        )
+        self.assertIn('.w48.webp 48w', html)
+
+    def test_backfill_command(self):
+        user = User.objects.create_user(username='old', email='old@example.com', password='testpass123')
+        name = default_storage.save('profiles/old.png', ContentFile(png(120, 120)))
+        # Bypass save signals, like pictures uploaded before variants existed
+        type(user.profile).objects.filter(pk=user.profile.pk).update(profile_picture=name)
+        self.assertFalse(default_storage.exists(variant_name(name, 48, 'webp')))
+
+        out = StringIO()
+        call_command('backfill_image_variants', stdout=out)
+        self.assertIn('Created variants for 1 profile picture(s)', out.getvalue())
+        self.assertTrue(default_storage.exists(variant_name(name, 96, 'webp')))
+
+        out = StringIO()
+        call_command('backfill_image_variants', stdout=out)
+        self.assertIn('already have variants', out.getvalue())
+
+
+class ChangeTrackingTestCase(TestCase):
+    """Test cases for CoreBaseModel change tracking"""
+
+    def setUp(self):
+        self.institution, _ = Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        SystemConfig.objects.create(key='site', value={'theme': 'light'})
+
+    def queries_on(self, model, context):
+        return [query['sql'] for query in context.captured_queries if model._meta.db_table in query['sql']]
+
+    def test_update_does_not_reload_the_row(self):
+        config = SystemConfig.objects.get(key='site')
+        changed_at = config.status_changed_at
+        config.status = SystemConfig.Status.INACTIVE
+        with CaptureQueriesContext(connection) as context:
+            config.save()
+
+        statements = self.queries_on(SystemConfig, context)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE'))
+        self.assertEqual(config._changed_fields, ['status'])
+        self.assertGreater(config.status_changed_at, changed_at)
+
+        # The snapshot moves on with the save
+        self.assertFalse(config.has_changed())
+        config.save(update_fields=['description'])
+        self.assertEqual(config._changed_fields, [])
+
+    def test_changed_fields(self):
+        config = SystemConfig(key='new')
+        self.assertEqual(config.changed_fields(), [])
+        self.assertFalse(config.has_changed('key'))
+
+        config = SystemConfig.objects.get(key='site')
+        config.value['theme'] = 'dark'
+        config.is_public = True
+        self.assertEqual(config.changed_fields(), ['value', 'is_public'])
+        self.assertTrue(config.has_changed('value'))
+        self.assertFalse(config.has_changed('key'))
+        self.assertEqual(config.original_value('value'), {'theme': 'light'})
+
+        config.refresh_from_db(fields=['value'])
+        self.assertEqual(config.changed_fields(), ['is_public'])
+
+    def test_deferred_fields_are_not_reported(self):
+        config = SystemConfig.objects.only('key', 'status').get(key='site')
+        config.status = SystemConfig.Status.ARCHIVED
+        self.assertEqual(config.changed_fields(), ['status'])
+        self.assertEqual(config.description, '')
+        self.assertEqual(config.changed_fields(), ['status'])
+
+    def test_unloaded_instance_reads_the_row_once(self):
+        config = SystemConfig.objects.get(key='site')
+        # As for an instance that was not created by from_db()
+        del config._snapshot
+        config.status = SystemConfig.Status.SUSPENDED
+        with CaptureQueriesContext(connection) as context:
+            config.save()
+        self.assertEqual(len(self.queries_on(SystemConfig, context)), 2)
+        self.assertEqual(config._changed_fields, ['status'])
+
+    def test_default_institution_is_cached(self):
+        # Remembered once the transaction it was read in commits
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemConfig.objects.create(key='first')
+        with CaptureQueriesContext(connection) as context:
+            config = SystemConfig.objects.create(key='second')
+        self.assertEqual(self.queries_on(Institution, context), [])
+        self.assertEqual(config.institution_id, self.institution.pk)
+
+        # Saving an institution clears the cache
+        self.institution.is_active = False
+        self.institution.save()
+        other = Institution.objects.create(code='OTHER', name='Other School')
+        self.assertEqual(SystemConfig.objects.create(key='third').institution_id, other.pk)
+
+
+class SoftDeleteTestCase(TestCase):
+    """Test cases for soft-delete managers and archival"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.live = SystemConfig.objects.create(key='live')
+        self.gone = SystemConfig.objects.create(key='gone')
+        self.gone.delete()
+
+    def test_default_manager_hides_deleted_rows(self):
+        self.assertEqual(list(SystemConfig.objects.values_list('key', flat=True)), ['live'])
+        self.assertEqual(SystemConfig.all_objects.count(), 2)
+        self.assertEqual(list(SystemConfig.all_objects.deleted()), [self.gone])
+
+        SystemConfig.objects.create(key='idle', status=SystemConfig.Status.INACTIVE)
+        self.assertEqual(list(SystemConfig.objects.live()), [self.live])
+
+        self.assertEqual(SystemConfig.all_objects.filter(key='gone').restore(), 1)
+        self.assertEqual(SystemConfig.objects.filter(key__in=['live', 'gone']).soft_delete(), 2)
+        self.assertEqual(SystemConfig.objects.filter(key__in=['live', 'gone']).count(), 0)
+
+    def test_unique_values_of_deleted_rows_are_checked(self):
+        with self.assertRaises(ValidationError) as context:
+            SystemConfig(key='gone').validate_unique()
+        self.assertIn('key', context.exception.message_dict)
+        SystemConfig(key='new').validate_unique()
+        self.gone.validate_unique()
+
+    def test_archive_moves_old_rows(self):
+        old = timezone.now() - timedelta(days=200)
+        logs = [
+            AuditLog.objects.create(action='view', model_name='Student', object_id=str(i))
+            for i in range(5)
+        ]
+        AuditLog.objects.filter(pk__in=[log.pk for log in logs[:3]]).soft_delete()
+        AuditLog.all_objects.filter(pk__in=[log.pk for log in logs[:2]]).update(deleted_at=old)
+        AuditLog.objects.filter(pk=logs[4].pk).update(status='archived', status_changed_at=old)
+
+        out = StringIO()
+        call_command('archive_records', model=['audit.AuditLog'], dry_run=True, stdout=out)
+        self.assertIn('audit.AuditLog: 3 row(s) would be archived', out.getvalue())
+        self.assertEqual(AuditLog.all_objects.count(), 5)
+
+        out = StringIO()
+        call_command('archive_records', model=['audit.AuditLog'], batch_size=2, stdout=out)
+        self.assertIn('Archived 3 row(s)', out.getvalue())
+        self.assertEqual(
+            set(AuditLog.all_objects.values_list('object_id', flat=True)), {'2', '3'}
+        )
+        record = ArchivedRecord.objects.get(object_id=str(logs[0].pk))
+        self.assertEqual(record.model, 'audit.AuditLog')
+        self.assertEqual(record.data['object_id'], '0')
+        self.assertEqual(record.deleted_at, old)
+
+
+class CachingTestCase(TestCase):
+    """Test cases for namespaced caching and hit/miss counters"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        for alias in ('default', caching.LOCAL):
+            caches[alias].clear()
+        caching.reset_stats()
+
+    def test_invalidate_changes_keys_on_commit(self):
+        key = caching.make_key('things', 1)
+        self.assertEqual(caching.make_key('things', 1), key)
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.invalidate('things')
+            self.assertEqual(caching.make_key('things', 1), key)
+        self.assertNotEqual(caching.make_key('things', 1), key)
+
+        calls = []
+        for _ in range(3):
+            caching.get_or_set('things', [1], lambda: calls.append(1) or 'value')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(caching.stats()['things'], {'hits': 2, 'misses': 1, 'hit_rate': 0.667})
+
+    def test_cached_page_is_dropped_when_content_changes(self):
+        FAQ.objects.create(question='When does term start?', answer='September')
+        url = reverse('support:faq_list')
+        self.assertContains(self.client.get(url), 'When does term start?')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertEqual(self.queries_on(FAQ, context), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQ.objects.create(question='Is there a uniform?', answer='Yes')
+        self.assertContains(self.client.get(url), 'Is there a uniform?')
+        self.assertEqual(caching.stats()['support'], {'hits': 1, 'misses': 2, 'hit_rate': 0.333})
+
+    def test_pages_are_not_cached_for_signed_in_users(self):
+        user = User.objects.create_user(username='reader', email='reader@example.com', password='testpass123')
+        self.client.force_login(user)
+        self.client.get(reverse('support:faq_list'))
+        self.client.get(reverse('support:faq_list'))
+        self.assertNotIn('support', caching.stats())
+
+    def test_fragment_cache(self):
+        template = Template("{% load fragment_cache %}{% cached 'menu' role %}{{ role }} {{ n }}{% endcached %}")
+        self.assertEqual(template.render(Context({'role': 'teacher', 'n': 1})), 'teacher 1')
+        self.assertEqual(template.render(Context({'role': 'teacher', 'n': 2})), 'teacher 1')
+        self.assertEqual(template.render(Context({'role': 'parent', 'n': 3})), 'parent 3')
+        self.assertEqual(caching.stats()['fragments']['hits'], 1)
+
+    def test_stats_api_is_for_superusers(self):
+        url = reverse('core:cache_stats_api')
+        user = User.objects.create_user(username='staff', email='staff@example.com', password='testpass123')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        user.is_superuser = True
+        user.save()
+        caching.record('things', True)
+        response = self.client.get(url)
+        self.assertEqual(response.json()['namespaces']['things']['hits'], 1)
+
+    def queries_on(self, model, context):
+        return [query['sql'] for query in context.captured_queries if model._meta.db_table in query['sql']]
+
+
+class QueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """Test cases for query recording and N+1 detection"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        caches['default'].clear()
+
+    def test_fingerprint_collapses_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'x''y' AND pk IN (1, 2, 3)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)',
+        )
+        self.assertEqual(fingerprint('SELECT *  FROM t\nWHERE id IN (%s, %s)'), 'SELECT * FROM t WHERE id IN (...)')
+
+    def test_repeated_queries_are_reported(self):
+        for number in range(6):
+            FAQ.objects.create(question=f'Question {number}?', answer='Answer')
+        with QueryRecorder() as recorder:
+            for faq in FAQ.objects.all():
+                FAQ.objects.filter(pk=faq.pk).exists()
+        report = recorder.report(budget=5)
+        self.assertEqual(report.count, 7)
+        self.assertTrue(report.over_budget)
+        self.assertEqual([times for _key, times, _sql in report.repeated], [6])
+
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(10):
+                for faq in FAQ.objects.all():
+                    FAQ.objects.filter(pk=faq.pk).exists()
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGETS={'support:faq_list': 0})
+    def test_middleware_reports_query_count(self):
+        with override_settings(MIDDLEWARE=['apps.core.querybudget.QueryBudgetMiddleware', *settings.MIDDLEWARE]):
+            with self.assertLogs('apps.core.querybudget', 'WARNING') as logs:
+                response = self.client.get(reverse('support:faq_list'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertIn('(budget 0)', logs.output[0])
+
+
+def seed_school(count):
+    """A current session with ``count`` of most things; returns the users by role."""
+    session = AcademicSession.objects.create(
+        name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), is_current=True,
+    )
+    roles = {
+        role_type: Role.objects.create(name=str(label), role_type=role_type)
+        for role_type, label in Role.RoleType.choices
+    }
+
+    def user(username, role_type, **extra):
+        account = User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='testpass123',
+            first_name=username.title(), last_name='Test', **extra,
+        )
+        UserRole.objects.create(user=account, role=roles[role_type], is_primary=True)
+        return account
+
+    admin = user('admin', 'admin', is_staff=True, is_superuser=True)
+    teacher = Teacher.objects.create(
+        user=user('teacher', 'teacher'), teacher_id='T001', employee_id='E001', gender='female',
+        joining_date=date(2020, 1, 1),
+    )
+    parent = user('parent', 'parent')
+    department = Department.objects.create(name='Sciences', code='SCI')
+    library = Library.objects.create(name='Main', code='MAIN', opening_time=time(8), closing_time=time(16))
+    category = Category.objects.create(name='General', slug='general')
+    students = []
+    for i in range(count):
+        Subject.objects.create(name=f'Subject {i}', code=f'SUB{i}', department=department)
+        grade_level = GradeLevel.objects.create(name=f'Grade {i + 1}', code=f'G{i + 1}', education_stage='middle_school')
+        class_obj = Class.objects.create(
+            name=f'Grade {i + 1}', code=f'G{i + 1}', academic_session=session, class_teacher=teacher,
+            grade_level=grade_level,
+        )
+        student = Student.objects.create(
+            user=user(f'student{i}', 'student'), student_id=f'S{i:04d}', admission_number=f'A{i:04d}',
+            admission_date=date(2024, 1, 1), date_of_birth=date(2012, 1, 1),
+        )
+        students.append(student)
+        Enrollment.objects.create(
+            student=student, class_enrolled=class_obj, academic_session=session,
+            enrollment_date=date(2024, 9, 1), roll_number=i + 1,
+        )
+        ParentStudentRelationship.objects.create(parent=parent, student=student.user, relationship_type='mother')
+        Invoice.objects.create(
+            invoice_number=f'INV{i:04d}', student=student, academic_session=session, billing_period='term_1',
+            issue_date=date(2024, 9, 1), due_date=date(2024, 10, 1), total_amount=Decimal('1000'),
+        )
+        Holiday.objects.create(name=f'Holiday {i}', date=date(2024, 12, 20 + i), academic_session=session)
+        Announcement.objects.create(title=f'News {i}', content='Body', author=admin)
+        RealTimeNotification.objects.create(
+            recipient=admin, title=f'Note {i}', message='Body', notification_type='announcement',
+        )
+        Book.objects.create(title=f'Book {i}', library=library)
+        HelpCenterArticle.objects.create(title=f'Article {i}', slug=f'article-{i}', content='Body', category=category)
+        FAQ.objects.create(question=f'Question {i}?', answer='Answer', category=category)
+        route = Route.objects.create(
+            name=f'Route {i}', code=f'R{i}', start_point='School', end_point='Town',
+            total_distance=Decimal('10'), estimated_duration=30,
+        )
+        for stop in range(2):
+            RouteStop.objects.create(
+                route=route, name=f'Stop {stop}', sequence=stop + 1, address='Road',
+                estimated_arrival_time=time(7, stop * 10),
+            )
+    for document_type, _label in LegalDocument._meta.get_field('document_type').choices:
+        LegalDocument.objects.create(
+            title=document_type, slug=document_type, content='Body', document_type=document_type, is_active=True,
+        )
+    return {'admin': admin, 'teacher': teacher.user, 'parent': parent, 'student': students[0].user}
+
+
+class PageQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """
+    Query budgets of the most used pages (settings.QUERY_BUDGETS).
+
+    Lists are seeded with six rows each, so a query run once per row trips
+    the repeat check as well as the budget.
+    """
+
+    # (user, URL name, most times one statement may run)
+    PAGES = [
+        # One role check per dashboard widget, not per row
+        ('student', 'users:dashboard', 6),
+        ('admin', 'users:role_list', None),
+        ('admin', 'academics:dashboard', None),
+        ('admin', 'academics:session_list', None),
+        ('admin', 'academics:subject_list', None),
+        ('admin', 'academics:class_list', None),
+        ('admin', 'academics:student_list', None),
+        ('admin', 'academics:teacher_list', None),
+        ('admin', 'academics:enrollment_list', None),
+        ('admin', 'academics:academic_calendar', None),
+        ('admin', 'academics:timetable_list', None),
+        ('admin', 'attendance:dashboard', None),
+        ('admin', 'assessment:dashboard', None),
+        ('admin', 'assessment:exam_list', None),
+        ('admin', 'assessment:assignment_list', None),
+        ('admin', 'finance:dashboard', None),
+        ('parent', 'finance:student_invoices', None),
+        ('admin', 'library:dashboard', None),
+        ('admin', 'library:book_list', None),
+        ('admin', 'library:borrowrecord_list', None),
+        ('admin', 'communication:notification_list', None),
+        ('admin', 'communication:realtime_notification_list', None),
+        ('admin', 'transport:dashboard', None),
+        ('admin', 'transport:route_list', None),
+        ('admin', 'transport:route_optimization', None),
+        ('admin', 'transport:vehicle_list', None),
+        ('admin', 'hostels:dashboard', None),
+        ('admin', 'hostels:hostel_list', None),
+        ('admin', 'activities:activity_list', None),
+        ('admin', 'activities:enrollment_list', None),
+        ('admin', 'core:super_admin_dashboard', None),
+        (None, 'support:home', None),
+        (None, 'support:faq_list', None),
+        (None, 'support:article_list', None),
+        (None, 'support:legal_documents_list', None),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        cls.users = seed_school(6)
+
+    def setUp(self):
+        for alias in ('default', caching.LOCAL):
+            caches[alias].clear()
+
+    def test_pages_within_budget(self):
+        for role, name, max_repeats in self.PAGES:
+            with self.subTest(page=name, user=role):
+                self.assertIn(name, settings.QUERY_BUDGETS)
+                self.client.logout()
+                if role:
+                    self.client.force_login(self.users[role])
+                self.assertPageWithinBudget(reverse(name), max_repeats=max_repeats)
+
+
+class SchoolGeneratorTestCase(TestCase):
+    """Test cases for the synthetic school generator"""
+
+    def test_generate_school(self):
+        out = StringIO()
+        call_command(
+            'generate_school_data', students=12, classes=2, days=3, messages=2, loans=0.5, force=True, stdout=out,
+        )
+        self.assertIn('Created', out.getvalue())
+
+        self.assertEqual(Student.objects.count(), 12)
+        self.assertEqual(Enrollment.objects.filter(class_enrolled__academic_session__is_current=True).count(), 12)
+        self.assertEqual(DailyAttendance.objects.count(), 36)
+        self.assertEqual(BorrowRecord.objects.count(), 6)
+        self.assertEqual(sum(LibraryMember.objects.values_list('current_borrow_count', flat=True)), 6)
+        student = Student.objects.select_related('user__profile').first()
+        self.assertTrue(student.user.check_password('synthetic'))
+        self.assertIsNotNone(student.current_class)
+
+        # A different prefix adds another cohort next to the first
+        call_command('generate_school_data', students=3, classes=1, days=1, prefix='more', force=True, stdout=StringIO())
+        self.assertEqual(Student.objects.count(), 15)
+
+    @override_settings(DEBUG=False)
+    def test_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_school_data', students=1, stdout=StringIO())
+
+
+IMPORT_REPORT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy.core
+import time:       300 |        420 |   numpy
+import time:        50 |        470 | apps.transport.services
+import time:        80 |         80 | config.routing
+"""
+
+
+class ImportTimeTestCase(SimpleTestCase):
+    """Test cases for startup import profiling"""
+
+    def test_parse_links_importers(self):
+        records = {record.name: record for record in parse(IMPORT_REPORT)}
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records['numpy.core'].parent.name, 'numpy')
+        self.assertEqual(records['numpy.core'].imported_by().name, 'apps.transport.services')
+        self.assertIsNone(records['config.routing'].parent)
+        self.assertEqual(by_package(parse(IMPORT_REPORT)), {'numpy': 420, 'config': 80, 'apps': 50})
+        self.assertEqual([r.name for r in entry_points(parse(IMPORT_REPORT), 'numpy')], ['numpy'])
+
+    def test_startup_skips_lazy_packages(self):
+        for target in ('urls', 'asgi'):
+            loaded = {record.package for record in profile(target)}
+            self.assertEqual(loaded & set(LAZY_PACKAGES), set(), target)
+
+    def test_single_asgi_application(self):
+        import config.asgi
+        import config.routing
+
+        self.assertFalse(hasattr(config.routing, 'application'))
+        self.assertEqual(set(config.asgi.application.application_mapping), {'http', 'websocket'})
+
+
+class RequestContextTestCase(TestCase):
+    """Test cases for the contextvars-based request context"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_sync_middleware_sets_and_resets_context(self):
+        seen = []
+
+        def view(request):
+            seen.append(get_context())
+            return HttpResponse('ok')
+
+        request = self.factory.get('/', HTTP_X_FORWARDED_FOR='10.0.0.7, 10.0.0.1', HTTP_USER_AGENT='tests')
+        response = RequestContextMiddleware(view)(request)
+        context = seen[0]
+        self.assertEqual(response['X-Request-ID'], context.request_id)
+        self.assertEqual((context.ip_address, context.user_agent), ('10.0.0.7', 'tests'))
+        self.assertIsNone(get_context())
+
+        response = RequestContextMiddleware(view)(self.factory.get('/', HTTP_X_REQUEST_ID='abc-123'))
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+        response = RequestContextMiddleware(view)(self.factory.get('/', HTTP_X_REQUEST_ID='bad id\n'))
+        self.assertNotEqual(response['X-Request-ID'], 'bad id\n')
+
+    def test_concurrent_async_requests_keep_their_context(self):
+        async def view(request):
+            context = get_context()
+            await asyncio.sleep(0.001 * (int(request.GET['n']) % 5))
+            # Still ours after yielding, and inside sync code run from here
+            in_thread = await sync_to_async(lambda: get_context().request_id)()
+            in_pool = await asyncio.get_running_loop().run_in_executor(
+                None, copy_context().run, lambda: get_context().request_id,
+            )
+            return HttpResponse(json.dumps([context.request_id, get_context().request_id, in_thread, in_pool]))
+
+        middleware = RequestContextMiddleware(view)
+
+        async def serve(count):
+            requests = [self.factory.get('/', {'n': n}) for n in range(count)]
+            return await asyncio.gather(*(middleware(request) for request in requests))
+
+        responses = async_to_sync(serve)(200)
+        ids = set()
+        for response in responses:
+            seen = json.loads(response.content)
+            self.assertEqual(set(seen), {response['X-Request-ID']})
+            ids.add(response['X-Request-ID'])
+        self.assertEqual(len(ids), 200)
+        self.assertIsNone(get_context())
+
+    def test_new_threads_start_without_context(self):
+        seen = []
+        with request_context(request_id='outer'):
+            thread = threading.Thread(target=lambda: seen.append(get_context()))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [None])
+
+    def test_channels_connections_get_context(self):
+        seen = []
+
+        async def consumer(scope, receive, send):
+            await asyncio.sleep(0)
+            seen.append(get_context())
+
+        scope = {
+            'type': 'websocket',
+            'headers': [(b'user-agent', b'socket'), (b'x-request-id', b'ws-1')],
+            'client': ('192.0.2.5', 5000),
+            'user': None,
+        }
+        async_to_sync(RequestContextASGIMiddleware(consumer))(scope, None, None)
+        self.assertEqual(
+            (seen[0].request_id, seen[0].ip_address, seen[0].user_agent), ('ws-1', '192.0.2.5', 'socket')
+        )
+        self.assertIsNone(get_context())
+
+    def test_institution_follows_context(self):
+        institution, _ = Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        with request_context(request_id='one'):
+            set_current_institution(institution)
+            self.assertEqual(get_current_institution(), institution)
+        self.assertIsNone(get_current_institution())
+
+        set_current_institution(institution)
+        self.assertEqual(get_current_institution(), institution)
+        set_current_institution(None)
+        self.assertIsNone(get_context())
+
+    def test_concurrent_async_saves_are_audited_with_their_request(self):
+        from apps.audit import views  # noqa: F401 (connects the audit signal handlers)
+
+        institution, _ = Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+
+        async def view(request):
+            set_current_institution(institution)
+            await asyncio.sleep(0)
+            await sync_to_async(SystemConfig.objects.create)(key=f"ctx.{request.GET['n']}", value={})
+            return HttpResponse()
+
+        middleware = RequestContextMiddleware(view)
+
+        async def serve(count):
+            requests = [self.factory.get('/', {'n': n}, HTTP_USER_AGENT=f'agent {n}') for n in range(count)]
+            return await asyncio.gather(*(middleware(request) for request in requests))
+
+        responses = async_to_sync(serve)(50)
+        for n, response in enumerate(responses):
+            log = AuditLog.objects.get(model_name='SystemConfig', details__new_values__key=f'ctx.{n}')
+            self.assertEqual(log.details['request_id'], response['X-Request-ID'])
+            self.assertEqual(log.user_agent, f'agent {n}')
+
+    def test_log_records_carry_request_id(self):
+        record = logging.LogRecord('apps', logging.INFO, __file__, 1, 'message', None, None)
+        RequestContextFilter().filter(record)
+        self.assertEqual(record.request_id, '-')
+        with request_context(request_id='req-9'):
+            RequestContextFilter().filter(record)
+        self.assertEqual(record.request_id, 'req-9')
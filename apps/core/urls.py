@@ -34,4 +34,5 @@ urlpatterns = [
     # Institution API endpoints
     path('api/institution/<str:institution_code>/config/<str:config_key>/', views.get_institution_config_value, name='get_institution_config_value'),
     path('api/institutions/statistics/', views.institution_statistics_api, name='institution_statistics_api'),
+    path('api/cache/stats/', views.cache_stats_api, name='cache_stats_api'),
 ]
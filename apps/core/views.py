@@ -1,15 +1,18 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.conf import settings
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.http import JsonResponse, HttpResponse
 from django.db.models import Q
 from django.core.paginator import Paginator
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views import View
 import json
 
+from . import caching
 from .models import SystemConfig, Institution, InstitutionConfig
 from .forms import (
     SystemConfigForm, SystemConfigBulkUpdateForm,
@@ -386,7 +389,6 @@ class SuperAdminDashboardView(LoginRequiredMixin, PermissionRequiredMixin, View)
 
         # If academic category is selected, redirect to academics dashboard with super admin flag
         if dashboard_category == 'academic':
-            from django.urls import reverse
             academic_url = reverse('academics:dashboard')
             # Pass super admin context parameters
             params = request.GET.copy()
@@ -475,7 +477,7 @@ class SchoolAdminDashboardView(LoginRequiredMixin, View):
 
         # Get current academic session
         from apps.academics.models import AcademicSession
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # School Statistics
         total_students = 0
@@ -491,32 +493,16 @@ class SchoolAdminDashboardView(LoginRequiredMixin, View):
             total_subjects = Subject.objects.filter(status='active').count()
 
         # Financial Overview
-        from apps.finance.models import Invoice, Payment, Expense
         total_revenue = 0
         total_expenses = 0
         pending_payments = 0
 
         if current_session:
-            # Calculate total revenue from paid invoices
-            paid_invoices = Invoice.objects.filter(
-                academic_session=current_session,
-                status='paid'
-            )
-            total_revenue = sum(invoice.amount_paid for invoice in paid_invoices)
-
-            # Calculate total expenses
-            expenses = Expense.objects.filter(
-                academic_session=current_session,
-                status='active'
-            )
-            total_expenses = sum(expense.amount for expense in expenses)
-
-            # Calculate pending payments
-            pending_invoices = Invoice.objects.filter(
-                academic_session=current_session,
-                status__in=['issued', 'partial']
-            )
-            pending_payments = sum(invoice.balance_due for invoice in pending_invoices)
+            from apps.finance.dashboard import FinanceDashboardService
+            finance_summary = FinanceDashboardService.summary(current_session)
+            total_revenue = finance_summary['total_revenue']
+            total_expenses = finance_summary['session_expenses']
+            pending_payments = finance_summary['pending_payments']
 
         # Attendance Overview
         attendance_rate = 0
@@ -650,7 +636,7 @@ class PrincipalPerformanceMonitoringView(LoginRequiredMixin, View):
         from apps.assessment.models import Result, Exam
         from apps.analytics.models import KPIMeasurement, KPI
 
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Performance data
         performance_data = {
@@ -733,7 +719,7 @@ class PrincipalTeacherManagementView(LoginRequiredMixin, View):
         from apps.academics.models import AcademicSession, Teacher, SubjectAssignment, Class
         from apps.assessment.models import Mark
 
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Teacher data
         teachers_data = []
@@ -796,7 +782,7 @@ class PrincipalStudentWelfareView(LoginRequiredMixin, View):
         from apps.academics.models import AcademicSession, BehaviorRecord, AcademicWarning, Student
         from apps.attendance.models import AttendanceSummary
 
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Behavior and welfare data
         welfare_data = {
@@ -869,7 +855,7 @@ class PrincipalCurriculumPlanningView(LoginRequiredMixin, View):
         from apps.academics.models import AcademicSession, Subject, Class, Timetable
         from apps.assessment.models import GradingSystem, Exam
 
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # Curriculum data
         curriculum_data = {
@@ -1297,6 +1283,17 @@ def institution_statistics_api(request):
     return JsonResponse(data)
 
 
+@user_passes_test(lambda user: user.is_superuser)
+def cache_stats_api(request):
+    """
+    API endpoint for cache hit/miss counters of the process serving the request.
+    """
+    return JsonResponse({
+        'backend': settings.CACHES['default']['BACKEND'],
+        'namespaces': caching.stats(),
+    })
+
+
 class GlobalSearchView(LoginRequiredMixin, PermissionRequiredMixin, View):
     """
     Global search view that searches across multiple models based on user query and filter.
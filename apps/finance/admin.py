@@ -7,7 +7,7 @@ from django.utils import timezone
 from decimal import Decimal
 from .models import (
     FeeStructure, FeeDiscount, Invoice, InvoiceItem, Payment, 
-    Expense, FinancialReport
+    Expense, FinancialReport, LedgerEntry
 )
 
 
@@ -423,5 +423,27 @@ class FinancialReportAdmin(admin.ModelAdmin):
     unpublish_reports.short_description = _('Unpublish selected reports')
 
 
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    """
+    Read-only admin interface for the append-only student ledger.
+    """
+    list_display = ('student', 'academic_session', 'sequence', 'posted_on', 'entry_type', 'debit_account', 'credit_account', 'amount', 'balance')
+    list_filter = ('entry_type', 'academic_session', 'posted_on')
+    search_fields = ('student__admission_number', 'description', 'invoice__invoice_number')
+    raw_id_fields = ('student', 'invoice', 'payment')
+    date_hierarchy = 'posted_on'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # NOTE: Custom FinanceAdminSite removed. Models are registered with the
 # default admin site via the @admin.register decorators above.
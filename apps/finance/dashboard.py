@@ -0,0 +1,150 @@
+"""
+Aggregated figures for the finance dashboards.
+
+Every session-level figure shown on the accountant, student-fee and school
+administrator dashboards comes from two month-grouped conditional aggregates
+(one over invoices, one over expenses) instead of a query per figure and per
+month. The result is cached per academic session and day; any write to an
+Invoice, Payment or Expense bumps a shared version counter so cached summaries
+are never served after the underlying rows change.
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Expense, Invoice
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'finance:dashboard:version'
+ZERO = Decimal('0.00')
+
+
+def _month(value) -> date:
+    # TruncMonth returns a date for DateFields, but a datetime on some backends
+    return value.date() if hasattr(value, 'date') and callable(value.date) else value
+
+
+class FinanceDashboardService:
+    """
+    Computes and caches the figures behind the finance dashboards.
+    """
+
+    @staticmethod
+    def version() -> int:
+        """Current cache version for dashboard summaries."""
+        cache.add(VERSION_KEY, 1, None)
+        return cache.get(VERSION_KEY, 1)
+
+    @staticmethod
+    def invalidate():
+        """Discard every cached dashboard summary."""
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 1, None)
+
+    @classmethod
+    def cache_key(cls, session, today: date) -> str:
+        session_id = session.pk if session else 'none'
+        return f'finance:dashboard:v{cls.version()}:{session_id}:{today.isoformat()}'
+
+    @classmethod
+    def summary(cls, session, today: Optional[date] = None) -> Dict:
+        """
+        Get the dashboard figures for an academic session.
+
+        Args:
+            session: AcademicSession (or None for invoices without a session)
+            today: Reference date for overdue and current-month figures
+
+        Returns:
+            Dict with ``total_invoiced``, ``total_paid``, ``total_outstanding``,
+            ``total_revenue``, ``pending_payments``, ``overdue_invoices_count``,
+            ``month_expenses``, ``session_expenses`` and ``monthly_collection``
+            (one ``{'month', 'invoiced', 'paid'}`` entry per month of the
+            current year)
+        """
+        today = today or timezone.now().date()
+        key = cls.cache_key(session, today)
+        summary = cache.get(key)
+        if summary is None:
+            summary = cls.compute(session, today)
+            cache.set(key, summary, getattr(settings, 'FINANCE_DASHBOARD_CACHE_TIMEOUT', 300))
+        return summary
+
+    @classmethod
+    def compute(cls, session, today: date) -> Dict:
+        """Compute the dashboard figures without the cache (two queries)."""
+        summary = {
+            'total_invoiced': ZERO,
+            'total_paid': ZERO,
+            'total_revenue': ZERO,
+            'pending_payments': ZERO,
+            'overdue_invoices_count': 0,
+            'month_expenses': ZERO,
+            'session_expenses': ZERO,
+        }
+        monthly = {month: {'invoiced': ZERO, 'paid': ZERO} for month in range(1, 13)}
+
+        invoice_months = Invoice.objects.filter(
+            academic_session=session
+        ).annotate(
+            month=TruncMonth('issue_date')
+        ).order_by().values('month').annotate(
+            invoiced=Sum('total_amount'),
+            paid=Sum('amount_paid'),
+            revenue=Sum('amount_paid', filter=Q(status=Invoice.InvoiceStatus.PAID)),
+            pending=Sum('balance_due', filter=Q(
+                status__in=[
+                    Invoice.InvoiceStatus.ISSUED,
+                    Invoice.InvoiceStatus.PARTIAL,
+                    Invoice.InvoiceStatus.OVERDUE,
+                ]
+            )),
+            overdue=Count('pk', filter=Q(due_date__lt=today, balance_due__gt=ZERO)),
+        )
+        for row in invoice_months:
+            summary['total_invoiced'] += row['invoiced'] or ZERO
+            summary['total_paid'] += row['paid'] or ZERO
+            summary['total_revenue'] += row['revenue'] or ZERO
+            summary['pending_payments'] += row['pending'] or ZERO
+            summary['overdue_invoices_count'] += row['overdue']
+            month = _month(row['month'])
+            if month and month.year == today.year:
+                monthly[month.month]['invoiced'] += row['invoiced'] or ZERO
+                monthly[month.month]['paid'] += row['paid'] or ZERO
+
+        month_start = today.replace(day=1)
+        in_month = Q(expense_date__year=today.year, expense_date__month=today.month)
+        conditions = in_month
+        totals = {'month_total': Sum('amount', filter=in_month)}
+        if session:
+            in_session = Q(
+                expense_date__range=(session.start_date, session.end_date),
+                status=Expense.Status.ACTIVE,
+            )
+            conditions |= in_session
+            totals['session_total'] = Sum('amount', filter=in_session)
+        expense_months = Expense.objects.filter(conditions).annotate(
+            month=TruncMonth('expense_date')
+        ).order_by().values('month').annotate(**totals)
+        for row in expense_months:
+            if _month(row['month']) == month_start:
+                summary['month_expenses'] += row['month_total'] or ZERO
+            summary['session_expenses'] += row.get('session_total') or ZERO
+
+        summary['total_outstanding'] = summary['total_invoiced'] - summary['total_paid']
+        summary['monthly_collection'] = [
+            {'month': month, 'invoiced': float(values['invoiced']), 'paid': float(values['paid'])}
+            for month, values in monthly.items()
+        ]
+        return summary
@@ -0,0 +1,79 @@
+"""
+Payment receipt PDFs, rendered through :class:`~apps.core.documents.DocumentRenderer`.
+"""
+
+from typing import Dict, List
+
+from apps.core.documents import Document, DocumentTemplate
+
+from .models import Payment
+
+TEMPLATE = 'apps.finance.documents.ReceiptTemplate'
+
+
+class ReceiptTemplate(DocumentTemplate):
+    """Payment receipt with the invoice it was paid against."""
+
+    name = 'receipt'
+    version = 1
+    title = 'Payment Receipt'
+
+    def draw(self, payload: Dict):
+        self.heading(payload['institution'], 'Payment Receipt', f"Receipt No. {payload['receipt_number']}")
+        self.fields([
+            ('Student', payload['student_name']),
+            ('Student ID', payload['student_id']),
+            ('Invoice', payload['invoice_number']),
+            ('Billing period', payload['billing_period']),
+            ('Payment date', payload['payment_date']),
+            ('Method', payload['payment_method']),
+            ('Reference', payload['reference']),
+            ('Status', payload['status']),
+        ])
+        self.table(
+            ['Description', 'Amount'],
+            [
+                ['Invoice total', payload['invoice_total']],
+                ['Amount paid (this receipt)', payload['amount']],
+                ['Balance due', payload['balance_due']],
+            ],
+            [0.7, 0.3],
+        )
+        self.paragraph('Notes', payload['notes'])
+        self.footer(f"Received by {payload['received_by']}" if payload['received_by'] else 'Thank you for your payment')
+
+
+def receipt_documents(payments) -> List[Document]:
+    """
+    Build receipt documents for a Payment queryset in one query.
+    """
+    documents = []
+    for payment in payments.select_related('invoice', 'student__user', 'received_by', 'institution'):
+        student = payment.student
+        documents.append(Document(
+            template=TEMPLATE,
+            payload={
+                'institution': payment.institution.name,
+                'receipt_number': payment.payment_number,
+                'student_name': student.user.get_full_name() or student.user.username,
+                'student_id': student.student_id,
+                'invoice_number': payment.invoice.invoice_number,
+                'billing_period': payment.invoice.billing_period,
+                'payment_date': payment.payment_date.isoformat(),
+                'payment_method': payment.get_payment_method_display(),
+                'reference': payment.paystack_transaction_reference or payment.reference_number or '-',
+                'status': payment.get_status_display(),
+                'invoice_total': str(payment.invoice.total_amount),
+                'amount': str(payment.amount),
+                'balance_due': str(payment.invoice.balance_due),
+                'notes': payment.notes,
+                'received_by': payment.received_by.get_full_name() if payment.received_by else '',
+            },
+            filename=f"receipt-{payment.payment_number}.pdf".replace('/', '-'),
+        ))
+    return documents
+
+
+def receipt_document(payment: Payment) -> Document:
+    """Document for a single payment."""
+    return receipt_documents(Payment.objects.filter(pk=payment.pk))[0]
@@ -0,0 +1,697 @@
+"""
+Double-entry student ledger.
+
+Invoices, discounts, late fees and payments are posted to an append-only
+ledger (:class:`~apps.finance.models.LedgerEntry`) with a running receivable
+balance per student and academic session. Postings are driven by the current
+state of the source row: :meth:`StudentLedger.sync_invoice` and
+:meth:`StudentLedger.sync_payment` compare what the row says the student owes
+with what has already been posted and append only the difference, so they are
+safe to call any number of times and corrections show up as reversing
+entries.
+
+Each posting also updates the student's monthly
+:class:`~apps.finance.models.LedgerSnapshot`, which statements and
+``FinancialReport.report_data`` read instead of recomputing balances from
+invoices. :class:`LedgerReconciliation` checks the ledger against
+``Invoice.balance_due`` and the snapshots against the ledger.
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, Q, Sum, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Expense, FinancialReport, Invoice, LedgerEntry, LedgerSnapshot, Payment
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+Account = LedgerEntry.Account
+EntryType = LedgerEntry.EntryType
+
+# (debit, credit) accounts for a posting in its natural direction
+POSTING_ACCOUNTS = {
+    EntryType.INVOICE: (Account.RECEIVABLE, Account.FEE_INCOME),
+    EntryType.LATE_FEE: (Account.RECEIVABLE, Account.LATE_FEE_INCOME),
+    EntryType.DISCOUNT: (Account.DISCOUNTS, Account.RECEIVABLE),
+    EntryType.PAYMENT: (Account.CASH, Account.RECEIVABLE),
+}
+SNAPSHOT_FIELDS = {
+    EntryType.INVOICE: 'charges',
+    EntryType.LATE_FEE: 'late_fees',
+    EntryType.DISCOUNT: 'discounts',
+    EntryType.PAYMENT: 'payments',
+}
+CHARGE_TYPES = (EntryType.INVOICE, EntryType.LATE_FEE)
+
+# Signed change to the receivable balance, for use in aggregates
+RECEIVABLE_EFFECT = Case(
+    When(debit_account=Account.RECEIVABLE, then=F('amount')),
+    When(credit_account=Account.RECEIVABLE, then=-F('amount')),
+    default=ZERO,
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+# Amount in the entry type's natural direction (reversals count negative)
+NATURAL_AMOUNT = Case(
+    When(
+        Q(entry_type__in=CHARGE_TYPES, debit_account=Account.RECEIVABLE) |
+        Q(credit_account=Account.RECEIVABLE) & ~Q(entry_type__in=CHARGE_TYPES),
+        then=F('amount'),
+    ),
+    default=-F('amount'),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def natural_amount(entry: LedgerEntry) -> Decimal:
+    """Python counterpart of ``NATURAL_AMOUNT`` for a loaded entry."""
+    effect = entry.receivable_effect
+    return abs(effect) if (effect > 0) == (entry.entry_type in CHARGE_TYPES) else -abs(effect)
+
+
+class StudentLedger:
+    """
+    Posts to and reads from the student ledger.
+    """
+
+    @classmethod
+    @transaction.atomic
+    def post(cls, student_id, session_id, entry_type: str, amount: Decimal,
+             invoice: Optional[Invoice] = None, payment: Optional[Payment] = None,
+             description: str = '', posted_on: Optional[date] = None,
+             institution_id=None) -> Optional[LedgerEntry]:
+        """
+        Append one posting and roll it into the monthly snapshot.
+
+        Args:
+            student_id: Student the posting belongs to
+            session_id: Academic session of the posting
+            entry_type: One of ``LedgerEntry.EntryType``
+            amount: Amount in the entry type's natural direction; a negative
+                amount posts a reversal (accounts swapped)
+            invoice: Source invoice, if any
+            payment: Source payment, if any
+            description: Free-text description for statements
+            posted_on: Posting date (defaults to today, never earlier than the
+                student's previous posting)
+            institution_id: Institution of the source row
+
+        Returns:
+            The new LedgerEntry, or None for a zero amount
+        """
+        if not amount:
+            return None
+        debit, credit = POSTING_ACCOUNTS[entry_type]
+        if amount < 0:
+            debit, credit = credit, debit
+
+        last = LedgerEntry.objects.select_for_update().filter(
+            student_id=student_id, academic_session_id=session_id
+        ).order_by('-sequence').values('sequence', 'balance', 'posted_on').first()
+        previous_balance = last['balance'] if last else ZERO
+        posted_on = posted_on or timezone.localdate()
+        if last and posted_on < last['posted_on']:
+            posted_on = last['posted_on']
+
+        effect = abs(amount) if debit == Account.RECEIVABLE else -abs(amount)
+        entry = LedgerEntry.objects.create(
+            student_id=student_id,
+            academic_session_id=session_id,
+            invoice=invoice,
+            payment=payment,
+            entry_type=entry_type,
+            debit_account=debit,
+            credit_account=credit,
+            amount=abs(amount),
+            sequence=(last['sequence'] if last else 0) + 1,
+            balance=previous_balance + effect,
+            posted_on=posted_on,
+            description=description[:255],
+            institution_id=institution_id,
+        )
+
+        snapshot, _created = LedgerSnapshot.objects.select_for_update().get_or_create(
+            student_id=student_id,
+            academic_session_id=session_id,
+            period=month_start(posted_on),
+            defaults={
+                'opening_balance': previous_balance,
+                'closing_balance': previous_balance,
+                'institution_id': institution_id,
+            },
+        )
+        field = SNAPSHOT_FIELDS[entry_type]
+        LedgerSnapshot.objects.filter(pk=snapshot.pk).update(**{
+            field: F(field) + amount,
+            'closing_balance': entry.balance,
+            'entry_count': F('entry_count') + 1,
+            'last_sequence': entry.sequence,
+        })
+        return entry
+
+    @classmethod
+    @transaction.atomic
+    def post_many(cls, postings: List[Dict], posted_on: Optional[date] = None) -> List[LedgerEntry]:
+        """
+        Append many postings with a constant number of queries.
+
+        Args:
+            postings: Dicts with ``student_id``, ``session_id``, ``entry_type``,
+                ``amount`` (natural direction, as for :meth:`post`) and
+                optionally ``invoice_id``, ``payment_id``, ``description`` and
+                ``institution_id``
+            posted_on: Posting date (defaults to today, never earlier than a
+                student's previous posting)
+
+        Returns:
+            The created entries
+        """
+        postings = [posting for posting in postings if posting['amount']]
+        if not postings:
+            return []
+        posted_on = posted_on or timezone.localdate()
+        students = {posting['student_id'] for posting in postings}
+        sessions = {posting['session_id'] for posting in postings}
+        pairs = {(posting['student_id'], posting['session_id']) for posting in postings}
+
+        entries_so_far = LedgerEntry.objects.filter(
+            student_id__in=students, academic_session_id__in=sessions
+        )
+        # Lock first, as post() does with the last entry; FOR UPDATE cannot be
+        # combined with the GROUP BY below (PostgreSQL rejects it)
+        list(entries_so_far.select_for_update().order_by().values_list('pk', flat=True))
+        state = {}
+        for row in entries_so_far.values('student_id', 'academic_session_id').annotate(
+            last_sequence=Max('sequence'), last_posted_on=Max('posted_on')
+        ).order_by():
+            key = (row['student_id'], row['academic_session_id'])
+            if key in pairs:
+                state[key] = {
+                    'sequence': row['last_sequence'],
+                    'balance': ZERO,
+                    'posted_on': max(posted_on, row['last_posted_on']),
+                }
+        if state:
+            for row in entries_so_far.filter(
+                sequence__in={pair['sequence'] for pair in state.values()}
+            ).values('student_id', 'academic_session_id', 'sequence', 'balance'):
+                pair = state.get((row['student_id'], row['academic_session_id']))
+                if pair and pair['sequence'] == row['sequence']:
+                    pair['balance'] = row['balance']
+        for key in pairs - set(state):
+            state[key] = {'sequence': 0, 'balance': ZERO, 'posted_on': posted_on}
+
+        snapshots = {
+            (snapshot.student_id, snapshot.academic_session_id, snapshot.period): snapshot
+            for snapshot in LedgerSnapshot.objects.select_for_update().filter(
+                student_id__in=students,
+                academic_session_id__in=sessions,
+                period__in={month_start(pair['posted_on']) for pair in state.values()},
+            )
+        }
+        entries = []
+        new_snapshots = []
+        touched = set()
+        for posting in postings:
+            key = (posting['student_id'], posting['session_id'])
+            pair = state[key]
+            amount = posting['amount']
+            debit, credit = POSTING_ACCOUNTS[posting['entry_type']]
+            if amount < 0:
+                debit, credit = credit, debit
+
+            snapshot_key = key + (month_start(pair['posted_on']),)
+            snapshot = snapshots.get(snapshot_key)
+            if snapshot is None:
+                snapshot = snapshots[snapshot_key] = LedgerSnapshot(
+                    student_id=key[0],
+                    academic_session_id=key[1],
+                    period=snapshot_key[2],
+                    opening_balance=pair['balance'],
+                    closing_balance=pair['balance'],
+                    institution_id=posting.get('institution_id'),
+                )
+                new_snapshots.append(snapshot)
+            elif snapshot.pk and not snapshot._state.adding:
+                touched.add(snapshot_key)
+
+            pair['sequence'] += 1
+            pair['balance'] += abs(amount) if debit == Account.RECEIVABLE else -abs(amount)
+            entries.append(LedgerEntry(
+                student_id=key[0],
+                academic_session_id=key[1],
+                invoice_id=posting.get('invoice_id'),
+                payment_id=posting.get('payment_id'),
+                entry_type=posting['entry_type'],
+                debit_account=debit,
+                credit_account=credit,
+                amount=abs(amount),
+                sequence=pair['sequence'],
+                balance=pair['balance'],
+                posted_on=pair['posted_on'],
+                description=posting.get('description', '')[:255],
+                institution_id=posting.get('institution_id'),
+            ))
+            field = SNAPSHOT_FIELDS[posting['entry_type']]
+            setattr(snapshot, field, getattr(snapshot, field) + amount)
+            snapshot.closing_balance = pair['balance']
+            snapshot.entry_count += 1
+            snapshot.last_sequence = pair['sequence']
+
+        LedgerEntry.objects.bulk_create(entries)
+        # One upsert on the snapshot's natural key instead of a many-column
+        # bulk_update, which builds a CASE per row and field
+        LedgerSnapshot.objects.bulk_create(
+            new_snapshots + [snapshots[key] for key in touched],
+            update_conflicts=True,
+            unique_fields=['student', 'academic_session', 'period'],
+            update_fields=[
+                'charges', 'late_fees', 'discounts', 'payments',
+                'closing_balance', 'entry_count', 'last_sequence', 'updated_at',
+            ],
+        )
+        return entries
+
+    @staticmethod
+    def posted(**filters) -> Dict[str, Decimal]:
+        """Net posted amount per entry type for the matching entries."""
+        rows = LedgerEntry.objects.filter(**filters).values('entry_type').annotate(
+            total=Sum(NATURAL_AMOUNT)
+        ).order_by()
+        return {row['entry_type']: row['total'] or ZERO for row in rows}
+
+    @classmethod
+    def sync_invoice(cls, invoice: Invoice, posted_on: Optional[date] = None,
+                     removed: bool = False) -> List[LedgerEntry]:
+        """
+        Post whatever the invoice's charges, discount and late fee have changed by.
+
+        ``total_amount`` is net of discount and includes any late fee, so the
+        ledger posts the gross charge, the discount and the late fee
+        separately and their net always equals ``total_amount``. A
+        soft-deleted invoice, or one about to be hard-deleted (``removed``),
+        has everything posted for it reversed.
+        """
+        if removed or invoice.is_deleted:
+            targets = {EntryType.INVOICE: ZERO, EntryType.LATE_FEE: ZERO, EntryType.DISCOUNT: ZERO}
+        else:
+            late_fee = invoice.late_fee or ZERO
+            discount = invoice.total_discount or ZERO
+            targets = {
+                EntryType.INVOICE: invoice.total_amount + discount - late_fee,
+                EntryType.LATE_FEE: late_fee,
+                EntryType.DISCOUNT: discount,
+            }
+        posted = cls.posted(invoice=invoice, entry_type__in=list(targets))
+        entries = []
+        with transaction.atomic():
+            for entry_type, target in targets.items():
+                delta = target - posted.get(entry_type, ZERO)
+                entry = cls.post(
+                    invoice.student_id, invoice.academic_session_id, entry_type, delta,
+                    invoice=invoice,
+                    description=f"{EntryType(entry_type).label} {invoice.invoice_number}",
+                    posted_on=posted_on,
+                    institution_id=invoice.institution_id,
+                )
+                if entry:
+                    entries.append(entry)
+        return entries
+
+    @classmethod
+    def sync_payment(cls, payment: Payment, posted_on: Optional[date] = None,
+                     removed: bool = False) -> Optional[LedgerEntry]:
+        """
+        Post a completed payment, or reverse it once it is no longer completed
+        or is about to be hard-deleted (``removed``).
+        """
+        completed = (
+            payment.status == Payment.PaymentStatus.COMPLETED and not payment.is_deleted and not removed
+        )
+        target = payment.amount if completed else ZERO
+        delta = target - cls.posted(payment=payment).get(EntryType.PAYMENT, ZERO)
+        if not delta:
+            return None
+        invoice = payment.invoice
+        return cls.post(
+            invoice.student_id, invoice.academic_session_id, EntryType.PAYMENT, delta,
+            invoice=invoice,
+            payment=payment,
+            description=f"Payment {payment.payment_number}",
+            posted_on=posted_on,
+            institution_id=payment.institution_id,
+        )
+
+    @staticmethod
+    def balance(student, session) -> Decimal:
+        """Current receivable balance of a student for a session."""
+        last = LedgerEntry.objects.filter(
+            student=student, academic_session=session
+        ).order_by('-sequence').values_list('balance', flat=True).first()
+        return last if last is not None else ZERO
+
+    @staticmethod
+    def totals(student, session=None) -> Dict[str, Decimal]:
+        """
+        Invoiced, paid and outstanding totals from the snapshots.
+
+        Args:
+            student: Student
+            session: Academic session, or None for all sessions
+
+        Returns:
+            Dict with ``total_invoiced`` (net of discounts, including late
+            fees), ``total_discount``, ``total_paid`` and ``total_balance``
+        """
+        snapshots = LedgerSnapshot.objects.filter(student=student)
+        if session is not None:
+            snapshots = snapshots.filter(academic_session=session)
+        agg = snapshots.aggregate(
+            charges=Sum('charges'),
+            late_fees=Sum('late_fees'),
+            discounts=Sum('discounts'),
+            payments=Sum('payments'),
+        )
+        charges = (agg['charges'] or ZERO) + (agg['late_fees'] or ZERO)
+        discounts = agg['discounts'] or ZERO
+        paid = agg['payments'] or ZERO
+        return {
+            'total_invoiced': charges - discounts,
+            'total_discount': discounts,
+            'total_paid': paid,
+            'total_balance': charges - discounts - paid,
+        }
+
+    @staticmethod
+    def statement(student, session, start: Optional[date] = None,
+                  end: Optional[date] = None) -> Dict:
+        """
+        Build a statement of account for a period.
+
+        Reads the balance brought forward from the last posting before
+        ``start`` and the postings inside the period only.
+
+        Returns:
+            Dict with ``opening_balance``, ``closing_balance``, ``debits``,
+            ``credits`` and ``entries`` (date, type, description, debit,
+            credit and running balance of each posting)
+        """
+        entries = LedgerEntry.objects.filter(student=student, academic_session=session)
+        opening = ZERO
+        if start:
+            previous = entries.filter(posted_on__lt=start).order_by('-sequence').values_list(
+                'balance', flat=True).first()
+            opening = previous if previous is not None else ZERO
+            entries = entries.filter(posted_on__gte=start)
+        if end:
+            entries = entries.filter(posted_on__lte=end)
+
+        lines = []
+        debits = credits = ZERO
+        closing = opening
+        for entry in entries.order_by('sequence'):
+            effect = entry.receivable_effect
+            debit = effect if effect > 0 else ZERO
+            credit = -effect if effect < 0 else ZERO
+            debits += debit
+            credits += credit
+            closing = entry.balance
+            lines.append({
+                'date': entry.posted_on.isoformat(),
+                'type': entry.entry_type,
+                'description': entry.description,
+                'debit': str(debit),
+                'credit': str(credit),
+                'balance': str(entry.balance),
+            })
+        return {
+            'opening_balance': opening,
+            'closing_balance': closing,
+            'debits': debits,
+            'credits': credits,
+            'entries': lines,
+        }
+
+
+class LedgerReports:
+    """
+    Builds ``FinancialReport.report_data`` from ledger snapshots.
+
+    Snapshots are monthly, so report periods are widened to whole months.
+    """
+
+    @staticmethod
+    def _snapshots(report: FinancialReport):
+        return LedgerSnapshot.objects.filter(
+            academic_session=report.academic_session,
+            period__gte=month_start(report.start_date),
+            period__lte=month_start(report.end_date),
+        )
+
+    @classmethod
+    def report_data(cls, report: FinancialReport) -> Optional[Dict]:
+        """Report data for ledger-backed report types, or None for other types."""
+        builders = {
+            FinancialReport.ReportType.STUDENT_LEDGER: cls.student_ledger,
+            FinancialReport.ReportType.OUTSTANDING_FEES: cls.outstanding_fees,
+            FinancialReport.ReportType.FEE_COLLECTION: cls.fee_collection,
+            FinancialReport.ReportType.CASH_FLOW: cls.cash_flow,
+        }
+        builder = builders.get(report.report_type)
+        return builder(report) if builder else None
+
+    @classmethod
+    def student_ledger(cls, report: FinancialReport) -> Dict:
+        """Opening balance, movements and closing balance per student."""
+        students = {}
+        rows = cls._snapshots(report).order_by('student_id', 'period').values(
+            'student_id', 'student__admission_number', 'opening_balance', 'charges',
+            'late_fees', 'discounts', 'payments', 'closing_balance',
+        )
+        for row in rows:
+            line = students.get(row['student_id'])
+            if line is None:
+                line = students[row['student_id']] = {
+                    'student_id': str(row['student_id']),
+                    'admission_number': row['student__admission_number'],
+                    'opening_balance': row['opening_balance'],
+                    'charges': ZERO, 'late_fees': ZERO, 'discounts': ZERO, 'payments': ZERO,
+                }
+            for field in ('charges', 'late_fees', 'discounts', 'payments'):
+                line[field] += row[field]
+            line['closing_balance'] = row['closing_balance']
+        return {'students': [
+            {key: str(value) if isinstance(value, Decimal) else value for key, value in line.items()}
+            for line in students.values()
+        ]}
+
+    @staticmethod
+    def outstanding_fees(report: FinancialReport) -> Dict:
+        """Students with a balance at the end of the period, largest first."""
+        balances = {}
+        rows = LedgerSnapshot.objects.filter(
+            academic_session=report.academic_session,
+            period__lte=month_start(report.end_date),
+        ).order_by('student_id', 'period').values(
+            'student_id', 'student__admission_number', 'closing_balance'
+        )
+        for row in rows:
+            balances[row['student_id']] = row
+        outstanding = sorted(
+            (row for row in balances.values() if row['closing_balance'] > ZERO),
+            key=lambda row: row['closing_balance'], reverse=True,
+        )
+        return {
+            'total_outstanding': str(sum((row['closing_balance'] for row in outstanding), ZERO)),
+            'students': [
+                {
+                    'student_id': str(row['student_id']),
+                    'admission_number': row['student__admission_number'],
+                    'balance': str(row['closing_balance']),
+                }
+                for row in outstanding
+            ],
+        }
+
+    @classmethod
+    def _monthly(cls, report: FinancialReport) -> List[Dict]:
+        rows = cls._snapshots(report).values('period').annotate(
+            charges=Sum('charges'),
+            late_fees=Sum('late_fees'),
+            discounts=Sum('discounts'),
+            payments=Sum('payments'),
+        ).order_by('period')
+        return list(rows)
+
+    @classmethod
+    def fee_collection(cls, report: FinancialReport) -> Dict:
+        """Billed, discounted and collected amounts per month."""
+        months = []
+        totals = {'billed': ZERO, 'discounts': ZERO, 'collected': ZERO}
+        for row in cls._monthly(report):
+            billed = row['charges'] + row['late_fees']
+            totals['billed'] += billed
+            totals['discounts'] += row['discounts']
+            totals['collected'] += row['payments']
+            months.append({
+                'month': row['period'].strftime('%Y-%m'),
+                'billed': str(billed),
+                'discounts': str(row['discounts']),
+                'collected': str(row['payments']),
+            })
+        return {'months': months, 'totals': {key: str(value) for key, value in totals.items()}}
+
+    @classmethod
+    def cash_flow(cls, report: FinancialReport) -> Dict:
+        """Fee receipts against expenses per month."""
+        flows = {
+            row['period']: {'inflow': row['payments'], 'outflow': ZERO}
+            for row in cls._monthly(report)
+        }
+        expenses = Expense.objects.filter(
+            expense_date__range=(report.start_date, report.end_date),
+            status=Expense.Status.ACTIVE,
+        ).annotate(month=TruncMonth('expense_date')).values('month').annotate(
+            total=Sum('amount')
+        ).order_by()
+        for row in expenses:
+            flows.setdefault(row['month'], {'inflow': ZERO, 'outflow': ZERO})['outflow'] = row['total']
+        months = [
+            {
+                'month': period.strftime('%Y-%m'),
+                'inflow': str(flow['inflow']),
+                'outflow': str(flow['outflow']),
+                'net': str(flow['inflow'] - flow['outflow']),
+            }
+            for period, flow in sorted(flows.items())
+        ]
+        inflow = sum((flow['inflow'] for flow in flows.values()), ZERO)
+        outflow = sum((flow['outflow'] for flow in flows.values()), ZERO)
+        return {
+            'months': months,
+            'totals': {'inflow': str(inflow), 'outflow': str(outflow), 'net': str(inflow - outflow)},
+        }
+
+
+class LedgerReconciliation:
+    """
+    Verifies the ledger against invoices and the snapshots against the ledger.
+    """
+
+    @staticmethod
+    def invoice_mismatches(session=None) -> List[Dict]:
+        """
+        Invoices whose ledger balance differs from ``balance_due``, or from
+        zero for soft-deleted invoices whose postings were not reversed.
+        """
+        entries = LedgerEntry.objects.filter(invoice__isnull=False)
+        invoices = Invoice.all_objects.all()
+        if session is not None:
+            entries = entries.filter(academic_session=session)
+            invoices = invoices.filter(academic_session=session)
+        ledger = dict(
+            entries.values('invoice_id').annotate(net=Sum(RECEIVABLE_EFFECT)).order_by().values_list(
+                'invoice_id', 'net')
+        )
+        mismatches = []
+        for invoice_id, number, balance_due, is_deleted in invoices.values_list(
+                'pk', 'invoice_number', 'balance_due', 'is_deleted'):
+            balance_due = ZERO if is_deleted else balance_due
+            ledger_balance = ledger.get(invoice_id) or ZERO
+            if ledger_balance != balance_due:
+                mismatches.append({
+                    'invoice_id': invoice_id,
+                    'invoice_number': number,
+                    'balance_due': balance_due,
+                    'ledger_balance': ledger_balance,
+                })
+        return mismatches
+
+    @staticmethod
+    def snapshot_mismatches(session=None) -> List[tuple]:
+        """(student_id, session_id) pairs whose snapshots disagree with their entries."""
+        entries = LedgerEntry.objects.all()
+        snapshots = LedgerSnapshot.objects.all()
+        if session is not None:
+            entries = entries.filter(academic_session=session)
+            snapshots = snapshots.filter(academic_session=session)
+        ledger = {
+            (row['student_id'], row['academic_session_id']): row['net']
+            for row in entries.values('student_id', 'academic_session_id').annotate(
+                net=Sum(RECEIVABLE_EFFECT)).order_by()
+        }
+        rolled_up = {
+            (row['student_id'], row['academic_session_id']): row['net']
+            for row in snapshots.values('student_id', 'academic_session_id').annotate(
+                net=Sum(F('charges') + F('late_fees') - F('discounts') - F('payments'))).order_by()
+        }
+        return sorted(
+            key for key in set(ledger) | set(rolled_up)
+            if (ledger.get(key) or ZERO) != (rolled_up.get(key) or ZERO)
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild_snapshots(student_id, session_id) -> int:
+        """Recompute the snapshots of one student and session from the ledger."""
+        LedgerSnapshot.objects.filter(student_id=student_id, academic_session_id=session_id).delete()
+        snapshots = {}
+        balance = ZERO
+        for entry in LedgerEntry.objects.filter(
+            student_id=student_id, academic_session_id=session_id
+        ).order_by('sequence'):
+            period = month_start(entry.posted_on)
+            snapshot = snapshots.get(period)
+            if snapshot is None:
+                snapshot = snapshots[period] = LedgerSnapshot(
+                    student_id=student_id,
+                    academic_session_id=session_id,
+                    period=period,
+                    opening_balance=balance,
+                    institution_id=entry.institution_id,
+                )
+            field = SNAPSHOT_FIELDS[entry.entry_type]
+            setattr(snapshot, field, getattr(snapshot, field) + natural_amount(entry))
+            balance = entry.balance
+            snapshot.closing_balance = balance
+            snapshot.entry_count += 1
+            snapshot.last_sequence = entry.sequence
+        LedgerSnapshot.objects.bulk_create(snapshots.values())
+        return len(snapshots)
+
+    @staticmethod
+    def sync_all(session=None) -> int:
+        """
+        Post any missing or changed amounts for every invoice and payment.
+
+        Sources are replayed in date order with their own dates, so running
+        this on existing data backfills a ledger that reads chronologically.
+        Soft-deleted invoices and payments are included, so postings left
+        behind by a bulk ``update(is_deleted=True)`` are reversed.
+        """
+        invoices = Invoice.all_objects.all()
+        payments = Payment.all_objects.select_related('invoice')
+        if session is not None:
+            invoices = invoices.filter(academic_session=session)
+            payments = payments.filter(invoice__academic_session=session)
+        sources = [(invoice.issue_date, 0, invoice) for invoice in invoices.iterator()]
+        sources += [(payment.payment_date, 1, payment) for payment in payments.iterator()]
+        posted = 0
+        for posted_on, kind, source in sorted(sources, key=lambda item: (item[0], item[1])):
+            if kind == 0:
+                posted += len(StudentLedger.sync_invoice(source, posted_on=posted_on))
+            elif StudentLedger.sync_payment(source, posted_on=posted_on):
+                posted += 1
+        if posted:
+            logger.info(f"Posted {posted} ledger entr{'y' if posted == 1 else 'ies'} during sync")
+        return posted
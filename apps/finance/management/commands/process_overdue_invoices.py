@@ -0,0 +1,52 @@
+"""
+Management command to process overdue invoices.
+
+Marks unpaid invoices past their due date as overdue, posts the late fees
+accrued since the last run and queues payment reminders. Run it once a day
+from cron; running it again on the same day changes nothing.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.overdue import OverdueProcessor
+
+
+class Command(BaseCommand):
+    help = 'Mark overdue invoices, accrue late fees and queue reminders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Process as of this date (YYYY-MM-DD, default: today)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Invoices processed per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--no-reminders',
+            action='store_true',
+            help='Do not queue reminder notifications',
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid date: {options['date']}")
+
+        result = OverdueProcessor.process(
+            today=today,
+            batch_size=options['batch_size'],
+            notify=not options['no_reminders'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['marked']} invoice(s) marked overdue; {result['items']} late fee item(s) "
+            f"posted on {result['late_fees']} invoice(s); {result['reminders']} reminder(s) queued"
+        ))
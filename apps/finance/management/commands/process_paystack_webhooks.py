@@ -0,0 +1,54 @@
+"""
+Management command to process queued Paystack webhook events.
+
+The webhook view only stores deliveries; this command applies them. Run it
+once from cron, or as a long-running worker with --loop. Several copies can
+run at once, since each batch is leased to a single worker.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.webhooks import WebhookQueue
+
+
+class Command(BaseCommand):
+    help = 'Process queued Paystack webhook events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, checking every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds between checks when looping (default: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Events claimed per batch (default: 100)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Threads processing each batch; use more than one only on a server database (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = WebhookQueue.drain(batch_size=options['batch_size'], workers=options['workers'])
+            if processed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Processed {processed} webhook event(s)'))
+            if not options['loop']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
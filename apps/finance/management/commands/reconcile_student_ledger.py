@@ -0,0 +1,71 @@
+"""
+Management command to reconcile the student ledger.
+
+Checks that every invoice's ledger balance matches Invoice.balance_due and
+that the monthly ledger snapshots agree with the entries they roll up.
+--sync first posts any missing or changed invoice and payment amounts;
+--rebuild-snapshots recomputes snapshots that disagree with the ledger.
+
+Invoices and payments that existed before the ledger was introduced are not
+posted by any migration. Run this once after upgrading to backfill them:
+
+    python manage.py reconcile_student_ledger --sync --rebuild-snapshots
+
+Syncing skips amounts already posted, so it is safe to run again.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academics.models import AcademicSession
+from apps.finance.ledger import LedgerReconciliation
+
+
+class Command(BaseCommand):
+    help = 'Verify the student ledger against invoices and its snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--session',
+            help='Only reconcile this academic session (id)',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Post missing or changed invoice and payment amounts first',
+        )
+        parser.add_argument(
+            '--rebuild-snapshots',
+            action='store_true',
+            help='Recompute snapshots that disagree with the ledger',
+        )
+
+    def handle(self, *args, **options):
+        session = None
+        if options['session']:
+            try:
+                session = AcademicSession.objects.get(pk=options['session'])
+            except (AcademicSession.DoesNotExist, ValueError):
+                raise CommandError(f"Academic session {options['session']} not found")
+
+        if options['sync']:
+            posted = LedgerReconciliation.sync_all(session)
+            self.stdout.write(f"Posted {posted} ledger entr{'y' if posted == 1 else 'ies'}")
+
+        mismatches = LedgerReconciliation.invoice_mismatches(session)
+        for mismatch in mismatches:
+            self.stdout.write(self.style.WARNING(
+                f"Invoice {mismatch['invoice_number']}: balance due {mismatch['balance_due']}, "
+                f"ledger {mismatch['ledger_balance']}"
+            ))
+
+        stale = LedgerReconciliation.snapshot_mismatches(session)
+        if options['rebuild_snapshots']:
+            for student_id, session_id in stale:
+                LedgerReconciliation.rebuild_snapshots(student_id, session_id)
+
+        verb = 'rebuilt' if options['rebuild_snapshots'] else 'found'
+        style = self.style.SUCCESS if not mismatches and not stale else self.style.WARNING
+        self.stdout.write(style(
+            f"{len(mismatches)} invoice(s) out of balance; "
+            f"{verb} stale snapshots for {len(stale)} student session(s)"
+        ))
@@ -0,0 +1,74 @@
+"""
+Management command to replay Paystack webhook events locally.
+
+Requeues stored events (dead-lettered ones, or every event for a reference),
+or feeds captured deliveries from a file through the same ingestion path as
+the webhook view. Captured files hold one raw Paystack payload per line.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.models import PaystackWebhookEvent
+from apps.finance.webhooks import InvalidWebhook, WebhookQueue, sign_payload
+
+
+class Command(BaseCommand):
+    help = 'Requeue stored Paystack webhook events or replay captured payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dead',
+            action='store_true',
+            help='Requeue every dead-lettered event',
+        )
+        parser.add_argument(
+            '--reference',
+            action='append',
+            default=[],
+            help='Requeue every event for this reference (repeatable)',
+        )
+        parser.add_argument(
+            '--file',
+            help='Ingest captured payloads from a JSON-lines file',
+        )
+        parser.add_argument(
+            '--process',
+            action='store_true',
+            help='Process the queue after requeueing',
+        )
+
+    def handle(self, *args, **options):
+        if not (options['dead'] or options['reference'] or options['file']):
+            raise CommandError('Pass --dead, --reference or --file')
+
+        requeued = 0
+        if options['dead']:
+            requeued += WebhookQueue.requeue(
+                PaystackWebhookEvent.objects.filter(dead_lettered_at__isnull=False)
+            )
+        if options['reference']:
+            requeued += WebhookQueue.requeue(
+                PaystackWebhookEvent.objects.filter(event_reference__in=options['reference'])
+            )
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} event(s)')
+
+        if options['file']:
+            created = duplicates = 0
+            with open(options['file'], 'rb') as payloads:
+                for number, line in enumerate(payloads, start=1):
+                    body = line.strip()
+                    if not body:
+                        continue
+                    try:
+                        _event, is_new = WebhookQueue.ingest(body, sign_payload(body))
+                    except InvalidWebhook as e:
+                        raise CommandError(f'Line {number}: {e}')
+                    created += is_new
+                    duplicates += not is_new
+            self.stdout.write(f'Ingested {created} event(s), skipped {duplicates} duplicate(s)')
+
+        if options['process']:
+            processed = WebhookQueue.drain()
+            self.stdout.write(f'Processed {processed} event(s)')
+        self.stdout.write(self.style.SUCCESS('Replay complete'))
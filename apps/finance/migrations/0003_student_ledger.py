@@ -0,0 +1,82 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:14
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_initial'),
+        ('core', '0003_alter_institution_database_schema'),
+        ('finance', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='updated at')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('inactive', 'Inactive'), ('pending', 'Pending'), ('suspended', 'Suspended'), ('archived', 'Archived')], db_index=True, default='active', max_length=20, verbose_name='status')),
+                ('status_changed_at', models.DateTimeField(auto_now_add=True, verbose_name='status changed at')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, verbose_name='is deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='deleted at')),
+                ('entry_type', models.CharField(choices=[('invoice', 'Invoice'), ('payment', 'Payment'), ('discount', 'Discount'), ('late_fee', 'Late Fee')], max_length=20, verbose_name='entry type')),
+                ('debit_account', models.CharField(choices=[('receivable', 'Fees Receivable'), ('fee_income', 'Fee Income'), ('late_fee_income', 'Late Fee Income'), ('discounts', 'Discounts Allowed'), ('cash', 'Cash and Bank')], max_length=20, verbose_name='debit account')),
+                ('credit_account', models.CharField(choices=[('receivable', 'Fees Receivable'), ('fee_income', 'Fee Income'), ('late_fee_income', 'Late Fee Income'), ('discounts', 'Discounts Allowed'), ('cash', 'Cash and Bank')], max_length=20, verbose_name='credit account')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='amount')),
+                ('sequence', models.PositiveIntegerField(verbose_name='sequence')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='running balance')),
+                ('posted_on', models.DateField(verbose_name='posted on')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='description')),
+                ('academic_session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='academics.academicsession', verbose_name='academic session')),
+                ('institution', models.ForeignKey(help_text='Institution this record belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_records', to='core.institution', verbose_name='institution')),
+                ('invoice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='finance.invoice', verbose_name='invoice')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='finance.payment', verbose_name='payment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='academics.student', verbose_name='student')),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'ordering': ['student', 'academic_session', 'sequence'],
+                'indexes': [models.Index(fields=['student', 'academic_session', 'posted_on', 'sequence'], name='finance_led_student_eca07b_idx'), models.Index(fields=['invoice', 'entry_type'], name='finance_led_invoice_4aa507_idx'), models.Index(fields=['payment'], name='finance_led_payment_f7fe13_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'academic_session', 'sequence'), name='unique_ledger_sequence')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='updated at')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('inactive', 'Inactive'), ('pending', 'Pending'), ('suspended', 'Suspended'), ('archived', 'Archived')], db_index=True, default='active', max_length=20, verbose_name='status')),
+                ('status_changed_at', models.DateTimeField(auto_now_add=True, verbose_name='status changed at')),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, verbose_name='is deleted')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='deleted at')),
+                ('period', models.DateField(help_text='First day of the month', verbose_name='period')),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='opening balance')),
+                ('charges', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='charges')),
+                ('late_fees', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='late fees')),
+                ('discounts', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='discounts')),
+                ('payments', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='payments')),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='closing balance')),
+                ('entry_count', models.PositiveIntegerField(default=0, verbose_name='entry count')),
+                ('last_sequence', models.PositiveIntegerField(default=0, verbose_name='last sequence')),
+                ('academic_session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_snapshots', to='academics.academicsession', verbose_name='academic session')),
+                ('institution', models.ForeignKey(help_text='Institution this record belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_records', to='core.institution', verbose_name='institution')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_snapshots', to='academics.student', verbose_name='student')),
+            ],
+            options={
+                'verbose_name': 'Ledger Snapshot',
+                'verbose_name_plural': 'Ledger Snapshots',
+                'ordering': ['student', 'academic_session', 'period'],
+                'indexes': [models.Index(fields=['academic_session', 'period'], name='finance_led_academi_875d2f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'academic_session', 'period'), name='unique_ledger_snapshot_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_student_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='last_reminder_sent_on',
+            field=models.DateField(blank=True, null=True, verbose_name='last reminder sent on'),
+        ),
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='is_late_fee',
+            field=models.BooleanField(default=False, verbose_name='is late fee'),
+        ),
+    ]
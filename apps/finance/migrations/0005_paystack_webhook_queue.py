@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_institution_database_schema'),
+        ('finance', '0004_overdue_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='attempts'),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='dead_lettered_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='dead-lettered at'),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='locked until'),
+        ),
+        migrations.AddField(
+            model_name='paystackwebhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='next attempt at'),
+        ),
+        migrations.AddIndex(
+            model_name='paystackwebhookevent',
+            index=models.Index(condition=models.Q(('dead_lettered_at__isnull', True), ('processed', False)), fields=['event_timestamp', 'created_at'], name='paystack_webhook_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paystackwebhookevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('event_reference', ''), _negated=True), fields=('event_type', 'event_reference'), name='unique_paystack_webhook_event'),
+        ),
+    ]
@@ -2,6 +2,7 @@
 
 import logging
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
@@ -320,6 +321,7 @@ class Invoice(CoreBaseModel):
     )
     notes = models.TextField(_('notes'), blank=True)
     terms_and_conditions = models.TextField(_('terms and conditions'), blank=True)
+    last_reminder_sent_on = models.DateField(_('last reminder sent on'), null=True, blank=True)
 
     class Meta:
         verbose_name = _('Invoice')
@@ -375,7 +377,7 @@ class Invoice(CoreBaseModel):
             return Decimal('0.00')
         
         total_late_fee = Decimal('0.00')
-        for item in self.items.all():
+        for item in self.items.filter(is_late_fee=False).select_related('fee_structure'):
             if item.fee_structure.late_fee_per_day > Decimal('0.00'):
                 days_overdue = self.days_overdue
                 late_fee = days_overdue * item.fee_structure.late_fee_per_day
@@ -436,6 +438,7 @@ class InvoiceItem(CoreBaseModel):
         validators=[MinValueValidator(Decimal('0.00'))]
     )
     description = models.TextField(_('description'), blank=True)
+    is_late_fee = models.BooleanField(_('is late fee'), default=False)
 
     class Meta:
         verbose_name = _('Invoice Item')
@@ -598,21 +601,17 @@ class Payment(CoreBaseModel):
                     invoice.save(update_fields=['amount_paid', 'balance_due', 'status'])
             else:
                 # Check if status changed TO completed (avoid double-counting on re-saves)
-                try:
-                    old_instance = Payment.objects.get(pk=self.pk)
-                    if old_instance.status != self.PaymentStatus.COMPLETED:
-                        from django.db import transaction
-                        with transaction.atomic():
-                            invoice = Invoice.objects.select_for_update().get(pk=self.invoice_id)
-                            invoice.amount_paid = (invoice.amount_paid or Decimal('0.00')) + self.amount
-                            invoice.balance_due = max(Decimal('0.00'), invoice.total_amount - invoice.amount_paid)
-                            if invoice.amount_paid >= invoice.total_amount:
-                                invoice.status = Invoice.InvoiceStatus.PAID
-                            elif invoice.amount_paid > Decimal('0.00'):
-                                invoice.status = Invoice.InvoiceStatus.PARTIAL
-                            invoice.save(update_fields=['amount_paid', 'balance_due', 'status'])
-                except Payment.DoesNotExist:
-                    pass
+                if self.has_changed('status'):
+                    from django.db import transaction
+                    with transaction.atomic():
+                        invoice = Invoice.objects.select_for_update().get(pk=self.invoice_id)
+                        invoice.amount_paid = (invoice.amount_paid or Decimal('0.00')) + self.amount
+                        invoice.balance_due = max(Decimal('0.00'), invoice.total_amount - invoice.amount_paid)
+                        if invoice.amount_paid >= invoice.total_amount:
+                            invoice.status = Invoice.InvoiceStatus.PAID
+                        elif invoice.amount_paid > Decimal('0.00'):
+                            invoice.status = Invoice.InvoiceStatus.PARTIAL
+                        invoice.save(update_fields=['amount_paid', 'balance_due', 'status'])
 
         super().save(*args, **kwargs)
 
@@ -775,6 +774,160 @@ class FinancialReport(CoreBaseModel):
         super().save(*args, **kwargs)
 
 
+# ============================
+# STUDENT LEDGER MODELS
+# ============================
+
+class LedgerEntry(CoreBaseModel):
+    """
+    Append-only double-entry posting against a student's fee account.
+
+    Every posting moves ``amount`` from ``credit_account`` to ``debit_account``;
+    the student's receivable balance goes up when the receivable account is
+    debited and down when it is credited. ``sequence`` and ``balance`` give the
+    running receivable balance per student and academic session. Corrections
+    are posted as new entries with the accounts swapped, never as edits.
+    """
+    class EntryType(models.TextChoices):
+        INVOICE = 'invoice', _('Invoice')
+        PAYMENT = 'payment', _('Payment')
+        DISCOUNT = 'discount', _('Discount')
+        LATE_FEE = 'late_fee', _('Late Fee')
+
+    class Account(models.TextChoices):
+        RECEIVABLE = 'receivable', _('Fees Receivable')
+        FEE_INCOME = 'fee_income', _('Fee Income')
+        LATE_FEE_INCOME = 'late_fee_income', _('Late Fee Income')
+        DISCOUNTS = 'discounts', _('Discounts Allowed')
+        CASH = 'cash', _('Cash and Bank')
+
+    student = models.ForeignKey(
+        'academics.Student',
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        verbose_name=_('student')
+    )
+    academic_session = models.ForeignKey(
+        'academics.AcademicSession',
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        verbose_name=_('academic session')
+    )
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries',
+        verbose_name=_('invoice')
+    )
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries',
+        verbose_name=_('payment')
+    )
+    entry_type = models.CharField(_('entry type'), max_length=20, choices=EntryType.choices)
+    debit_account = models.CharField(_('debit account'), max_length=20, choices=Account.choices)
+    credit_account = models.CharField(_('credit account'), max_length=20, choices=Account.choices)
+    amount = models.DecimalField(
+        _('amount'),
+        max_digits=12,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))]
+    )
+    sequence = models.PositiveIntegerField(_('sequence'))
+    balance = models.DecimalField(_('running balance'), max_digits=12, decimal_places=2)
+    posted_on = models.DateField(_('posted on'))
+    description = models.CharField(_('description'), max_length=255, blank=True)
+
+    class Meta:
+        verbose_name = _('Ledger Entry')
+        verbose_name_plural = _('Ledger Entries')
+        ordering = ['student', 'academic_session', 'sequence']
+        indexes = [
+            models.Index(fields=['student', 'academic_session', 'posted_on', 'sequence']),
+            models.Index(fields=['invoice', 'entry_type']),
+            models.Index(fields=['payment']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'academic_session', 'sequence'],
+                name='unique_ledger_sequence'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_entry_type_display()} {self.amount} - {self.student} #{self.sequence}"
+
+    @property
+    def receivable_effect(self):
+        """Signed change to the student's receivable balance."""
+        if self.debit_account == self.Account.RECEIVABLE:
+            return self.amount
+        if self.credit_account == self.Account.RECEIVABLE:
+            return -self.amount
+        return Decimal('0.00')
+
+    def save(self, *args, **kwargs):
+        """Ledger entries are append-only."""
+        if not self._state.adding:
+            raise ValidationError(_('Ledger entries cannot be changed once posted.'))
+        super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        raise ValidationError(_('Ledger entries cannot be deleted; post a reversal instead.'))
+
+
+class LedgerSnapshot(CoreBaseModel):
+    """
+    Monthly roll-up of a student's ledger for an academic session.
+
+    Maintained incrementally as entries are posted, so statements and reports
+    read one row per student and month instead of replaying the ledger.
+    """
+    student = models.ForeignKey(
+        'academics.Student',
+        on_delete=models.CASCADE,
+        related_name='ledger_snapshots',
+        verbose_name=_('student')
+    )
+    academic_session = models.ForeignKey(
+        'academics.AcademicSession',
+        on_delete=models.CASCADE,
+        related_name='ledger_snapshots',
+        verbose_name=_('academic session')
+    )
+    period = models.DateField(_('period'), help_text=_('First day of the month'))
+    opening_balance = models.DecimalField(_('opening balance'), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    charges = models.DecimalField(_('charges'), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    late_fees = models.DecimalField(_('late fees'), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    discounts = models.DecimalField(_('discounts'), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    payments = models.DecimalField(_('payments'), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    closing_balance = models.DecimalField(_('closing balance'), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    entry_count = models.PositiveIntegerField(_('entry count'), default=0)
+    last_sequence = models.PositiveIntegerField(_('last sequence'), default=0)
+
+    class Meta:
+        verbose_name = _('Ledger Snapshot')
+        verbose_name_plural = _('Ledger Snapshots')
+        ordering = ['student', 'academic_session', 'period']
+        indexes = [
+            models.Index(fields=['academic_session', 'period']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'academic_session', 'period'],
+                name='unique_ledger_snapshot_period'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.period:%Y-%m} ({self.closing_balance})"
+
+
 # ============================
 # PAYSTACK INTEGRATION MODELS
 # ============================
@@ -1017,6 +1170,12 @@ class PaystackWebhookEvent(CoreBaseModel):
     processed_at = models.DateTimeField(_('processed at'), null=True, blank=True)
     processing_error = models.TextField(_('processing error'), blank=True)
 
+    # Queue state (see apps.finance.webhooks)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), null=True, blank=True)
+    locked_until = models.DateTimeField(_('locked until'), null=True, blank=True)
+    dead_lettered_at = models.DateTimeField(_('dead-lettered at'), null=True, blank=True)
+
     # Related objects
     payment = models.ForeignKey(
         Payment,
@@ -1043,6 +1202,19 @@ class PaystackWebhookEvent(CoreBaseModel):
             models.Index(fields=['event_type', 'processed']),
             models.Index(fields=['event_reference']),
             models.Index(fields=['event_timestamp']),
+            # The worker only ever scans events still waiting to be processed
+            models.Index(
+                fields=['event_timestamp', 'created_at'],
+                condition=models.Q(processed=False, dead_lettered_at__isnull=True),
+                name='paystack_webhook_pending_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event_type', 'event_reference'],
+                condition=~models.Q(event_reference=''),
+                name='unique_paystack_webhook_event',
+            ),
         ]
 
     def __str__(self):
@@ -1080,7 +1252,7 @@ class PaystackWebhookEvent(CoreBaseModel):
     def _handle_charge_success(self, event_data):
         """Handle successful charge webhook."""
         try:
-            reference = event_data.get('data', {}).get('reference')
+            reference = event_data.get('reference')
             if not reference:
                 return False
 
@@ -1113,7 +1285,7 @@ class PaystackWebhookEvent(CoreBaseModel):
     def _handle_charge_failed(self, event_data):
         """Handle failed charge webhook."""
         try:
-            reference = event_data.get('data', {}).get('reference')
+            reference = event_data.get('reference')
             if not reference:
                 return False
 
@@ -1137,7 +1309,7 @@ class PaystackWebhookEvent(CoreBaseModel):
     def _handle_charge_abandoned(self, event_data):
         """Handle abandoned charge webhook."""
         try:
-            reference = event_data.get('data', {}).get('reference')
+            reference = event_data.get('reference')
             if not reference:
                 return False
 
@@ -1161,7 +1333,7 @@ class PaystackWebhookEvent(CoreBaseModel):
     def _handle_customer_created(self, event_data):
         """Handle customer created webhook."""
         try:
-            customer_data = event_data.get('data', {}).get('customer', {})
+            customer_data = event_data.get('customer', {})
             customer_code = customer_data.get('customer_code')
             
             if customer_code:
@@ -1182,7 +1354,7 @@ class PaystackWebhookEvent(CoreBaseModel):
         """Handle invoice created webhook."""
         try:
             # This is typically handled by our system, but we can log it
-            logger.info(f"Invoice created webhook received: {event_data.get('data', {}).get('reference')}")
+            logger.info(f"Invoice created webhook received: {event_data.get('reference')}")
             return True
 
         except Exception as e:
@@ -1192,7 +1364,7 @@ class PaystackWebhookEvent(CoreBaseModel):
     def _handle_invoice_payment_failed(self, event_data):
         """Handle invoice payment failed webhook."""
         try:
-            reference = event_data.get('data', {}).get('reference')
+            reference = event_data.get('reference')
             if not reference:
                 return False
 
@@ -1299,4 +1471,66 @@ class PaymentMethod(CoreBaseModel):
             institution=institution,
             is_default=True,
             reusable=True
-        ).first()
\ No newline at end of file
+        ).first()
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def invalidate_finance_dashboard(sender, instance, **kwargs):
+    """
+    Drop cached dashboard figures whenever an invoice, payment or expense changes.
+    """
+    from .dashboard import FinanceDashboardService
+    FinanceDashboardService.invalidate()
+
+
+# Invoice.save(update_fields=...) from Payment.save only moves paid amounts,
+# which the ledger records from the payment itself
+PAYMENT_TOTAL_FIELDS = frozenset({'amount_paid', 'balance_due', 'status'})
+
+
+@receiver(post_save, sender=Invoice)
+def post_invoice_to_ledger(sender, instance, update_fields=None, **kwargs):
+    """
+    Post changes to an invoice's charges, discount and late fee to the student ledger.
+    """
+    if update_fields and frozenset(update_fields) <= PAYMENT_TOTAL_FIELDS:
+        return
+    from .ledger import StudentLedger
+    StudentLedger.sync_invoice(instance)
+
+
+@receiver(post_save, sender=Payment)
+def post_payment_to_ledger(sender, instance, **kwargs):
+    """
+    Post a payment to the student ledger when it completes (or reverse it).
+    """
+    from .ledger import StudentLedger
+    StudentLedger.sync_payment(instance)
+
+
+@receiver(pre_delete, sender=Invoice)
+def reverse_invoice_in_ledger(sender, instance, **kwargs):
+    """
+    Reverse an invoice's postings before it is hard-deleted; its entries
+    stay in the ledger with the invoice link cleared.
+    """
+    from .ledger import StudentLedger
+    StudentLedger.sync_invoice(instance, removed=True)
+
+
+@receiver(pre_delete, sender=Payment)
+def reverse_payment_in_ledger(sender, instance, **kwargs):
+    """
+    Reverse a payment's posting before it is hard-deleted (including along
+    with its invoice).
+    """
+    from .ledger import StudentLedger
+    StudentLedger.sync_payment(instance, removed=True)
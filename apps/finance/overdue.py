@@ -0,0 +1,262 @@
+"""
+Daily overdue-invoice processing.
+
+:class:`OverdueProcessor` runs once a day (``manage.py process_overdue_invoices``
+from cron) and, in set-based queries over bounded batches of invoices:
+
+- moves unpaid invoices past their due date to ``overdue``
+- accrues late fees for every line item from its fee structure's
+  ``late_fee_per_day`` and ``max_late_fee``, posting only the increase since
+  the last run as late-fee ``InvoiceItem`` rows, and updates the invoice and
+  student ledger totals to match
+- queues reminder notifications to students and parents at most once every
+  ``FINANCE_OVERDUE_REMINDER_INTERVAL_DAYS`` days
+
+Every step compares against what is already recorded, so running it more than
+once on the same day changes nothing.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Least
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Invoice, InvoiceItem
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+# Statuses that still expect payment
+OPEN_STATUSES = [
+    Invoice.InvoiceStatus.ISSUED,
+    Invoice.InvoiceStatus.PARTIAL,
+    Invoice.InvoiceStatus.OVERDUE,
+]
+
+
+class OverdueProcessor:
+    """
+    Marks overdue invoices, accrues late fees and queues reminders.
+    """
+
+    @staticmethod
+    def overdue(today: date):
+        """Open invoices past their due date with a balance outstanding."""
+        return Invoice.objects.filter(
+            is_deleted=False,
+            status__in=OPEN_STATUSES,
+            due_date__lt=today,
+            balance_due__gt=ZERO,
+        )
+
+    @classmethod
+    def process(cls, today: Optional[date] = None, batch_size: int = 1000,
+                notify: bool = True) -> Dict[str, int]:
+        """
+        Run every overdue step for ``today``.
+
+        Returns:
+            Dict with the number of invoices ``marked`` overdue, invoices whose
+            ``late_fees`` increased, late-fee ``items`` posted and
+            ``reminders`` queued
+        """
+        today = today or timezone.localdate()
+        result = {'marked': cls.mark_overdue(today), 'late_fees': 0, 'items': 0, 'reminders': 0}
+        for batch in cls._batches(cls.overdue(today), batch_size):
+            invoices, items = cls.accrue_late_fees(batch, today)
+            result['late_fees'] += invoices
+            result['items'] += items
+        if notify:
+            result['reminders'] = cls.queue_reminders(today, batch_size)
+
+        if result['marked'] or result['late_fees']:
+            from .dashboard import FinanceDashboardService
+            FinanceDashboardService.invalidate()
+        if any(result.values()):
+            logger.info(
+                f"Overdue processing for {today}: {result['marked']} marked overdue, "
+                f"late fees on {result['late_fees']} invoice(s), {result['reminders']} reminder(s)"
+            )
+        return result
+
+    @staticmethod
+    def _batches(queryset, batch_size):
+        # Keyset over primary keys so rows updated mid-run are not skipped
+        last = None
+        while True:
+            page = queryset.order_by('pk')
+            if last is not None:
+                page = page.filter(pk__gt=last)
+            ids = list(page.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            yield ids
+            last = ids[-1]
+
+    @classmethod
+    def mark_overdue(cls, today: date) -> int:
+        """Move open invoices past their due date to ``overdue``."""
+        return cls.overdue(today).exclude(
+            status=Invoice.InvoiceStatus.OVERDUE
+        ).update(
+            status=Invoice.InvoiceStatus.OVERDUE,
+            status_changed_at=timezone.now(),
+        )
+
+    @staticmethod
+    def late_fee_expression(due_dates, today: date):
+        """
+        Capped late fee of one invoice item, for use in an InvoiceItem annotation.
+
+        Days overdue only depend on the invoice's due date, so they are passed
+        in per distinct due date rather than computed with backend-specific
+        date arithmetic.
+        """
+        days = Case(
+            *[When(invoice__due_date=due_date, then=Value((today - due_date).days)) for due_date in due_dates],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        fee = ExpressionWrapper(F('fee_structure__late_fee_per_day') * days, output_field=MONEY)
+        return Case(
+            When(fee_structure__max_late_fee__gt=ZERO, then=Least(fee, F('fee_structure__max_late_fee'))),
+            default=fee,
+            output_field=MONEY,
+        )
+
+    @classmethod
+    @transaction.atomic
+    def accrue_late_fees(cls, invoice_ids, today: date):
+        """
+        Post the late fees accrued since the last run for a batch of invoices.
+
+        Returns:
+            (invoices updated, late-fee items created)
+        """
+        invoices = {
+            row['pk']: row for row in Invoice.objects.filter(pk__in=invoice_ids).values(
+                'pk', 'invoice_number', 'due_date', 'student_id', 'academic_session_id', 'institution_id')
+        }
+        due_dates = {row['due_date'] for row in invoices.values()}
+
+        accrued = InvoiceItem.objects.filter(
+            invoice_id__in=invoice_ids,
+            is_late_fee=False,
+            fee_structure__late_fee_per_day__gt=ZERO,
+        ).values('invoice_id', 'fee_structure_id').annotate(
+            fee=Sum(cls.late_fee_expression(due_dates, today))
+        ).order_by()
+        posted = {
+            (row['invoice_id'], row['fee_structure_id']): row['total']
+            for row in InvoiceItem.objects.filter(invoice_id__in=invoice_ids, is_late_fee=True).values(
+                'invoice_id', 'fee_structure_id').annotate(total=Sum('line_total')).order_by()
+        }
+
+        items = []
+        increases = {}
+        for row in accrued:
+            increase = (row['fee'] or ZERO) - posted.get((row['invoice_id'], row['fee_structure_id']), ZERO)
+            if increase <= ZERO:
+                continue
+            invoice = invoices[row['invoice_id']]
+            items.append(InvoiceItem(
+                invoice_id=row['invoice_id'],
+                fee_structure_id=row['fee_structure_id'],
+                unit_price=increase,
+                line_total=increase,
+                description=f"Late fee to {today.isoformat()}",
+                is_late_fee=True,
+                institution_id=invoice['institution_id'],
+            ))
+            increases[row['invoice_id']] = increases.get(row['invoice_id'], ZERO) + increase
+        if not items:
+            return 0, 0
+        InvoiceItem.objects.bulk_create(items)
+
+        # Recompute late_fee from the posted items; SET expressions read the
+        # old late_fee, so totals move by exactly the increase
+        late_fee = Coalesce(Subquery(
+            InvoiceItem.objects.filter(invoice=OuterRef('pk'), is_late_fee=True).values(
+                'invoice').annotate(total=Sum('line_total')).values('total')
+        ), ZERO, output_field=MONEY)
+        Invoice.objects.filter(pk__in=list(increases)).update(
+            total_amount=F('total_amount') - F('late_fee') + late_fee,
+            balance_due=F('balance_due') - F('late_fee') + late_fee,
+            late_fee=late_fee,
+        )
+
+        from .ledger import StudentLedger
+        from .models import LedgerEntry
+        StudentLedger.post_many([
+            {
+                'student_id': invoices[invoice_id]['student_id'],
+                'session_id': invoices[invoice_id]['academic_session_id'],
+                'entry_type': LedgerEntry.EntryType.LATE_FEE,
+                'amount': increase,
+                'invoice_id': invoice_id,
+                'description': f"Late fee {invoices[invoice_id]['invoice_number']}",
+                'institution_id': invoices[invoice_id]['institution_id'],
+            }
+            for invoice_id, increase in increases.items()
+        ], posted_on=today)
+        return len(increases), len(items)
+
+    @classmethod
+    def queue_reminders(cls, today: date, batch_size: int = 1000) -> int:
+        """Queue reminders for overdue invoices not reminded within the interval."""
+        from apps.communication.models import RealTimeNotification
+        from apps.users.models import ParentStudentRelationship
+
+        interval = getattr(settings, 'FINANCE_OVERDUE_REMINDER_INTERVAL_DAYS', 7)
+        due = Invoice.objects.filter(
+            is_deleted=False,
+            status=Invoice.InvoiceStatus.OVERDUE,
+            balance_due__gt=ZERO,
+        ).exclude(last_reminder_sent_on__gt=today - timedelta(days=interval))
+
+        queued = 0
+        now = timezone.now()
+        for ids in cls._batches(due, batch_size):
+            invoices = list(Invoice.objects.filter(pk__in=ids).values(
+                'pk', 'invoice_number', 'balance_due', 'due_date', 'institution_id', 'student__user_id'))
+            parents = {}
+            for parent_id, student_user_id in ParentStudentRelationship.objects.filter(
+                student_id__in={invoice['student__user_id'] for invoice in invoices},
+                status='active',
+            ).values_list('parent_id', 'student_id'):
+                parents.setdefault(student_user_id, []).append(parent_id)
+
+            notifications = []
+            for invoice in invoices:
+                days = (today - invoice['due_date']).days
+                for recipient_id in [invoice['student__user_id'], *parents.get(invoice['student__user_id'], [])]:
+                    notifications.append(RealTimeNotification(
+                        recipient_id=recipient_id,
+                        notification_type='reminder',
+                        title=f"Invoice {invoice['invoice_number']} is overdue",
+                        message=(
+                            f"Invoice {invoice['invoice_number']} is {days} day(s) overdue with "
+                            f"{invoice['balance_due']} outstanding."
+                        ),
+                        priority='high',
+                        action_url=reverse('finance:pay_invoice', kwargs={'pk': invoice['pk']}),
+                        action_text='Pay now',
+                        delivered_at=now,
+                        institution_id=invoice['institution_id'],
+                    ))
+            with transaction.atomic():
+                RealTimeNotification.objects.bulk_create(notifications, batch_size=batch_size)
+                Invoice.objects.filter(pk__in=ids).update(last_reminder_sent_on=today)
+            queued += len(notifications)
+        return queued
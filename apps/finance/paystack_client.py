@@ -0,0 +1,240 @@
+"""
+Pooled HTTP client for the Paystack API.
+
+Every :class:`~apps.finance.services.PaystackService` in a process shares one
+:class:`PaystackClient`, so calls reuse keep-alive connections from a
+``requests`` session instead of paying a TLS handshake each time. The client
+adds:
+
+- connect and read timeouts on every call (``PAYSTACK_HTTP_TIMEOUT``)
+- retries with jittered exponential backoff for idempotent calls on
+  connection errors, timeouts, 429 and 5xx responses; POSTs are only retried
+  when the connection could not be opened
+- a circuit breaker that fails fast for ``PAYSTACK_CIRCUIT_RESET_SECONDS``
+  after ``PAYSTACK_CIRCUIT_FAILURES`` consecutive failures
+- per-operation latency metrics (:meth:`PaystackClient.metrics`)
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling Paystack while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``threshold`` failures in a row the circuit opens and calls fail
+    immediately; once ``reset_seconds`` have passed a single trial call is
+    let through, closing the circuit again if it succeeds.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a call may go out now."""
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    logger.error(f"Paystack circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+
+
+class LatencyMetrics:
+    """Call counts, errors and recent latencies per operation."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.operations = {}
+
+    def record(self, operation: str, seconds: float, error: bool = False, retries: int = 0):
+        with self.lock:
+            stats = self.operations.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'retries': 0, 'latencies': deque(maxlen=self.window),
+            })
+            stats['calls'] += 1
+            stats['errors'] += error
+            stats['retries'] += retries
+            stats['latencies'].append(seconds)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Summary per operation.
+
+        Returns:
+            ``{operation: {'calls', 'errors', 'retries', 'p50_ms', 'p95_ms',
+            'max_ms'}}``, percentiles over the most recent calls
+        """
+        with self.lock:
+            summary = {}
+            for operation, stats in self.operations.items():
+                latencies = sorted(stats['latencies'])
+                summary[operation] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+                    'p95_ms': round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 1),
+                    'max_ms': round(latencies[-1] * 1000, 1),
+                }
+            return summary
+
+    def reset(self):
+        with self.lock:
+            self.operations.clear()
+
+
+class PaystackClient:
+    """
+    Shared session, retries, circuit breaker and metrics for Paystack calls.
+    """
+
+    def __init__(self):
+        pool_size = getattr(settings, 'PAYSTACK_HTTP_POOL_SIZE', 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.breaker = CircuitBreaker(
+            threshold=getattr(settings, 'PAYSTACK_CIRCUIT_FAILURES', 5),
+            reset_seconds=getattr(settings, 'PAYSTACK_CIRCUIT_RESET_SECONDS', 30),
+        )
+        self.metrics = LatencyMetrics()
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (1-based)."""
+        base = getattr(settings, 'PAYSTACK_HTTP_BACKOFF', 0.25)
+        return random.uniform(0, min(base * 2 ** (attempt - 1), 5.0))
+
+    @staticmethod
+    def _retryable(method: str, error: Optional[Exception], response) -> bool:
+        if error is not None:
+            if isinstance(error, requests.exceptions.ConnectTimeout):
+                return True
+            return method in IDEMPOTENT_METHODS and isinstance(
+                error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+            )
+        return method in IDEMPOTENT_METHODS and response.status_code in RETRY_STATUSES
+
+    def request(self, method: str, url: str, operation: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            operation: Name recorded in the metrics (defaults to the method)
+            **kwargs: Passed to ``requests.Session.request``
+
+        Returns:
+            The final response (``raise_for_status`` is left to the caller)
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            requests.exceptions.RequestException: If the last attempt failed
+        """
+        method = method.upper()
+        operation = operation or method
+        if not self.breaker.allow():
+            self.metrics.record(operation, 0.0, error=True)
+            raise CircuitOpenError("Paystack is unavailable (circuit open)")
+
+        kwargs.setdefault('timeout', getattr(settings, 'PAYSTACK_HTTP_TIMEOUT', (3.05, 10)))
+        attempts = getattr(settings, 'PAYSTACK_HTTP_RETRIES', 2) + 1
+        start = time.perf_counter()
+        for attempt in range(1, attempts + 1):
+            error = response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                error = e
+            if attempt < attempts and self._retryable(method, error, response):
+                time.sleep(self.backoff(attempt))
+                continue
+            break
+
+        failed = error is not None or response.status_code >= 500
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self.metrics.record(operation, time.perf_counter() - start, error=failed, retries=attempt - 1)
+        if error is not None:
+            raise error
+        return response
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client() -> PaystackClient:
+    """The process-wide client (a new one after a fork, so pools are never shared)."""
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(pid)
+            if client is None:
+                _clients.clear()
+                client = _clients[pid] = PaystackClient()
+    return client
+
+
+def reset_client():
+    """Drop the process-wide client, e.g. after changing its settings."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.session.close()
+        _clients.clear()
@@ -3,11 +3,11 @@
 Paystack integration services for handling payment processing.
 """
 
-import requests
 import json
 import logging
 from decimal import Decimal
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db import transaction
@@ -35,10 +35,14 @@ class PaystackService:
         if not self.secret_key or not self.public_key:
             logger.warning("Paystack API keys not configured properly")
 
-    def _make_request(self, method, endpoint, data=None, headers=None):
+    def _make_request(self, method, endpoint, data=None, headers=None, operation=None):
         """
-        Make HTTP request to Paystack API.
+        Make HTTP request to Paystack API through the shared pooled client.
         """
+        import requests
+
+        from .paystack_client import get_client
+
         url = f"{self.base_url}{endpoint}"
         default_headers = {
             'Authorization': f'Bearer {self.secret_key}',
@@ -49,18 +53,15 @@ class PaystackService:
         if headers:
             default_headers.update(headers)
 
-        try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=default_headers, params=data)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=default_headers, json=data)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=default_headers, json=data)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=default_headers, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        method = method.upper()
+        if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        payload = {'params': data} if method == 'GET' else {'json': data}
 
+        try:
+            response = get_client().request(
+                method, url, operation=operation or endpoint, headers=default_headers, **payload
+            )
             response.raise_for_status()
             return response.json()
 
@@ -71,6 +72,19 @@ class PaystackService:
             logger.error(f"Invalid JSON response from Paystack: {e}")
             raise ValidationError("Invalid response from Paystack")
 
+    def _cached_request(self, key, method, endpoint, data=None, operation=None):
+        """
+        Make a read-only request, reusing a successful response for
+        ``PAYSTACK_CACHE_TIMEOUT`` seconds.
+        """
+        key = f'paystack:{key}'
+        response = cache.get(key)
+        if response is None:
+            response = self._make_request(method, endpoint, data, operation=operation)
+            if response.get('status'):
+                cache.set(key, response, getattr(settings, 'PAYSTACK_CACHE_TIMEOUT', 300))
+        return response
+
     def initialize_payment(self, email, amount, reference, metadata=None, callback_url=None, channels=None):
         """
         Initialize a payment with Paystack.
@@ -93,7 +107,7 @@ class PaystackService:
         if metadata:
             payload['metadata'] = metadata
 
-        response = self._make_request('POST', '/transaction/initialize', payload)
+        response = self._make_request('POST', '/transaction/initialize', payload, operation='initialize_payment')
         
         if response.get('status'):
             return {
@@ -112,7 +126,7 @@ class PaystackService:
         if not reference:
             raise ValidationError("Reference is required for payment verification")
 
-        response = self._make_request('GET', f'/transaction/verify/{reference}')
+        response = self._make_request('GET', f'/transaction/verify/{reference}', operation='verify_payment')
         
         if response.get('status'):
             return response['data']
@@ -134,7 +148,7 @@ class PaystackService:
         if phone:
             payload['phone'] = phone
 
-        response = self._make_request('POST', '/customer', payload)
+        response = self._make_request('POST', '/customer', payload, operation='create_customer')
         
         if response.get('status'):
             return response['data']
@@ -162,7 +176,7 @@ class PaystackService:
         if metadata:
             payload['metadata'] = metadata
 
-        response = self._make_request('POST', '/charge/authorize', payload)
+        response = self._make_request('POST', '/charge/authorize', payload, operation='charge_authorization')
         
         if response.get('status'):
             return response['data']
@@ -176,7 +190,7 @@ class PaystackService:
         if not customer_email:
             raise ValidationError("Customer email is required")
 
-        response = self._make_request('GET', f'/customer/{customer_email}/payment_method')
+        response = self._make_request('GET', f'/customer/{customer_email}/payment_method', operation='get_payment_methods')
         
         if response.get('status'):
             return response['data']
@@ -187,7 +201,7 @@ class PaystackService:
         """
         Get list of supported banks for transfers.
         """
-        response = self._make_request('GET', '/bank')
+        response = self._cached_request('banks', 'GET', '/bank', operation='list_banks')
         
         if response.get('status'):
             return response['data']
@@ -206,7 +220,10 @@ class PaystackService:
             'bank_code': bank_code
         }
 
-        response = self._make_request('GET', '/bank/resolve', payload)
+        response = self._cached_request(
+            f'resolve:{bank_code}:{account_number}', 'GET', '/bank/resolve', payload,
+            operation='resolve_bank_account'
+        )
         
         if response.get('status'):
             return response['data']
@@ -406,23 +423,22 @@ class WebhookService:
         return hmac.compare_digest(signature, computed_signature)
 
     @staticmethod
-    def process_webhook_event(event_type, event_data, event_reference, event_timestamp):
+    def process_webhook_event(event_type, event_data, event_reference=None, event_timestamp=None):
         """
-        Process a Paystack webhook event.
+        Record and immediately process a Paystack webhook event.
+
+        Goes through the same queue as the webhook view, so an event that was
+        already received is not processed again.
         """
-        # Log the webhook event
-        webhook_event = PaystackWebhookEvent.objects.create(
-            event_type=event_type,
-            event_data=event_data,
-            event_reference=event_reference,
-            event_timestamp=event_timestamp
-        )
+        from .webhooks import WebhookQueue
 
-        # Process the event
-        success = webhook_event.process_webhook()
+        webhook_event, created = WebhookQueue.enqueue(event_type, event_data, event_reference, event_timestamp)
+        if not created:
+            return webhook_event, webhook_event.processed
 
+        success = WebhookQueue.process_event(webhook_event)
         if not success:
-            logger.error(f"Failed to process webhook event: {event_type} - {event_reference}")
+            logger.error(f"Failed to process webhook event: {event_type} - {webhook_event.event_reference}")
 
         return webhook_event, success
 
@@ -0,0 +1,668 @@
+# apps/finance/tests.py
+
+import json
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.academics.models import AcademicSession, Student
+from apps.core.models import Institution
+from .dashboard import FinanceDashboardService
+from .ledger import LedgerReconciliation, LedgerReports, StudentLedger
+from .models import (
+    Expense, FeeStructure, FinancialReport, Invoice, InvoiceItem, LedgerEntry, LedgerSnapshot, Payment,
+    PaystackPayment, PaystackWebhookEvent,
+)
+from .overdue import OverdueProcessor
+from .paystack_client import get_client, reset_client
+from .services import PaystackService
+from .webhooks import WebhookQueue, sign_payload
+
+User = get_user_model()
+
+
+def create_student(number):
+    user = User.objects.create_user(
+        username=f'student{number}',
+        email=f'student{number}@example.com',
+        password='testpass123'
+    )
+    return Student.objects.create(
+        user=user,
+        student_id=f'S{number:04d}',
+        admission_number=f'S{number:04d}',
+        admission_date=date(2024, 1, 1),
+        date_of_birth=date(2010, 1, 1)
+    )
+
+
+class FinanceDashboardTestCase(TestCase):
+    """Test cases for the finance dashboard aggregates"""
+
+    def setUp(self):
+        cache.clear()
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.today = date(2025, 3, 15)
+        self.session = AcademicSession.objects.create(
+            name='2024/2025',
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31),
+            is_current=True
+        )
+        self.student = create_student(1)
+
+    def create_invoice(self, issue_date, total, paid='0.00', due_date=None):
+        return Invoice.objects.create(
+            student=self.student,
+            academic_session=self.session,
+            billing_period='Term',
+            issue_date=issue_date,
+            due_date=due_date or issue_date,
+            total_amount=Decimal(total),
+            amount_paid=Decimal(paid),
+        )
+
+    def create_expense(self, expense_date, amount):
+        return Expense.objects.create(
+            description='Supplies',
+            amount=Decimal(amount),
+            expense_date=expense_date,
+        )
+
+    def seed(self, months):
+        for month in range(1, months + 1):
+            self.create_invoice(date(2025, month, 1), '100.00', paid='100.00')
+            self.create_invoice(date(2025, month, 2), '50.00', paid='20.00', due_date=date(2025, 6, 30))
+            self.create_expense(date(2025, month, 3), '10.00')
+        self.create_invoice(date(2024, 10, 1), '40.00', due_date=date(2024, 11, 1))
+        self.create_expense(date(2024, 10, 1), '5.00')
+
+    def test_figures(self):
+        self.seed(3)
+        summary = FinanceDashboardService.summary(self.session, today=self.today)
+
+        self.assertEqual(summary['total_invoiced'], Decimal('490.00'))
+        self.assertEqual(summary['total_paid'], Decimal('360.00'))
+        self.assertEqual(summary['total_outstanding'], Decimal('130.00'))
+        self.assertEqual(summary['total_revenue'], Decimal('300.00'))
+        self.assertEqual(summary['pending_payments'], Decimal('130.00'))
+        self.assertEqual(summary['overdue_invoices_count'], 1)
+        self.assertEqual(summary['month_expenses'], Decimal('10.00'))
+        self.assertEqual(summary['session_expenses'], Decimal('35.00'))
+        self.assertEqual(len(summary['monthly_collection']), 12)
+        self.assertEqual(summary['monthly_collection'][0], {'month': 1, 'invoiced': 150.0, 'paid': 120.0})
+        self.assertEqual(summary['monthly_collection'][3], {'month': 4, 'invoiced': 0.0, 'paid': 0.0})
+
+    def test_query_count_is_independent_of_months(self):
+        self.seed(1)
+        with self.assertNumQueries(2):
+            FinanceDashboardService.compute(self.session, self.today)
+        self.seed(12)
+        with self.assertNumQueries(2):
+            FinanceDashboardService.compute(self.session, self.today)
+
+    def test_summary_is_cached_until_a_write(self):
+        invoice = self.create_invoice(date(2025, 1, 1), '100.00')
+        FinanceDashboardService.summary(self.session, today=self.today)
+        with self.assertNumQueries(0):
+            FinanceDashboardService.summary(self.session, today=self.today)
+
+        Payment.objects.create(
+            invoice=invoice,
+            student=self.student,
+            amount=Decimal('60.00'),
+            payment_date=self.today,
+            status=Payment.PaymentStatus.COMPLETED,
+        )
+        with self.assertNumQueries(2):
+            summary = FinanceDashboardService.summary(self.session, today=self.today)
+        self.assertEqual(summary['total_paid'], Decimal('60.00'))
+
+        self.create_expense(self.today, '25.00')
+        self.assertEqual(
+            FinanceDashboardService.summary(self.session, today=self.today)['month_expenses'],
+            Decimal('25.00')
+        )
+
+    def test_dashboard_query_count_is_independent_of_data(self):
+        staff = User.objects.create_user(
+            username='accountant', email='accountant@example.com', password='testpass123', is_staff=True
+        )
+        self.client.force_login(staff)
+        url = reverse('finance:dashboard')
+
+        self.seed(1)
+        cache.clear()
+        small = self._count_queries(url)
+        self.seed(12)
+        cache.clear()
+        self.assertEqual(self._count_queries(url), small)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+
+class StudentLedgerTestCase(TestCase):
+    """Test cases for the student ledger and its snapshots"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.session = AcademicSession.objects.create(
+            name='2024/2025',
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31),
+            is_current=True
+        )
+        self.student = create_student(1)
+        self.invoice = Invoice.objects.create(
+            student=self.student,
+            academic_session=self.session,
+            billing_period='Term',
+            issue_date=date(2024, 9, 1),
+            due_date=date(2024, 9, 30),
+            total_amount=Decimal('900.00'),
+            total_discount=Decimal('100.00'),
+        )
+
+    def pay(self, amount, status=Payment.PaymentStatus.COMPLETED):
+        return Payment.objects.create(
+            invoice=self.invoice,
+            student=self.student,
+            amount=Decimal(amount),
+            payment_date=date(2024, 9, 10),
+            status=status,
+        )
+
+    def assertReconciled(self):
+        self.assertEqual(LedgerReconciliation.invoice_mismatches(), [])
+        self.assertEqual(LedgerReconciliation.snapshot_mismatches(), [])
+
+    def test_invoice_posts_charge_and_discount(self):
+        entries = list(LedgerEntry.objects.filter(student=self.student))
+        self.assertEqual([(e.entry_type, e.amount, e.balance) for e in entries], [
+            (LedgerEntry.EntryType.INVOICE, Decimal('1000.00'), Decimal('1000.00')),
+            (LedgerEntry.EntryType.DISCOUNT, Decimal('100.00'), Decimal('900.00')),
+        ])
+        self.assertEqual(entries[0].debit_account, LedgerEntry.Account.RECEIVABLE)
+        self.assertEqual(entries[1].credit_account, LedgerEntry.Account.RECEIVABLE)
+        self.assertEqual(StudentLedger.balance(self.student, self.session), Decimal('900.00'))
+        self.assertReconciled()
+
+    def test_payments_post_once(self):
+        payment = self.pay('400.00')
+        payment.notes = 'Re-saved'
+        payment.save()
+        self.invoice.refresh_from_db()
+        self.invoice.notes = 'Re-saved'
+        self.invoice.save()
+
+        self.assertEqual(LedgerEntry.objects.filter(student=self.student).count(), 3)
+        self.assertEqual(StudentLedger.balance(self.student, self.session), Decimal('500.00'))
+        self.assertEqual(StudentLedger.totals(self.student, self.session), {
+            'total_invoiced': Decimal('900.00'),
+            'total_discount': Decimal('100.00'),
+            'total_paid': Decimal('400.00'),
+            'total_balance': Decimal('500.00'),
+        })
+        self.assertReconciled()
+
+    def test_pending_payment_is_not_posted(self):
+        payment = self.pay('400.00', status=Payment.PaymentStatus.PENDING)
+        self.assertFalse(payment.ledger_entries.exists())
+        payment.status = Payment.PaymentStatus.COMPLETED
+        payment.save()
+        self.assertEqual(payment.ledger_entries.count(), 1)
+        self.assertReconciled()
+
+    def test_changes_are_posted_as_reversals(self):
+        self.invoice.total_amount = Decimal('700.00')
+        self.invoice.total_discount = Decimal('0.00')
+        self.invoice.save()
+
+        last = LedgerEntry.objects.filter(student=self.student).order_by('-sequence')[:2]
+        self.assertEqual(
+            sorted((e.entry_type, e.debit_account, e.amount) for e in last),
+            [
+                (LedgerEntry.EntryType.DISCOUNT, LedgerEntry.Account.RECEIVABLE, Decimal('100.00')),
+                (LedgerEntry.EntryType.INVOICE, LedgerEntry.Account.FEE_INCOME, Decimal('300.00')),
+            ]
+        )
+        self.assertEqual(StudentLedger.balance(self.student, self.session), Decimal('700.00'))
+        self.assertEqual(StudentLedger.totals(self.student)['total_discount'], Decimal('0.00'))
+        self.assertReconciled()
+
+    def test_entries_are_append_only(self):
+        entry = LedgerEntry.objects.first()
+        entry.amount = Decimal('1.00')
+        with self.assertRaises(ValidationError):
+            entry.save()
+        with self.assertRaises(ValidationError):
+            entry.delete()
+
+    def test_statement_for_period(self):
+        student = create_student(2)
+        for posted_on, entry_type, amount in [
+            (date(2024, 9, 1), LedgerEntry.EntryType.INVOICE, '500.00'),
+            (date(2024, 9, 15), LedgerEntry.EntryType.PAYMENT, '200.00'),
+            (date(2024, 10, 5), LedgerEntry.EntryType.LATE_FEE, '20.00'),
+            (date(2024, 11, 2), LedgerEntry.EntryType.PAYMENT, '100.00'),
+        ]:
+            StudentLedger.post(student.pk, self.session.pk, entry_type, Decimal(amount), posted_on=posted_on)
+
+        statement = StudentLedger.statement(student, self.session, date(2024, 10, 1), date(2024, 10, 31))
+        self.assertEqual(statement['opening_balance'], Decimal('300.00'))
+        self.assertEqual(statement['closing_balance'], Decimal('320.00'))
+        self.assertEqual(len(statement['entries']), 1)
+        self.assertEqual(statement['entries'][0]['debit'], '20.00')
+
+        snapshots = list(LedgerSnapshot.objects.filter(student=student).values_list(
+            'period', 'opening_balance', 'closing_balance'))
+        self.assertEqual(snapshots, [
+            (date(2024, 9, 1), Decimal('0.00'), Decimal('300.00')),
+            (date(2024, 10, 1), Decimal('300.00'), Decimal('320.00')),
+            (date(2024, 11, 1), Decimal('320.00'), Decimal('220.00')),
+        ])
+        LedgerReconciliation.rebuild_snapshots(student.pk, self.session.pk)
+        self.assertEqual(list(LedgerSnapshot.objects.filter(student=student).values_list(
+            'period', 'opening_balance', 'closing_balance')), snapshots)
+
+    def test_reconciliation_reports_drift(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(balance_due=Decimal('850.00'))
+        mismatches = LedgerReconciliation.invoice_mismatches()
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0]['ledger_balance'], Decimal('900.00'))
+
+        LedgerSnapshot.objects.filter(student=self.student).update(payments=Decimal('5.00'))
+        self.assertEqual(LedgerReconciliation.snapshot_mismatches(), [(self.student.pk, self.session.pk)])
+        call_command('reconcile_student_ledger', '--rebuild-snapshots', stdout=StringIO())
+        self.assertEqual(LedgerReconciliation.snapshot_mismatches(), [])
+
+    def test_sync_all_is_idempotent(self):
+        self.pay('400.00')
+        self.assertEqual(LedgerReconciliation.sync_all(), 0)
+
+    def test_sync_all_reverses_bulk_soft_deleted_invoice(self):
+        self.pay('400.00')
+        Invoice.objects.filter(pk=self.invoice.pk).update(is_deleted=True)
+        Payment.objects.filter(invoice=self.invoice).update(is_deleted=True)
+        self.assertEqual(len(LedgerReconciliation.invoice_mismatches()), 1)
+
+        LedgerReconciliation.sync_all()
+
+        self.assertEqual(StudentLedger.balance(self.student, self.session), Decimal('0.00'))
+        self.assertEqual(StudentLedger.totals(self.student)['total_balance'], Decimal('0.00'))
+        self.assertReconciled()
+        self.assertEqual(LedgerReconciliation.sync_all(), 0)
+
+    def test_hard_deleted_invoice_is_reversed(self):
+        self.pay('400.00')
+
+        self.invoice.hard_delete()
+
+        entries = LedgerEntry.objects.filter(student=self.student)
+        self.assertEqual(entries.count(), 6)
+        self.assertFalse(entries.filter(invoice__isnull=False).exists())
+        self.assertFalse(entries.filter(payment__isnull=False).exists())
+        self.assertEqual(StudentLedger.balance(self.student, self.session), Decimal('0.00'))
+        self.assertEqual(StudentLedger.totals(self.student)['total_balance'], Decimal('0.00'))
+        self.assertReconciled()
+
+    def test_sync_command_backfills_existing_data(self):
+        self.pay('400.00')
+        LedgerEntry.objects.all()._raw_delete(LedgerEntry.objects.db)
+        LedgerSnapshot.objects.all().delete()
+
+        call_command('reconcile_student_ledger', '--sync', stdout=StringIO())
+
+        self.assertEqual(LedgerEntry.objects.filter(student=self.student).count(), 3)
+        self.assertEqual(StudentLedger.balance(self.student, self.session), Decimal('500.00'))
+        self.assertReconciled()
+
+    def test_report_data(self):
+        self.pay('400.00')
+        today = date.today()
+        report = FinancialReport(
+            report_type=FinancialReport.ReportType.OUTSTANDING_FEES,
+            academic_session=self.session,
+            start_date=today.replace(day=1),
+            end_date=today,
+        )
+        data = LedgerReports.report_data(report)
+        self.assertEqual(data['total_outstanding'], '500.00')
+        self.assertEqual(data['students'][0]['admission_number'], 'S0001')
+
+        report.report_type = FinancialReport.ReportType.FEE_COLLECTION
+        self.assertEqual(LedgerReports.report_data(report)['totals'], {
+            'billed': '1000.00', 'discounts': '100.00', 'collected': '400.00',
+        })
+
+        report.report_type = FinancialReport.ReportType.INCOME_STATEMENT
+        self.assertIsNone(LedgerReports.report_data(report))
+
+
+class OverdueProcessorTestCase(TestCase):
+    """Test cases for overdue marking, late fees and reminders"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.session = AcademicSession.objects.create(
+            name='2024/2025',
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31),
+            is_current=True
+        )
+        self.tuition = FeeStructure.objects.create(
+            name='Tuition', code='TUI', academic_session=self.session,
+            amount=Decimal('500.00'), late_fee_per_day=Decimal('10.00'), max_late_fee=Decimal('50.00'),
+        )
+        self.books = FeeStructure.objects.create(
+            name='Books', code='BKS', fee_type=FeeStructure.FeeType.LIBRARY, academic_session=self.session,
+            amount=Decimal('100.00'), late_fee_per_day=Decimal('1.00'),
+        )
+        self.due_date = date(2025, 1, 1)
+        self.invoice = self.create_invoice(create_student(1))
+
+    def create_invoice(self, student):
+        invoice = Invoice.objects.create(
+            student=student,
+            academic_session=self.session,
+            billing_period='Term',
+            issue_date=date(2024, 12, 1),
+            due_date=self.due_date,
+            total_amount=Decimal('600.00'),
+        )
+        for fee in (self.tuition, self.books):
+            InvoiceItem.objects.create(invoice=invoice, fee_structure=fee, unit_price=fee.amount)
+        return invoice
+
+    def test_marks_overdue_and_accrues_capped_late_fees(self):
+        result = OverdueProcessor.process(today=date(2025, 1, 4))
+        self.assertEqual(result, {'marked': 1, 'late_fees': 1, 'items': 2, 'reminders': 1})
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, Invoice.InvoiceStatus.OVERDUE)
+        self.assertEqual(self.invoice.late_fee, Decimal('33.00'))
+        self.assertEqual(self.invoice.total_amount, Decimal('633.00'))
+        self.assertEqual(self.invoice.balance_due, Decimal('633.00'))
+
+        OverdueProcessor.process(today=date(2025, 1, 11))
+        self.invoice.refresh_from_db()
+        # Tuition capped at 50, books uncapped at 10 days
+        self.assertEqual(self.invoice.late_fee, Decimal('60.00'))
+        self.assertEqual(self.invoice.items.filter(is_late_fee=True).count(), 4)
+        self.assertEqual(StudentLedger.balance(self.invoice.student, self.session), Decimal('660.00'))
+        self.assertEqual(LedgerReconciliation.invoice_mismatches(), [])
+        self.assertEqual(LedgerReconciliation.snapshot_mismatches(), [])
+
+    def test_same_day_rerun_changes_nothing(self):
+        OverdueProcessor.process(today=date(2025, 1, 4))
+        result = OverdueProcessor.process(today=date(2025, 1, 4))
+        self.assertEqual(result, {'marked': 0, 'late_fees': 0, 'items': 0, 'reminders': 0})
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.late_fee, Decimal('33.00'))
+
+    def test_reminders_respect_interval(self):
+        from apps.communication.models import RealTimeNotification
+
+        OverdueProcessor.process(today=date(2025, 1, 4))
+        self.assertEqual(OverdueProcessor.process(today=date(2025, 1, 8))['reminders'], 0)
+        self.assertEqual(OverdueProcessor.process(today=date(2025, 1, 11))['reminders'], 1)
+        reminder = RealTimeNotification.objects.filter(recipient=self.invoice.student.user).first()
+        self.assertEqual(reminder.notification_type, 'reminder')
+        self.assertIsNotNone(reminder.delivered_at)
+
+    def test_paid_invoices_are_skipped(self):
+        Payment.objects.create(
+            invoice=self.invoice,
+            student=self.invoice.student,
+            amount=Decimal('600.00'),
+            payment_date=date(2024, 12, 20),
+            status=Payment.PaymentStatus.COMPLETED,
+        )
+        result = OverdueProcessor.process(today=date(2025, 1, 4))
+        self.assertEqual(result, {'marked': 0, 'late_fees': 0, 'items': 0, 'reminders': 0})
+
+    def test_query_count_is_independent_of_invoices(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                OverdueProcessor.process(today=date(2025, 1, 4))
+            return len(context.captured_queries)
+
+        few = count_queries()
+        for number in range(2, 8):
+            self.create_invoice(create_student(number))
+        self.assertEqual(count_queries(), few)
+        self.assertEqual(InvoiceItem.objects.filter(is_late_fee=True).count(), 14)
+
+
+@override_settings(PAYSTACK_WEBHOOK_SECRET='whsec_test', PAYSTACK_WEBHOOK_RETRY_DELAY=0,
+                   PAYSTACK_WEBHOOK_MAX_ATTEMPTS=2)
+class WebhookQueueTestCase(TestCase):
+    """Test cases for queued Paystack webhook ingestion"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        session = AcademicSession.objects.create(
+            name='2024/2025',
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31),
+            is_current=True
+        )
+        student = create_student(1)
+        invoice = Invoice.objects.create(
+            student=student,
+            academic_session=session,
+            billing_period='Term 1',
+            issue_date=date(2024, 9, 1),
+            due_date=date(2024, 10, 1),
+            total_amount=Decimal('600.00'),
+        )
+        self.payment = Payment.objects.create(
+            invoice=invoice,
+            student=student,
+            amount=Decimal('600.00'),
+            payment_method=Payment.PaymentMethod.PAYSTACK,
+            payment_date=date(2024, 9, 15),
+            status=Payment.PaymentStatus.PENDING,
+        )
+        PaystackPayment.objects.create(
+            payment=self.payment,
+            paystack_reference='PSK-1',
+            customer_email=student.user.email,
+        )
+
+    def deliver(self, event, reference, status='success', signature=None):
+        body = json.dumps({'event': event, 'data': {
+            'reference': reference, 'status': status, 'amount': 60000,
+            'customer': {'email': 'student1@example.com'},
+        }}).encode()
+        return self.client.post(
+            reverse('finance:paystack_webhook'), body, content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE=signature or sign_payload(body),
+        )
+
+    def test_deliveries_are_queued_once(self):
+        first = self.deliver('charge.success', 'PSK-1')
+        retry = self.deliver('charge.success', 'PSK-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['status'], 'queued')
+        self.assertEqual(retry.json()['status'], 'duplicate')
+        self.assertEqual(PaystackWebhookEvent.objects.count(), 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.PENDING)
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.deliver('charge.success', 'PSK-1', signature='forged')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaystackWebhookEvent.objects.exists())
+
+    def test_worker_applies_queued_events(self):
+        self.deliver('charge.success', 'PSK-1')
+        self.assertEqual(WebhookQueue.drain(), 1)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.COMPLETED)
+        self.assertTrue(PaystackWebhookEvent.objects.get().processed)
+        self.assertEqual(WebhookQueue.drain(), 0)
+
+    @override_settings(PAYSTACK_WEBHOOK_RETRY_DELAY=60)
+    def test_drain_continues_past_a_failed_batch(self):
+        self.deliver('charge.failed', 'UNKNOWN')
+        self.deliver('charge.success', 'PSK-1')
+
+        self.assertEqual(WebhookQueue.drain(batch_size=1), 1)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.COMPLETED)
+        failed = PaystackWebhookEvent.objects.get(event_reference='UNKNOWN')
+        self.assertEqual((failed.processed, failed.attempts), (False, 1))
+
+    def test_failures_are_retried_then_dead_lettered(self):
+        self.deliver('charge.failed', 'UNKNOWN')
+        event = PaystackWebhookEvent.objects.get()
+
+        self.assertEqual(WebhookQueue.work(), 0)
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNone(event.dead_lettered_at)
+
+        self.assertEqual(WebhookQueue.work(), 0)
+        event.refresh_from_db()
+        self.assertIsNotNone(event.dead_lettered_at)
+        self.assertEqual(WebhookQueue.claim(), [])
+
+        call_command('replay_paystack_webhooks', '--dead', stdout=StringIO())
+        event.refresh_from_db()
+        self.assertEqual((event.attempts, event.dead_lettered_at), (0, None))
+
+    def test_receipt_download(self):
+        staff = User.objects.create_user(username='bursar', password='testpass123', is_staff=True)
+        self.client.force_login(staff)
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            response = self.client.get(reverse('finance:receipt_download', kwargs={'pk': self.payment.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_events_of_a_reference_run_in_order(self):
+        self.deliver('charge.failed', 'PSK-2')
+        self.deliver('charge.abandoned', 'PSK-2')
+        self.deliver('charge.success', 'PSK-1')
+
+        claimed = WebhookQueue.claim()
+        self.assertEqual(
+            [(event.event_type, event.event_reference) for event in claimed],
+            [('charge.failed', 'PSK-2'), ('charge.success', 'PSK-1')],
+        )
+
+
+class StubPaystackHandler(BaseHTTPRequestHandler):
+    """Answers like Paystack; ``server.script`` maps paths to queued (status, delay) replies."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self):
+        self.server.requests.append((self.command, self.path.split('?')[0], self.client_address[1]))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        script = self.server.script.get(self.path.split('?')[0].rstrip('/'), [])
+        status, delay = script.pop(0) if script else (200, 0)
+        time.sleep(delay)
+        body = json.dumps({'status': status == 200, 'message': 'ok', 'data': {'path': self.path}}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (read timeout tests)
+            pass
+
+    do_GET = do_POST = reply
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(PAYSTACK_HTTP_BACKOFF=0, PAYSTACK_HTTP_RETRIES=2, PAYSTACK_HTTP_TIMEOUT=(1, 0.5),
+                   PAYSTACK_CIRCUIT_FAILURES=3, PAYSTACK_CIRCUIT_RESET_SECONDS=60)
+class PaystackClientTestCase(SimpleTestCase):
+    """Test cases for the pooled Paystack client against a local stub server"""
+
+    def setUp(self):
+        cache.clear()
+        reset_client()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPaystackHandler)
+        self.server.requests = []
+        self.server.script = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(reset_client)
+        base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        with override_settings(PAYSTACK_BASE_URL=base_url):
+            self.service = PaystackService()
+
+    def test_connections_are_reused(self):
+        for number in range(5):
+            self.service.verify_payment(f'REF{number}')
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(len({port for _method, _path, port in self.server.requests}), 1)
+
+    def test_idempotent_calls_are_retried(self):
+        self.server.script['/transaction/verify/REF'] = [(503, 0), (502, 0)]
+        self.assertEqual(self.service.verify_payment('REF'), {'path': '/transaction/verify/REF'})
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(get_client().metrics.snapshot()['verify_payment']['retries'], 2)
+
+    def test_posts_are_not_retried(self):
+        self.server.script['/transaction/initialize'] = [(503, 0)]
+        with self.assertRaises(ValidationError):
+            self.service.initialize_payment('payer@example.com', Decimal('10.00'), 'REF')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_read_timeout(self):
+        self.server.script['/transaction/verify/SLOW'] = [(200, 2)] * 3
+        start = time.perf_counter()
+        with self.assertRaises(ValidationError):
+            self.service.verify_payment('SLOW')
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_circuit_breaker_fails_fast(self):
+        self.server.script['/transaction/verify/DOWN'] = [(500, 0)] * 9
+        for _attempt in range(3):
+            with self.assertRaises(ValidationError):
+                self.service.verify_payment('DOWN')
+        sent = len(self.server.requests)
+        with self.assertRaises(ValidationError):
+            self.service.verify_payment('OTHER')
+        self.assertEqual(len(self.server.requests), sent)
+        self.assertEqual(get_client().breaker.state, 'open')
+
+    def test_bank_lookups_are_cached(self):
+        self.service.list_banks()
+        self.service.list_banks()
+        self.service.resolve_bank_account('0123456789', '058')
+        self.service.resolve_bank_account('0123456789', '058')
+        self.assertEqual([path for _method, path, _port in self.server.requests], ['/bank', '/bank/resolve'])
+        self.assertEqual(get_client().metrics.snapshot()['list_banks']['calls'], 1)
+
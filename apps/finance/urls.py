@@ -86,6 +86,7 @@ urlpatterns = [
     path('api/invoices/', views.APIInvoiceListView.as_view(), name='api_invoice_list'),
     path('api/invoices/<uuid:pk>/details/', views.GetInvoiceDetailsAPIView.as_view(), name='api_invoice_details'),
     path('api/students/<uuid:student_id>/outstanding-fees/', views.GetStudentOutstandingFeesAPIView.as_view(), name='api_student_outstanding_fees'),
+    path('api/students/<uuid:student_id>/statement/', views.GetStudentStatementAPIView.as_view(), name='api_student_statement'),
     path('api/expenses/summary/', views.GetExpenseSummaryAPIView.as_view(), name='api_expense_summary'),
     path('api/reports/<uuid:pk>/publish/', views.PublishFinancialReportAPIView.as_view(), name='api_publish_report'),
     path('api/payments/<uuid:payment_id>/status/', views.APIPaymentStatusView.as_view(), name='api_payment_status'),
@@ -25,10 +25,15 @@ from .models import FeeStructure, FeeDiscount, Invoice, InvoiceItem, Payment, Ex
 
 logger = logging.getLogger(__name__)
 from .forms import FeeStructureForm, FeeDiscountForm, InvoiceForm, InvoiceItemForm, PaymentForm, ExpenseForm, FinancialReportForm
-from .services import get_paystack_service, get_payment_service, get_webhook_service
+from .services import get_paystack_service, get_payment_service
+from .webhooks import InvalidWebhook, WebhookQueue
+from .documents import receipt_document
+from .dashboard import FinanceDashboardService
+from .ledger import LedgerReports, StudentLedger
 from apps.academics.models import AcademicSession, Student, Class
 from apps.users.models import User, Role
 from apps.audit.models import AuditLog
+from apps.core.documents import DocumentRenderer
 from apps.core.models import Institution
 
 
@@ -75,18 +80,10 @@ class DashboardView(LoginRequiredMixin, AccountantRequiredMixin, View):
     """Accountant dashboard showing financial overview."""
 
     def get(self, request):
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
-        # Fee Collection Summary
-        total_invoiced = Invoice.objects.filter(
-            academic_session=current_session
-        ).aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-
-        total_paid = Invoice.objects.filter(
-            academic_session=current_session
-        ).aggregate(Sum('amount_paid'))['amount_paid__sum'] or Decimal('0.00')
-
-        total_outstanding = total_invoiced - total_paid
+        # Fee collection, expense and monthly chart figures
+        summary = FinanceDashboardService.summary(current_session)
 
         # Recent Invoices
         recent_invoices = Invoice.objects.filter(
@@ -99,50 +96,17 @@ class DashboardView(LoginRequiredMixin, AccountantRequiredMixin, View):
             status=Payment.PaymentStatus.COMPLETED,
         ).select_related('student__user', 'invoice').order_by('-payment_date')[:8]
 
-        # Expense Summary (current month)
-        now = timezone.now()
-        total_expenses = Expense.objects.filter(
-            expense_date__year=now.year,
-            expense_date__month=now.month,
-        ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        # Overdue Invoices count
-        overdue_invoices_count = Invoice.objects.filter(
-            academic_session=current_session,
-            due_date__lt=now.date(),
-            balance_due__gt=Decimal('0.00'),
-        ).count()
-
-        # ── Monthly collection data for chart (real data) ─────────────────
-        monthly_collection = []
-        for month in range(1, 13):
-            month_invoiced = Invoice.objects.filter(
-                academic_session=current_session,
-                issue_date__year=now.year,
-                issue_date__month=month,
-            ).aggregate(v=Sum('total_amount'))['v'] or 0
-            month_paid = Invoice.objects.filter(
-                academic_session=current_session,
-                issue_date__year=now.year,
-                issue_date__month=month,
-            ).aggregate(v=Sum('amount_paid'))['v'] or 0
-            monthly_collection.append({
-                'month': month,
-                'invoiced': float(month_invoiced),
-                'paid': float(month_paid),
-            })
-
         context = {
             'title': _('Accountant Dashboard'),
             'current_session': current_session,
-            'total_invoiced': total_invoiced,
-            'total_paid': total_paid,
-            'total_outstanding': total_outstanding,
+            'total_invoiced': summary['total_invoiced'],
+            'total_paid': summary['total_paid'],
+            'total_outstanding': summary['total_outstanding'],
             'recent_invoices': recent_invoices,
             'recent_payments': recent_payments,
-            'total_expenses': total_expenses,
-            'overdue_invoices_count': overdue_invoices_count,
-            'monthly_collection': monthly_collection,
+            'total_expenses': summary['month_expenses'],
+            'overdue_invoices_count': summary['overdue_invoices_count'],
+            'monthly_collection': summary['monthly_collection'],
         }
         return render(request, 'finance/dashboard/accountant_dashboard.html', context)
 
@@ -850,6 +814,11 @@ class FinancialReportCreateView(AccountantRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.generated_by = self.request.user
+        if not form.instance.report_data:
+            # Ledger-backed report types are generated from the ledger snapshots
+            report_data = LedgerReports.report_data(form.instance)
+            if report_data is not None:
+                form.instance.report_data = report_data
         messages.success(self.request, _('Financial report created successfully.'))
         return super().form_valid(form)
 
@@ -883,53 +852,25 @@ class FinancialReportDeleteView(AccountantRequiredMixin, DeleteView):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class PaystackWebhookView(View):
-    """View for handling Paystack webhook events."""
-    
-    def post(self, request):
-        import hashlib
-        import hmac
-
-        # Get webhook signature from headers
-        signature = request.META.get('HTTP_X_PAYSTACK_SIGNATURE')
-        if not signature:
-            return HttpResponseBadRequest("Missing webhook signature")
-
-        # Verify webhook signature
-        webhook_secret = getattr(settings, 'PAYSTACK_WEBHOOK_SECRET', '')
-        if webhook_secret:
-            computed_signature = hmac.new(
-                webhook_secret.encode('utf-8'),
-                request.body,
-                hashlib.sha512
-            ).hexdigest()
-
-            if not hmac.compare_digest(signature, computed_signature):
-                return HttpResponseBadRequest("Invalid webhook signature")
+    """
+    View for receiving Paystack webhook events.
 
+    Deliveries are verified and queued, then acknowledged straight away;
+    ``manage.py process_paystack_webhooks`` applies them.
+    """
+
+    def post(self, request):
         try:
-            # Parse webhook data
-            webhook_data = json.loads(request.body)
-            event_type = webhook_data.get('event')
-            event_data = webhook_data.get('data', {})
-            event_reference = event_data.get('reference')
-            event_timestamp = timezone.now()
-
-            # Process webhook event
-            webhook_service = get_webhook_service()
-            webhook_event, success = webhook_service.process_webhook_event(
-                event_type, event_data, event_reference, event_timestamp
+            _event, created = WebhookQueue.ingest(
+                request.body, request.META.get('HTTP_X_PAYSTACK_SIGNATURE')
             )
-
-            if success:
-                return JsonResponse({'status': 'success'}, status=200)
-            else:
-                return JsonResponse({'status': 'failed', 'message': 'Webhook processing failed'}, status=500)
-
-        except json.JSONDecodeError:
-            return HttpResponseBadRequest("Invalid JSON data")
+        except InvalidWebhook as e:
+            return HttpResponseBadRequest(str(e))
         except Exception as e:
-            logger.error(f"Webhook processing error: {e}")
-            return HttpResponseBadRequest(f"Webhook processing error: {str(e)}")
+            logger.error(f"Webhook ingestion error: {e}")
+            return JsonResponse({'status': 'failed', 'message': 'Webhook could not be queued'}, status=500)
+
+        return JsonResponse({'status': 'queued' if created else 'duplicate'}, status=200)
 
 
 # =============================================================================
@@ -937,12 +878,13 @@ class PaystackWebhookView(View):
 # =============================================================================
 
 class ReceiptDownloadView(FinanceAccessMixin, View):
-    """View for downloading payment receipts."""
+    """View for downloading a payment receipt as PDF."""
     def get(self, request, pk):
         payment = get_object_or_404(Payment, pk=pk)
-        # TODO: Implement receipt generation and download
-        messages.info(request, _(f"Receipt download for Payment ID {pk}. (Placeholder)"))
-        return HttpResponse(_("Receipt Download Placeholder"))
+        document = receipt_document(payment)
+        response = HttpResponse(DocumentRenderer.render(document), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{document.filename}"'
+        return response
 
 class APIInvoiceListView(FinanceAccessMixin, ListView):
     """API to list invoices (placeholder for a more robust API)."""
@@ -1119,7 +1061,7 @@ class GetStudentOutstandingFeesAPIView(FinanceAccessMixin, View):
 
     def get(self, request, student_id):
         student = get_object_or_404(Student, id=student_id)
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         if not current_session:
             return JsonResponse({'success': False, 'message': _('No current academic session found.')}, status=404)
@@ -1132,7 +1074,6 @@ class GetStudentOutstandingFeesAPIView(FinanceAccessMixin, View):
         ).order_by('due_date')
 
         fees_data = []
-        total_outstanding = Decimal('0.00')
         for invoice in outstanding_invoices:
             fees_data.append({
                 'invoice_number': invoice.invoice_number,
@@ -1145,16 +1086,49 @@ class GetStudentOutstandingFeesAPIView(FinanceAccessMixin, View):
                 'days_overdue': invoice.days_overdue,
                 'late_fee_calculated': str(invoice.calculate_late_fee()),
             })
-            total_outstanding += invoice.balance_due
 
         return JsonResponse({
             'success': True,
             'student_name': student.user.get_full_name(),
-            'total_outstanding': str(total_outstanding),
+            'total_outstanding': str(StudentLedger.balance(student, current_session)),
             'fees': fees_data
         })
 
 
+class GetStudentStatementAPIView(FinanceAccessMixin, View):
+    """API to get a student's statement of account from the ledger."""
+
+    def get(self, request, student_id):
+        student = get_object_or_404(Student, id=student_id)
+        session_id = request.GET.get('session')
+        if session_id:
+            session = get_object_or_404(AcademicSession, pk=session_id)
+        else:
+            session = AcademicSession.current()
+            if not session:
+                return JsonResponse({'success': False, 'message': _('No current academic session found.')}, status=404)
+
+        try:
+            start_date = request.GET.get('start_date')
+            end_date = request.GET.get('end_date')
+            start_date = timezone.datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end_date = timezone.datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            return JsonResponse({'success': False, 'message': _('Dates must be in YYYY-MM-DD format.')}, status=400)
+
+        statement = StudentLedger.statement(student, session, start_date, end_date)
+        return JsonResponse({
+            'success': True,
+            'student_name': student.user.get_full_name(),
+            'academic_session': str(session),
+            'opening_balance': str(statement['opening_balance']),
+            'closing_balance': str(statement['closing_balance']),
+            'total_debits': str(statement['debits']),
+            'total_credits': str(statement['credits']),
+            'entries': statement['entries'],
+        })
+
+
 class GetExpenseSummaryAPIView(FinanceAccessMixin, View):
     """API to get a summary of expenses for a given period."""
 
@@ -1404,7 +1378,7 @@ class StudentInvoiceListView(LoginRequiredMixin, ListView):
         # Calculate summary statistics
         if hasattr(self.request.user, 'student_profile'):
             student = self.request.user.student_profile
-            current_session = AcademicSession.objects.filter(is_current=True).first()
+            current_session = AcademicSession.current()
 
             if current_session:
                 # Total outstanding amount
@@ -1457,7 +1431,7 @@ class StudentFeeDashboardView(LoginRequiredMixin, View):
             messages.error(request, _('No student profile found for your account.'))
             return redirect('users:dashboard')
 
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
 
         # All invoices for this student
         all_invoices_qs = Invoice.objects.filter(
@@ -1476,15 +1450,8 @@ class StudentFeeDashboardView(LoginRequiredMixin, View):
         paginator = Paginator(all_invoices_qs, 10)
         page_obj = paginator.get_page(request.GET.get('page', 1))
 
-        # Aggregates (all time)
-        agg = Invoice.objects.filter(student=student).aggregate(
-            total_invoiced=Sum('total_amount'),
-            total_paid=Sum('amount_paid'),
-            total_balance=Sum('balance_due'),
-        )
-        total_invoiced = agg['total_invoiced'] or Decimal('0.00')
-        total_paid = agg['total_paid'] or Decimal('0.00')
-        total_balance = agg['total_balance'] or Decimal('0.00')
+        # Totals (all sessions) from the student ledger
+        totals = StudentLedger.totals(student)
 
         overdue_invoices = Invoice.objects.filter(
             student=student,
@@ -1504,9 +1471,9 @@ class StudentFeeDashboardView(LoginRequiredMixin, View):
             'invoices': page_obj,
             'page_obj': page_obj,
             'status_filter': status_filter,
-            'total_invoiced': total_invoiced,
-            'total_paid': total_paid,
-            'total_balance': total_balance,
+            'total_invoiced': totals['total_invoiced'],
+            'total_paid': totals['total_paid'],
+            'total_balance': totals['total_balance'],
             'overdue_invoices': overdue_invoices,
             'overdue_count': overdue_count,
             'payment_history': payment_history,
@@ -1522,26 +1489,11 @@ class AccountantStudentFeeDashboardView(FinanceAccessMixin, View):
     """Student Fee Dashboard for accountants - comprehensive view of all student fees."""
 
     def get(self, request):
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         institution = getattr(request.user, 'current_institution', None)
 
         # Fee Overview Statistics
-        total_invoiced = Invoice.objects.filter(
-            academic_session=current_session
-        ).aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0.00')
-
-        total_paid = Invoice.objects.filter(
-            academic_session=current_session
-        ).aggregate(Sum('amount_paid'))['amount_paid__sum'] or Decimal('0.00')
-
-        total_outstanding = total_invoiced - total_paid
-
-        # Overdue Invoices count
-        overdue_invoices_count = Invoice.objects.filter(
-            academic_session=current_session,
-            due_date__lt=timezone.now().date(),
-            balance_due__gt=Decimal('0.00'),
-        ).count()
+        summary = FinanceDashboardService.summary(current_session)
 
         # Recent Invoices
         recent_invoices = Invoice.objects.filter(
@@ -1645,10 +1597,10 @@ class AccountantStudentFeeDashboardView(FinanceAccessMixin, View):
         context = {
             'title': _('Student Fee Dashboard'),
             'current_session': current_session,
-            'total_invoiced': total_invoiced,
-            'total_paid': total_paid,
-            'total_outstanding': total_outstanding,
-            'overdue_invoices_count': overdue_invoices_count,
+            'total_invoiced': summary['total_invoiced'],
+            'total_paid': summary['total_paid'],
+            'total_outstanding': summary['total_outstanding'],
+            'overdue_invoices_count': summary['overdue_invoices_count'],
             'recent_invoices': recent_invoices,
             'recent_payments': recent_payments,
             'student_fee_data': student_fee_data,
@@ -0,0 +1,307 @@
+"""
+Queued ingestion of Paystack webhooks.
+
+Paystack retries any delivery that is not acknowledged quickly, so the webhook
+view only verifies the signature and stores the event through
+:meth:`WebhookQueue.ingest`, then returns 200. A unique constraint on
+``(event_type, event_reference)`` makes retried deliveries no-ops.
+
+Events are processed afterwards by ``manage.py process_paystack_webhooks``,
+which claims ready events with a conditional UPDATE (so several workers can
+run at once), processes the events of each reference in the order they were
+received, retries failures with exponential backoff and dead-letters an event
+after ``PAYSTACK_WEBHOOK_MAX_ATTEMPTS`` attempts. Dead-lettered events can be
+requeued with ``manage.py replay_paystack_webhooks``.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import PaystackWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidWebhook(ValueError):
+    """Raised when a webhook delivery cannot be accepted."""
+
+
+def sign_payload(body: bytes, secret: Optional[str] = None) -> str:
+    """HMAC-SHA512 signature Paystack sends in ``X-Paystack-Signature``."""
+    secret = getattr(settings, 'PAYSTACK_WEBHOOK_SECRET', '') if secret is None else secret
+    return hmac.new(secret.encode('utf-8'), body, hashlib.sha512).hexdigest()
+
+
+class WebhookQueue:
+    """
+    Stores Paystack webhook deliveries and works through them.
+    """
+
+    @staticmethod
+    def verify(body: bytes, signature: Optional[str]):
+        """
+        Check a delivery's signature.
+
+        Raises:
+            InvalidWebhook: If the signature is missing or does not match
+        """
+        if not signature:
+            raise InvalidWebhook("Missing webhook signature")
+        if getattr(settings, 'PAYSTACK_WEBHOOK_SECRET', '') and not hmac.compare_digest(
+            signature, sign_payload(body)
+        ):
+            raise InvalidWebhook("Invalid webhook signature")
+
+    @classmethod
+    def ingest(cls, body: bytes, signature: Optional[str]) -> Tuple[PaystackWebhookEvent, bool]:
+        """
+        Verify and store a webhook delivery without processing it.
+
+        Args:
+            body: Raw request body
+            signature: Value of the ``X-Paystack-Signature`` header
+
+        Returns:
+            (event, created); ``created`` is False for a repeated delivery
+
+        Raises:
+            InvalidWebhook: If the signature or payload is invalid
+        """
+        cls.verify(body, signature)
+        try:
+            payload = json.loads(body)
+        except (TypeError, ValueError):
+            raise InvalidWebhook("Invalid JSON data")
+        if not isinstance(payload, dict):
+            raise InvalidWebhook("Invalid JSON data")
+        return cls.enqueue(payload.get('event') or '', payload.get('data') or {})
+
+    @staticmethod
+    def enqueue(event_type: str, event_data: Dict, event_reference: Optional[str] = None,
+                event_timestamp=None) -> Tuple[PaystackWebhookEvent, bool]:
+        """
+        Store an event for processing, ignoring repeated deliveries.
+
+        Args:
+            event_type: Paystack event name, e.g. ``charge.success``
+            event_data: The payload's ``data`` object
+            event_reference: Defaults to ``event_data['reference']``
+            event_timestamp: Defaults to now; orders events of one reference
+
+        Returns:
+            (event, created)
+        """
+        reference = str(event_reference or event_data.get('reference') or '')[:100]
+        if event_type not in PaystackWebhookEvent.WebhookEventType.values:
+            event_type = PaystackWebhookEvent.WebhookEventType.OTHER
+        if reference:
+            existing = PaystackWebhookEvent.objects.filter(
+                event_type=event_type, event_reference=reference
+            ).first()
+            if existing:
+                return existing, False
+        try:
+            with transaction.atomic():
+                event = PaystackWebhookEvent.objects.create(
+                    event_type=event_type,
+                    event_data=event_data,
+                    event_reference=reference,
+                    event_timestamp=event_timestamp or timezone.now(),
+                )
+        except IntegrityError:
+            # Another delivery of the same event won the race
+            return PaystackWebhookEvent.objects.get(event_type=event_type, event_reference=reference), False
+        return event, True
+
+    @staticmethod
+    def pending():
+        """Events that have been neither processed nor dead-lettered."""
+        return PaystackWebhookEvent.objects.filter(processed=False, dead_lettered_at__isnull=True)
+
+    @classmethod
+    def ready(cls, now=None):
+        """
+        Pending events that can be processed now.
+
+        An event waits while it is leased to a worker, until its retry is due,
+        and while an earlier event for the same reference is still pending.
+        """
+        now = now or timezone.now()
+        earlier = cls.pending().filter(
+            event_reference=OuterRef('event_reference'),
+        ).exclude(event_reference='').filter(
+            Q(event_timestamp__lt=OuterRef('event_timestamp'))
+            | Q(event_timestamp=OuterRef('event_timestamp'), created_at__lt=OuterRef('created_at'))
+        )
+        return cls.pending().filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+        ).exclude(Exists(earlier))
+
+    @classmethod
+    def claim(cls, batch_size: int = 100, now=None) -> List[PaystackWebhookEvent]:
+        """
+        Lease a batch of ready events to this worker.
+
+        Returns:
+            Claimed events, oldest first
+        """
+        now = now or timezone.now()
+        ids = list(cls.ready(now).order_by('event_timestamp', 'created_at').values_list(
+            'pk', flat=True)[:batch_size])
+        if not ids:
+            return []
+        lease = timedelta(seconds=getattr(settings, 'PAYSTACK_WEBHOOK_LEASE_SECONDS', 300))
+        locked_until = now + lease
+        PaystackWebhookEvent.objects.filter(pk__in=ids).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lte=now)
+        ).update(locked_until=locked_until)
+        return list(PaystackWebhookEvent.objects.filter(
+            pk__in=ids, locked_until=locked_until
+        ).order_by('event_timestamp', 'created_at'))
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Backoff before the next attempt after ``attempts`` failures."""
+        base = getattr(settings, 'PAYSTACK_WEBHOOK_RETRY_DELAY', 30)
+        return timedelta(seconds=base * 2 ** (attempts - 1))
+
+    @classmethod
+    def process_event(cls, event: PaystackWebhookEvent) -> bool:
+        """
+        Process one claimed event and record the outcome.
+
+        A failed attempt is rolled back, so it can be retried safely.
+        """
+        error = ''
+        try:
+            with transaction.atomic():
+                success = event.process_webhook()
+                if not success:
+                    transaction.set_rollback(True)
+        except Exception as e:
+            success = False
+            error = str(e)
+
+        now = timezone.now()
+        events = PaystackWebhookEvent.objects.filter(pk=event.pk)
+        if success:
+            events.update(processed=True, processed_at=now, locked_until=None, processing_error='')
+            return True
+
+        attempts = event.attempts + 1
+        error = error or f"{event.event_type} handler reported failure (attempt {attempts})"
+        if attempts >= getattr(settings, 'PAYSTACK_WEBHOOK_MAX_ATTEMPTS', 5):
+            events.update(attempts=attempts, dead_lettered_at=now, locked_until=None, processing_error=error)
+            logger.error(f"Dead-lettered webhook event {event.event_type} - {event.event_reference}: {error}")
+        else:
+            events.update(
+                attempts=attempts,
+                next_attempt_at=now + cls.retry_delay(attempts),
+                locked_until=None,
+                processing_error=error,
+            )
+            logger.warning(f"Webhook event {event.event_type} - {event.event_reference} failed, will retry: {error}")
+        return False
+
+    @classmethod
+    def _process_in_order(cls, events: List[PaystackWebhookEvent]) -> int:
+        # Events of one reference, oldest first; stop at the first failure so
+        # the rest wait behind its retry
+        processed = 0
+        for event in events:
+            if not cls.process_event(event):
+                break
+            processed += 1
+        return processed
+
+    @classmethod
+    def _process_in_thread(cls, events: List[PaystackWebhookEvent]) -> int:
+        # An unexpected error leaves the group leased; it is claimed again
+        # once the lease runs out
+        try:
+            return cls._process_in_order(events)
+        except Exception as e:
+            logger.error(f"Webhook worker failed on reference {events[0].event_reference}: {e}")
+            return 0
+        finally:
+            connection.close()
+
+    @classmethod
+    def work(cls, batch_size: int = 100, workers: int = 1) -> int:
+        """
+        Claim and process one batch of events.
+
+        Args:
+            batch_size: Events claimed at once
+            workers: Threads processing the batch; events of the same
+                reference always run on one thread, in order
+
+        Returns:
+            Number of events processed successfully
+        """
+        return cls._process_batch(cls.claim(batch_size), workers)
+
+    @classmethod
+    def _process_batch(cls, events: List[PaystackWebhookEvent], workers: int) -> int:
+        if not events:
+            return 0
+        groups = {}
+        for event in events:
+            groups.setdefault(event.event_reference or event.pk, []).append(event)
+
+        if workers <= 1:
+            processed = sum(cls._process_in_order(group) for group in groups.values())
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                processed = sum(pool.map(cls._process_in_thread, groups.values()))
+
+        # Release the lease on events skipped after an earlier failure
+        PaystackWebhookEvent.objects.filter(
+            pk__in=[event.pk for event in events], locked_until=events[0].locked_until
+        ).update(locked_until=None)
+        if processed:
+            logger.info(f"Processed {processed} Paystack webhook event(s)")
+        return processed
+
+    @classmethod
+    def drain(cls, batch_size: int = 100, workers: int = 1) -> int:
+        """
+        Process batches until no event is ready.
+
+        A batch in which every event failed does not end the run: failed
+        events wait for their retry, which ready() excludes until it is due,
+        so the loop ends once claim() comes back empty.
+
+        Returns:
+            Number of events processed successfully
+        """
+        total = 0
+        while True:
+            events = cls.claim(batch_size)
+            if not events:
+                return total
+            total += cls._process_batch(events, workers)
+
+    @staticmethod
+    def requeue(queryset) -> int:
+        """Return events (e.g. dead-lettered ones) to the queue."""
+        return queryset.update(
+            processed=False,
+            processed_at=None,
+            dead_lettered_at=None,
+            attempts=0,
+            next_attempt_at=None,
+            locked_until=None,
+            processing_error='',
+        )
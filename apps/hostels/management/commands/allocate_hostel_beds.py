@@ -0,0 +1,77 @@
+"""
+Management command to allocate hostel beds to boarders in bulk.
+
+Unallocated boarders (optionally limited to some classes) are matched to
+available beds in one pass by BulkAllocationService. Use --recount to
+reconcile the room and hostel occupancy counters with actual allocations.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from apps.academics.models import AcademicSession, Student
+from apps.hostels.services import BulkAllocationService, OccupancyService, active_allocations
+
+
+class Command(BaseCommand):
+    help = 'Allocate hostel beds to unallocated boarders in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--class',
+            dest='classes',
+            action='append',
+            default=[],
+            help='Only allocate students enrolled in this class (ID, repeatable)',
+        )
+        parser.add_argument(
+            '--session',
+            help='Academic session ID (defaults to the current session)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the planned allocation without saving it',
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Only reconcile occupancy counters with active allocations',
+        )
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            changed = OccupancyService.recount()
+            self.stdout.write(self.style.SUCCESS(f'Occupancy recounted; {changed} room(s) corrected'))
+            return
+
+        if options['session']:
+            session = AcademicSession.objects.filter(pk=options['session']).first()
+        else:
+            session = AcademicSession.current()
+        if not session:
+            raise CommandError('No academic session found')
+
+        students = Student.objects.filter(is_boarder=True, is_deleted=False).exclude(
+            Exists(active_allocations().filter(student=OuterRef('pk')))
+        )
+        if options['classes']:
+            students = students.filter(
+                enrollments__class_enrolled_id__in=options['classes'],
+                enrollments__academic_session=session,
+                enrollments__enrollment_status='active',
+            ).distinct()
+
+        service = BulkAllocationService(session)
+        if options['dry_run']:
+            assignments, unallocated = service.plan(students)
+            for student, bed, _class_id in assignments:
+                self.stdout.write(f'{student} -> {bed}')
+        else:
+            assignments, unallocated = service.allocate(students)
+
+        for student, reason in unallocated:
+            self.stdout.write(self.style.WARNING(f'Not allocated: {student} ({reason})'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(assignments)} student(s) allocated, {len(unallocated)} not allocated'
+        ))
@@ -1,6 +1,6 @@
 # apps/hostels/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -132,12 +132,15 @@ class Hostel(CoreBaseModel, AddressModel, ContactModel):
         return self.current_occupancy >= self.capacity
 
     def update_occupancy(self):
-        """Update current occupancy based on active allocations."""
-        active_allocations = self.rooms.filter(
-            beds__allocations__status='active'
-        ).distinct().count()
-        self.current_occupancy = active_allocations
-        self.save()
+        """
+        Recount occupancy from active allocations.
+
+        Occupancy is normally maintained incrementally as allocations change
+        (see hostels.services.OccupancyService); this is for reconciliation.
+        """
+        from .services import OccupancyService
+        OccupancyService.recount(hostels=[self.pk])
+        self.refresh_from_db(fields=['current_occupancy'])
 
     def get_students_by_class(self, class_obj):
         """Get all students from a specific class allocated to this hostel."""
@@ -247,14 +250,10 @@ class Room(CoreBaseModel):
         return self.current_occupancy >= self.capacity
 
     def update_occupancy(self):
-        """Update current occupancy based on active bed allocations."""
-        active_allocations = self.beds.filter(
-            allocations__status='active'
-        ).count()
-        self.current_occupancy = active_allocations
-        self.save()
-        # Update hostel occupancy as well
-        self.hostel.update_occupancy()
+        """Recount room and hostel occupancy from active bed allocations."""
+        from .services import OccupancyService
+        OccupancyService.recount(hostels=[self.hostel_id])
+        self.refresh_from_db(fields=['current_occupancy'])
 
     def get_current_residents(self):
         """Get current residents of this room."""
@@ -473,7 +472,9 @@ class HostelAllocation(CoreBaseModel):
                 self.class_enrolled = current_class
 
     def save(self, *args, **kwargs):
-        """Update bed and room availability when allocation status changes."""
+        """Update bed availability and occupancy counters when the allocation changes."""
+        from .services import OccupancyService, counts_towards_occupancy
+
         # Auto-set class enrolled before saving
         if not self.class_enrolled and self.student:
             current_class = self.student.current_class
@@ -484,21 +485,19 @@ class HostelAllocation(CoreBaseModel):
         if not self.rent_amount and self.bed:
             self.rent_amount = self.bed.room.effective_rent
         
+        old_bed_id, was_active = None, False
         if self.pk:
-            original = HostelAllocation.objects.get(pk=self.pk)
-            if original.status != self.status:
-                if self.status == 'active':
-                    self.bed.is_available = False
-                    self.bed.save()
-                elif self.status in ['completed', 'cancelled', 'transferred']:
-                    self.bed.is_available = True
-                    self.bed.save()
-        
-        super().save(*args, **kwargs)
+            original = HostelAllocation.all_objects.filter(pk=self.pk).values('bed_id', 'status', 'is_deleted').first()
+            if original:
+                old_bed_id = original['bed_id']
+                was_active = counts_towards_occupancy(original['status'], original['is_deleted'])
         
-        # Update room and hostel occupancy
-        if self.bed.room:
-            self.bed.room.update_occupancy()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            OccupancyService.allocation_changed(
+                old_bed_id, was_active,
+                self.bed_id, counts_towards_occupancy(self.status, self.is_deleted)
+            )
 
     @property
     def duration_days(self):
@@ -528,26 +527,29 @@ class HostelAllocation(CoreBaseModel):
         if self.status != 'active':
             raise ValidationError(_('Only active allocations can be transferred.'))
         
-        # Create new allocation
-        new_allocation = HostelAllocation.objects.create(
-            student=self.student,
-            bed=new_bed,
-            academic_session=self.academic_session,
-            class_enrolled=self.class_enrolled,
-            allocation_date=timezone.now().date(),
-            rent_amount=new_bed.room.effective_rent,
-            security_deposit_paid=self.security_deposit_paid,
-            allocated_by=transferred_by,
-            special_requirements=self.special_requirements,
-            emergency_contact=self.emergency_contact,
-            medical_information=self.medical_information,
-            notes=f"Transferred from {self.bed}. {notes}"
-        )
-        
-        # Mark old allocation as transferred
-        self.status = self.AllocationStatus.TRANSFERRED
-        self.actual_departure_date = timezone.now().date()
-        self.save()
+        with transaction.atomic():
+            # Mark old allocation as transferred (frees the old bed)
+            old_bed = self.bed
+            self.status = self.AllocationStatus.TRANSFERRED
+            self.actual_departure_date = timezone.now().date()
+            self.save()
+
+            # Create new allocation, occupying the new bed straight away
+            new_allocation = HostelAllocation.objects.create(
+                student=self.student,
+                bed=new_bed,
+                academic_session=self.academic_session,
+                class_enrolled=self.class_enrolled,
+                allocation_date=timezone.now().date(),
+                status=self.AllocationStatus.ACTIVE,
+                rent_amount=new_bed.room.effective_rent,
+                security_deposit_paid=self.security_deposit_paid,
+                allocated_by=transferred_by,
+                special_requirements=self.special_requirements,
+                emergency_contact=self.emergency_contact,
+                medical_information=self.medical_information,
+                notes=f"Transferred from {old_bed}. {notes}"
+            )
         
         return new_allocation
 
@@ -1013,14 +1015,14 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 
-@receiver(post_save, sender=HostelAllocation)
 @receiver(post_delete, sender=HostelAllocation)
 def update_hostel_occupancy(sender, instance, **kwargs):
     """
-    Update hostel and room occupancy when allocations change.
+    Release the bed and decrement occupancy when an active allocation is deleted.
     """
-    if instance.bed and instance.bed.room:
-        instance.bed.room.update_occupancy()
+    from .services import OccupancyService, counts_towards_occupancy
+    if counts_towards_occupancy(instance.status, instance.is_deleted):
+        OccupancyService.allocation_changed(instance.bed_id, True, None, False)
 
 
 @receiver(post_save, sender=Room)
@@ -1028,6 +1030,6 @@ def update_room_availability(sender, instance, **kwargs):
     """
     Update room availability based on maintenance status.
     """
-    if instance.maintenance_required:
+    if instance.maintenance_required and instance.is_available:
         instance.is_available = False
-        instance.save(update_fields=['is_available'])
+        Room.objects.filter(pk=instance.pk).update(is_available=False)
@@ -0,0 +1,375 @@
+"""
+Allocation and occupancy services for the hostels app.
+
+Occupancy is kept as counters on Room and Hostel (``current_occupancy``)
+which are adjusted with F() deltas as allocations become active or inactive,
+instead of being recounted on every save.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from .models import Bed, Hostel, HostelAllocation, Room
+
+logger = logging.getLogger(__name__)
+
+# Hostel types that can house students of each gender
+GENDER_HOSTEL_TYPES = {
+    'male': {Hostel.HostelType.BOYS, Hostel.HostelType.COED},
+    'female': {Hostel.HostelType.GIRLS, Hostel.HostelType.COED},
+    'other': {Hostel.HostelType.COED},
+}
+STUDENT_HOSTEL_TYPES = {Hostel.HostelType.BOYS, Hostel.HostelType.GIRLS, Hostel.HostelType.COED}
+
+
+def counts_towards_occupancy(status, is_deleted=False):
+    """Whether an allocation in this state occupies a bed."""
+    return status == HostelAllocation.AllocationStatus.ACTIVE and not is_deleted
+
+
+def active_allocations():
+    """Allocations currently occupying a bed."""
+    return HostelAllocation.objects.filter(
+        status=HostelAllocation.AllocationStatus.ACTIVE,
+        is_deleted=False,
+    )
+
+
+class OccupancyService:
+    """
+    Maintains Room/Hostel occupancy counters with single-statement deltas.
+    """
+
+    @staticmethod
+    def _apply(model, deltas):
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        increment = Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        model.objects.filter(pk__in=list(deltas)).update(
+            current_occupancy=F('current_occupancy') + increment
+        )
+
+    @classmethod
+    def apply_deltas(cls, room_deltas, hostel_deltas):
+        """
+        Apply {room_id: delta} and {hostel_id: delta} to the counters.
+
+        Issues one UPDATE for rooms and one for hostels regardless of the
+        number of rooms touched.
+        """
+        cls._apply(Room, room_deltas)
+        cls._apply(Hostel, hostel_deltas)
+
+    @classmethod
+    def allocation_changed(cls, old_bed_id, was_active, new_bed_id, is_active):
+        """
+        Adjust counters and bed availability for one allocation transition.
+        """
+        if was_active == is_active and (old_bed_id == new_bed_id or not is_active):
+            return
+
+        beds = {
+            pk: (room_id, hostel_id)
+            for pk, room_id, hostel_id in Bed.objects.filter(
+                pk__in={old_bed_id, new_bed_id} - {None}
+            ).values_list('pk', 'room_id', 'room__hostel_id')
+        }
+        room_deltas, hostel_deltas = defaultdict(int), defaultdict(int)
+        if was_active and old_bed_id in beds:
+            room_id, hostel_id = beds[old_bed_id]
+            room_deltas[room_id] -= 1
+            hostel_deltas[hostel_id] -= 1
+            Bed.objects.filter(pk=old_bed_id).update(is_available=True)
+        if is_active and new_bed_id in beds:
+            room_id, hostel_id = beds[new_bed_id]
+            room_deltas[room_id] += 1
+            hostel_deltas[hostel_id] += 1
+            Bed.objects.filter(pk=new_bed_id).update(is_available=False)
+        cls.apply_deltas(room_deltas, hostel_deltas)
+
+    @staticmethod
+    def recount(hostels=None):
+        """
+        Recompute counters from allocations (for reconciliation or repair).
+
+        Returns the number of rooms whose counter changed.
+        """
+        rooms = Room.objects.all()
+        if hostels is not None:
+            rooms = rooms.filter(hostel__in=hostels)
+        active = Q(beds__allocations__status=HostelAllocation.AllocationStatus.ACTIVE,
+                   beds__allocations__is_deleted=False)
+        actual = rooms.annotate(actual=Count('beds__allocations', filter=active)).values_list(
+            'pk', 'current_occupancy', 'actual'
+        )
+        changed = {pk: count for pk, current, count in actual if current != count}
+
+        with transaction.atomic():
+            if changed:
+                Room.objects.filter(pk__in=list(changed)).update(current_occupancy=Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in changed.items()],
+                    output_field=IntegerField(),
+                ))
+            hostel_qs = Hostel.objects.all() if hostels is None else Hostel.objects.filter(pk__in=hostels)
+            hostel_actual = hostel_qs.annotate(
+                actual=Count('rooms__beds__allocations', filter=Q(
+                    rooms__beds__allocations__status=HostelAllocation.AllocationStatus.ACTIVE,
+                    rooms__beds__allocations__is_deleted=False,
+                ))
+            ).values_list('pk', 'current_occupancy', 'actual')
+            hostel_changed = {pk: count for pk, current, count in hostel_actual if current != count}
+            if hostel_changed:
+                Hostel.objects.filter(pk__in=list(hostel_changed)).update(current_occupancy=Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in hostel_changed.items()],
+                    output_field=IntegerField(),
+                ))
+        return len(changed)
+
+
+class BulkAllocationService:
+    """
+    Assigns a whole intake of students to beds in one pass.
+
+    Hard constraints: the bed and room are available, the room has spare
+    capacity, the hostel type matches the student's gender and the
+    student's class is among the hostel's allowed classes (if any). Soft
+    preferences are scored per room:
+
+    - room reserved for the student's class (``Room.preferred_class``)
+    - requested hostel, room type and hostel category
+    - classmates already placed in the room
+    - partly filled rooms (keeps rooms compact)
+
+    Students with the fewest feasible rooms are placed first so that
+    constrained students are not crowded out.
+    """
+
+    CLASS_MATCH = 4
+    CLASS_MISMATCH = -4
+    HOSTEL_MATCH = 3
+    ROOM_TYPE_MATCH = 2
+    CATEGORY_MATCH = 1
+    CLASSMATE = 1
+    PARTLY_FILLED = 0.5
+
+    def __init__(self, academic_session, allocated_by=None, allocation_date=None):
+        self.academic_session = academic_session
+        self.allocated_by = allocated_by
+        self.allocation_date = allocation_date or timezone.now().date()
+
+    def _load_rooms(self, hostels=None, lock=False):
+        beds = Bed.objects.filter(
+            is_available=True,
+            room__is_available=True,
+            room__maintenance_required=False,
+            room__hostel__is_active=True,
+            room__hostel__hostel_type__in=STUDENT_HOSTEL_TYPES,
+        ).exclude(
+            Exists(active_allocations().filter(bed=OuterRef('pk')))
+        ).select_related('room__hostel').order_by('room__hostel__name', 'room__floor', 'room__room_number', 'bed_number')
+        if hostels is not None:
+            beds = beds.filter(room__hostel__in=hostels)
+
+        if lock:
+            # Lock candidate beds so concurrent runs cannot hand out the same bed
+            beds = beds.select_for_update(of=('self',))
+
+        rooms = {}
+        for bed in beds:
+            room = bed.room
+            entry = rooms.get(room.pk)
+            if entry is None:
+                entry = rooms[room.pk] = {
+                    'room': room,
+                    'hostel': room.hostel,
+                    'beds': [],
+                    'free': room.capacity - room.current_occupancy,
+                    'classes': defaultdict(int),
+                    'filled': room.current_occupancy,
+                }
+            entry['beds'].append(bed)
+
+        # Existing residents' classes (for grouping classmates)
+        residents = active_allocations().filter(
+            bed__room_id__in=list(rooms),
+        ).order_by().values_list('bed__room_id', 'class_enrolled_id')
+        for room_id, class_id in residents:
+            if class_id:
+                rooms[room_id]['classes'][class_id] += 1
+
+        # Hostels restricted to particular classes
+        allowed = defaultdict(set)
+        through = Hostel.allowed_classes.through.objects.filter(
+            hostel_id__in={entry['hostel'].pk for entry in rooms.values()}
+        ).values_list('hostel_id', 'class_id')
+        for hostel_id, class_id in through:
+            allowed[hostel_id].add(class_id)
+
+        for entry in rooms.values():
+            entry['free'] = min(entry['free'], len(entry['beds']))
+            entry['allowed_classes'] = allowed.get(entry['hostel'].pk)
+        return {pk: entry for pk, entry in rooms.items() if entry['free'] > 0}
+
+    def _student_classes(self, students):
+        from apps.academics.models import Enrollment
+
+        classes = {}
+        enrollments = Enrollment.objects.filter(
+            student__in=students,
+            enrollment_status='active',
+            academic_session=self.academic_session,
+        ).order_by().values_list('student_id', 'class_enrolled_id')
+        for student_id, class_id in enrollments:
+            classes.setdefault(student_id, class_id)
+        return classes
+
+    def _score(self, entry, class_id, preference):
+        room = entry['room']
+        hostel = entry['hostel']
+        score = 0.0
+        if room.preferred_class_id:
+            score += self.CLASS_MATCH if room.preferred_class_id == class_id else self.CLASS_MISMATCH
+        if preference.get('hostel') and str(hostel.pk) == str(preference['hostel']):
+            score += self.HOSTEL_MATCH
+        if preference.get('room_type') and room.room_type == preference['room_type']:
+            score += self.ROOM_TYPE_MATCH
+        if preference.get('category') and hostel.category == preference['category']:
+            score += self.CATEGORY_MATCH
+        if class_id and entry['classes'].get(class_id):
+            score += self.CLASSMATE
+        if entry['filled']:
+            score += self.PARTLY_FILLED
+        return score
+
+    def plan(self, students, preferences=None, hostels=None, lock=False):
+        """
+        Match students to beds without writing anything.
+
+        ``preferences`` maps student id to a dict with optional ``hostel``,
+        ``room_type`` and ``category`` keys. Returns ``(assignments,
+        unallocated)`` where assignments is a list of ``(student, bed,
+        class_id)`` and unallocated a list of ``(student, reason)``.
+
+        ``lock`` locks the candidate beds (``SELECT ... FOR UPDATE``) and
+        must be called inside a transaction; ``allocate`` does so. A plan
+        that is only shown, as with ``--dry-run``, needs no locks.
+        """
+        preferences = preferences or {}
+        students = list(students)
+        rooms = self._load_rooms(hostels, lock=lock)
+        classes = self._student_classes(students)
+
+        already_allocated = set(active_allocations().filter(
+            student__in=students,
+        ).order_by().values_list('student_id', flat=True))
+
+        rooms_by_type = defaultdict(list)
+        for entry in rooms.values():
+            rooms_by_type[entry['hostel'].hostel_type].append(entry)
+
+        def feasible(student):
+            class_id = classes.get(student.pk)
+            return [
+                entry
+                for hostel_type in GENDER_HOSTEL_TYPES.get(student.gender, set())
+                for entry in rooms_by_type.get(hostel_type, [])
+                if not entry['allowed_classes'] or class_id in entry['allowed_classes']
+            ]
+
+        assignments, unallocated, pending = [], [], []
+        for student in students:
+            if student.pk in already_allocated:
+                unallocated.append((student, 'already_allocated'))
+            else:
+                pending.append((len(feasible(student)), student))
+
+        # Most constrained students first
+        pending.sort(key=lambda item: item[0])
+        for _count, student in pending:
+            class_id = classes.get(student.pk)
+            preference = preferences.get(student.pk) or preferences.get(str(student.pk)) or {}
+            best, best_score = None, None
+            for entry in feasible(student):
+                if entry['free'] <= 0:
+                    continue
+                score = self._score(entry, class_id, preference)
+                if best is None or score > best_score:
+                    best, best_score = entry, score
+            if best is None:
+                unallocated.append((student, 'no_available_bed'))
+                continue
+
+            bed = best['beds'].pop(0)
+            best['free'] -= 1
+            best['filled'] += 1
+            if class_id:
+                best['classes'][class_id] += 1
+            assignments.append((student, bed, class_id))
+
+        return assignments, unallocated
+
+    def allocate(self, students, preferences=None, hostels=None, status=HostelAllocation.AllocationStatus.ACTIVE):
+        """
+        Plan and persist allocations for ``students``.
+
+        Allocations are written with one ``bulk_create``; beds are marked
+        unavailable and occupancy counters adjusted with one UPDATE each.
+        """
+        with transaction.atomic():
+            assignments, unallocated = self.plan(students, preferences, hostels, lock=True)
+
+            allocations = []
+            room_deltas, hostel_deltas = defaultdict(int), defaultdict(int)
+            for student, bed, class_id in assignments:
+                room = bed.room
+                allocations.append(HostelAllocation(
+                    student=student,
+                    bed=bed,
+                    academic_session=self.academic_session,
+                    class_enrolled_id=class_id,
+                    allocation_date=self.allocation_date,
+                    status=status,
+                    allocated_by=self.allocated_by,
+                    rent_amount=room.rent or room.hostel.monthly_rent,
+                    institution_id=room.institution_id,
+                ))
+                room_deltas[room.pk] += 1
+                hostel_deltas[room.hostel_id] += 1
+
+            HostelAllocation.objects.bulk_create(allocations, batch_size=500)
+
+            if counts_towards_occupancy(status):
+                Bed.objects.filter(pk__in=[allocation.bed_id for allocation in allocations]).update(is_available=False)
+                OccupancyService.apply_deltas(room_deltas, hostel_deltas)
+
+        logger.info(
+            f"Bulk hostel allocation: {len(allocations)} allocated, {len(unallocated)} unallocated"
+        )
+        return allocations, unallocated
+
+
+def available_bed_queryset(hostel_id=None, room_type=None):
+    """
+    Available beds served from the maintained counters: rooms with spare
+    capacity and beds flagged available.
+    """
+    beds = Bed.objects.filter(
+        is_available=True,
+        room__is_available=True,
+        room__current_occupancy__lt=F('room__capacity'),
+    ).select_related('room__hostel')
+    if hostel_id:
+        beds = beds.filter(room__hostel_id=hostel_id)
+    if room_type:
+        beds = beds.filter(room__room_type=room_type)
+    return beds
+
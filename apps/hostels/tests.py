@@ -0,0 +1,195 @@
+# apps/hostels/tests.py
+
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.academics.models import AcademicSession, Student
+from apps.core.models import Institution
+from .models import Bed, Hostel, HostelAllocation, Room
+from .services import BulkAllocationService, OccupancyService
+
+User = get_user_model()
+
+
+def create_students(count, gender='male', prefix='S'):
+    students = []
+    for i in range(count):
+        user = User.objects.create_user(
+            username=f'{prefix.lower()}{i}',
+            email=f'{prefix.lower()}{i}@example.com',
+            password='testpass123'
+        )
+        students.append(Student.objects.create(
+            user=user,
+            student_id=f'{prefix}{i:04d}',
+            admission_number=f'{prefix}{i:04d}',
+            admission_date=date(2024, 1, 1),
+            date_of_birth=date(2010, 1, 1),
+            gender=gender,
+            is_boarder=True,
+        ))
+    return students
+
+
+def create_hostel(code, hostel_type, rooms, capacity):
+    hostel = Hostel.objects.create(
+        name=f'{code} House', code=code, hostel_type=hostel_type, capacity=rooms * capacity
+    )
+    for number in range(1, rooms + 1):
+        room = Room.objects.create(hostel=hostel, room_number=str(number), capacity=capacity)
+        for bed_number in range(1, capacity + 1):
+            Bed.objects.create(room=room, bed_number=str(bed_number))
+    return hostel
+
+
+class HostelTestCase(TestCase):
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.session = AcademicSession.objects.create(
+            name='2024/2025',
+            start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31),
+            is_current=True
+        )
+        self.hostel = create_hostel('BOYS', Hostel.HostelType.BOYS, rooms=2, capacity=2)
+        self.beds = list(Bed.objects.filter(room__hostel=self.hostel).order_by('room__room_number', 'bed_number'))
+
+    def occupancy(self, *objects):
+        counts = []
+        for obj in objects:
+            obj.refresh_from_db()
+            counts.append(obj.current_occupancy)
+        return counts
+
+    def allocate(self, student, bed, status=HostelAllocation.AllocationStatus.ACTIVE):
+        return HostelAllocation.objects.create(
+            student=student, bed=bed, academic_session=self.session,
+            allocation_date=date(2024, 9, 1), status=status,
+        )
+
+
+class AllocationDeltaTestCase(HostelTestCase):
+    """Occupancy counters follow allocation saves, status changes and transfers"""
+
+    def setUp(self):
+        super().setUp()
+        self.student = create_students(1)[0]
+        self.room, self.other_room = self.beds[0].room, self.beds[2].room
+
+    def test_allocate_and_vacate(self):
+        allocation = self.allocate(self.student, self.beds[0])
+
+        self.assertEqual(self.occupancy(self.room, self.hostel), [1, 1])
+        self.beds[0].refresh_from_db()
+        self.assertFalse(self.beds[0].is_available)
+
+        allocation.status = HostelAllocation.AllocationStatus.COMPLETED
+        allocation.save()
+        allocation.save()
+
+        self.assertEqual(self.occupancy(self.room, self.hostel), [0, 0])
+        self.beds[0].refresh_from_db()
+        self.assertTrue(self.beds[0].is_available)
+
+    def test_pending_allocation_does_not_occupy(self):
+        allocation = self.allocate(self.student, self.beds[0], status=HostelAllocation.AllocationStatus.PENDING)
+        self.assertEqual(self.occupancy(self.room, self.hostel), [0, 0])
+
+        allocation.status = HostelAllocation.AllocationStatus.ACTIVE
+        allocation.save()
+        self.assertEqual(self.occupancy(self.room, self.hostel), [1, 1])
+
+    def test_moving_bed_moves_the_count(self):
+        allocation = self.allocate(self.student, self.beds[0])
+
+        allocation.bed = self.beds[2]
+        allocation.save()
+
+        self.assertEqual(self.occupancy(self.room, self.other_room, self.hostel), [0, 1, 1])
+        self.beds[0].refresh_from_db()
+        self.assertTrue(self.beds[0].is_available)
+
+    def test_transfer_bed(self):
+        allocation = self.allocate(self.student, self.beds[0])
+
+        new_allocation = allocation.transfer_bed(self.beds[2], transferred_by=None)
+
+        self.assertEqual(allocation.status, HostelAllocation.AllocationStatus.TRANSFERRED)
+        self.assertEqual(new_allocation.bed, self.beds[2])
+        self.assertEqual(self.occupancy(self.room, self.other_room, self.hostel), [0, 1, 1])
+
+    def test_soft_and_hard_delete_release_the_bed(self):
+        first = self.allocate(self.student, self.beds[0])
+        second = self.allocate(create_students(1, prefix='T')[0], self.beds[1])
+
+        first.delete()
+        second.hard_delete()
+
+        self.assertEqual(self.occupancy(self.room, self.hostel), [0, 0])
+
+    def test_recount_fixes_drift(self):
+        self.allocate(self.student, self.beds[0])
+        Room.objects.filter(pk=self.room.pk).update(current_occupancy=2)
+        Room.objects.filter(pk=self.other_room.pk).update(current_occupancy=1)
+        Hostel.objects.filter(pk=self.hostel.pk).update(current_occupancy=0)
+
+        changed = OccupancyService.recount()
+
+        self.assertEqual(changed, 2)
+        self.assertEqual(self.occupancy(self.room, self.other_room, self.hostel), [1, 0, 1])
+        self.assertEqual(OccupancyService.recount(), 0)
+
+
+class BulkAllocationTestCase(HostelTestCase):
+    """Bulk allocation respects capacity, gender and existing allocations"""
+
+    def test_plan_respects_capacity(self):
+        self.allocate(create_students(1, prefix='R')[0], self.beds[0])
+        students = create_students(5)
+
+        assignments, unallocated = BulkAllocationService(self.session).plan(students)
+
+        self.assertEqual(len(assignments), 3)
+        self.assertEqual(len({bed.pk for _student, bed, _class_id in assignments}), 3)
+        self.assertNotIn(self.beds[0].pk, [bed.pk for _student, bed, _class_id in assignments])
+        self.assertEqual([reason for _student, reason in unallocated], ['no_available_bed'] * 2)
+        self.assertFalse(HostelAllocation.objects.filter(student__in=students).exists())
+
+    def test_plan_matches_gender_to_hostel_type(self):
+        girls_hostel = create_hostel('GIRLS', Hostel.HostelType.GIRLS, rooms=1, capacity=2)
+        girls = create_students(2, gender='female', prefix='G')
+
+        assignments, unallocated = BulkAllocationService(self.session).plan(girls)
+
+        self.assertEqual(unallocated, [])
+        self.assertEqual({bed.room.hostel_id for _student, bed, _class_id in assignments}, {girls_hostel.pk})
+
+    def test_allocate_writes_allocations_and_counters(self):
+        students = create_students(3)
+
+        allocations, unallocated = BulkAllocationService(self.session).allocate(students)
+        again, skipped = BulkAllocationService(self.session).allocate(students)
+
+        self.assertEqual((len(allocations), unallocated), (3, []))
+        self.assertEqual(again, [])
+        self.assertEqual([reason for _student, reason in skipped], ['already_allocated'] * 3)
+        rooms = [self.beds[0].room, self.beds[2].room]
+        self.assertEqual(sum(self.occupancy(*rooms)), 3)
+        self.assertEqual(self.occupancy(self.hostel), [3])
+        self.assertEqual(Bed.objects.filter(room__hostel=self.hostel, is_available=False).count(), 3)
+        self.assertEqual(OccupancyService.recount(), 0)
+
+    def test_dry_run_command_writes_nothing(self):
+        create_students(2)
+        out = StringIO()
+
+        call_command('allocate_hostel_beds', '--dry-run', stdout=out)
+
+        self.assertIn('2 student(s) allocated, 0 not allocated', out.getvalue())
+        self.assertFalse(HostelAllocation.objects.exists())
+        self.assertEqual(self.occupancy(self.hostel), [0])
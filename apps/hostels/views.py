@@ -5,7 +5,7 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Count, Sum, Avg, F
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
@@ -21,6 +21,7 @@ from .forms import (
     HostelFeeForm, VisitorLogForm, MaintenanceRequestForm,
     InventoryItemForm, HostelSearchForm
 )
+from .services import available_bed_queryset
 
 
 # Dashboard and Overview Views
@@ -962,15 +963,7 @@ def get_available_beds(request):
     room_type = request.GET.get('room_type')
 
     if hostel_id:
-        beds = Bed.objects.filter(
-            room__hostel_id=hostel_id,
-            is_available=True,
-            is_occupied=False
-        ).select_related('room')
-
-        # Filter by room type if specified
-        if room_type:
-            beds = beds.filter(room__room_type=room_type)
+        beds = available_bed_queryset(hostel_id=hostel_id, room_type=room_type)
 
         bed_data = []
         for bed in beds:
@@ -998,24 +991,22 @@ def occupancy_report(request):
     """
     hostels = Hostel.objects.filter(is_active=True)
     
+    # Served from the maintained occupancy counters
     report_data = []
     for hostel in hostels:
-        occupancy_rate = hostel.occupancy_percentage
-        available_beds = hostel.available_beds
-        
         report_data.append({
             'hostel': hostel,
             'total_capacity': hostel.capacity,
             'current_occupancy': hostel.current_occupancy,
-            'available_beds': available_beds,
-            'occupancy_rate': occupancy_rate,
+            'available_beds': hostel.available_beds,
+            'occupancy_rate': hostel.occupancy_percentage,
             'is_full': hostel.is_full,
         })
     
     context = {
         'report_data': report_data,
-        'total_capacity': sum(h.capacity for h in hostels),
-        'total_occupancy': sum(h.current_occupancy for h in hostels),
+        'total_capacity': sum(row['total_capacity'] for row in report_data),
+        'total_occupancy': sum(row['current_occupancy'] for row in report_data),
     }
     
     return render(request, 'hostels/reports/occupancy_report.html', context)
@@ -1057,7 +1048,9 @@ def api_hostel_list(request):
     """
     API view for mobile app to get hostel list.
     """
-    hostels = Hostel.objects.filter(is_active=True).values(
+    hostels = Hostel.objects.filter(is_active=True).annotate(
+        available_beds=F('capacity') - F('current_occupancy')
+    ).values(
         'id', 'name', 'code', 'hostel_type', 'category',
         'capacity', 'current_occupancy', 'available_beds'
     )
@@ -1074,35 +1067,32 @@ def api_search_students(request):
     if len(query) < 2:
         return JsonResponse({'students': []})
 
-    # Search students who are active and don't have current allocations
-    from apps.academics.models import Student
-    students = Student.objects.filter(
-        status='active',
-        user__first_name__icontains=query
-    ) | Student.objects.filter(
-        status='active',
-        user__last_name__icontains=query
-    ) | Student.objects.filter(
-        status='active',
-        admission_number__icontains=query
-    )
+    # Search active students through the typeahead index, over-fetching so that
+    # students with current allocations can be dropped afterwards
+    from apps.users.typeahead import student_index
+    candidates = student_index.search(query, limit=50)
 
     # Exclude students who already have active allocations
-    students_with_allocations = HostelAllocation.objects.filter(
-        status='active'
-    ).values_list('student_id', flat=True)
-
-    students = students.exclude(id__in=students_with_allocations).select_related('user', 'current_class')[:10]
+    students_with_allocations = {
+        str(student_id) for student_id in HostelAllocation.objects.filter(
+            status='active',
+            student_id__in=[document['id'] for document in candidates]
+        ).values_list('student_id', flat=True)
+    }
 
     student_data = []
-    for student in students:
+    for document in candidates:
+        if document['id'] in students_with_allocations:
+            continue
         student_data.append({
-            'id': student.id,
-            'name': student.user.get_full_name(),
-            'admission': student.admission_number,
-            'class': str(student.current_class) if student.current_class else 'N/A',
-            'gender': student.get_gender_display(),
+            'id': document['id'],
+            'name': document['name'],
+            'admission': document['admission'],
+            'class': document['class'],
+            'gender': document['gender'],
         })
+        if len(student_data) >= 10:
+            break
 
     return JsonResponse({'students': student_data})
 
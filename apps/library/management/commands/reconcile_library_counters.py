@@ -0,0 +1,30 @@
+"""
+Management command to reconcile library circulation counters.
+
+Recomputes Book.available_copies, LibraryMember.current_borrow_count and
+BookCopy.copy_status from borrow records and fixes any drift. Safe to run
+at any time; use --dry-run to only report.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.library.services import CirculationService
+
+
+class Command(BaseCommand):
+    help = 'Fix drift in library availability and borrow counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without fixing it',
+        )
+
+    def handle(self, *args, **options):
+        drift = CirculationService.reconcile(dry_run=options['dry_run'])
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} drift in {drift['books']} book(s), {drift['members']} member(s) "
+            f"and {drift['copies']} copy status(es)"
+        ))
@@ -1,6 +1,6 @@
 # apps/library/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator,FileExtensionValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -269,13 +269,15 @@ class Book(CoreBaseModel):
         return ", ".join([str(author) for author in self.authors.all()])
 
     def update_available_copies(self):
-        """Recalculate available copies based on current borrows."""
-        from .models import BorrowRecord
-        borrowed_count = self.borrow_records.filter(
-            status__in=[BorrowRecord.Status.BORROWED, BorrowRecord.Status.OVERDUE]
-        ).count()
-        self.available_copies = self.total_copies - borrowed_count
-        self.save()
+        """
+        Recalculate available copies from current borrows.
+
+        Circulation keeps the counter up to date incrementally; this is for
+        reconciliation only.
+        """
+        from .services import CirculationService
+        CirculationService.reconcile(books=[self.pk], members=[])
+        self.refresh_from_db(fields=['available_copies'])
 
 
 class BookCopy(CoreBaseModel):
@@ -392,12 +394,10 @@ class LibraryMember(CoreBaseModel):
         return self.expiry_date >= timezone.now().date()
 
     def update_borrow_count(self):
-        """Update current borrow count based on active borrow records."""
-        active_borrows = self.borrow_records.filter(
-            status__in=[BorrowRecord.Status.BORROWED, BorrowRecord.Status.OVERDUE]
-        ).count()
-        self.current_borrow_count = active_borrows
-        self.save()
+        """Recalculate the borrow count from active borrow records (reconciliation only)."""
+        from .services import CirculationService
+        CirculationService.reconcile(books=[], members=[self.pk])
+        self.refresh_from_db(fields=['current_borrow_count'])
 
 
 class BorrowRecord(CoreBaseModel):
@@ -484,16 +484,17 @@ class BorrowRecord(CoreBaseModel):
         return f"{self.member.member_id} - {self.book_copy.book.title}"
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        
-        from django.db import transaction
-        if self.member and hasattr(self.member, 'update_borrow_count'):
-            transaction.on_commit(lambda: self.member.update_borrow_count())
-
-        # Update book's available copies
-        if self.book_copy and hasattr(self.book_copy.book, 'update_available_copies'):
-            transaction.on_commit(lambda: self.book_copy.book.update_available_copies())
+        """Adjust copy, book and member counters when a loan starts or ends."""
+        from .services import CirculationService
+
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = BorrowRecord.all_objects.select_for_update().filter(pk=self.pk).values_list(
+                    'status', 'is_deleted', 'book_copy_id', 'member_id'
+                ).first()
+            super().save(*args, **kwargs)
+            CirculationService.loan_changed(previous, self)
 
     @property
     def is_overdue(self):
@@ -525,27 +526,13 @@ class BorrowRecord(CoreBaseModel):
 
     def renew(self, renewed_by):
         """Renew the book borrowing."""
-        if not self.can_renew():
-            return False
-        
-        self.renewal_count += 1
-        self.due_date += timezone.timedelta(days=self.book_copy.book.library.max_borrow_days)
-        self.issued_by = renewed_by
-        self.save()
-        return True
+        from .services import CirculationService
+        return CirculationService.renew(self, renewed_by)
 
     def return_book(self, returned_by, notes=''):
         """Process book return."""
-        self.status = self.Status.RETURNED
-        self.return_date = timezone.now().date()
-        self.received_by = returned_by
-        self.notes = notes
-        
-        # Calculate and set fine if overdue
-        if self.is_overdue:
-            self.fine_amount = self.calculated_fine
-        
-        self.save()
+        from .services import CirculationService
+        CirculationService.return_copy(self, returned_by=returned_by, notes=notes)
 
 
 class Reservation(CoreBaseModel):
@@ -660,4 +647,18 @@ class FinePayment(CoreBaseModel):
         if self.borrow_record:
             self.borrow_record.fine_paid = True
             self.borrow_record.fine_paid_date = self.payment_date
-            self.borrow_record.save()
\ No newline at end of file
+            self.borrow_record.save()
+
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_delete, sender=BorrowRecord)
+def release_borrowed_copy(sender, instance, **kwargs):
+    """
+    Return the copy to the shelf when a borrow record on loan is deleted.
+    """
+    from .services import CirculationService, is_on_loan
+    if is_on_loan(instance.status, instance.is_deleted):
+        CirculationService.release_copy(instance.book_copy_id, instance.member_id)
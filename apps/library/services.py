@@ -0,0 +1,388 @@
+"""
+Circulation services for the library app.
+
+``Book.available_copies`` and ``LibraryMember.current_borrow_count`` are
+counters adjusted with conditional F() deltas as loans start and end,
+rather than recounted from borrow records after every save. The
+conditions (``available_copies > 0``, copy still on the shelf) make the
+check and the update a single statement, so a copy cannot be lent twice.
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import Book, BookCopy, BorrowRecord, LibraryMember, Reservation
+
+logger = logging.getLogger(__name__)
+
+ON_LOAN_STATUSES = (BorrowRecord.Status.BORROWED, BorrowRecord.Status.OVERDUE)
+
+
+def lendable_to(member_id):
+    """
+    Filter for copies a member may borrow: copies on the shelf, and copies
+    held back for a pending reservation of that member on the same title.
+    """
+    return Q(copy_status=BookCopy.CopyStatus.AVAILABLE) | Q(
+        copy_status=BookCopy.CopyStatus.RESERVED,
+        book__reservations__member_id=member_id,
+        book__reservations__status=Reservation.Status.PENDING,
+        book__reservations__is_deleted=False,
+    )
+
+
+def is_on_loan(status, is_deleted=False):
+    """Whether a borrow record in this state holds a copy."""
+    return status in ON_LOAN_STATUSES and not is_deleted
+
+
+def _case_delta(deltas):
+    return Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+class CirculationService:
+    """
+    Issue, return, renew and reservation fulfilment with counter deltas.
+    """
+
+    # Counter primitives
+
+    @staticmethod
+    def take_copy(book_copy_id, member_id):
+        """
+        Mark a copy as lent and adjust the counters.
+
+        Raises ValidationError if the copy is not on the shelf (or reserved
+        for this member) or the title has no available copies left.
+        """
+        lent = BookCopy.objects.filter(lendable_to(member_id), pk=book_copy_id).update(copy_status=BookCopy.CopyStatus.BORROWED)
+        if not lent:
+            raise ValidationError(_('Book copy is not available.'))
+        taken = Book.objects.filter(copies=book_copy_id, available_copies__gt=0).update(
+            available_copies=F('available_copies') - 1
+        )
+        if not taken:
+            raise ValidationError(_('No copies of this book are available.'))
+        LibraryMember.objects.filter(pk=member_id).update(
+            current_borrow_count=F('current_borrow_count') + 1
+        )
+
+    @staticmethod
+    def release_copy(book_copy_id, member_id, lost=False):
+        """Put a copy back on the shelf (or mark it lost) and adjust the counters."""
+        BookCopy.objects.filter(pk=book_copy_id).update(
+            copy_status=BookCopy.CopyStatus.LOST if lost else BookCopy.CopyStatus.AVAILABLE
+        )
+        Book.objects.filter(copies=book_copy_id, available_copies__lt=F('total_copies')).update(
+            available_copies=F('available_copies') + 1
+        )
+        LibraryMember.objects.filter(pk=member_id, current_borrow_count__gt=0).update(
+            current_borrow_count=F('current_borrow_count') - 1
+        )
+
+    @classmethod
+    def loan_changed(cls, previous, record):
+        """
+        Apply counter changes for a borrow record transition.
+
+        ``previous`` is ``(status, is_deleted, book_copy_id, member_id)`` as
+        stored before the save, or None for a new record.
+        """
+        was_on_loan = previous is not None and is_on_loan(previous[0], previous[1])
+        now_on_loan = is_on_loan(record.status, record.is_deleted)
+        moved = previous is not None and (previous[2], previous[3]) != (record.book_copy_id, record.member_id)
+
+        if was_on_loan and (not now_on_loan or moved):
+            cls.release_copy(previous[2], previous[3], lost=record.status == BorrowRecord.Status.LOST)
+        if now_on_loan and (not was_on_loan or moved):
+            cls.take_copy(record.book_copy_id, record.member_id)
+
+    # Circulation operations
+
+    @staticmethod
+    def issue(member, book_copy, issued_by=None, due_date=None, enforce_limit=True):
+        """
+        Lend a copy to a member.
+
+        The member row is locked so concurrent issues to the same member
+        cannot overrun the borrow limit.
+        """
+        with transaction.atomic():
+            locked = LibraryMember.objects.select_for_update().get(pk=member.pk)
+            if not locked.is_membership_active:
+                raise ValidationError(_('Membership is not active.'))
+            if enforce_limit and not locked.can_borrow_more:
+                raise ValidationError(_('Borrow limit reached.'))
+
+            today = timezone.now().date()
+            record = BorrowRecord(
+                member=member,
+                book_copy=book_copy,
+                borrow_date=today,
+                due_date=due_date or today + timezone.timedelta(days=book_copy.book.library.max_borrow_days),
+                issued_by=issued_by,
+            )
+            record.save()
+        member.current_borrow_count = locked.current_borrow_count + 1
+        return record
+
+    @staticmethod
+    def return_copy(record, returned_by=None, notes=''):
+        """Check a copy back in, setting the fine if it is overdue."""
+        with transaction.atomic():
+            # The fine depends on the loan still being open, so work it out first
+            if record.is_overdue:
+                record.fine_amount = record.calculated_fine
+            record.status = BorrowRecord.Status.RETURNED
+            record.return_date = timezone.now().date()
+            record.received_by = returned_by
+            record.notes = notes
+            record.save()
+        return record
+
+    @staticmethod
+    def renew(record, renewed_by):
+        """Extend the due date if the record can still be renewed."""
+        with transaction.atomic():
+            locked = BorrowRecord.objects.select_for_update().select_related(
+                'book_copy__book__library'
+            ).get(pk=record.pk)
+            if not locked.can_renew():
+                return False
+            locked.renewal_count += 1
+            locked.due_date += timezone.timedelta(days=locked.book_copy.book.library.max_borrow_days)
+            locked.issued_by = renewed_by
+            locked.save()
+        record.renewal_count = locked.renewal_count
+        record.due_date = locked.due_date
+        record.issued_by = renewed_by
+        return True
+
+    @classmethod
+    def fulfil_reservation(cls, reservation, issued_by=None, book_copy=None):
+        """
+        Lend a copy of the reserved title to the reserving member and mark
+        the reservation fulfilled. Picks the first copy on the shelf unless
+        one is given.
+        """
+        with transaction.atomic():
+            if reservation.status != Reservation.Status.PENDING:
+                raise ValidationError(_('Reservation cannot be fulfilled.'))
+            if book_copy is None:
+                # A copy held back for a reservation is also lendable here
+                book_copy = BookCopy.objects.select_for_update().filter(
+                    book_id=reservation.book_id,
+                    copy_status__in=(BookCopy.CopyStatus.AVAILABLE, BookCopy.CopyStatus.RESERVED),
+                    is_deleted=False,
+                ).order_by('copy_number').first()
+                if book_copy is None:
+                    raise ValidationError(_('No copies of this book are available.'))
+            record = cls.issue(reservation.member, book_copy, issued_by=issued_by)
+            reservation.status = Reservation.Status.FULFILLED
+            reservation.save()
+        return record
+
+    # Batch operations
+
+    @staticmethod
+    def batch_issue(book, members, issued_by=None, due_date=None):
+        """
+        Issue one copy of ``book`` to each member (e.g. a class set of textbooks).
+
+        Copies are locked and lent in one pass; borrow records are written
+        with ``bulk_create`` and counters adjusted with one UPDATE per table.
+        Returns ``(records, skipped)`` where skipped is a list of
+        ``(member, reason)``.
+        """
+        members = list(members)
+        today = timezone.now().date()
+        skipped = []
+
+        with transaction.atomic():
+            book = Book.objects.select_for_update().select_related('library').get(pk=book.pk)
+            locked = {
+                m.pk: m for m in LibraryMember.objects.select_for_update().filter(pk__in=[m.pk for m in members])
+            }
+            holding = set(BorrowRecord.objects.filter(
+                member__in=members,
+                book_copy__book=book,
+                status__in=ON_LOAN_STATUSES,
+                is_deleted=False,
+            ).values_list('member_id', flat=True))
+
+            eligible = []
+            for member in members:
+                current = locked.get(member.pk)
+                if current is None or not current.is_membership_active:
+                    skipped.append((member, 'membership_inactive'))
+                elif not current.can_borrow_more:
+                    skipped.append((member, 'borrow_limit_reached'))
+                elif member.pk in holding:
+                    skipped.append((member, 'already_borrowed'))
+                else:
+                    eligible.append(member)
+
+            # Reserved copies are left for fulfil_reservation
+            copies = list(BookCopy.objects.select_for_update().filter(
+                book=book,
+                copy_status=BookCopy.CopyStatus.AVAILABLE,
+                is_deleted=False,
+            ).order_by('copy_number')[:min(len(eligible), book.available_copies)])
+            for member in eligible[len(copies):]:
+                skipped.append((member, 'no_copy_available'))
+            eligible = eligible[:len(copies)]
+
+            due_date = due_date or today + timezone.timedelta(days=book.library.max_borrow_days)
+            records = [
+                BorrowRecord(
+                    member=member,
+                    book_copy=copy,
+                    borrow_date=today,
+                    due_date=due_date,
+                    issued_by=issued_by,
+                    institution_id=copy.institution_id,
+                )
+                for member, copy in zip(eligible, copies)
+            ]
+            if records:
+                taken = Book.objects.filter(pk=book.pk, available_copies__gte=len(records)).update(
+                    available_copies=F('available_copies') - len(records)
+                )
+                if not taken:
+                    raise ValidationError(_('Not enough copies of this book are available.'))
+                BorrowRecord.objects.bulk_create(records, batch_size=500)
+                BookCopy.objects.filter(pk__in=[c.pk for c in copies]).update(
+                    copy_status=BookCopy.CopyStatus.BORROWED
+                )
+                LibraryMember.objects.filter(pk__in=[m.pk for m in eligible]).update(
+                    current_borrow_count=F('current_borrow_count') + 1
+                )
+
+        logger.info(f"Batch issue of '{book}': {len(records)} issued, {len(skipped)} skipped")
+        return records, skipped
+
+    @staticmethod
+    def batch_return(records, received_by=None):
+        """
+        Check in many borrow records at once (e.g. end of term class sets).
+
+        Records not currently on loan are ignored. Returns the number of
+        records checked in.
+        """
+        today = timezone.now().date()
+        with transaction.atomic():
+            on_loan = list(BorrowRecord.objects.select_for_update().filter(
+                pk__in=[r.pk for r in records],
+                status__in=ON_LOAN_STATUSES,
+                is_deleted=False,
+            ).select_related('book_copy__book__library'))
+            if not on_loan:
+                return 0
+
+            for record in on_loan:
+                if today > record.due_date:
+                    record.fine_amount = (today - record.due_date).days * record.book_copy.book.library.fine_per_day
+                record.status = BorrowRecord.Status.RETURNED
+                record.return_date = today
+                record.received_by = received_by
+                record.updated_at = timezone.now()
+            BorrowRecord.objects.bulk_update(
+                on_loan, ['status', 'return_date', 'received_by', 'fine_amount', 'updated_at'], batch_size=500
+            )
+
+            book_deltas = Counter(record.book_copy.book_id for record in on_loan)
+            member_deltas = Counter(record.member_id for record in on_loan)
+            BookCopy.objects.filter(pk__in=[r.book_copy_id for r in on_loan]).update(
+                copy_status=BookCopy.CopyStatus.AVAILABLE
+            )
+            # Capped like release_copy, so counters that had drifted cannot
+            # go above the number of copies or below zero
+            Book.objects.filter(pk__in=list(book_deltas)).update(
+                available_copies=Least(F('available_copies') + _case_delta(book_deltas), F('total_copies'))
+            )
+            LibraryMember.objects.filter(pk__in=list(member_deltas)).update(
+                current_borrow_count=Greatest(F('current_borrow_count') - _case_delta(member_deltas), Value(0))
+            )
+
+        logger.info(f"Batch return: {len(on_loan)} record(s) checked in")
+        return len(on_loan)
+
+    # Reconciliation
+
+    @staticmethod
+    def reconcile(books=None, members=None, dry_run=False):
+        """
+        Recompute counters and copy statuses from borrow records.
+
+        Returns a dict with the number of books, members and copies that
+        had drifted (and were fixed unless ``dry_run``).
+        """
+        on_loan = Q(status__in=ON_LOAN_STATUSES, is_deleted=False)
+
+        book_qs = Book.objects.all() if books is None else Book.objects.filter(pk__in=books)
+        loans_per_book = dict(
+            BorrowRecord.objects.filter(on_loan, book_copy__book__in=book_qs)
+            .values('book_copy__book_id').annotate(n=Count('id'))
+            .values_list('book_copy__book_id', 'n')
+        )
+        book_fixes = {}
+        for pk, total, available in book_qs.values_list('pk', 'total_copies', 'available_copies'):
+            expected = max(0, total - loans_per_book.get(pk, 0))
+            if expected != available:
+                book_fixes[pk] = expected
+
+        member_qs = LibraryMember.objects.all() if members is None else LibraryMember.objects.filter(pk__in=members)
+        member_fixes = {
+            pk: actual
+            for pk, current, actual in member_qs.annotate(
+                actual=Count('borrow_records', filter=Q(
+                    borrow_records__status__in=ON_LOAN_STATUSES,
+                    borrow_records__is_deleted=False,
+                ))
+            ).values_list('pk', 'current_borrow_count', 'actual')
+            if current != actual
+        }
+
+        copy_qs = BookCopy.objects.filter(book__in=book_qs)
+        lent_copies = set(
+            BorrowRecord.objects.filter(on_loan, book_copy__in=copy_qs).values_list('book_copy_id', flat=True)
+        )
+        shelved_but_lent = list(copy_qs.filter(pk__in=lent_copies).exclude(
+            copy_status=BookCopy.CopyStatus.BORROWED
+        ).values_list('pk', flat=True))
+        lent_but_returned = list(copy_qs.filter(copy_status=BookCopy.CopyStatus.BORROWED).exclude(
+            pk__in=lent_copies
+        ).values_list('pk', flat=True))
+
+        if not dry_run:
+            with transaction.atomic():
+                fixes = defaultdict(list)
+                for pk, value in book_fixes.items():
+                    fixes[value].append(pk)
+                for value, pks in fixes.items():
+                    Book.objects.filter(pk__in=pks).update(available_copies=value)
+                fixes = defaultdict(list)
+                for pk, value in member_fixes.items():
+                    fixes[value].append(pk)
+                for value, pks in fixes.items():
+                    LibraryMember.objects.filter(pk__in=pks).update(current_borrow_count=value)
+                BookCopy.objects.filter(pk__in=shelved_but_lent).update(copy_status=BookCopy.CopyStatus.BORROWED)
+                BookCopy.objects.filter(pk__in=lent_but_returned).update(copy_status=BookCopy.CopyStatus.AVAILABLE)
+
+        return {
+            'books': len(book_fixes),
+            'members': len(member_fixes),
+            'copies': len(shelved_but_lent) + len(lent_but_returned),
+        }
+
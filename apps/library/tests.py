@@ -0,0 +1,213 @@
+# apps/library/tests.py
+
+import threading
+import time
+from datetime import time as clock_time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.core.models import Institution
+from .models import Book, BookCopy, BorrowRecord, Library, LibraryMember, Reservation
+from .services import CirculationService
+
+User = get_user_model()
+
+
+def create_book(copies, title='Algebra I'):
+    Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+    library, _ = Library.objects.get_or_create(code='MAIN', defaults={
+        'name': 'Main Library',
+        'opening_time': clock_time(8),
+        'closing_time': clock_time(17),
+    })
+    book = Book.objects.create(title=title, library=library, total_copies=copies, available_copies=copies)
+    for number in range(1, copies + 1):
+        BookCopy.objects.create(book=book, copy_number=number, barcode=f'{book.pk}-{number}')
+    return book
+
+
+def create_members(count, prefix='M'):
+    members = []
+    for i in range(count):
+        user = User.objects.create_user(
+            username=f'{prefix.lower()}{i}',
+            email=f'{prefix.lower()}{i}@example.com',
+            password='testpass123'
+        )
+        members.append(LibraryMember.objects.create(
+            user=user,
+            member_id=f'{prefix}{i:04d}',
+            expiry_date=timezone.now().date() + timedelta(days=365),
+        ))
+    return members
+
+
+def counters(book, members):
+    book.refresh_from_db()
+    return book.available_copies, [LibraryMember.objects.get(pk=m.pk).current_borrow_count for m in members]
+
+
+class CirculationServiceTestCase(TestCase):
+    """Test cases for issue, return and renewal counter deltas"""
+
+    def setUp(self):
+        self.book = create_book(copies=3)
+        self.copies = list(self.book.copies.order_by('copy_number'))
+        self.members = create_members(4)
+
+    def test_issue_and_return_adjust_counters(self):
+        record = CirculationService.issue(self.members[0], self.copies[0])
+
+        self.assertEqual(counters(self.book, self.members[:1]), (2, [1]))
+        self.copies[0].refresh_from_db()
+        self.assertEqual(self.copies[0].copy_status, BookCopy.CopyStatus.BORROWED)
+
+        CirculationService.return_copy(record)
+
+        self.assertEqual(counters(self.book, self.members[:1]), (3, [0]))
+        self.copies[0].refresh_from_db()
+        self.assertEqual(self.copies[0].copy_status, BookCopy.CopyStatus.AVAILABLE)
+
+    def test_copy_on_loan_cannot_be_issued_again(self):
+        CirculationService.issue(self.members[0], self.copies[0])
+
+        with self.assertRaises(ValidationError):
+            CirculationService.issue(self.members[1], self.copies[0])
+
+        self.assertEqual(counters(self.book, self.members[:2]), (2, [1, 0]))
+        self.assertEqual(BorrowRecord.objects.count(), 1)
+
+    def test_batch_issue_lends_available_copies_and_skips_the_rest(self):
+        CirculationService.issue(self.members[3], self.copies[0])
+
+        records, skipped = CirculationService.batch_issue(self.book, self.members[:3])
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(skipped, [(self.members[2], 'no_copy_available')])
+        self.assertEqual(counters(self.book, self.members), (0, [1, 1, 0, 1]))
+        self.assertFalse(self.book.copies.filter(copy_status=BookCopy.CopyStatus.AVAILABLE).exists())
+
+    def test_batch_return_reverses_batch_issue(self):
+        records, _skipped = CirculationService.batch_issue(self.book, self.members[:3])
+        BorrowRecord.objects.filter(pk=records[0].pk).update(due_date=timezone.now().date() - timedelta(days=2))
+
+        returned = CirculationService.batch_return(records)
+        again = CirculationService.batch_return(records)
+
+        self.assertEqual((returned, again), (3, 0))
+        self.assertEqual(counters(self.book, self.members[:3]), (3, [0, 0, 0]))
+        overdue = BorrowRecord.objects.get(pk=records[0].pk)
+        self.assertEqual(overdue.status, BorrowRecord.Status.RETURNED)
+        self.assertEqual(overdue.fine_amount, 2 * self.book.library.fine_per_day)
+
+    def test_batch_return_caps_drifted_counters(self):
+        records, _skipped = CirculationService.batch_issue(self.book, self.members[:2])
+        Book.objects.filter(pk=self.book.pk).update(available_copies=2)
+        LibraryMember.objects.filter(pk=self.members[0].pk).update(current_borrow_count=0)
+
+        CirculationService.batch_return(records)
+
+        self.assertEqual(counters(self.book, self.members[:2]), (3, [0, 0]))
+
+    def test_renew_limits(self):
+        record = CirculationService.issue(self.members[0], self.copies[0])
+        due_date = record.due_date
+
+        self.assertTrue(CirculationService.renew(record, renewed_by=None))
+        self.assertFalse(CirculationService.renew(record, renewed_by=None))
+
+        record.refresh_from_db()
+        self.assertEqual(record.renewal_count, 1)
+        self.assertEqual(record.due_date, due_date + timedelta(days=self.book.library.max_borrow_days))
+
+    def test_overdue_loan_cannot_be_renewed(self):
+        record = CirculationService.issue(self.members[0], self.copies[0])
+        BorrowRecord.objects.filter(pk=record.pk).update(due_date=timezone.now().date() - timedelta(days=1))
+
+        self.assertFalse(CirculationService.renew(record, renewed_by=None))
+
+    def test_reserved_copy_is_only_lent_to_reserving_member(self):
+        BookCopy.objects.filter(pk=self.copies[0].pk).update(copy_status=BookCopy.CopyStatus.RESERVED)
+        reservation = Reservation.objects.create(
+            member=self.members[1], book=self.book, expiry_date=timezone.now().date() + timedelta(days=3)
+        )
+
+        with self.assertRaises(ValidationError):
+            CirculationService.issue(self.members[0], self.copies[0])
+        records, _skipped = CirculationService.batch_issue(self.book, self.members[2:4])
+        record = CirculationService.fulfil_reservation(reservation)
+
+        self.assertNotIn(self.copies[0].pk, [r.book_copy_id for r in records])
+        self.assertEqual(record.book_copy_id, self.copies[0].pk)
+        self.assertEqual(record.member_id, self.members[1].pk)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, Reservation.Status.FULFILLED)
+
+    def test_reconcile_command_fixes_drift(self):
+        CirculationService.issue(self.members[0], self.copies[0])
+        Book.objects.filter(pk=self.book.pk).update(available_copies=3)
+        LibraryMember.objects.filter(pk=self.members[0].pk).update(current_borrow_count=4)
+        BookCopy.objects.filter(pk=self.copies[1].pk).update(copy_status=BookCopy.CopyStatus.BORROWED)
+
+        dry_run = StringIO()
+        call_command('reconcile_library_counters', '--dry-run', stdout=dry_run)
+        self.assertEqual(counters(self.book, self.members[:1]), (3, [4]))
+        out = StringIO()
+        call_command('reconcile_library_counters', stdout=out)
+
+        self.assertIn('Found drift in 1 book(s), 1 member(s) and 1 copy status(es)', dry_run.getvalue())
+        self.assertIn('Fixed drift in 1 book(s), 1 member(s) and 1 copy status(es)', out.getvalue())
+        self.assertEqual(counters(self.book, self.members[:1]), (2, [1]))
+        self.assertEqual(CirculationService.reconcile(), {'books': 0, 'members': 0, 'copies': 0})
+
+
+class ConcurrentIssueTestCase(TransactionTestCase):
+    """Simultaneous issues of the last copy must lend it once"""
+
+    MEMBERS = 8
+
+    def setUp(self):
+        self.book = create_book(copies=1)
+        self.copy = self.book.copies.get()
+        self.members = create_members(self.MEMBERS)
+
+    def test_last_copy_is_issued_once(self):
+        barrier = threading.Barrier(len(self.members))
+        issued, refused, errors = [], [], []
+
+        def issue(member):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        CirculationService.issue(member, self.copy)
+                        issued.append(member.pk)
+                        return
+                    except ValidationError:
+                        refused.append(member.pk)
+                        return
+                    except OperationalError:
+                        # SQLite serialises writers; retry when the database is locked
+                        time.sleep(0.01 * (attempt + 1))
+                errors.append(member.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=issue, args=(m,)) for m in self.members]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(issued), 1)
+        self.assertEqual(len(refused), self.MEMBERS - 1)
+        self.assertEqual(BorrowRecord.objects.count(), 1)
+        self.assertEqual(counters(self.book, self.members)[0], 0)
+        self.assertEqual(sum(counters(self.book, self.members)[1]), 1)
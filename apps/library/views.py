@@ -12,6 +12,7 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.views import LoginView, LogoutView
+from django.core.exceptions import ValidationError
 
 from .models import (
     Library, Author, Publisher, BookCategory, Book, 
@@ -22,6 +23,7 @@ from .forms import (
     BookForm, BookCopyForm, LibraryMemberForm, BorrowRecordForm, 
     ReservationForm, FinePaymentForm, BookSearchForm
 )
+from .services import CirculationService
 
 
 # Library Views
@@ -485,8 +487,13 @@ class BorrowRecordCreateView(LoginRequiredMixin, PermissionRequiredMixin, Create
         library = book_copy.book.library
         form.instance.due_date = timezone.now().date() + timezone.timedelta(days=library.max_borrow_days)
 
+        try:
+            response = super().form_valid(form)
+        except ValidationError as e:
+            form.add_error(None, e)
+            return self.form_invalid(form)
         messages.success(self.request, _('Book borrowed successfully.'))
-        return super().form_valid(form)
+        return response
 
 
 class BorrowRecordUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
@@ -499,8 +506,13 @@ class BorrowRecordUpdateView(LoginRequiredMixin, PermissionRequiredMixin, Update
         return reverse_lazy('library:borrowrecord_list')
 
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except ValidationError as e:
+            form.add_error(None, e)
+            return self.form_invalid(form)
         messages.success(self.request, _('Borrow record updated successfully.'))
-        return super().form_valid(form)
+        return response
 
 
 @login_required
@@ -587,11 +599,11 @@ def fulfill_reservation(request, pk):
     """
     reservation = get_object_or_404(Reservation, pk=pk)
     
-    if reservation.status == 'pending':
-        reservation.fulfill()
+    try:
+        CirculationService.fulfil_reservation(reservation, issued_by=request.user)
         messages.success(request, _('Reservation fulfilled successfully.'))
-    else:
-        messages.error(request, _('Reservation cannot be fulfilled.'))
+    except ValidationError as e:
+        messages.error(request, ' '.join(e.messages))
     
     return redirect('library:reservation_list')
 
@@ -864,15 +876,11 @@ def borrow_book_ajax(request, book_copy_id):
         if not book_copy.is_available_for_borrow:
             return JsonResponse({'success': False, 'error': 'Book copy is not available'})
 
-        # Create borrow record
-        library = book_copy.book.library
-        borrow_record = BorrowRecord.objects.create(
-            member=member,
-            book_copy=book_copy,
-            borrow_date=timezone.now().date(),
-            due_date=timezone.now().date() + timezone.timedelta(days=library.max_borrow_days),
-            issued_by=request.user
-        )
+        # Create borrow record; availability is re-checked atomically
+        try:
+            borrow_record = CirculationService.issue(member, book_copy, issued_by=request.user)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': ' '.join(e.messages)})
 
         return JsonResponse({
             'success': True,
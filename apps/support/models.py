@@ -697,3 +697,23 @@ class CaseAttachment(CoreBaseModel):
             self.filename = self.file.name
             self.file_size = self.file.size
         super().save(*args, **kwargs)
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=HelpCenterArticle)
+@receiver(post_delete, sender=HelpCenterArticle)
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+@receiver(post_save, sender=LegalDocument)
+@receiver(post_delete, sender=LegalDocument)
+def invalidate_support_pages(sender, instance, **kwargs):
+    """
+    Drop cached help center, FAQ and legal pages whenever their content changes.
+    """
+    from apps.core.caching import invalidate
+    invalidate('support')
@@ -7,9 +7,12 @@ from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.http import JsonResponse, HttpResponseForbidden
-from django.db.models import Q, Count, Case, When, IntegerField
+from django.db.models import Q, Count, Case, When, IntegerField, F
 from django.views import View
 from django.core.paginator import Paginator
+from django.utils.decorators import method_decorator
+
+from apps.core.caching import cache_view
 
 from .models import (
     HelpCenterArticle, Resource, FAQ, ContactSubmission, LegalDocument, Category,
@@ -93,6 +96,7 @@ class ContactSubmissionUpdateView(LoginRequiredMixin, SupportStaffRequiredMixin,
         return reverse_lazy('support:ticket_detail', kwargs={'pk': self.object.pk})
 
 
+@cache_view('support')
 def legal_documents_list(request):
     """List all active legal documents."""
     documents = LegalDocument.objects.filter(is_active=True).order_by('document_type')
@@ -100,6 +104,7 @@ def legal_documents_list(request):
     return render(request, 'support/legal/legal_documents.html', context)
 
 
+@method_decorator(cache_view('support'), name='dispatch')
 class HelpCenterArticleListView(ListView):
     model = HelpCenterArticle
     template_name = 'support/articles/list.html'
@@ -107,7 +112,7 @@ class HelpCenterArticleListView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(is_published=True)
+        queryset = super().get_queryset().filter(is_published=True).select_related('category')
         category_slug = self.kwargs.get('category_slug')
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
@@ -152,8 +157,9 @@ class HelpCenterArticleDetailView(DetailView):
 
     def get_object(self, queryset=None):
         obj = super().get_object(queryset)
+        # Counting a view is not an edit: keep cached article lists
+        HelpCenterArticle.objects.filter(pk=obj.pk).update(views=F('views') + 1)
         obj.views += 1
-        obj.save()
         return obj
 
 
@@ -203,11 +209,12 @@ class ResourceDetailView(DetailView):
         return super().get_queryset().filter(is_published=True)
 
 
+@method_decorator(cache_view('support'), name='dispatch')
 class FAQListView(ListView):
     model = FAQ
     template_name = 'support/faq/list.html'
     context_object_name = 'faqs'
-    queryset = FAQ.objects.filter(is_published=True).order_by('order')
+    queryset = FAQ.objects.filter(is_published=True).select_related('category').order_by('order')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -253,6 +260,7 @@ def contact_success_view(request):
     return render(request, 'support/contact/success.html')
 
 
+@method_decorator(cache_view('support'), name='dispatch')
 class LegalDocumentDetailView(DetailView):
     model = LegalDocument
     template_name = 'support/legal/document_detail.html'
@@ -251,6 +251,9 @@ class Route(CoreBaseModel):
     @property
     def current_students_count(self):
         """Count active students on this route for current academic session."""
+        if hasattr(self, 'active_student_count'):
+            # Annotated by list views, see Route.with_current_counts()
+            return self.active_student_count
         return self.route_schedules.filter(
             student_allocations__status='active',
             academic_session__is_current=True
@@ -261,11 +264,36 @@ class Route(CoreBaseModel):
     @property
     def current_vehicles_count(self):
         """Count active vehicles assigned to this route."""
+        if hasattr(self, 'active_vehicle_count'):
+            return self.active_vehicle_count
         return self.route_schedules.filter(
             status='active',
             academic_session__is_current=True
         ).values('vehicle').distinct().count()
 
+    @staticmethod
+    def with_current_counts(queryset):
+        """
+        Annotate each route in ``queryset`` with its current numbers of
+        students and vehicles.
+        """
+        current_schedule = models.Q(
+            route_schedules__academic_session__is_current=True,
+            route_schedules__is_deleted=False,
+        )
+        return queryset.annotate(
+            active_student_count=models.Count(
+                'route_schedules__student_allocations',
+                filter=current_schedule & models.Q(route_schedules__student_allocations__status='active'),
+                distinct=True,
+            ),
+            active_vehicle_count=models.Count(
+                'route_schedules__vehicle',
+                filter=current_schedule & models.Q(route_schedules__status='active'),
+                distinct=True,
+            ),
+        )
+
 
 class RouteStop(CoreBaseModel):
     """
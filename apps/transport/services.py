@@ -0,0 +1,406 @@
+"""
+Route optimization services for the transport app.
+
+Builds a haversine distance matrix from RouteStop coordinates and orders
+stops with a nearest-neighbour construction followed by 2-opt and Or-opt
+improvement. Everything runs offline; no map API is required.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Route, RouteSchedule, RouteStop, TransportAllocation
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(coordinates):
+    """
+    Return the pairwise great-circle distance matrix (km) for an (n, 2) array
+    of (latitude, longitude) pairs in degrees.
+    """
+    import numpy as np
+
+    radians = np.radians(np.asarray(coordinates, dtype=float))
+    lat = radians[:, 0][:, None]
+    lon = radians[:, 1][:, None]
+    dlat = lat - lat.T
+    dlon = lon - lon.T
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def path_length(order, distances):
+    """Total length of an open path visiting ``order``."""
+    import numpy as np
+
+    order = np.asarray(order)
+    if len(order) < 2:
+        return 0.0
+    return float(distances[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbour(distances, start=0):
+    """Greedy open path starting at ``start``."""
+    import numpy as np
+
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    current = start
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, distances[current])
+        current = int(row.argmin())
+        visited[current] = True
+        order.append(current)
+    return order
+
+
+def two_opt(order, distances, max_passes=50):
+    """
+    Improve an open path with 2-opt segment reversals (first position fixed).
+
+    For each segment start ``i`` the gain of every possible segment end is
+    evaluated at once with NumPy and the best improving move is applied.
+    """
+    import numpy as np
+
+    order = np.asarray(order)
+    n = len(order)
+    if n < 4:
+        return order.tolist()
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = order[i - 1], order[i]
+            js = np.arange(i + 1, n)
+            c = order[js]
+            removed = distances[a, b]
+            added = distances[a, c]
+            # Edges (c, e) exist only when the segment does not end the path
+            has_next = js < n - 1
+            e = order[np.minimum(js + 1, n - 1)]
+            removed = removed + np.where(has_next, distances[c, e], 0.0)
+            added = added + np.where(has_next, distances[b, e], 0.0)
+            gains = removed - added
+            best = int(gains.argmax())
+            if gains[best] > 1e-9:
+                j = int(js[best])
+                order[i:j + 1] = order[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return order.tolist()
+
+
+def or_opt(order, distances, segment_lengths=(1, 2, 3), max_passes=20):
+    """
+    Improve an open path by relocating short segments (Or-opt).
+
+    The first position stays fixed. Each pass tries to move every segment of
+    length 1-3 to the cheapest insertion point elsewhere in the path.
+    """
+    import numpy as np
+
+    order = list(order)
+    n = len(order)
+    if n < 4:
+        return order
+
+    for _ in range(max_passes):
+        improved = False
+        for length in segment_lengths:
+            i = 1
+            while i + length <= n:
+                segment = order[i:i + length]
+                prev_node = order[i - 1]
+                next_node = order[i + length] if i + length < n else None
+                first, last = segment[0], segment[-1]
+
+                removal_gain = distances[prev_node, first]
+                if next_node is not None:
+                    removal_gain += distances[last, next_node] - distances[prev_node, next_node]
+
+                rest = order[:i] + order[i + length:]
+                rest_arr = np.asarray(rest)
+                # Insert between rest[k] and rest[k + 1] (or append at the end)
+                left = rest_arr
+                right = np.append(rest_arr[1:], -1)
+                insert_cost = distances[left, first] + np.where(
+                    right >= 0,
+                    distances[last, np.maximum(right, 0)] - distances[left, np.maximum(right, 0)],
+                    0.0
+                )
+                # Inserting back where it came from is not a move
+                insert_cost[i - 1] = np.inf
+                best = int(insert_cost.argmin())
+                if removal_gain - insert_cost[best] > 1e-9:
+                    order = rest[:best + 1] + segment + rest[best + 1:]
+                    improved = True
+                else:
+                    i += 1
+        if not improved:
+            break
+    return order
+
+
+def solve_stop_order(coordinates, start=0):
+    """
+    Return a good open-path visiting order for ``coordinates``.
+
+    Returns ``(order, distances)`` where ``order`` is a list of indices into
+    ``coordinates`` beginning with ``start``.
+    """
+    distances = haversine_matrix(coordinates)
+    order = nearest_neighbour(distances, start=start)
+    order = two_opt(order, distances)
+    order = or_opt(order, distances)
+    order = two_opt(order, distances)
+    return order, distances
+
+
+class RouteOptimizer:
+    """
+    Optimizes stop ordering and timing for transport routes.
+
+    Distances come from stop coordinates; durations assume an average speed
+    (``TRANSPORT_AVERAGE_SPEED_KMH``) plus a dwell time per stop
+    (``TRANSPORT_STOP_DWELL_MINUTES``).
+    """
+
+    def __init__(self, average_speed_kmh=None, dwell_minutes=None):
+        self.average_speed_kmh = average_speed_kmh or getattr(settings, 'TRANSPORT_AVERAGE_SPEED_KMH', 30)
+        self.dwell_minutes = dwell_minutes if dwell_minutes is not None else getattr(
+            settings, 'TRANSPORT_STOP_DWELL_MINUTES', 1
+        )
+
+    def order_stops(self, stops, optimization_type='distance'):
+        """
+        Return ``(ordered_stops, leg_distances)`` for a list of stops.
+
+        The current first stop stays first. Stops without coordinates keep
+        their relative order and are placed after the routed stops.
+        """
+        if optimization_type == 'time':
+            ordered = sorted(stops, key=lambda stop: stop.estimated_arrival_time)
+            return ordered, self._leg_distances(ordered)
+
+        located = [stop for stop in stops if stop.latitude is not None and stop.longitude is not None]
+        unlocated = [stop for stop in stops if stop.latitude is None or stop.longitude is None]
+        if len(located) < 3:
+            ordered = located + unlocated
+            return ordered, self._leg_distances(ordered)
+
+        coordinates = [(float(stop.latitude), float(stop.longitude)) for stop in located]
+        order, distances = solve_stop_order(coordinates, start=0)
+        ordered = [located[index] for index in order]
+        legs = [0.0] + [float(distances[a, b]) for a, b in zip(order, order[1:])]
+        return ordered + unlocated, legs + [0.0] * len(unlocated)
+
+    def _leg_distances(self, stops):
+        legs = [0.0]
+        for previous, stop in zip(stops, stops[1:]):
+            if None in (previous.latitude, previous.longitude, stop.latitude, stop.longitude):
+                legs.append(0.0)
+                continue
+            matrix = haversine_matrix([
+                (float(previous.latitude), float(previous.longitude)),
+                (float(stop.latitude), float(stop.longitude)),
+            ])
+            legs.append(float(matrix[0, 1]))
+        return legs
+
+    def schedule_times(self, ordered_stops, legs, start_time):
+        """Assign pickup/arrival times along the route starting at ``start_time``."""
+        current = datetime.combine(datetime.today(), start_time)
+        for index, (stop, leg) in enumerate(zip(ordered_stops, legs)):
+            if index:
+                travel_minutes = leg / self.average_speed_kmh * 60
+                current += timedelta(minutes=travel_minutes + self.dwell_minutes)
+            stop.pickup_time = current.time().replace(microsecond=0)
+            stop.estimated_arrival_time = stop.pickup_time
+
+    def _start_time(self, route, stops):
+        schedule = route.route_schedules.filter(
+            status='active', academic_session__is_current=True
+        ).order_by('morning_start_time').first()
+        if schedule:
+            return schedule.morning_start_time
+        first = stops[0]
+        return first.pickup_time or first.estimated_arrival_time
+
+    def optimize_route(self, route, optimization_type='distance'):
+        """
+        Re-order a route's stops, recompute its timings and totals and persist
+        the result. Returns a summary dict.
+        """
+        stops = list(route.stops.all().order_by('sequence'))
+        if not stops:
+            return {'route': route, 'stops': [], 'total_distance': 0, 'estimated_duration': 0}
+
+        previous_distance = float(route.total_distance or 0)
+        ordered, legs = self.order_stops(stops, optimization_type)
+        self.schedule_times(ordered, legs, self._start_time(route, ordered))
+
+        total_distance = round(sum(legs), 2)
+        duration = sum(legs) / self.average_speed_kmh * 60 + self.dwell_minutes * (len(ordered) - 1)
+
+        with transaction.atomic():
+            # Two passes so that swapping sequences never collides with the
+            # (route, sequence) unique constraint.
+            offset = len(ordered) + max(stop.sequence for stop in ordered)
+            for index, stop in enumerate(ordered, 1):
+                stop.sequence = offset + index
+            RouteStop.objects.bulk_update(ordered, ['sequence'])
+            for index, stop in enumerate(ordered, 1):
+                stop.sequence = index
+            RouteStop.objects.bulk_update(
+                ordered, ['sequence', 'pickup_time', 'estimated_arrival_time'], batch_size=500
+            )
+
+            if any(legs):
+                route.total_distance = total_distance
+            route.estimated_duration = max(1, int(round(duration)))
+            Route.objects.filter(pk=route.pk).update(
+                total_distance=route.total_distance,
+                estimated_duration=route.estimated_duration,
+            )
+
+        return {
+            'route': route,
+            'stops': ordered,
+            'previous_distance': previous_distance,
+            'total_distance': float(route.total_distance),
+            'estimated_duration': route.estimated_duration,
+        }
+
+
+class CapacityPlanner:
+    """
+    Plans vehicle loads for routes against ``Vehicle.seating_capacity``.
+
+    Splitting assigns contiguous runs of (already ordered) stops to the
+    route's active vehicles so that no vehicle exceeds its seats; merging
+    suggests pairs of under-used routes whose combined load fits one vehicle.
+    """
+
+    @staticmethod
+    def stop_loads(route):
+        """Return {stop_id: active student count} for pickups on ``route``."""
+        rows = TransportAllocation.objects.filter(
+            route_schedule__route=route,
+            route_schedule__academic_session__is_current=True,
+            status='active',
+        ).values('pickup_stop_id').annotate(count=Count('id'))
+        return {row['pickup_stop_id']: row['count'] for row in rows}
+
+    @staticmethod
+    def split_route(ordered_stops, stop_loads, capacities):
+        """
+        Split ordered stops into legs, one per vehicle capacity.
+
+        Returns a list of dicts (``capacity``, ``stops``, ``load``); stops that
+        do not fit any vehicle are returned in a final leg with
+        ``capacity=None`` so that callers can flag the shortfall.
+        """
+        legs = []
+        remaining = list(ordered_stops)
+        for capacity in sorted(capacities, reverse=True):
+            leg_stops, load = [], 0
+            while remaining:
+                stop_load = stop_loads.get(remaining[0].id, 0)
+                if leg_stops and load + stop_load > capacity:
+                    break
+                if not leg_stops and stop_load > capacity:
+                    break
+                leg_stops.append(remaining.pop(0))
+                load += stop_load
+            legs.append({'capacity': capacity, 'stops': leg_stops, 'load': load})
+        if remaining:
+            legs.append({
+                'capacity': None,
+                'stops': remaining,
+                'load': sum(stop_loads.get(stop.id, 0) for stop in remaining),
+            })
+        return legs
+
+    @staticmethod
+    def route_loads(routes):
+        """
+        Return {route_id: (student_count, seating_capacity)} for ``routes``
+        using two grouped queries.
+        """
+        session_filter = Q(route_schedules__academic_session__is_current=True)
+        students = dict(
+            Route.objects.filter(pk__in=[route.pk for route in routes]).annotate(
+                student_count=Count(
+                    'route_schedules__student_allocations',
+                    filter=session_filter & Q(route_schedules__student_allocations__status='active'),
+                    distinct=True,
+                )
+            ).values_list('pk', 'student_count')
+        )
+        seats = dict(
+            RouteSchedule.objects.filter(
+                route__in=routes, status='active', academic_session__is_current=True
+            ).values('route_id').annotate(seats=Sum('vehicle__seating_capacity')).values_list('route_id', 'seats')
+        )
+        return {route.pk: (students.get(route.pk, 0), seats.get(route.pk) or 0) for route in routes}
+
+    @staticmethod
+    def suggest_merges(routes, loads, max_capacity, max_centroid_km=10):
+        """
+        Suggest merging pairs of routes whose combined load fits in
+        ``max_capacity`` seats and whose stop centroids are close together.
+        """
+        import numpy as np
+
+        centroids = {}
+        for route in routes:
+            points = [
+                (float(stop.latitude), float(stop.longitude))
+                for stop in route.stops.all()
+                if stop.latitude is not None and stop.longitude is not None
+            ]
+            if points:
+                centroids[route.pk] = np.mean(points, axis=0)
+
+        candidates = [route for route in routes if route.pk in centroids]
+        if len(candidates) < 2 or not max_capacity:
+            return []
+
+        distances = haversine_matrix([centroids[route.pk] for route in candidates])
+        suggestions = []
+        used = set()
+        pairs = sorted(
+            ((distances[i, j], i, j) for i in range(len(candidates)) for j in range(i + 1, len(candidates))),
+            key=lambda item: item[0]
+        )
+        for distance, i, j in pairs:
+            if distance > max_centroid_km:
+                break
+            first, second = candidates[i], candidates[j]
+            if first.pk in used or second.pk in used:
+                continue
+            combined = loads[first.pk][0] + loads[second.pk][0]
+            if combined <= max_capacity:
+                suggestions.append({
+                    'routes': (first, second),
+                    'combined_load': combined,
+                    'centroid_distance': round(float(distance), 2),
+                })
+                used.update({first.pk, second.pk})
+        return suggestions
+
+
+def get_route_optimizer():
+    """Get a RouteOptimizer instance."""
+    return RouteOptimizer()
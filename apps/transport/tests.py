@@ -0,0 +1,239 @@
+# apps/transport/tests.py
+
+import itertools
+import random
+from datetime import date, time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from apps.academics.models import AcademicSession, Student
+from apps.core.models import Institution
+from .models import Driver, Route, RouteSchedule, RouteStop, TransportAllocation, Vehicle
+from .services import CapacityPlanner, RouteOptimizer, haversine_matrix, path_length, solve_stop_order
+
+CENTRE = (6.5244, 3.3792)
+
+User = get_user_model()
+
+
+def brute_force_length(distances):
+    """Shortest open path from node 0 through every other node."""
+    nodes = range(1, len(distances))
+    return min(path_length([0, *order], distances) for order in itertools.permutations(nodes))
+
+
+def make_stop(stop_id, latitude=None, longitude=None, arrival=None):
+    return SimpleNamespace(id=stop_id, latitude=latitude, longitude=longitude, estimated_arrival_time=arrival)
+
+
+def make_route(pk, stops):
+    return SimpleNamespace(pk=pk, stops=SimpleNamespace(all=lambda: stops))
+
+
+class StopOrderTestCase(SimpleTestCase):
+    """Stop ordering against known and brute-force optimal paths"""
+
+    def test_known_instance_is_solved_exactly(self):
+        # Stops along one road, listed out of order: the best path walks the road
+        points = [(CENTRE[0], CENTRE[1] + 0.01 * offset) for offset in (0, 3, 1, 5, 2, 4)]
+
+        order, distances = solve_stop_order(points)
+
+        self.assertEqual(order, [0, 2, 4, 1, 5, 3])
+        self.assertAlmostEqual(path_length(order, distances), brute_force_length(distances))
+
+    def test_random_instances_are_close_to_brute_force(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            points = [
+                (CENTRE[0] + rng.uniform(-0.1, 0.1), CENTRE[1] + rng.uniform(-0.1, 0.1))
+                for _ in range(8)
+            ]
+
+            order, distances = solve_stop_order(points)
+
+            self.assertEqual(order[0], 0)
+            self.assertEqual(sorted(order), list(range(8)))
+            self.assertLessEqual(path_length(order, distances), brute_force_length(distances) * 1.06)
+
+    def test_haversine_matrix(self):
+        # One degree of latitude is about 111 km
+        distances = haversine_matrix([(0.0, 0.0), (1.0, 0.0)])
+
+        self.assertAlmostEqual(float(distances[0, 1]), 111.19, places=1)
+        self.assertEqual(float(distances[0, 0]), 0.0)
+
+
+class RouteOptimizerTestCase(SimpleTestCase):
+    """Depot handling, unlocated stops, time ordering and scheduling"""
+
+    def setUp(self):
+        self.optimizer = RouteOptimizer(average_speed_kmh=30, dwell_minutes=1)
+
+    def test_depot_stays_first_and_unlocated_stops_go_last(self):
+        depot = make_stop(1, CENTRE[0], CENTRE[1])
+        far = make_stop(2, CENTRE[0], CENTRE[1] + 0.05)
+        near = make_stop(3, CENTRE[0], CENTRE[1] + 0.01)
+        middle = make_stop(4, CENTRE[0], CENTRE[1] + 0.03)
+        unlocated = make_stop(5)
+
+        ordered, legs = self.optimizer.order_stops([depot, far, unlocated, near, middle])
+
+        self.assertEqual([stop.id for stop in ordered], [1, 3, 4, 2, 5])
+        self.assertEqual(len(legs), 5)
+        self.assertEqual((legs[0], legs[-1]), (0.0, 0.0))
+        self.assertAlmostEqual(sum(legs), float(haversine_matrix([
+            (CENTRE[0], CENTRE[1]), (CENTRE[0], CENTRE[1] + 0.05)
+        ])[0, 1]), places=6)
+
+    def test_time_ordering_sorts_by_arrival(self):
+        stops = [
+            make_stop(1, CENTRE[0], CENTRE[1], time(7, 20)),
+            make_stop(2, CENTRE[0], CENTRE[1] + 0.01, time(7, 0)),
+            make_stop(3, CENTRE[0], CENTRE[1] + 0.02, time(7, 10)),
+        ]
+
+        ordered, _legs = self.optimizer.order_stops(stops, optimization_type='time')
+
+        self.assertEqual([stop.id for stop in ordered], [2, 3, 1])
+
+    def test_schedule_times_add_travel_and_dwell(self):
+        stops = [make_stop(1), make_stop(2), make_stop(3)]
+
+        # 5 km at 30 km/h is 10 minutes, plus 1 minute dwell per stop
+        self.optimizer.schedule_times(stops, [0.0, 5.0, 10.0], time(7, 0))
+
+        self.assertEqual([stop.pickup_time for stop in stops], [time(7, 0), time(7, 11), time(7, 32)])
+
+
+class CapacityPlannerTestCase(SimpleTestCase):
+    """Capacity split and merge plans"""
+
+    def test_split_fills_largest_vehicle_first(self):
+        stops = [make_stop(stop_id) for stop_id in range(1, 6)]
+        loads = {1: 6, 2: 4, 3: 3, 4: 2, 5: 1}
+
+        legs = CapacityPlanner.split_route(stops, loads, [5, 10])
+
+        self.assertEqual(
+            [(leg['capacity'], [stop.id for stop in leg['stops']], leg['load']) for leg in legs],
+            [(10, [1, 2], 10), (5, [3, 4], 5), (None, [5], 1)],
+        )
+
+    def test_split_without_shortfall(self):
+        stops = [make_stop(stop_id) for stop_id in range(1, 4)]
+
+        legs = CapacityPlanner.split_route(stops, {1: 2, 2: 2, 3: 2}, [4, 4])
+
+        self.assertEqual([leg['load'] for leg in legs], [4, 2])
+        self.assertNotIn(None, [leg['capacity'] for leg in legs])
+
+    def test_stop_larger_than_vehicle_is_flagged(self):
+        stops = [make_stop(1), make_stop(2)]
+
+        legs = CapacityPlanner.split_route(stops, {1: 12, 2: 1}, [10])
+
+        self.assertEqual([(leg['capacity'], leg['load']) for leg in legs], [(10, 0), (None, 13)])
+
+    def test_merges_pair_close_routes_that_fit(self):
+        routes = [
+            make_route(1, [make_stop(11, CENTRE[0], CENTRE[1])]),
+            make_route(2, [make_stop(21, CENTRE[0] + 0.01, CENTRE[1])]),
+            make_route(3, [make_stop(31, CENTRE[0] + 0.02, CENTRE[1])]),
+            make_route(4, [make_stop(41, CENTRE[0] + 1.0, CENTRE[1])]),
+            make_route(5, [make_stop(51)]),
+        ]
+        loads = {1: (10, 30), 2: (15, 30), 3: (25, 30), 4: (5, 30), 5: (1, 30)}
+
+        suggestions = CapacityPlanner.suggest_merges(routes, loads, max_capacity=30)
+
+        self.assertEqual(
+            [(tuple(route.pk for route in s['routes']), s['combined_load']) for s in suggestions],
+            [((1, 2), 25)],
+        )
+        self.assertAlmostEqual(suggestions[0]['centroid_distance'], 1.11, places=2)
+
+    def test_no_merges_without_capacity(self):
+        routes = [make_route(pk, [make_stop(pk, *CENTRE)]) for pk in (1, 2)]
+
+        self.assertEqual(CapacityPlanner.suggest_merges(routes, {1: (1, 0), 2: (1, 0)}, max_capacity=0), [])
+
+
+class RouteCountsTestCase(TestCase):
+    """Annotated route counts match the per-route properties"""
+
+    def setUp(self):
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.session = AcademicSession.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), is_current=True
+        )
+        self.past_session = AcademicSession.objects.create(
+            name='2023/2024', start_date=date(2023, 9, 1), end_date=date(2024, 7, 31)
+        )
+        self.driver = Driver.objects.create(
+            user=User.objects.create_user(username='driver', email='driver@example.com', password='testpass123'),
+            employee_id='D001', license_number='L001', license_expiry=date(2030, 1, 1),
+            date_of_birth=date(1980, 1, 1), date_of_joining=date(2020, 1, 1),
+        )
+        self.vehicles = [
+            Vehicle.objects.create(
+                vehicle_number=f'V{number}', registration_number=f'REG{number}', make='Toyota',
+                model='Coaster', year=2020, seating_capacity=30,
+            )
+            for number in range(3)
+        ]
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f's{i}', email=f's{i}@example.com', password='testpass123'),
+                student_id=f'S{i:04d}', admission_number=f'A{i:04d}',
+                admission_date=date(2024, 1, 1), date_of_birth=date(2012, 1, 1),
+            )
+            for i in range(3)
+        ]
+
+    def create_route(self, code):
+        route = Route.objects.create(
+            name=code, code=code, start_point='School', end_point='Town',
+            total_distance=Decimal('10'), estimated_duration=30,
+        )
+        RouteStop.objects.create(route=route, name='Gate', sequence=1, address='Road', estimated_arrival_time=time(7))
+        return route
+
+    def schedule(self, route, vehicle, session=None, status='active'):
+        return RouteSchedule.objects.create(
+            route=route, vehicle=vehicle, driver=self.driver, academic_session=session or self.session,
+            morning_start_time=time(7), morning_end_time=time(8), status=status,
+        )
+
+    def allocate(self, schedule, student, status='active'):
+        stop = schedule.route.stops.first()
+        return TransportAllocation.objects.create(
+            student=student, route_schedule=schedule, pickup_stop=stop, drop_stop=stop,
+            start_date=date(2024, 9, 1), monthly_fee=Decimal('50'), status=status,
+        )
+
+    def test_annotation_matches_properties(self):
+        busy, quiet, empty = (self.create_route(code) for code in ('R1', 'R2', 'R3'))
+        first = self.schedule(busy, self.vehicles[0])
+        second = self.schedule(busy, self.vehicles[1])
+        self.schedule(busy, self.vehicles[2], status='inactive')
+        self.allocate(first, self.students[0])
+        self.allocate(first, self.students[1])
+        self.allocate(second, self.students[2])
+        self.allocate(second, self.students[0], status='inactive')
+        self.allocate(self.schedule(quiet, self.vehicles[0], session=self.past_session), self.students[1])
+        self.schedule(quiet, self.vehicles[1])
+
+        routes = Route.with_current_counts(Route.objects.filter(pk__in=[busy.pk, quiet.pk, empty.pk]))
+
+        expected = {
+            route.pk: (route.current_students_count, route.current_vehicles_count)
+            for route in Route.objects.filter(pk__in=[busy.pk, quiet.pk, empty.pk])
+        }
+        self.assertEqual(expected, {busy.pk: (3, 2), quiet.pk: (0, 1), empty.pk: (0, 0)})
+        with self.assertNumQueries(1):
+            annotated = {route.pk: (route.current_students_count, route.current_vehicles_count) for route in routes}
+        self.assertEqual(annotated, expected)
@@ -7,7 +7,7 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Count, Sum, Avg, Max
 from django.utils import timezone
 from django.core.exceptions import PermissionDenied
 from django.utils.translation import gettext_lazy as _
@@ -21,6 +21,7 @@ from .forms import (
     RouteScheduleForm, TransportAllocationForm, MaintenanceRecordForm,
     FuelRecordForm, IncidentReportForm, BulkTransportNotificationForm
 )
+from .services import CapacityPlanner, get_route_optimizer
 
 
 # ============================================================================
@@ -367,7 +368,7 @@ class RouteListView(LoginRequiredMixin, ListView):
                 Q(end_point__icontains=search)
             )
         
-        return queryset.prefetch_related('stops')
+        return Route.with_current_counts(queryset).prefetch_related('stops')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1130,13 +1131,14 @@ class RouteOptimizationView(LoginRequiredMixin, View):
     template_name = 'transport/routes/route_optimization.html'
 
     def get(self, request):
-        routes = Route.objects.filter(is_active=True).prefetch_related('stops')
+        routes = list(Route.objects.filter(is_active=True).prefetch_related('stops'))
+        loads = CapacityPlanner.route_loads(routes)
 
         # Calculate optimization metrics
         optimization_data = []
         for route in routes:
-            stops = route.stops.all().order_by('sequence')
-            student_count = route.current_students_count
+            student_count, seating_capacity = loads[route.pk]
+            route.student_count = student_count
 
             # Calculate efficiency metrics
             if route.total_distance and route.estimated_duration:
@@ -1148,18 +1150,24 @@ class RouteOptimizationView(LoginRequiredMixin, View):
 
             optimization_data.append({
                 'route': route,
-                'stops_count': stops.count(),
+                'stops_count': len(route.stops.all()),
                 'student_count': student_count,
                 'efficiency_score': round(efficiency_score, 2),
                 'time_efficiency': round(time_efficiency, 2),
-                'capacity_utilization': (student_count / sum(route.route_schedules.filter(status='active').values_list('vehicle__seating_capacity', flat=True)[:1]) * 100) if route.route_schedules.filter(status='active').exists() else 0
+                'capacity_utilization': (student_count / seating_capacity * 100) if seating_capacity else 0
             })
 
+        max_capacity = Vehicle.objects.filter(status='active').aggregate(
+            max_capacity=Max('seating_capacity')
+        )['max_capacity'] or 0
+
         context = {
             'routes': routes,
+            'total_routes': len(routes),
             'optimization_data': optimization_data,
+            'merge_suggestions': CapacityPlanner.suggest_merges(routes, loads, max_capacity),
             'total_stops': RouteStop.objects.count(),
-            'total_distance_estimate': sum(route.distance or 0 for route in routes),
+            'total_distance_estimate': sum(route.total_distance or 0 for route in routes),
             'average_efficiency': round(sum(data['efficiency_score'] for data in optimization_data) / len(optimization_data), 2) if optimization_data else 0
         }
 
@@ -1173,41 +1181,49 @@ class RouteOptimizationView(LoginRequiredMixin, View):
         if route_id:
             try:
                 route = Route.objects.get(id=route_id, is_active=True)
-                stops = list(route.stops.all().order_by('sequence'))
+            except Route.DoesNotExist:
+                return JsonResponse({'status': 'error', 'message': 'Route not found'}, status=404)
 
-                if optimization_type == 'distance':
-                    # Simple distance-based optimization (placeholder for more complex algorithms)
-                    optimized_stops = self._optimize_by_distance(stops)
-                elif optimization_type == 'time':
-                    # Time-based optimization
-                    optimized_stops = self._optimize_by_time(stops)
-                else:
-                    optimized_stops = stops
+            if optimization_type not in ('distance', 'time'):
+                return JsonResponse({'status': 'error', 'message': 'Invalid optimization type'}, status=400)
 
-                # Update sequence numbers
-                for i, stop in enumerate(optimized_stops, 1):
-                    stop.sequence = i
-                    stop.save()
+            result = get_route_optimizer().optimize_route(route, optimization_type)
 
-                messages.success(request, _('Route optimized successfully.'))
-                return JsonResponse({'status': 'success', 'message': 'Route optimized successfully'})
+            # Check the optimized order against the seats on the route's vehicles
+            capacities = list(route.route_schedules.filter(
+                status='active', academic_session__is_current=True
+            ).values_list('vehicle__seating_capacity', flat=True))
+            legs = CapacityPlanner.split_route(result['stops'], CapacityPlanner.stop_loads(route), capacities)
 
-            except Route.DoesNotExist:
-                return JsonResponse({'status': 'error', 'message': 'Route not found'}, status=404)
+            messages.success(request, _('Route optimized successfully.'))
+            return JsonResponse({
+                'status': 'success',
+                'message': 'Route optimized successfully',
+                'total_distance': result['total_distance'],
+                'previous_distance': result.get('previous_distance', 0),
+                'estimated_duration': result['estimated_duration'],
+                'stops': [
+                    {
+                        'id': str(stop.id),
+                        'name': stop.name,
+                        'sequence': stop.sequence,
+                        'pickup_time': stop.pickup_time.strftime('%H:%M') if stop.pickup_time else None,
+                    }
+                    for stop in result['stops']
+                ],
+                'vehicle_legs': [
+                    {
+                        'capacity': leg['capacity'],
+                        'load': leg['load'],
+                        'over_capacity': leg['capacity'] is None,
+                        'stops': [str(stop.id) for stop in leg['stops']],
+                    }
+                    for leg in legs
+                ],
+            })
 
         return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=400)
 
-    def _optimize_by_distance(self, stops):
-        """Simple distance-based optimization (placeholder for complex algorithms)"""
-        # This is a simplified version. In a real implementation, you would use
-        # algorithms like Traveling Salesman Problem solvers or Google Maps API
-        return sorted(stops, key=lambda x: (x.latitude or 0, x.longitude or 0))
-
-    def _optimize_by_time(self, stops):
-        """Time-based optimization"""
-        # Sort by estimated arrival time
-        return sorted(stops, key=lambda x: x.estimated_arrival_time or timezone.now().time())
-
 
 class TransportReportView(LoginRequiredMixin, View):
     template_name = 'transport/reports/reports.html'
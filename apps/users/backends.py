@@ -1,12 +1,15 @@
 """
-Custom authentication backends for email and username-based login.
+Custom authentication backends for email and username-based login, and
+role-based permissions.
 """
 
-from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.backends import BaseBackend, ModelBackend
 from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
+from .permissions import resolve
+
 User = get_user_model()
 
 
@@ -77,3 +80,31 @@ class EmailOrUsernameBackend(ModelBackend):
             return User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return None
+
+
+class RolePermissionBackend(BaseBackend):
+    """
+    Grants users the permissions of their active roles.
+
+    Role permission sets and each user's role ids are cached (see
+    apps.users.permissions), so a permission check costs no queries once
+    warm; role permissions are not copied into ``user.user_permissions``.
+    Does not authenticate; it is used for authorization only.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_role_perm_cache'):
+            user_obj._role_perm_cache = resolve(user_obj)
+        return user_obj._role_perm_cache
+
+    def get_user(self, user_id):
+        # Listed first so granted permissions skip ModelBackend's queries,
+        # which makes it the backend of sessions from force_login()
+        return EmailOrUsernameBackend().get_user(user_id)
+
+    def has_module_perms(self, user_obj, app_label):
+        return user_obj.is_active and any(
+            perm[:perm.index('.')] == app_label for perm in self.get_all_permissions(user_obj)
+        )
@@ -101,6 +101,9 @@ def user_roles(request):
             'can_manage_hostels': is_super_admin or is_admin or is_hostel_warden,
             'can_view_student_data': is_super_admin or is_admin or is_principal or is_teacher or is_parent,
             'highest_role_level': highest_role_level,
+
+            # Everything the role-based navigation depends on, for {% cached %}
+            'nav_cache_key': ','.join(sorted(set(user_roles_list))) + (':superuser' if request.user.is_superuser else ''),
         }
 
     return {
@@ -135,4 +138,5 @@ def user_roles(request):
         'can_manage_hostels': False,
         'can_view_student_data': False,
         'highest_role_level': 0,
+        'nav_cache_key': '',
     }
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def clear_mirrored_user_permissions(apps, schema_editor):
+    """
+    Remove the role permissions that used to be copied into
+    ``user_permissions``.
+
+    Every role assignment used to replace a user's ``user_permissions`` with
+    the permissions of their roles, so the rows of users holding a role are
+    such copies; left behind, they would keep granting (through
+    ModelBackend) permissions their roles no longer have. Roles are resolved
+    by RolePermissionBackend now. Rows of users without a role are direct
+    grants and are kept.
+    """
+    User = apps.get_model('users', 'User')
+    UserRole = apps.get_model('users', 'UserRole')
+    through = User.user_permissions.through
+
+    role_holders = UserRole.objects.values('user_id')
+    through.objects.filter(user_id__in=role_holders).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_staffapplication_highest_qualification_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_mirrored_user_permissions, migrations.RunPython.noop, elidable=True),
+    ]
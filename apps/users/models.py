@@ -309,21 +309,16 @@ class Role(CoreBaseModel):
     def save(self, *args, **kwargs):
         """Ensure system roles cannot be modified."""
         # Track original values for audit logging
-        if self.pk:
-            try:
-                original = Role.objects.get(pk=self.pk)
-                self._original_name = original.name
-                self._original_role_type = original.role_type
-                self._original_hierarchy_level = original.hierarchy_level
-                self._original_status = original.status
-
-                # Check system role constraints only if this is an update (not creation)
-                if self.is_system_role:
-                    if original.name != self.name or original.role_type != self.role_type:
-                        raise ValueError(_("System roles cannot be modified."))
-            except Role.DoesNotExist:
-                # Object doesn't exist yet (during creation)
-                pass
+        if not self._state.adding:
+            self._original_name = self.original_value('name')
+            self._original_role_type = self.original_value('role_type')
+            self._original_hierarchy_level = self.original_value('hierarchy_level')
+            self._original_status = self.original_value('status')
+
+            # Check system role constraints only if this is an update (not creation)
+            if self.is_system_role:
+                if self.has_changed('name') or self.has_changed('role_type'):
+                    raise ValueError(_("System roles cannot be modified."))
 
         super().save(*args, **kwargs)
 
@@ -473,12 +468,8 @@ class UserRole(CoreBaseModel):
     def save(self, *args, **kwargs):
         """Ensure only one primary role per user per academic session."""
         # Track original values for audit logging
-        if self.pk:
-            try:
-                original = UserRole.objects.get(pk=self.pk)
-                self._original_is_primary = original.is_primary
-            except UserRole.DoesNotExist:
-                pass
+        if not self._state.adding:
+            self._original_is_primary = self.original_value('is_primary')
 
         if self.is_primary:
             # Set all other roles for this user in the same context as non-primary
@@ -1375,41 +1366,6 @@ class StaffApplication(CoreBaseModel, AddressModel):
             if self.cv.size > 5 * 1024 * 1024:  # 5MB limit
                 raise ValidationError({'cv': _('CV file size must not exceed 5MB.')})
 
-# Permission synchronization utilities
-def sync_user_permissions(user):
-    """
-    Synchronize user's Django permissions based on their active roles.
-    This ensures that PermissionRequiredMixin checks work correctly.
-    """
-    from django.contrib.auth.models import Permission
-
-    # Get all permissions from user's active roles
-    role_permissions = Permission.objects.filter(
-        roles__user_roles__user=user,
-        roles__user_roles__status='active'
-    ).distinct()
-
-    # Update user's permissions
-    user.user_permissions.set(role_permissions)
-    user.save()
-
-    return role_permissions.count()
-
-
-def sync_all_user_permissions():
-    """
-    Synchronize permissions for all users based on their roles.
-    Useful for initial setup or bulk updates.
-    """
-    users_updated = 0
-    for user in User.objects.all():
-        permissions_count = sync_user_permissions(user)
-        if permissions_count > 0:
-            users_updated += 1
-
-    return users_updated
-
-
 # Utility functions for guardian notifications
 def get_student_guardians(student_user):
     """
@@ -1512,7 +1468,7 @@ def notify_guardians_profile_update(student_user, guardians, changed_fields):
 
 
 # Signal handlers for user management
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 
 
@@ -1621,25 +1577,38 @@ def auto_map_user_to_institution(sender, instance, created, **kwargs):
                     logger.error(f"Failed to auto-map user {instance.user.email} to institution: {e}")
 
 @receiver(post_save, sender=UserRole)
-def sync_permissions_on_role_save(sender, instance, **kwargs):
+@receiver(post_delete, sender=UserRole)
+def forget_roles_on_role_change(sender, instance, **kwargs):
     """
-    Sync user permissions when a role is assigned or updated.
+    Re-resolve a user's permissions when a role is assigned, updated or
+    removed.
     """
-    try:
-        sync_user_permissions(instance.user)
-    except Exception as e:
-        logger.error(f"Failed to sync permissions for user {instance.user.email}: {e}")
+    from .permissions import forget_user
 
+    forget_user(instance.user_id)
 
-@receiver(post_delete, sender=UserRole)
-def sync_permissions_on_role_delete(sender, instance, **kwargs):
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_roles_on_role_save(sender, instance, **kwargs):
     """
-    Sync user permissions when a role is removed.
+    Drop the cached role permissions when a role changes (its status may
+    have). Deleted roles take their assignments with them, which the
+    UserRole handler forgets.
     """
-    try:
-        sync_user_permissions(instance.user)
-    except Exception as e:
-        logger.error(f"Failed to sync permissions for user {instance.user.email}: {e}")
+    from .permissions import invalidate_roles
+
+    invalidate_roles()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_roles_on_role_permissions_change(sender, action, **kwargs):
+    """Drop the cached role permissions when a role's permissions change."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    from .permissions import invalidate_roles
+
+    invalidate_roles()
 
 
 @receiver(post_save, sender=UserProfile)
@@ -1651,46 +1620,23 @@ def notify_guardians_on_profile_update(sender, instance, created, **kwargs):
         # Don't notify on profile creation
         return
 
-    # Check if the user is a student
-    if not instance.user.user_roles.filter(role__role_type=Role.RoleType.STUDENT).exists():
-        return
-
-    # Get the previous profile state from the database
-    try:
-        previous_profile = UserProfile.objects.get(pk=instance.pk)
-    except UserProfile.DoesNotExist:
-        return
-
-    # Check if any meaningful fields changed
+    # Compare against the values the profile was loaded with
     meaningful_fields = [
         'date_of_birth', 'gender', 'nationality',
-        'identification_number', 'bio', 'website', 'facebook', 'twitter', 'linkedin'
+        'identification_number', 'bio', 'website', 'facebook', 'twitter', 'linkedin',
+        'address_line_1', 'address_line_2', 'city', 'state', 'postal_code', 'country',
+        'profile_picture',
     ]
-
-    changed_fields = []
-    for field in meaningful_fields:
-        old_value = getattr(previous_profile, field)
-        new_value = getattr(instance, field)
-        if old_value != new_value:
-            changed_fields.append(field)
-
-    # Also check address fields if they exist
-    address_fields = ['address_line_1', 'address_line_2', 'city', 'state', 'postal_code', 'country']
-    for field in address_fields:
-        if hasattr(instance, field):
-            old_value = getattr(previous_profile, field)
-            new_value = getattr(instance, field)
-            if old_value != new_value:
-                changed_fields.append(field)
-
-    # If profile picture changed
-    if previous_profile.profile_picture != instance.profile_picture:
-        changed_fields.append('profile_picture')
+    changed_fields = [field for field in meaningful_fields if field in instance._changed_fields]
 
     # Only notify if there were actual changes
     if not changed_fields:
         return
 
+    # Check if the user is a student
+    if not instance.user.user_roles.filter(role__role_type=Role.RoleType.STUDENT).exists():
+        return
+
     # Get guardians and send notifications
     guardians = get_student_guardians(instance.user)
     if guardians:
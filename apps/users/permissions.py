@@ -0,0 +1,91 @@
+"""
+Role-based permission resolution.
+
+A user's permissions are the union of the permissions of their active
+roles. :class:`apps.users.backends.RolePermissionBackend` answers
+``has_perm`` from two cached values instead of per-user permission rows:
+
+- the permission set of every role (``'app_label.codename'`` strings),
+  cached under the ``permissions.roles`` namespace and invalidated whenever
+  a role or its permissions change;
+- the active role ids of each user, cached per user and dropped when one of
+  their role assignments changes.
+
+Role permissions are not copied into ``User.user_permissions``; those rows
+hold only permissions granted to a user directly, which ModelBackend
+checks. Migration ``users.0004`` removed the copies written before.
+"""
+
+from typing import Dict, FrozenSet, List
+
+from django.db import transaction
+
+from apps.core import caching
+
+ROLES_NAMESPACE = 'permissions.roles'
+USERS_NAMESPACE = 'permissions.users'
+
+
+def role_permission_sets() -> Dict[str, FrozenSet[str]]:
+    """Permission names of every role, keyed by role id."""
+    def compute():
+        from .models import Role
+
+        sets = {}
+        rows = Role.objects.filter(status='active').values_list(
+            'pk', 'permissions__content_type__app_label', 'permissions__codename',
+        )
+        for role_id, app_label, codename in rows:
+            names = sets.setdefault(str(role_id), set())
+            if codename:
+                names.add(f'{app_label}.{codename}')
+        return {role_id: frozenset(names) for role_id, names in sets.items()}
+
+    return caching.get_or_set(ROLES_NAMESPACE, ['all'], compute)
+
+
+def user_role_ids(user_id) -> List[str]:
+    """Ids of the active roles of a user."""
+    def compute():
+        from .models import UserRole
+
+        return sorted({
+            str(role_id) for role_id in
+            UserRole.objects.filter(user_id=user_id, status='active').values_list('role_id', flat=True)
+        })
+
+    return caching.get_or_set(USERS_NAMESPACE, [user_id], compute)
+
+
+def resolve(user) -> FrozenSet[str]:
+    """Permission names granted to ``user`` through their active roles."""
+    sets = role_permission_sets()
+    names = set()
+    for role_id in user_role_ids(user.pk):
+        names |= sets.get(role_id, frozenset())
+    return frozenset(names)
+
+
+def _drop(namespace, *parts):
+    # Now, for the rest of this transaction, and again on commit, for
+    # other processes that cached the old value in the meantime
+    cache = caching.get_cache()
+    key = caching.make_key(namespace, *parts)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_roles():
+    """Drop the cached role permission sets."""
+    _drop(ROLES_NAMESPACE, 'all')
+
+
+def forget_user(user_id):
+    """Drop the cached role ids of a user."""
+    _drop(USERS_NAMESPACE, user_id)
+
+
+def refresh():
+    """Drop every cached role permission set and user role list."""
+    caching.invalidate(ROLES_NAMESPACE)
+    caching.invalidate(USERS_NAMESPACE)
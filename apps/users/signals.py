@@ -1,7 +1,7 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserRole, Role
+from .models import UserProfile, UserRole, Role
 from apps.audit.models import AuditLog
 
 User = get_user_model()
@@ -144,3 +144,74 @@ def audit_role_deletion(sender, instance, **kwargs):
         ip_address=getattr(instance, '_audit_ip', None),
         user_agent=getattr(instance, '_audit_user_agent', None)
     )
+
+
+# Typeahead index maintenance
+TYPEAHEAD_USER_FIELDS = {'first_name', 'last_name', 'email', 'username', 'is_active'}
+
+
+@receiver(post_save, sender=User)
+def refresh_user_typeahead(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the user/student typeahead index in sync with user changes."""
+    if raw:
+        return
+    # Saves such as last_login updates do not touch indexed fields
+    if update_fields and not TYPEAHEAD_USER_FIELDS.intersection(update_fields):
+        return
+    from .typeahead import refresh_user
+    refresh_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_typeahead(sender, instance, **kwargs):
+    """Drop deleted users from the typeahead index."""
+    from .typeahead import user_index
+    user_index.remove(str(instance.id))
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def refresh_user_role_typeahead(sender, instance, raw=False, **kwargs):
+    """Role changes affect role-filtered user suggestions."""
+    if raw:
+        return
+    from .typeahead import refresh_user
+    refresh_user(instance.user)
+
+
+@receiver(post_save, sender='academics.Student')
+def refresh_student_typeahead(sender, instance, raw=False, **kwargs):
+    """Keep the student typeahead index in sync with student changes."""
+    if raw:
+        return
+    from .typeahead import refresh_student
+    refresh_student(instance)
+
+
+@receiver(post_delete, sender='academics.Student')
+def remove_student_typeahead(sender, instance, **kwargs):
+    """Drop deleted students from the typeahead index."""
+    from .typeahead import student_index
+    student_index.remove(str(instance.id))
+
+
+@receiver(post_save, sender='academics.Enrollment')
+@receiver(post_delete, sender='academics.Enrollment')
+def refresh_enrollment_typeahead(sender, instance, raw=False, **kwargs):
+    """Student suggestions show the current class, which enrollments change."""
+    if raw:
+        return
+    from .typeahead import refresh_student
+    refresh_student(instance.student)
+
+
+@receiver(post_save, sender=UserProfile)
+def create_profile_picture_variants(sender, instance, created=False, raw=False, **kwargs):
+    """Generate thumbnails for a new profile picture once it is committed."""
+    if raw or not instance.profile_picture:
+        return
+    if not created and 'profile_picture' not in instance._changed_fields:
+        return
+    from apps.core.images import schedule_upload_variants, upload_variants_exist
+    if not upload_variants_exist(instance.profile_picture.name, instance.profile_picture.storage):
+        schedule_upload_variants(instance.profile_picture.name)
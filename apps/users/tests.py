@@ -0,0 +1,299 @@
+# apps/users/tests.py
+
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.core.models import Institution
+from apps.users.models import Role, UserRole
+from apps.users.typeahead import TypeaheadIndex, student_index, tokenize, user_index
+
+User = get_user_model()
+
+
+class RolePermissionTestCase(TestCase):
+    """Role-based permission resolution from cached role sets."""
+
+    def setUp(self):
+        caches['default'].clear()
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        self.view_student = Permission.objects.get(codename='view_student')
+        self.add_student = Permission.objects.get(codename='add_student')
+        self.role = Role.objects.create(name='Registrar', role_type=Role.RoleType.SUPPORT)
+        self.role.permissions.add(self.view_student)
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='x')
+            for i in range(3)
+        ]
+
+    def fresh(self, user):
+        return User.objects.get(pk=user.pk)
+
+    def assign(self, *users):
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in users:
+                UserRole.objects.create(user=user, role=self.role)
+
+    def test_role_grants_permission_without_copying(self):
+        self.assign(self.users[0])
+        user = self.fresh(self.users[0])
+        self.assertTrue(user.has_perm('academics.view_student'))
+        self.assertFalse(user.has_perm('academics.add_student'))
+        self.assertTrue(user.has_module_perms('academics'))
+        self.assertFalse(user.user_permissions.exists())
+
+    def test_removing_role_revokes_permission(self):
+        self.assign(*self.users)
+        for user in self.users:
+            self.assertTrue(self.fresh(user).has_perm('academics.view_student'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.filter(user=self.users[0]).delete()
+            UserRole.objects.get(user=self.users[1]).delete()
+        self.assertFalse(self.fresh(self.users[0]).has_perm('academics.view_student'))
+        self.assertFalse(self.fresh(self.users[1]).has_perm('academics.view_student'))
+        self.assertTrue(self.fresh(self.users[2]).has_perm('academics.view_student'))
+
+    def test_direct_grants_still_apply(self):
+        self.users[0].user_permissions.add(self.add_student)
+        self.assign(self.users[0])
+
+        user = self.fresh(self.users[0])
+        self.assertTrue(user.has_perm('academics.add_student'))
+        self.assertTrue(user.has_perm('academics.view_student'))
+        self.assertEqual(list(user.user_permissions.all()), [self.add_student])
+
+    def test_role_permission_change_invalidates_cache(self):
+        self.assign(self.users[0])
+        self.assertFalse(self.fresh(self.users[0]).has_perm('academics.add_student'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.permissions.add(self.add_student)
+        self.assertTrue(self.fresh(self.users[0]).has_perm('academics.add_student'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.status = 'inactive'
+            self.role.save()
+        self.assertFalse(self.fresh(self.users[0]).has_perm('academics.view_student'))
+
+    def test_warm_permission_check_runs_no_queries(self):
+        self.assign(self.users[0])
+        self.fresh(self.users[0]).has_perm('academics.view_student')
+        user = self.fresh(self.users[0])
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('academics.view_student'))
+
+    def test_sync_permissions_command_refreshes_cache(self):
+        self.assign(self.users[0])
+        self.assertFalse(self.fresh(self.users[0]).has_perm('academics.add_student'))
+        # A change that bypasses the m2m_changed signal
+        Role.permissions.through.objects.create(role=self.role, permission=self.add_student)
+        self.assertFalse(self.fresh(self.users[0]).has_perm('academics.add_student'))
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('sync_permissions', stdout=out)
+        self.assertIn('refreshed', out.getvalue())
+        self.assertTrue(self.fresh(self.users[0]).has_perm('academics.add_student'))
+
+    def test_migration_clears_mirrored_rows(self):
+        self.assign(self.users[0])
+        self.users[0].user_permissions.add(self.view_student, self.add_student)
+        self.users[2].user_permissions.add(self.add_student)
+        migration = import_module('apps.users.migrations.0004_clear_mirrored_user_permissions')
+
+        migration.clear_mirrored_user_permissions(django_apps, None)
+
+        self.assertFalse(self.users[0].user_permissions.exists())
+        self.assertEqual(list(self.users[2].user_permissions.all()), [self.add_student])
+        self.assertFalse(self.fresh(self.users[0]).has_perm('academics.add_student'))
+
+
+def document(doc_id, *values):
+    return {'id': doc_id, 'text': ' '.join(values), 'tokens': tokenize(*values)}
+
+
+class TypeaheadIndexTestCase(SimpleTestCase):
+    """Prefix, fuzzy and cross-worker behaviour of the in-memory typeahead index."""
+
+    DOCUMENTS = [
+        document('1', 'Jonathan', 'Smith', 'jonathan.smith@example.com'),
+        document('2', 'Jonathan', 'Brown', 'jbrown@example.com'),
+        document('3', 'Joan', 'Smithers', 'joan@example.com'),
+        document('4', 'Amina', 'Bello', 'amina@example.com'),
+    ]
+
+    def setUp(self):
+        caches['default'].clear()
+        self.index = TypeaheadIndex('test', lambda: list(self.DOCUMENTS))
+
+    def ids(self, query, index=None, **kwargs):
+        return [result['id'] for result in (index or self.index).search(query, **kwargs)]
+
+    def test_prefix_matching(self):
+        self.assertEqual(sorted(self.ids('jo', fuzzy=False)), ['1', '2', '3'])
+        self.assertEqual(self.ids('bell', fuzzy=False), ['4'])
+        self.assertEqual(self.ids('JBROWN@EXAMPLE', fuzzy=False), ['2'])
+        # Prefixes only: the middle of a word does not match
+        self.assertEqual(self.ids('nathan', fuzzy=False), [])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.ids('jon smi', fuzzy=False), ['1'])
+        self.assertEqual(sorted(self.ids('smi jo', fuzzy=False)), ['1', '3'])
+        self.assertEqual(self.ids('jon bello', fuzzy=False), [])
+
+    def test_exact_token_matches_come_first(self):
+        self.assertEqual(self.ids('smith', fuzzy=False), ['1', '3'])
+
+    def test_trigram_fuzzy_fallback(self):
+        self.assertEqual(self.ids('jonathn', fuzzy=False), [])
+        # Closest tokens first; weaker matches such as 'joan' fill the rest
+        self.assertEqual(sorted(self.ids('jonathn')[:2]), ['1', '2'])
+        self.assertEqual(self.ids('amnia bello', limit=1), ['4'])
+
+    def test_limit_and_predicate(self):
+        self.assertEqual(len(self.ids('jo', limit=2)), 2)
+        self.assertEqual(self.ids('jo', predicate=lambda doc: 'Smithers' in doc['text']), ['3'])
+
+    def test_update_and_remove(self):
+        self.index.search('jo')
+        self.index.update(document('1', 'Jonah', 'Smith'))
+        self.index.remove('3')
+
+        self.assertEqual(self.ids('jonah', fuzzy=False), ['1'])
+        self.assertEqual(self.ids('jonathan', fuzzy=False), ['2'])
+        self.assertEqual(self.ids('smithers', fuzzy=False), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_other_worker_replays_changes(self):
+        other = TypeaheadIndex('test', lambda: list(self.DOCUMENTS))
+        self.index.search('jo')
+        other.search('jo')
+
+        self.index.update(document('5', 'Chidi', 'Okafor'))
+        self.index.remove('4')
+        other.loader = lambda: self.fail('replaying the change log must not rebuild')
+
+        self.assertEqual(self.ids('chidi', other), ['5'])
+        self.assertEqual(self.ids('amina', other, fuzzy=False), [])
+        self.assertEqual(other._version, self.index._version)
+
+    def test_other_worker_rebuilds_when_change_log_expired(self):
+        other = TypeaheadIndex('test', lambda: list(self.DOCUMENTS))
+        other.search('jo')
+        self.index.search('jo')
+        self.index.update(document('5', 'Chidi', 'Okafor'))
+        caches['default'].delete(self.index._change_key(self.index._version))
+        rebuilt = self.DOCUMENTS + [document('5', 'Chidi', 'Okafor')]
+        other.loader = lambda: rebuilt
+
+        self.assertEqual(self.ids('chidi', other), ['5'])
+        self.assertEqual(len(other), 5)
+
+
+class TypeaheadSignalTestCase(TestCase):
+    """User and student saves and deletes keep the typeahead indexes current."""
+
+    def setUp(self):
+        caches['default'].clear()
+        Institution.objects.get_or_create(code='TEST', defaults={'name': 'Test School'})
+        for index in (user_index, student_index):
+            index._built = False
+            self.addCleanup(setattr, index, '_built', False)
+        # Build the (empty) indexes, so later changes are applied incrementally
+        user_index.search('x')
+        student_index.search('x')
+
+    def ids(self, index, query):
+        return [result['id'] for result in index.search(query, fuzzy=False)]
+
+    def test_user_insert_update_and_delete(self):
+        user = User.objects.create_user(
+            username='ngozi', email='ngozi@example.com', password='x', first_name='Ngozi', last_name='Eze'
+        )
+        self.assertEqual(self.ids(user_index, 'ngozi eze'), [str(user.pk)])
+
+        user.last_name = 'Okeke'
+        user.save()
+        self.assertEqual(self.ids(user_index, 'ngozi oke'), [str(user.pk)])
+        self.assertEqual(self.ids(user_index, 'eze'), [])
+
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.ids(user_index, 'ngozi'), [])
+
+        user.is_active = True
+        user.save()
+        user.delete()
+        self.assertEqual(self.ids(user_index, 'ngozi'), [])
+
+    def test_saves_of_unindexed_fields_are_skipped(self):
+        user = User.objects.create_user(username='tunde', email='tunde@example.com', password='x')
+        version = user_index._version
+
+        user.save(update_fields=['last_login'])
+
+        self.assertEqual(user_index._version, version)
+
+    def test_student_insert_update_and_delete(self):
+        from datetime import date
+
+        from apps.academics.models import Student
+
+        user = User.objects.create_user(
+            username='kemi', email='kemi@example.com', password='x', first_name='Kemi', last_name='Adeyemi'
+        )
+        student = Student.objects.create(
+            user=user, student_id='STU0001', admission_number='ADM0001',
+            admission_date=date(2024, 1, 1), date_of_birth=date(2010, 1, 1),
+        )
+        self.assertEqual(self.ids(student_index, 'kemi'), [str(student.pk)])
+        self.assertEqual(self.ids(student_index, 'adm0001'), [str(student.pk)])
+
+        student.status = 'inactive'
+        student.save()
+        self.assertEqual(self.ids(student_index, 'kemi'), [])
+
+        student.status = 'active'
+        student.save()
+        student.delete()
+        self.assertEqual(self.ids(student_index, 'kemi'), [])
+
+    def test_enrollment_changes_update_class(self):
+        from datetime import date
+
+        from apps.academics.models import AcademicSession, Class, Enrollment, Student
+
+        session = AcademicSession.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), is_current=True
+        )
+        jss1, jss2 = (
+            Class.objects.create(name=name, code=name, academic_session=session) for name in ('JSS1', 'JSS2')
+        )
+        user = User.objects.create_user(username='bola', email='bola@example.com', password='x', first_name='Bola')
+        student = Student.objects.create(
+            user=user, student_id='STU0002', admission_number='ADM0002',
+            admission_date=date(2024, 1, 1), date_of_birth=date(2010, 1, 1),
+        )
+
+        def indexed_class():
+            return [result['class'] for result in student_index.search('bola', fuzzy=False)]
+
+        self.assertEqual(indexed_class(), ['N/A'])
+        enrollment = Enrollment.objects.create(
+            student=student, class_enrolled=jss1, academic_session=session, enrollment_date=date(2024, 9, 1), roll_number=1,
+        )
+        self.assertEqual(indexed_class(), [str(jss1)])
+
+        enrollment.class_enrolled = jss2
+        enrollment.save()
+        self.assertEqual(indexed_class(), [str(jss2)])
+
+        enrollment.hard_delete()
+        self.assertEqual(indexed_class(), ['N/A'])
@@ -0,0 +1,452 @@
+"""
+In-memory typeahead index for user and student autocomplete lookups.
+
+Each worker process keeps its own index in memory so that lookups never touch
+the database. Consistency between workers is maintained through the Django
+cache: every change bumps a shared version counter and records the changed
+document under that version, so a worker that falls behind replays the missed
+changes (or rebuilds from the database if the change log has expired).
+"""
+
+import bisect
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SPLIT_RE = re.compile(r'[\s@._\-/]+')
+CHANGE_LOG_TIMEOUT = 60 * 60  # 1 hour
+MIN_FUZZY_SCORE = 0.3
+
+
+def tokenize(*values):
+    """Split values into lowercase search tokens (whole values are kept too)."""
+    tokens = set()
+    for value in values:
+        if not value:
+            continue
+        value = str(value).lower().strip()
+        tokens.add(value)
+        tokens.update(token for token in TOKEN_SPLIT_RE.split(value) if token)
+    return tokens
+
+
+def trigrams(value):
+    """Return the set of padded trigrams for a string."""
+    padded = f'  {value} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TypeaheadIndex:
+    """
+    Prefix and trigram index over a set of documents.
+
+    Documents are plain dicts with an ``id`` key and a ``tokens`` set; any
+    other keys are returned as-is from ``search`` so that views can render
+    results without a database round trip.
+
+    Prefix lookups bisect a sorted token array, so their cost depends on the
+    number of results rather than the size of the index. Alphabetic tokens are
+    also indexed by trigram for typo-tolerant matching.
+
+    ``loader`` is a callable returning an iterable of documents and is used
+    for the initial (lazy) build and whenever a worker falls too far behind.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.version_key = f'typeahead:{name}:version'
+        self._lock = threading.RLock()
+        self._built = False
+        self._version = None
+        self._reset()
+
+    def _reset(self):
+        self._documents = {}
+        # Parallel sorted arrays: _keys[i] is a token of document _ids[i]
+        self._keys = []
+        self._ids = []
+        # Trigrams index the distinct alphabetic tokens (the vocabulary), which
+        # is far smaller than the number of documents for person names.
+        self._token_counts = Counter()
+        self._trigrams = defaultdict(set)
+
+    # ------------------------------------------------------------------
+    # Local index maintenance
+    # ------------------------------------------------------------------
+
+    def _insert(self, document):
+        doc_id = document['id']
+        self._remove(doc_id)
+        self._documents[doc_id] = document
+        for token in document['tokens']:
+            position = bisect.bisect_right(self._keys, token)
+            self._keys.insert(position, token)
+            self._ids.insert(position, doc_id)
+            self._add_vocabulary(token)
+
+    def _remove(self, doc_id):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        for token in document['tokens']:
+            low = bisect.bisect_left(self._keys, token)
+            high = bisect.bisect_right(self._keys, token, low)
+            for position in range(low, high):
+                if self._ids[position] == doc_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+            self._remove_vocabulary(token)
+
+    def _add_vocabulary(self, token):
+        if not token.isalpha():
+            return
+        self._token_counts[token] += 1
+        if self._token_counts[token] == 1:
+            for gram in trigrams(token):
+                self._trigrams[gram].add(token)
+
+    def _remove_vocabulary(self, token):
+        if not token.isalpha() or token not in self._token_counts:
+            return
+        self._token_counts[token] -= 1
+        if self._token_counts[token] > 0:
+            return
+        del self._token_counts[token]
+        for gram in trigrams(token):
+            tokens = self._trigrams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[gram]
+
+    def load(self, documents):
+        """Replace the index contents with ``documents``."""
+        with self._lock:
+            self._reset()
+            entries = []
+            for document in documents:
+                doc_id = document['id']
+                self._documents[doc_id] = document
+                for token in document['tokens']:
+                    entries.append((token, doc_id))
+                    if token.isalpha():
+                        self._token_counts[token] += 1
+            for token in self._token_counts:
+                for gram in trigrams(token):
+                    self._trigrams[gram].add(token)
+            entries.sort()
+            self._keys = [token for token, _doc_id in entries]
+            self._ids = [doc_id for _token, doc_id in entries]
+            self._built = True
+
+    def rebuild(self):
+        """Rebuild the index from the database and sync with the shared version."""
+        version = self._shared_version()
+        documents = list(self.loader())
+        self.load(documents)
+        with self._lock:
+            self._version = version
+        logger.debug(f"Built typeahead index '{self.name}' with {len(documents)} documents")
+
+    # ------------------------------------------------------------------
+    # Cross-worker synchronisation
+    # ------------------------------------------------------------------
+
+    def _shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 0, timeout=None)
+            version = cache.get(self.version_key, 0)
+        return version
+
+    def _change_key(self, version):
+        return f'typeahead:{self.name}:change:{version}'
+
+    def _sync(self):
+        """Bring the local index up to date with changes made by other workers."""
+        if not self._built:
+            self.rebuild()
+            return
+
+        shared = self._shared_version()
+        with self._lock:
+            local = self._version
+        if shared == local:
+            return
+        if local is None or shared < local:
+            # The cache was cleared or restarted; start over.
+            self.rebuild()
+            return
+
+        keys = [self._change_key(version) for version in range(local + 1, shared + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            self.rebuild()
+            return
+
+        with self._lock:
+            for key in keys:
+                doc_id, document = changes[key]
+                if document is None:
+                    self._remove(doc_id)
+                else:
+                    self._insert(document)
+            self._version = shared
+
+    def _publish(self, doc_id, document):
+        """Apply a change locally and record it for other workers."""
+        try:
+            self._shared_version()
+            version = cache.incr(self.version_key)
+        except ValueError:
+            version = None
+
+        if version is not None:
+            cache.set(self._change_key(version), (doc_id, document), timeout=CHANGE_LOG_TIMEOUT)
+
+        with self._lock:
+            if not self._built:
+                return
+            if document is None:
+                self._remove(doc_id)
+            else:
+                self._insert(document)
+            # Only advance if no other worker published in between; otherwise the
+            # next lookup replays the gap from the change log.
+            if version is not None and self._version == version - 1:
+                self._version = version
+
+    def update(self, document):
+        """Add or replace a document."""
+        self._publish(document['id'], document)
+
+    def remove(self, doc_id):
+        """Remove a document if present."""
+        self._publish(doc_id, None)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _prefix_range(self, term):
+        """Return (low, exact_high, high) positions of tokens starting with ``term``."""
+        low = bisect.bisect_left(self._keys, term)
+        high = bisect.bisect_left(self._keys, term + '\U0010ffff', low)
+        exact_high = bisect.bisect_right(self._keys, term, low, high)
+        return low, exact_high, high
+
+    def _prefix_candidates(self, terms, scan_limit):
+        """Yield document ids matching every term, exact token matches first."""
+        ranges = [self._prefix_range(term) for term in terms]
+        # Drive the scan from the most selective term and verify the others
+        driver = min(range(len(terms)), key=lambda i: ranges[i][2] - ranges[i][0])
+        low, exact_high, high = ranges[driver]
+        others = [term for i, term in enumerate(terms) if i != driver]
+
+        # Other terms are checked by set membership when their match set is
+        # small enough to materialise, otherwise against document tokens.
+        other_sets = []
+        other_terms = []
+        for i, term in enumerate(terms):
+            if i == driver:
+                continue
+            other_low, _exact_high, other_high = ranges[i]
+            if other_high - other_low <= scan_limit * 4:
+                other_sets.append(set(self._ids[other_low:other_high]))
+            else:
+                other_terms.append(term)
+
+        seen = set()
+        for position in range(low, min(high, low + scan_limit)):
+            doc_id = self._ids[position]
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if other_sets and not all(doc_id in ids for ids in other_sets):
+                continue
+            if other_terms:
+                tokens = self._documents[doc_id]['tokens']
+                if not all(any(token.startswith(term) for token in tokens) for term in other_terms):
+                    continue
+            yield doc_id
+
+    def _fuzzy_candidates(self, terms, max_tokens=20):
+        """
+        Yield document ids whose tokens are similar to the longest query term.
+
+        Similar vocabulary tokens are found by trigram overlap (Dice
+        coefficient) and expanded back to documents via the sorted arrays.
+        """
+        term = max(terms, key=len)
+        grams = trigrams(term)
+        counts = Counter(chain.from_iterable(
+            self._trigrams[gram] for gram in grams if gram in self._trigrams
+        ))
+        scored = []
+        for token, count in counts.items():
+            score = 2 * count / (len(grams) + len(token) + 1)
+            if score >= MIN_FUZZY_SCORE:
+                scored.append((score, token))
+        scored.sort(reverse=True)
+
+        for _score, token in scored[:max_tokens]:
+            low = bisect.bisect_left(self._keys, token)
+            high = bisect.bisect_right(self._keys, token, low)
+            yield from self._ids[low:high]
+
+    def search(self, query, limit=10, fuzzy=True, predicate=None, scan_limit=5000):
+        """
+        Return up to ``limit`` documents matching ``query``.
+
+        Every word in the query must prefix-match a token of the document.
+        When prefix matching finds fewer than ``limit`` results and ``fuzzy``
+        is set, trigram similarity is used to fill the remaining slots so
+        that small typos still return sensible suggestions. ``predicate``
+        filters documents (e.g. by role) before they count towards ``limit``.
+        """
+        terms = [term for term in TOKEN_SPLIT_RE.split(query.lower().strip()) if term]
+        if not terms:
+            return []
+
+        self._sync()
+
+        with self._lock:
+            results = []
+            seen = set()
+            candidates = self._prefix_candidates(terms, scan_limit)
+            if fuzzy:
+                # Only computed if prefix matching did not fill the result list
+                candidates = chain(candidates, self._fuzzy_candidates(terms))
+            for doc_id in candidates:
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                document = self._documents[doc_id]
+                if predicate is not None and not predicate(document):
+                    continue
+                results.append(document)
+                if len(results) >= limit:
+                    break
+
+        return results
+
+    def __len__(self):
+        return len(self._documents)
+
+
+# ----------------------------------------------------------------------
+# Document builders
+# ----------------------------------------------------------------------
+
+def build_user_document(user, role_types=()):
+    """Build the index document for a user."""
+    full_name = user.get_full_name()
+    return {
+        'id': str(user.id),
+        'text': f"{full_name} ({user.email})",
+        'role_types': frozenset(role_types),
+        'tokens': tokenize(user.first_name, user.last_name, user.email, user.username),
+    }
+
+
+def build_student_document(student, class_name=None):
+    """
+    Build the index document for a student.
+
+    ``class_name`` may be passed when already known (bulk builds); otherwise
+    it is looked up from the student's current enrollment.
+    """
+    if class_name is None:
+        current_class = student.current_class
+        class_name = str(current_class) if current_class else 'N/A'
+    full_name = student.user.get_full_name()
+    return {
+        'id': str(student.id),
+        'name': full_name,
+        'admission': student.admission_number,
+        'class': class_name,
+        'gender': student.get_gender_display(),
+        'tokens': tokenize(
+            student.user.first_name, student.user.last_name, student.user.email,
+            student.student_id, student.admission_number
+        ),
+    }
+
+
+def _load_user_documents():
+    from .models import User, UserRole
+
+    role_types = defaultdict(set)
+    for user_id, role_type in UserRole.objects.filter(status='active').values_list('user_id', 'role__role_type'):
+        role_types[user_id].add(role_type)
+
+    users = User.objects.filter(is_active=True).only(
+        'id', 'first_name', 'last_name', 'email', 'username'
+    ).iterator(chunk_size=2000)
+    for user in users:
+        yield build_user_document(user, role_types.get(user.id, ()))
+
+
+def _load_student_documents():
+    from apps.academics.models import Enrollment, Student
+
+    class_names = {}
+    enrollments = Enrollment.objects.filter(
+        status='active', academic_session__is_current=True
+    ).select_related('class_enrolled')
+    for enrollment in enrollments:
+        class_names.setdefault(enrollment.student_id, str(enrollment.class_enrolled))
+
+    students = Student.objects.filter(
+        status='active', is_deleted=False, user__is_active=True
+    ).select_related('user').iterator(chunk_size=2000)
+    for student in students:
+        yield build_student_document(student, class_names.get(student.id, 'N/A'))
+
+
+user_index = TypeaheadIndex('users', _load_user_documents)
+student_index = TypeaheadIndex('students', _load_student_documents)
+
+
+# ----------------------------------------------------------------------
+# Incremental refresh helpers (called from signal handlers)
+# ----------------------------------------------------------------------
+
+def refresh_user(user):
+    """Re-index a user (and their student record, if any)."""
+    from .models import UserRole
+
+    if user.is_active:
+        role_types = UserRole.objects.filter(
+            user=user, status='active'
+        ).values_list('role__role_type', flat=True)
+        user_index.update(build_user_document(user, role_types))
+    else:
+        user_index.remove(str(user.id))
+
+    if _has_student(user):
+        refresh_student(user.student_profile)
+
+
+def refresh_student(student):
+    """Re-index a student."""
+    if student.status == 'active' and not student.is_deleted and student.user.is_active:
+        student_index.update(build_student_document(student))
+    else:
+        student_index.remove(str(student.id))
+
+
+def _has_student(user):
+    from django.core.exceptions import ObjectDoesNotExist
+    try:
+        return user.student_profile is not None
+    except ObjectDoesNotExist:
+        return False
@@ -24,7 +24,6 @@ import smtplib
 import ssl
 from django.http import JsonResponse, HttpResponse
 import csv
-import openpyxl
 from io import BytesIO
 
 
@@ -38,9 +37,9 @@ from .models import (
     User, UserProfile, Role, UserRole, LoginHistory,
     PasswordHistory, UserSession, ParentStudentRelationship,
     StudentApplication, StaffApplication, UserRoleActivity,
-    get_student_guardians, notify_guardians_profile_update,
     ApplicationStatus
 )
+from .typeahead import user_index
 from .forms import (
     LoginForm, UserCreationForm, UserUpdateForm, UserProfileForm, RoleForm,
     UserRoleAssignmentForm, CustomPasswordChangeForm, ParentStudentRelationshipForm,
@@ -1450,16 +1449,13 @@ def user_dashboard(request):
             ).exists()
 
             # Get unread notification count
-            from apps.communication.models import RealTimeNotification
-            unread_notification_count = RealTimeNotification.objects.filter(
-                recipient=request.user,
-                is_read=False
-            ).count()
+            from apps.communication.feed import NotificationFeed
+            unread_notification_count = NotificationFeed.unread_count(request.user)
 
             # Add student-specific context if user is a student
             if is_student:
                 student = request.user.student_profile
-                current_session = AcademicSession.objects.filter(is_current=True).first()
+                current_session = AcademicSession.current()
 
                 # Get current enrollment
                 current_enrollment = None
@@ -2717,7 +2713,7 @@ def parent_dashboard(request):
         ).select_related('class_enrolled').first()
 
         # Get current attendance percentage
-        current_session = AcademicSession.objects.filter(is_current=True).first()
+        current_session = AcademicSession.current()
         attendance_percentage = None
         if current_session:
             from apps.attendance.models import AttendanceSummary
@@ -2791,16 +2787,11 @@ def parent_dashboard(request):
         })
 
     # Get recent general notifications for parent
-    from apps.communication.models import RealTimeNotification
-    recent_notifications = RealTimeNotification.objects.filter(
-        recipient=request.user
-    ).order_by('-created_at')[:5]
+    from apps.communication.feed import NotificationFeed
+    recent_notifications = NotificationFeed.visible(request.user).order_by('-created_at', '-id')[:5]
 
     # Get unread notification count
-    unread_count = RealTimeNotification.objects.filter(
-        recipient=request.user,
-        is_read=False
-    ).count()
+    unread_count = NotificationFeed.unread_count(request.user)
 
     context = {
         'title': _('Parent Dashboard'),
@@ -2879,7 +2870,7 @@ def child_academic_records(request, child_id):
 
     # Attendance summary
     attendance_summary = None
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
     if current_session:
         from apps.attendance.models import DailyAttendance
         attendance_records = DailyAttendance.objects.filter(
@@ -2981,7 +2972,7 @@ def child_attendance(request, child_id):
 
     # Attendance summary
     attendance_summary = None
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
     if current_session:
         from apps.attendance.models import DailyAttendance
         attendance_records = DailyAttendance.objects.filter(
@@ -3039,7 +3030,7 @@ def child_attendance(request, child_id):
         return redirect('users:dashboard')
 
     # Get attendance data
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     from apps.attendance.models import DailyAttendance, AttendanceSummary
 
@@ -3098,9 +3089,10 @@ def child_fee_status(request, child_id):
         messages.error(request, _("You don't have permission to view this child's fee information."))
         return redirect('users:dashboard')
 
+    from apps.finance.ledger import StudentLedger
     from apps.finance.models import Invoice, Payment
 
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get invoices for current session
     invoices = Invoice.objects.filter(
@@ -3113,18 +3105,18 @@ def child_fee_status(request, child_id):
         student=child
     ).select_related('invoice').order_by('-payment_date')[:10]
 
-    # Calculate totals
-    total_invoiced = sum(invoice.total_amount for invoice in invoices)
-    total_paid = sum(invoice.amount_paid for invoice in invoices)
-    total_pending = sum(invoice.balance_due for invoice in invoices)
+    # Totals from the student ledger
+    totals = {'total_invoiced': 0, 'total_paid': 0, 'total_balance': 0}
+    if current_session:
+        totals = StudentLedger.totals(child, current_session)
 
     context = {
         'child': child,
         'invoices': invoices,
         'payments': payments,
-        'total_invoiced': total_invoiced,
-        'total_paid': total_paid,
-        'total_pending': total_pending,
+        'total_invoiced': totals['total_invoiced'],
+        'total_paid': totals['total_paid'],
+        'total_pending': totals['total_balance'],
         'current_session': current_session,
     }
 
@@ -3300,7 +3292,7 @@ def user_bulk_action(request):
                             return redirect('users:user_list')
 
                         # Get current academic session for role assignment
-                        current_session = AcademicSession.objects.filter(is_current=True).first()
+                        current_session = AcademicSession.current()
 
                         for user in users:
                             # Check if user already has this role to avoid duplicates
@@ -3696,6 +3688,8 @@ def export_applications(request, application_type):
         return response
 
     elif format == 'excel':
+        import openpyxl
+
         output = BytesIO()
         workbook = openpyxl.Workbook()
         sheet = workbook.active
@@ -3832,6 +3826,8 @@ def export_users(request):
         return response
 
     elif format == 'excel':
+        import openpyxl
+
         output = BytesIO()
         workbook = openpyxl.Workbook()
         sheet = workbook.active
@@ -3948,21 +3944,16 @@ def get_user_suggestions(request):
     query = request.GET.get('q', '')
     role_type = request.GET.get('role_type', '')
 
-    users = User.objects.filter(
-        Q(email__icontains=query) |
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query)
-    ).filter(is_active=True)
-
+    predicate = None
     if role_type:
-        users = users.filter(user_roles__role__role_type=role_type)
+        predicate = lambda document: role_type in document['role_types']
 
     suggestions = [
         {
-            'id': user.id,
-            'text': f"{user.get_full_name()} ({user.email})"
+            'id': document['id'],
+            'text': document['text']
         }
-        for user in users[:10]
+        for document in user_index.search(query, limit=10, predicate=predicate)
     ]
 
     return JsonResponse({'results': suggestions})
@@ -4085,11 +4076,7 @@ def upload_profile_picture(request):
             details={'action': 'Profile picture updated'}
         )
 
-        # Trigger guardian notifications if user is a student
-        if user.user_roles.filter(role__role_type='student').exists():
-            guardians = get_student_guardians(user)
-            if guardians:
-                notify_guardians_profile_update(user, guardians, ['profile_picture'])
+        # Guardians of students are notified by the UserProfile post_save receiver
 
         return JsonResponse({
             'success': True,
@@ -4608,7 +4595,7 @@ def process_bulk_import(csv_file, send_welcome_email, generate_passwords, perfor
                             raise ValueError(f"Invalid role type: {role_type}")
 
                     # Get current academic session
-                    current_session = AcademicSession.objects.filter(is_current=True).first()
+                    current_session = AcademicSession.current()
 
                     UserRole.objects.create(
                         user=user,
@@ -4715,7 +4702,7 @@ def teacher_dashboard(request):
     from apps.attendance.models import DailyAttendance
 
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Classes taught by this teacher in the current session
     classes_taught = Class.objects.filter(
@@ -4795,7 +4782,7 @@ def teacher_classes(request):
     View all classes assigned to the teacher.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get all classes taught by this teacher
     teacher_assignments = teacher.subject_assignments.filter(
@@ -4838,7 +4825,7 @@ def teacher_class_attendance(request, class_id):
     Take attendance for a specific class.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Verify teacher teaches this class
     class_obj = get_object_or_404(
@@ -4953,7 +4940,7 @@ def teacher_class_materials(request, class_id):
     View and manage materials for a specific class.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Verify teacher teaches this class
     class_obj = get_object_or_404(
@@ -4998,7 +4985,7 @@ def teacher_material_upload(request):
     Upload new material for classes.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get classes taught by this teacher
     teacher_assignments = teacher.subject_assignments.filter(
@@ -5048,7 +5035,7 @@ def teacher_students(request):
     View all students taught by the teacher.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get all students taught by this teacher
     taught_classes = Class.objects.filter(
@@ -5087,7 +5074,7 @@ def teacher_student_progress(request, student_id):
     View detailed progress for a specific student.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     student = get_object_or_404(Student, id=student_id)
 
@@ -5151,7 +5138,7 @@ def teacher_assessment(request):
     Teacher assessment overview and management.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get exams created by teacher
     from apps.assessment.models import Exam
@@ -5194,7 +5181,7 @@ def teacher_timetable(request):
     View teacher's timetable/schedule.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get teacher's timetable
     from apps.academics.models import Timetable
@@ -5229,7 +5216,7 @@ def teacher_communication(request):
     Teacher communication hub for parent interactions.
     """
     teacher = request.user.teacher_profile
-    current_session = AcademicSession.objects.filter(is_current=True).first()
+    current_session = AcademicSession.current()
 
     # Get recent messages
     from apps.communication.models import Message
@@ -0,0 +1,106 @@
+"""
+Benchmark for model save throughput under the audit signal handlers.
+
+Saves --saves SystemConfig rows in a throwaway database and reports saves
+per second with:
+
+- before: the old per-save check, which scanned sys.argv and listed every
+  table in the database before deciding whether to log
+- after: the apps.audit.switch check, decided once per process
+- after, inside audit_disabled(), as a bulk job would run
+
+each both outside a request (no current institution: nothing is logged,
+only the check runs) and with a current institution (an audit row is
+written per save).
+
+Usage:
+    python benchmarks/bench_audit_saves.py [--saves 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from apps.audit import views as audit_views  # noqa: E402
+from apps.audit.models import AuditLog  # noqa: E402
+from apps.audit.switch import audit_disabled  # noqa: E402
+from apps.core.middleware import get_current_institution, set_current_institution  # noqa: E402
+from apps.core.models import Institution, SystemConfig  # noqa: E402
+
+
+def legacy_can_create_audit_log():
+    """The check every save and delete ran before apps.audit.switch."""
+    migrating = 'migrate' in sys.argv or 'makemigrations' in sys.argv or 'showmigrations' in sys.argv
+    try:
+        with connection.cursor():
+            table_exists = 'audit_auditlog' in connection.introspection.table_names()
+    except Exception:
+        table_exists = False
+    return not migrating and table_exists and get_current_institution() is not None
+
+
+def save_rate(configs):
+    start = time.perf_counter()
+    for config in configs:
+        config.save()
+    return len(configs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--saves', type=int, default=2000)
+    args = parser.parse_args()
+
+    settings.DEBUG = False
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+        configs = SystemConfig.objects.bulk_create([
+            SystemConfig(institution=institution, key=f'bench.{number}', value={'n': number})
+            for number in range(args.saves)
+        ])
+        print(f'{len(connection.introspection.table_names())} tables, {args.saves} saves per run\n')
+
+        current_check = audit_views._can_create_audit_log
+        scenarios = [
+            ('before', legacy_can_create_audit_log, False),
+            ('after', current_check, False),
+            ('after, audit_disabled()', current_check, True),
+        ]
+        for institution_label, current in (('outside a request', None), ('with an institution', institution)):
+            set_current_institution(current)
+            for label, check, disabled in scenarios:
+                audit_views._can_create_audit_log = check
+                logs = AuditLog.objects.count()
+                if disabled:
+                    with audit_disabled():
+                        rate = save_rate(configs)
+                else:
+                    rate = save_rate(configs)
+                written = AuditLog.objects.count() - logs
+                print(f'{institution_label:<20} {label:<24} {rate:8.0f} saves/s  {written:6d} audit rows')
+        audit_views._can_create_audit_log = current_check
+        set_current_institution(None)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
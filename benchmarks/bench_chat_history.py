@@ -0,0 +1,132 @@
+"""
+Benchmark for chat history delivery.
+
+Seeds a throwaway database with one room of 100,000 messages and compares:
+
+- offset paging with a read-state query per message (the old approach)
+  against keyset pages from ChatHistoryService at increasing depths
+- marking messages read one at a time against a single bulk insert
+
+Usage:
+    python benchmarks/bench_chat_history.py [--messages 100000] [--page-size 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.communication.history import ChatHistoryService, ReadReceipt, encode_cursor  # noqa: E402
+from apps.communication.models import ChatMessage, ChatRoom  # noqa: E402
+from apps.core.models import Institution  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+
+def seed(count):
+    institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+    sender = User.objects.create_user(username='sender', email='sender@example.com', password='x')
+    reader = User.objects.create_user(username='reader', email='reader@example.com', password='x')
+    room = ChatRoom.objects.create(name='Bench room', room_type='group')
+    room.members.add(sender, reader)
+
+    # created_at is auto_now_add, so spread the timestamps after each insert;
+    # messages within a batch share a timestamp and are ordered by id
+    start = timezone.now() - timedelta(days=365)
+    for offset in range(0, count, 500):
+        batch = ChatMessage.objects.bulk_create([
+            ChatMessage(room=room, sender=sender, institution=institution, content=f'message {number}')
+            for number in range(offset, min(offset + 500, count))
+        ])
+        ChatMessage.objects.filter(pk__in=[m.pk for m in batch]).update(
+            created_at=start + timedelta(minutes=offset // 500)
+        )
+    return room, reader
+
+
+def offset_page(room, user, offset, size):
+    messages = ChatMessage.objects.filter(room=room).select_related('sender').order_by('-created_at')[offset:offset + size]
+    return [
+        {'id': str(m.id), 'content': m.content, 'is_read': m.is_read_by_user(user)}
+        for m in messages
+    ]
+
+
+def timed(func, *args, **kwargs):
+    reset_queries()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000, len(connection.queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.force_debug_cursor = True
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        room, reader = seed(args.messages)
+        print(f'Seeded {args.messages} messages in {time.perf_counter() - start:.1f}s\n')
+
+        print(f'{"depth":>8}  {"offset+per-row":>22}  {"keyset":>22}')
+        cursor = None
+        depth = 0
+        checkpoints = {0, 1000, 10000, 50000, args.messages - args.page_size}
+        while depth < args.messages:
+            page, keyset_ms, keyset_queries = timed(
+                ChatHistoryService.page, room.pk, reader, before=cursor, limit=args.page_size
+            )
+            if depth in checkpoints:
+                _rows, offset_ms, offset_queries = timed(offset_page, room, reader, depth, args.page_size)
+                print(
+                    f'{depth:>8}  {offset_ms:9.1f}ms {offset_queries:4d} queries  '
+                    f'{keyset_ms:9.1f}ms {keyset_queries:4d} queries'
+                )
+            cursor = page['next_cursor']
+            depth += args.page_size
+            if cursor is None:
+                break
+            # Jump ahead between checkpoints without walking every page
+            upcoming = min((c for c in checkpoints if c > depth), default=None)
+            if upcoming is not None and upcoming - depth > args.page_size:
+                jump = ChatMessage.objects.filter(room=room).order_by('-created_at', '-id').values(
+                    'created_at', 'id')[upcoming - 1]
+                cursor = encode_cursor(jump['created_at'], jump['id'])
+                depth = upcoming
+
+        sample = list(ChatMessage.objects.filter(room=room).order_by('created_at')[:1000])
+        _none, loop_ms, loop_queries = timed(lambda: [m.read_by.add(reader) for m in sample])
+        ReadReceipt.objects.filter(user_id=reader.pk).delete()
+        ids = [m.pk for m in sample]
+        marked, bulk_ms, bulk_queries = timed(ChatHistoryService.mark_read, room.pk, reader, ids)
+        print(f'\nmark 1000 read: loop {loop_ms:.1f}ms ({loop_queries} queries), '
+              f'bulk {bulk_ms:.1f}ms ({bulk_queries} queries, {marked} marked)')
+
+        marked, all_ms, all_queries = timed(ChatHistoryService.mark_read, room.pk, reader)
+        print(f'mark room read: bulk {all_ms:.1f}ms ({all_queries} queries, {marked} marked)')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Load benchmark for the main pages, APIs and the chat WebSocket.
+
+Generates a synthetic school (apps.core.synthetic) in a throwaway database
+and drives each endpoint --requests times through the Django test client,
+or a channels WebsocketCommunicator for chat, reporting latency percentiles
+and queries per request:
+
+- dashboards for a student and an administrator
+- marking attendance for a whole class, as its teacher
+- generating invoices for a class
+- global search
+- chat: joining a room (history and presence) and sending a message
+
+Usage:
+    python benchmarks/bench_endpoints.py [--students 2000] [--requests 30] [--only chat]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from asgiref.sync import async_to_sync  # noqa: E402
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.models import Permission  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.attendance.models import AttendanceSession  # noqa: E402
+from apps.communication.models import ChatRoom  # noqa: E402
+from apps.core.querybudget import QueryRecorder  # noqa: E402
+from apps.core.synthetic import SchoolGenerator  # noqa: E402
+from config.routing import websocket_urlpatterns  # noqa: E402
+
+User = get_user_model()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples, queries):
+    print(
+        f'{label:<34} n={len(samples):<4} p50={percentile(samples, 50):8.1f}ms  '
+        f'p95={percentile(samples, 95):8.1f}ms  p99={percentile(samples, 99):8.1f}ms  '
+        f'queries={statistics.median(queries):6.0f}'
+    )
+
+
+def measure(request, count):
+    """Run ``request(number)`` ``count`` times; returns latencies and query counts."""
+    samples, queries = [], []
+    for number in range(count):
+        with QueryRecorder() as recorder:
+            start = time.perf_counter()
+            response = request(number)
+            samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{response.status_code} from {response.request["PATH_INFO"]}')
+        queries.append(recorder.count)
+    return samples, queries
+
+
+def client_for(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def http_endpoints(school, admin):
+    student = client_for(school.student_list[0].user)
+    teacher_user = school.class_list[0].class_teacher.user
+    teacher_user.user_permissions.add(Permission.objects.get(codename='add_dailyattendance'))
+    teacher = client_for(teacher_user)
+    staff = client_for(admin)
+
+    class_obj = school.class_list[0]
+    class_students = [s for s in school.student_list if school.class_of[s.pk].pk == class_obj.pk]
+    attendance_session = AttendanceSession.objects.get(academic_session=school.session, name='Morning')
+    first_day = timezone.localdate() - timedelta(days=2 * school.days + 7)
+
+    def mark_attendance(number):
+        data = {
+            'date': (first_day - timedelta(days=number)).isoformat(),
+            'attendance_session': str(attendance_session.pk),
+        }
+        for student in class_students:
+            data[f'status_{student.pk}'] = 'present'
+        return teacher.post(reverse('attendance:bulk_mark', args=[class_obj.pk]), data)
+
+    def generate_invoices(number):
+        payload = {
+            'student_ids': [str(s.pk) for s in class_students],
+            'academic_session_id': str(school.session.pk),
+            'billing_period': f'bench_{number}',
+            'issue_date': timezone.localdate().isoformat(),
+            'due_date': (timezone.localdate() + timedelta(days=30)).isoformat(),
+        }
+        return staff.post(reverse('finance:api_generate_invoices'), json.dumps(payload),
+                          content_type='application/json')
+
+    terms = ['Ada', 'Okafor', 'Grade 1', 'SYNS0000', 'Mathematics', 'Bello Eze']
+    return [
+        ('dashboard (student)', lambda n: student.get(reverse('users:dashboard'))),
+        ('dashboard (attendance, admin)', lambda n: staff.get(reverse('attendance:dashboard'))),
+        ('dashboard (academics, admin)', lambda n: staff.get(reverse('academics:dashboard'))),
+        ('dashboard (finance, admin)', lambda n: staff.get(reverse('finance:dashboard'))),
+        ('dashboard (super admin)', lambda n: staff.get(reverse('core:super_admin_dashboard'))),
+        (f'bulk attendance ({len(class_students)} students)', mark_attendance),
+        (f'invoice generation ({len(class_students)} students)', generate_invoices),
+        ('global search', lambda n: staff.get(reverse('core:global_search'), {'q': terms[n % len(terms)]})),
+    ]
+
+
+def chat(school, count):
+    room = ChatRoom.objects.filter(academic_class=school.class_list[0]).first()
+    user = school.class_list[0].class_teacher.user
+    application = AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def communicator():
+        socket = WebsocketCommunicator(application, f'/ws/chat/{room.pk}/')
+        socket.scope['user'] = user
+        return socket
+
+    async def receive(socket, frame_type):
+        while True:
+            frame = await socket.receive_json_from(timeout=5)
+            if frame['type'] == 'error':
+                raise RuntimeError(frame['message'])
+            if frame['type'] == frame_type:
+                return frame
+
+    async def join():
+        samples = []
+        for _ in range(count):
+            socket = communicator()
+            start = time.perf_counter()
+            await socket.connect()
+            await receive(socket, 'history')
+            samples.append((time.perf_counter() - start) * 1000)
+            await socket.disconnect()
+        return samples
+
+    async def send():
+        socket = communicator()
+        await socket.connect()
+        await receive(socket, 'history')
+        samples = []
+        for number in range(count):
+            start = time.perf_counter()
+            await socket.send_json_to({'type': 'chat_message', 'content': f'benchmark {number}'})
+            await receive(socket, 'message')
+            samples.append((time.perf_counter() - start) * 1000)
+        await socket.disconnect()
+        return samples
+
+    # database_sync_to_async runs in this thread, so the recorder sees the consumer's queries
+    results = []
+    for label, scenario in (('chat: join room', join), ('chat: send message', send)):
+        with QueryRecorder() as recorder:
+            samples = async_to_sync(scenario)()
+        results.append((label, samples, [recorder.count / count]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--only', help='Only run endpoints whose label contains this text')
+    args = parser.parse_args()
+
+    # As in production: no query log and no query budget middleware
+    settings.DEBUG = False
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        school = SchoolGenerator(students=args.students, days=args.days)
+        counts = school.generate()
+        admin = User.objects.create_superuser(username='bench-admin', email='bench-admin@example.com',
+                                              password='x', is_staff=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        print(f'Generated {sum(counts.values())} rows ({args.students} students) '
+              f'in {time.perf_counter() - start:.1f}s\n')
+
+        for label, request in http_endpoints(school, admin):
+            if args.only and args.only not in label:
+                continue
+            request(args.requests)  # warm up caches and lazy imports
+            report(label, *measure(request, args.requests))
+        if not args.only or 'chat' in args.only:
+            for label, samples, queries in chat(school, args.requests):
+                if not args.only or args.only in label:
+                    report(label, samples, queries)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark for the real-time notification feed.
+
+Seeds a throwaway database with 1,000,000 notifications spread over 1,000
+users (a mix of read, unread, expired, old and scheduled rows; one user
+receives 5% of them) and measures:
+
+- unread count and first page: old full-history queries against the feed
+- deep pages: offset pagination (with COUNT) against keyset cursors
+- scheduler delivery of due notifications
+- archival and purge throughput
+
+Usage:
+    python benchmarks/bench_notification_feed.py [--rows 1000000] [--users 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.communication.feed import (  # noqa: E402
+    NotificationArchiver, NotificationFeed, NotificationScheduler, serialize_notification,
+)
+from apps.communication.models import RealTimeNotification  # noqa: E402
+from apps.core.models import Institution  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+BATCH = 5000
+
+
+def seed(rows, user_count, seed=42):
+    rng = random.Random(seed)
+    institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+    users = User.objects.bulk_create([
+        User(username=f'user{i}', email=f'user{i}@example.com')
+        for i in range(user_count)
+    ])
+    now = timezone.now()
+    pending = []
+    for number in range(rows):
+        age = timedelta(minutes=rng.randint(0, 60 * 24 * 720))
+        created = now - age
+        roll = rng.random()
+        scheduled = now + timedelta(minutes=rng.randint(-30, 30)) if roll < 0.01 else None
+        pending.append(RealTimeNotification(
+            # One heavy recipient with a long history shows deep-page behaviour
+            recipient=users[0] if rng.random() < 0.05 else rng.choice(users),
+            institution=institution,
+            notification_type='announcement',
+            title=f'Notification {number}',
+            message='Body',
+            is_read=roll > 0.2,
+            created_at=created,
+            delivered_at=None if scheduled else created,
+            scheduled_for=scheduled,
+            expires_at=now - timedelta(days=1) if 0.01 <= roll < 0.05 else None,
+        ))
+        if len(pending) == BATCH:
+            RealTimeNotification.objects.bulk_create(pending)
+            pending = []
+    RealTimeNotification.objects.bulk_create(pending)
+    # created_at is auto_now_add; restore the generated ages
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE {RealTimeNotification._meta.db_table} SET created_at = delivered_at '
+                       'WHERE delivered_at IS NOT NULL')
+    return users
+
+
+def timed(func, repeat=1):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, sorted(samples)[len(samples) // 2]
+
+
+def legacy_unread_count(user):
+    return RealTimeNotification.objects.filter(recipient=user, is_read=False).exclude(
+        Q(expires_at__isnull=False) & Q(expires_at__lt=timezone.now())
+    ).count()
+
+
+def legacy_page(user, number):
+    queryset = RealTimeNotification.objects.filter(recipient=user).order_by('-created_at')
+    page = Paginator(queryset, 20).get_page(number)
+    return [serialize_notification(n) for n in page], page.paginator.count
+
+
+def keyset_to_depth(user, depth):
+    cursor = None
+    page = None
+    for _ in range(depth):
+        page = NotificationFeed.page(user, before=cursor, limit=20)
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    return page
+
+
+def measure(users, sample, label):
+    print(f'-- {label}')
+    _c, legacy_ms = timed(lambda: [legacy_unread_count(u) for u in sample])
+    _c, feed_ms = timed(lambda: [NotificationFeed.unread_count(u) for u in sample])
+    print(f'unread count x{len(sample)}:   legacy {legacy_ms:8.1f}ms   feed {feed_ms:8.1f}ms')
+
+    _p, legacy_ms = timed(lambda: [legacy_page(u, 1) for u in sample])
+    _p, feed_ms = timed(lambda: [NotificationFeed.page(u, limit=20) for u in sample])
+    print(f'first page x{len(sample)}:     legacy {legacy_ms:8.1f}ms   feed {feed_ms:8.1f}ms')
+
+    user = users[0]
+    for depth in (5, 100, 1000):
+        _p, legacy_ms = timed(lambda: legacy_page(user, depth), repeat=5)
+        # Measure only the final keyset page: earlier pages were already served
+        cursor_page = keyset_to_depth(user, depth - 1)
+        cursor = cursor_page['next_cursor'] if cursor_page else None
+        _p, feed_ms = timed(lambda: NotificationFeed.page(user, before=cursor, limit=20), repeat=5)
+        print(f'page {depth:>3}:              offset {legacy_ms:8.2f}ms   keyset {feed_ms:8.2f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        users = seed(args.rows, args.users)
+        print(f'Seeded {args.rows} notifications for {args.users} users '
+              f'in {time.perf_counter() - start:.1f}s\n')
+        sample = users[:50]
+        measure(users, sample, 'before archival')
+
+        due = NotificationScheduler.pending().count()
+        delivered, deliver_ms = timed(lambda: NotificationScheduler.deliver_due(push=False))
+        print(f'\ndeliver due: {delivered}/{due} in {deliver_ms:.1f}ms')
+
+        archivable = NotificationArchiver.archive(dry_run=True)
+        archived, archive_ms = timed(lambda: NotificationArchiver.archive(batch_size=5000))
+        print(f'archive: {archived}/{archivable} rows in {archive_ms / 1000:.1f}s '
+              f'({archived / max(archive_ms / 1000, 0.001):.0f} rows/s)')
+        purged, purge_ms = timed(lambda: NotificationArchiver.purge(purge_days=365, batch_size=5000))
+        print(f'purge:   {purged} rows in {purge_ms / 1000:.1f}s\n')
+
+        measure(users, sample, 'after archival')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark for the overdue invoice processor.
+
+Seeds a throwaway database with 100,000 overdue invoices (two line items each,
+spread over 2,000 students and 90 due dates) and compares:
+
+- the per-invoice approach (is_overdue, calculate_late_fee and save for every
+  row), timed on a sample and extrapolated
+- OverdueProcessor.process over every invoice, and a second run on the same
+  day (which should post nothing)
+
+Usage:
+    python benchmarks/bench_overdue_invoices.py [--invoices 100000] [--sample 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.db import connection, reset_queries, transaction  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from apps.academics.models import AcademicSession, Student  # noqa: E402
+from apps.core.models import Institution  # noqa: E402
+from apps.finance.models import FeeStructure, Invoice, InvoiceItem  # noqa: E402
+from apps.finance.overdue import OverdueProcessor  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+BATCH = 5000
+TODAY = date(2025, 3, 1)
+
+
+def seed(count, student_count, seed=42):
+    rng = random.Random(seed)
+    institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+    session = AcademicSession.objects.create(
+        name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), is_current=True
+    )
+    tuition = FeeStructure.objects.create(
+        name='Tuition', code='TUI', academic_session=session, amount=Decimal('500.00'),
+        late_fee_per_day=Decimal('5.00'), max_late_fee=Decimal('150.00'),
+    )
+    transport = FeeStructure.objects.create(
+        name='Transport', code='TRN', fee_type=FeeStructure.FeeType.TRANSPORT, academic_session=session,
+        amount=Decimal('100.00'), late_fee_per_day=Decimal('1.00'),
+    )
+    users = User.objects.bulk_create([
+        User(username=f'student{i}', email=f'student{i}@example.com') for i in range(student_count)
+    ])
+    students = Student.objects.bulk_create([
+        Student(
+            user=user, student_id=f'S{i:06d}', admission_number=f'S{i:06d}',
+            admission_date=date(2024, 9, 1), date_of_birth=date(2012, 1, 1), institution=institution,
+        )
+        for i, user in enumerate(users)
+    ])
+
+    for offset in range(0, count, BATCH):
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                invoice_number=f'INV{number:07d}',
+                student=rng.choice(students),
+                academic_session=session,
+                billing_period='Term 2',
+                issue_date=date(2024, 11, 1),
+                due_date=TODAY - timedelta(days=rng.randint(1, 90)),
+                status=Invoice.InvoiceStatus.ISSUED,
+                total_amount=Decimal('600.00'),
+                balance_due=Decimal('600.00'),
+                institution=institution,
+            )
+            for number in range(offset, min(offset + BATCH, count))
+        ])
+        InvoiceItem.objects.bulk_create([
+            InvoiceItem(invoice=invoice, fee_structure=fee, unit_price=fee.amount,
+                        line_total=fee.amount, institution=institution)
+            for invoice in invoices
+            for fee in (tuition, transport)
+        ])
+
+
+def per_invoice(invoices):
+    # Mirrors what a naive job would do with the model helpers
+    for invoice in invoices:
+        if invoice.due_date < TODAY and invoice.balance_due > 0:
+            fee = invoice.calculate_late_fee()
+            invoice.status = Invoice.InvoiceStatus.OVERDUE
+            invoice.late_fee = fee
+            invoice.save()
+
+
+def timed(func, *args, **kwargs):
+    reset_queries()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start, len(connection.queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--invoices', type=int, default=100000)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--sample', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.force_debug_cursor = True
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        seed(args.invoices, args.students)
+        print(f'Seeded {args.invoices} invoices in {time.perf_counter() - start:.1f}s\n')
+
+        # calculate_late_fee compares against the real clock, so the sample is
+        # only a cost estimate; its writes are rolled back
+        sample = list(Invoice.objects.order_by('?')[:args.sample])
+        with transaction.atomic():
+            _none, sample_s, sample_queries = timed(per_invoice, sample)
+            transaction.set_rollback(True)
+        scale = args.invoices / max(len(sample), 1)
+        print(f'per-invoice: {len(sample)} invoices in {sample_s:.2f}s ({sample_queries} queries), '
+              f'~{sample_s * scale:.0f}s and ~{int(sample_queries * scale)} queries for all')
+
+        connection.force_debug_cursor = False
+        result, run_s, _q = timed(OverdueProcessor.process, today=TODAY, batch_size=args.batch_size)
+        print(f'processor:   {run_s:.2f}s '
+              f'({args.invoices / run_s:.0f} invoices/s) -> {result}')
+
+        connection.force_debug_cursor = True
+        result, rerun_s, rerun_queries = timed(OverdueProcessor.process, today=TODAY, batch_size=args.batch_size)
+        print(f'same-day rerun: {rerun_s:.2f}s ({rerun_queries} queries) -> {result}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Load test for queued Paystack webhook ingestion.
+
+Seeds a throwaway database with pending Paystack payments, then a stub
+Paystack sender posts signed charge.success deliveries to the webhook view,
+re-sending a share of them the way Paystack retries slow acknowledgements.
+Measures:
+
+- acknowledgement latency when every delivery is processed inline (the
+  previous behaviour) against the queued view
+- worker throughput draining the queue, and that every payment was applied
+  exactly once
+
+Usage:
+    python benchmarks/bench_paystack_webhooks.py [--payments 2000] [--retries 0.3] [--workers 1]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from apps.academics.models import AcademicSession, Student  # noqa: E402
+from apps.core.models import Institution  # noqa: E402
+from apps.finance.models import Invoice, Payment, PaystackPayment, PaystackWebhookEvent  # noqa: E402
+from apps.finance.webhooks import WebhookQueue, sign_payload  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+SECRET = 'whsec_bench'
+
+
+def seed(payment_count, student_count=200):
+    institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+    session = AcademicSession.objects.create(
+        name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), is_current=True
+    )
+    users = User.objects.bulk_create([
+        User(username=f'student{i}', email=f'student{i}@example.com') for i in range(student_count)
+    ])
+    students = Student.objects.bulk_create([
+        Student(
+            user=user, student_id=f'S{i:06d}', admission_number=f'S{i:06d}',
+            admission_date=date(2024, 9, 1), date_of_birth=date(2012, 1, 1), institution=institution,
+        )
+        for i, user in enumerate(users)
+    ])
+    invoices = Invoice.objects.bulk_create([
+        Invoice(
+            invoice_number=f'INV{i:07d}', student=student, academic_session=session, billing_period='Term 2',
+            issue_date=date(2024, 11, 1), due_date=date(2024, 12, 1), status=Invoice.InvoiceStatus.ISSUED,
+            total_amount=Decimal('1000000.00'), balance_due=Decimal('1000000.00'), institution=institution,
+        )
+        for i, student in enumerate(students)
+    ])
+    payments = Payment.objects.bulk_create([
+        Payment(
+            payment_number=f'PAY{i:07d}', invoice=invoices[i % len(invoices)],
+            student=invoices[i % len(invoices)].student, amount=Decimal('100.00'),
+            payment_method=Payment.PaymentMethod.PAYSTACK, payment_date=date(2024, 11, 15),
+            status=Payment.PaymentStatus.PENDING, institution=institution,
+        )
+        for i in range(payment_count)
+    ])
+    PaystackPayment.objects.bulk_create([
+        PaystackPayment(
+            payment=payment, paystack_reference=f'PSK{i:07d}', customer_email=f'payer{i}@example.com',
+            institution=institution,
+        )
+        for i, payment in enumerate(payments)
+    ])
+    return [f'PSK{i:07d}' for i in range(payment_count)]
+
+
+class StubPaystackSender:
+    """Builds and posts signed deliveries the way Paystack does."""
+
+    def __init__(self, retry_share, seed=42):
+        self.client = Client()
+        self.url = reverse('finance:paystack_webhook')
+        self.retry_share = retry_share
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def payload(reference):
+        return json.dumps({'event': 'charge.success', 'data': {
+            'reference': reference, 'status': 'success', 'amount': 10000, 'currency': 'NGN',
+            'customer': {'email': 'payer@example.com', 'first_name': 'Bench', 'last_name': 'Payer'},
+            'paidAt': '2024-11-15T10:00:00.000Z',
+        }}).encode()
+
+    def deliveries(self, references):
+        bodies = [self.payload(reference) for reference in references]
+        bodies += self.rng.sample(bodies, int(len(bodies) * self.retry_share))
+        self.rng.shuffle(bodies)
+        return bodies
+
+    def post(self, body):
+        start = time.perf_counter()
+        response = self.client.post(
+            self.url, body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=sign_payload(body)
+        )
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - start
+
+
+def latency(samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return (f'p50 {statistics.median(samples) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, '
+            f'total {sum(samples):.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--payments', type=int, default=2000)
+    parser.add_argument('--retries', type=float, default=0.3, help='Share of deliveries re-sent')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(PAYSTACK_WEBHOOK_SECRET=SECRET):
+            references = seed(args.payments)
+            half = len(references) // 2
+            sender = StubPaystackSender(args.retries)
+
+            # Previous behaviour: the request does all the processing
+            inline = []
+            for body in sender.deliveries(references[:half]):
+                start = time.perf_counter()
+                event, created = WebhookQueue.ingest(body, sign_payload(body))
+                if created:
+                    WebhookQueue.process_event(event)
+                inline.append(time.perf_counter() - start)
+            print(f'inline:  {len(inline)} deliveries, {latency(inline)}')
+
+            queued = [sender.post(body) for body in sender.deliveries(references[half:])]
+            print(f'queued:  {len(queued)} deliveries, {latency(queued)}')
+
+            start = time.perf_counter()
+            processed = WebhookQueue.drain(batch_size=args.batch_size, workers=args.workers)
+            drain_s = time.perf_counter() - start
+            print(f'workers: {processed} events in {drain_s:.2f}s ({processed / drain_s:.0f} events/s)')
+
+            events = PaystackWebhookEvent.objects.count()
+            completed = Payment.objects.filter(status=Payment.PaymentStatus.COMPLETED).count()
+            print(f'\n{events} events stored for {len(references)} references, '
+                  f'{completed} payments completed')
+            assert events == completed == len(references)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark for batch report card rendering.
+
+Seeds a throwaway database with 1,000 report cards (8 subjects each) in one
+class and measures:
+
+- building payloads card by card against the batched builder
+- rendering in this process against the process pool
+- a second run, served entirely from the content-hash cache
+- bundling into a ZIP archive and into one merged PDF
+
+Usage:
+    python benchmarks/bench_report_cards.py [--cards 1000] [--workers N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.core.files.storage import default_storage  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+from apps.academics.models import AcademicSession, Class, Department, GradeLevel, Student, Subject  # noqa: E402
+from apps.assessment.documents import report_card_document, report_card_documents  # noqa: E402
+from apps.assessment.models import ExamType, Grade, GradingSystem, ReportCard, Result, ResultSubject  # noqa: E402
+from apps.core.documents import DocumentRenderer  # noqa: E402
+from apps.core.models import Institution  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+SUBJECTS = ['Mathematics', 'English', 'Biology', 'Chemistry', 'Physics', 'Geography', 'History', 'French']
+
+
+def seed(count):
+    institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+    session = AcademicSession.objects.create(
+        name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), is_current=True
+    )
+    academic_class = Class.objects.create(
+        name='SS 2', code='SS2', academic_session=session,
+        grade_level=GradeLevel.objects.create(name='SS 2', code='SS2', education_stage='high_school'),
+    )
+    department = Department.objects.create(name='General', code='GEN')
+    subjects = [Subject.objects.create(name=name, code=name[:5].upper(), department=department) for name in SUBJECTS]
+    exam_type = ExamType.objects.create(name='Third Term', code='T3', weightage=Decimal('100'))
+    grade = Grade.objects.create(
+        grading_system=GradingSystem.objects.create(name='Standard', code='STD'),
+        grade='B', description='Good', min_mark=Decimal('60'), max_mark=Decimal('69'), grade_point=Decimal('3'),
+    )
+
+    users = User.objects.bulk_create([
+        User(username=f'student{i}', email=f'student{i}@example.com', first_name='Student', last_name=str(i))
+        for i in range(count)
+    ])
+    students = Student.objects.bulk_create([
+        Student(
+            user=user, student_id=f'S{i:06d}', admission_number=f'S{i:06d}',
+            admission_date=date(2019, 9, 1), date_of_birth=date(2008, 1, 1), institution=institution,
+        )
+        for i, user in enumerate(users)
+    ])
+    results = Result.objects.bulk_create([
+        Result(
+            student=student, academic_class=academic_class, exam_type=exam_type, institution=institution,
+            total_marks=Decimal('800'), marks_obtained=Decimal(500 + i % 250), percentage=Decimal('70.00'),
+            grade=grade, rank=i + 1, total_students=count, attendance_percentage=Decimal('93.50'),
+            remarks='Consistent effort across subjects; keep practising past questions before exams.',
+        )
+        for i, student in enumerate(students)
+    ])
+    ResultSubject.objects.bulk_create([
+        ResultSubject(
+            result=result, subject=subject, marks_obtained=Decimal(50 + (i + j) % 50),
+            max_marks=Decimal('100'), percentage=Decimal(50 + (i + j) % 50), grade=grade, institution=institution,
+        )
+        for i, result in enumerate(results)
+        for j, subject in enumerate(subjects)
+    ], batch_size=2000)
+    ReportCard.objects.bulk_create([
+        ReportCard(
+            student=result.student, academic_class=academic_class, exam_type=exam_type, result=result,
+            comments='A pleasure to teach.', institution=institution,
+        )
+        for result in results
+    ])
+
+
+def timed(func, *args, **kwargs):
+    reset_queries()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start, len(connection.queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.force_debug_cursor = True
+    old_name = connection.settings_dict['NAME']
+    media = tempfile.mkdtemp()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(MEDIA_ROOT=media):
+            seed(args.cards)
+            cards = ReportCard.objects.order_by('student__student_id')
+            print(f'Seeded {args.cards} report cards ({len(SUBJECTS)} subjects each), '
+                  f'{os.cpu_count()} CPU(s)\n')
+
+            _docs, per_card_s, per_card_q = timed(lambda: [report_card_document(card) for card in cards])
+            documents, batch_s, batch_q = timed(report_card_documents, cards)
+            print(f'payloads   per card: {per_card_s:.2f}s ({per_card_q} queries)   '
+                  f'batched: {batch_s:.2f}s ({batch_q} queries)')
+
+            sample = documents[:100]
+            _paths, serial_s, _q = timed(DocumentRenderer.render_many, sample, workers=1)
+            print(f'render     in-process: {serial_s / len(sample) * 1000:.1f}ms/card '
+                  f'(~{serial_s / len(sample) * len(documents):.1f}s for all)')
+
+            paths, pool_s, _q = timed(DocumentRenderer.render_many, documents, workers=args.workers)
+            print(f'render     pool of {args.workers}: {pool_s:.2f}s for {len(documents) - len(sample)} '
+                  f'uncached cards ({(len(documents) - len(sample)) / pool_s:.0f} cards/s)')
+
+            _paths, cached_s, _q = timed(DocumentRenderer.render_many, documents, workers=args.workers)
+            print(f'render     cached rerun: {cached_s:.2f}s')
+
+            for output_format in ('zip', 'pdf'):
+                output, bundle_s, _q = timed(DocumentRenderer.bundle, documents, paths, output_format, 'bench')
+                print(f'bundle     {output_format}: {bundle_s:.2f}s, '
+                      f'{default_storage.size(output) / 1024 / 1024:.1f} MB')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(media, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
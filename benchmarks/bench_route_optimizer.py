@@ -0,0 +1,91 @@
+"""
+Benchmark for the transport route optimizer.
+
+Generates random 200-stop routes around a city centre and measures solve
+time and tour quality for nearest-neighbour, 2-opt and Or-opt stages
+against the old (latitude, longitude) sort.
+
+Usage:
+    python benchmarks/bench_route_optimizer.py [--stops 200] [--routes 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from apps.transport.services import (  # noqa: E402
+    haversine_matrix, nearest_neighbour, path_length, solve_stop_order, two_opt
+)
+
+CENTRE = (6.5244, 3.3792)  # Lagos
+
+
+def make_route(stops, rng):
+    coordinates = [CENTRE]
+    for _ in range(stops - 1):
+        coordinates.append((
+            CENTRE[0] + rng.uniform(-0.15, 0.15),
+            CENTRE[1] + rng.uniform(-0.15, 0.15),
+        ))
+    return coordinates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stops', type=int, default=200)
+    parser.add_argument('--routes', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    totals = {'sorted': 0.0, 'nearest': 0.0, 'two_opt': 0.0, 'full': 0.0}
+    timings = []
+
+    for _ in range(args.routes):
+        coordinates = make_route(args.stops, rng)
+
+        start = time.perf_counter()
+        order, distances = solve_stop_order(coordinates)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        sorted_order = [0] + sorted(range(1, len(coordinates)), key=lambda i: coordinates[i])
+        nn = nearest_neighbour(distances)
+        totals['sorted'] += path_length(sorted_order, distances)
+        totals['nearest'] += path_length(nn, distances)
+        totals['two_opt'] += path_length(two_opt(nn, distances), distances)
+        totals['full'] += path_length(order, distances)
+
+    timings.sort()
+    print(f'{args.routes} routes x {args.stops} stops')
+    print(
+        f'solve time      p50={timings[len(timings) // 2]:8.1f}ms  '
+        f'max={timings[-1]:8.1f}ms'
+    )
+    baseline = totals['sorted']
+    for label, key in [
+        ('lat/lng sort (old)', 'sorted'),
+        ('nearest neighbour', 'nearest'),
+        ('+ 2-opt', 'two_opt'),
+        ('+ Or-opt + 2-opt', 'full'),
+    ]:
+        average = totals[key] / args.routes
+        print(f'{label:<20} avg length={average:8.1f}km  ({average / (baseline / args.routes) * 100:5.1f}% of old)')
+
+    start = time.perf_counter()
+    haversine_matrix(make_route(args.stops, rng))
+    print(f'distance matrix  {(time.perf_counter() - start) * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark for soft-deleted rows in hot tables.
+
+Seeds a throwaway database with 500,000 audit log entries, 40% of them
+soft-deleted (most long ago) and 5% archived, and measures:
+
+- the audit trail's newest page and live-row count with and without the
+  partial index over undeleted rows, with SQLite's query plans
+- archive_records throughput
+- the same queries once old rows have been moved to the archive
+
+Usage:
+    python benchmarks/bench_soft_delete.py [--rows 500000] [--deleted 0.4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.audit.models import AuditLog  # noqa: E402
+from apps.core.archive import archive  # noqa: E402
+from apps.core.models import Institution  # noqa: E402
+
+BATCH = 5000
+LIVE_INDEX = 'auditlog_live_idx'
+
+
+def seed(rows, deleted, seed=42):
+    rng = random.Random(seed)
+    institution, _ = Institution.objects.get_or_create(code='BENCH', defaults={'name': 'Bench School'})
+    now = timezone.now()
+    for offset in range(0, rows, BATCH):
+        pending = []
+        for number in range(offset, min(offset + BATCH, rows)):
+            roll = rng.random()
+            age = timedelta(days=rng.randint(0, 720))
+            pending.append(AuditLog(
+                institution=institution,
+                action='view',
+                model_name='Student',
+                object_id=str(number),
+                is_deleted=roll < deleted,
+                deleted_at=now - age if roll < deleted else None,
+                status='archived' if deleted <= roll < deleted + 0.05 else 'active',
+            ))
+        AuditLog.all_objects.bulk_create(pending)
+    # timestamp and status_changed_at are auto_now_add; spread them out
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {AuditLog._meta.db_table} SET "
+            f"timestamp = datetime('now', '-' || (abs(random()) % 720) || ' days'), "
+            f"status_changed_at = datetime('now', '-' || (abs(random()) % 720) || ' days')"
+        )
+
+
+def timed(func, repeat=1):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, sorted(samples)[len(samples) // 2]
+
+
+def plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return '; '.join(row[-1] for row in cursor.fetchall())
+
+
+def measure(label):
+    print(f'-- {label} ({AuditLog.all_objects.count()} rows, {AuditLog.objects.count()} live)')
+    newest = AuditLog.objects.order_by('-timestamp')
+    _r, page_ms = timed(lambda: list(newest[:50]), repeat=20)
+    _r, count_ms = timed(lambda: AuditLog.objects.count(), repeat=5)
+    print(f'newest page: {page_ms:8.2f}ms   live count: {count_ms:8.2f}ms')
+    print(f'   plan: {plan(newest[:50])}')
+
+
+def without_live_index(func):
+    index = next(index for index in AuditLog._meta.indexes if index.name == LIVE_INDEX)
+    with connection.schema_editor() as editor:
+        editor.remove_index(AuditLog, index)
+    try:
+        func()
+    finally:
+        with connection.schema_editor() as editor:
+            editor.add_index(AuditLog, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--deleted', type=float, default=0.4)
+    parser.add_argument('--days', type=int, default=180)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        seed(args.rows, args.deleted)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        print(f'Seeded {args.rows} audit log entries in {time.perf_counter() - start:.1f}s\n')
+
+        without_live_index(lambda: measure('without partial index'))
+        measure('with partial index')
+
+        moved, archive_ms = timed(lambda: archive(['audit.AuditLog'], days=args.days, batch_size=BATCH))
+        count = moved['audit.AuditLog']
+        print(f'\narchive: {count} rows in {archive_ms / 1000:.1f}s '
+              f'({count / max(archive_ms / 1000, 0.001):.0f} rows/s)\n')
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        measure('after archival')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark for process startup time.
+
+Starts fresh interpreters --runs times for each startup target of
+apps.core.importtime (django.setup(), loading the URLconf, building the
+ASGI application) and for ``manage.py check``, reporting wall-clock
+percentiles. Then checks that none of the heavy optional dependencies in
+LAZY_PACKAGES is imported at startup.
+
+Exits with status 1 if a lazy package is imported at startup or, with
+--max-ms, if the median time to load the URLconf is above the limit, so
+CI can run it as a gate.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--max-ms 1500]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+from apps.core.importtime import LAZY_PACKAGES, TARGETS, profile  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_runs(command, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, help='Fail if loading the URLconf takes longer (median)')
+    args = parser.parse_args()
+
+    commands = {name: [sys.executable, '-c', code] for name, code in TARGETS.items()}
+    commands['manage.py check'] = [sys.executable, 'manage.py', 'check']
+    commands['python (baseline)'] = [sys.executable, '-c', 'pass']
+
+    medians = {}
+    for label, command in commands.items():
+        samples = timed_runs(command, args.runs)
+        medians[label] = percentile(samples, 50)
+        print(f'{label:<20} p50={medians[label]:7.0f}ms  p95={percentile(samples, 95):7.0f}ms  '
+              f'max={max(samples):7.0f}ms')
+
+    failed = False
+    loaded = {}
+    for target in TARGETS:
+        for record in profile(target):
+            if record.package in LAZY_PACKAGES and record.package not in loaded:
+                importer = record.imported_by()
+                loaded[record.package] = importer.name if importer else 'the interpreter'
+    for package, importer in sorted(loaded.items()):
+        print(f'FAIL: {package} is imported at startup (by {importer})')
+        failed = True
+    if not loaded:
+        print(f'No lazy package imported at startup ({", ".join(LAZY_PACKAGES)})')
+
+    if args.max_ms is not None and medians['urls'] > args.max_ms:
+        print(f'FAIL: loading the URLconf took {medians["urls"]:.0f}ms (limit {args.max_ms:.0f}ms)')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
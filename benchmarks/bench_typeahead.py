@@ -0,0 +1,127 @@
+"""
+Benchmark for the user/student typeahead index.
+
+Builds the index from 50,000 synthetic users and measures lookup latency for
+prefix, multi-word and fuzzy queries plus incremental updates.
+
+Usage:
+    python benchmarks/bench_typeahead.py [--users 50000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
+
+import django
+
+django.setup()
+
+from apps.users.typeahead import TypeaheadIndex, tokenize  # noqa: E402
+
+FIRST_NAMES = [
+    'adaeze', 'chinedu', 'emeka', 'funmilayo', 'ibrahim', 'ngozi', 'oluwaseun', 'tunde',
+    'amina', 'bola', 'chioma', 'david', 'esther', 'grace', 'hassan', 'joseph', 'kemi',
+    'mary', 'musa', 'peter', 'samuel', 'sarah', 'yusuf', 'zainab', 'daniel', 'blessing',
+]
+LAST_NAMES = [
+    'okafor', 'adeyemi', 'bello', 'eze', 'ibrahim', 'nwosu', 'obi', 'okonkwo', 'olawale',
+    'sani', 'usman', 'yakubu', 'abubakar', 'balogun', 'chukwu', 'danjuma', 'ekwueme',
+]
+ROLE_TYPES = ['student', 'teacher', 'parent', 'admin', 'accountant', 'librarian']
+
+
+def make_documents(count, seed=42):
+    rng = random.Random(seed)
+    for number in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        suffix = ''.join(rng.choices(string.ascii_lowercase, k=3))
+        email = f'{first}.{last}{number}@{suffix}.school.edu'
+        admission = f'ADM{number:06d}'
+        full_name = f'{first.title()} {last.title()}'
+        yield {
+            'id': str(number),
+            'text': f'{full_name} ({email})',
+            'role_types': frozenset([rng.choice(ROLE_TYPES)]),
+            'tokens': tokenize(first, last, email, admission),
+        }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_queries(index, queries, **kwargs):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(
+        f'{label:<28} p50={percentile(samples, 50):7.3f}ms  '
+        f'p95={percentile(samples, 95):7.3f}ms  p99={percentile(samples, 99):7.3f}ms'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    documents = list(make_documents(args.users))
+    index = TypeaheadIndex('benchmark', loader=lambda: documents)
+
+    start = time.perf_counter()
+    index.rebuild()
+    print(f'Built index over {len(index)} users in {(time.perf_counter() - start):.2f}s')
+
+    rng = random.Random(7)
+    prefix_queries = [rng.choice(FIRST_NAMES)[:rng.randint(2, 5)] for _ in range(args.queries)]
+    multi_queries = [
+        f'{rng.choice(FIRST_NAMES)[:3]} {rng.choice(LAST_NAMES)[:3]}' for _ in range(args.queries)
+    ]
+    id_queries = [f'adm{rng.randint(0, args.users - 1):06d}'[:rng.randint(5, 9)] for _ in range(args.queries)]
+    typo_queries = []
+    for _ in range(args.queries):
+        name = rng.choice(LAST_NAMES)
+        position = rng.randint(1, len(name) - 1)
+        typo_queries.append(name[:position] + 'x' + name[position + 1:])
+
+    report('prefix (name)', time_queries(index, prefix_queries, fuzzy=False))
+    report('prefix (two words)', time_queries(index, multi_queries, fuzzy=False))
+    report('prefix (admission no.)', time_queries(index, id_queries, fuzzy=False))
+    report('role-filtered prefix', time_queries(
+        index, prefix_queries, fuzzy=False,
+        predicate=lambda document: 'teacher' in document['role_types'],
+    ))
+    report('fuzzy (typo)', time_queries(index, typo_queries))
+
+    new_documents = list(make_documents(args.queries, seed=99))
+    for number, document in enumerate(new_documents):
+        document['id'] = f'new-{number}'
+    samples = []
+    for document in new_documents:
+        start = time.perf_counter()
+        index.update(document)
+        samples.append((time.perf_counter() - start) * 1000)
+    report('incremental update', samples)
+
+
+if __name__ == '__main__':
+    main()
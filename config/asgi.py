@@ -2,30 +2,36 @@
 ASGI config for school management system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is the only ASGI application definition; config.routing holds the
+WebSocket URL patterns it serves.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
-import django
-from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 
-# Import routing configuration
-from config.routing import websocket_urlpatterns
+from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.development')
-django.setup()
+
+# Set Django up before the consumers (and their models) are imported
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from apps.core.context import RequestContextASGIMiddleware  # noqa: E402
+from config.routing import websocket_urlpatterns  # noqa: E402
 
 # Application definition
 application = ProtocolTypeRouter({
     # Django's ASGI application for HTTP requests
-    'http': get_asgi_application(),
+    'http': django_asgi_app,
 
-    # WebSocket connections with authentication
+    # WebSocket connections with authentication, and a request context
+    # (apps.core.context) per connection
     'websocket': AuthMiddlewareStack(
-        URLRouter(websocket_urlpatterns)
+        RequestContextASGIMiddleware(URLRouter(websocket_urlpatterns))
     ),
 })
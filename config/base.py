@@ -65,11 +65,13 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    "apps.core.context.RequestContextMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.academics.registry.CurrentSessionMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -117,6 +119,138 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Caches (apps.core.caching): 'default' is shared between processes and
+# 'local' is per-process memory for hot values such as rendered navigation.
+# CACHE_BACKEND picks the shared backend: locmem, file (CACHE_DIR) or redis
+# (REDIS_URL).
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {**CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'school'},
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+CACHE_DEFAULT_TIMEOUT = 300
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+# Chat presence/typing state (apps.communication.presence); in-memory unless a Redis URL is set
+CHAT_PRESENCE_REDIS_URL = os.environ.get('CHAT_PRESENCE_REDIS_URL') or None
+CHAT_PRESENCE_TTL = 60
+CHAT_TYPING_TTL = 5
+CHAT_PRESENCE_DEBOUNCE = 0.25
+CHAT_LAST_SEEN_FLUSH_INTERVAL = 30
+
+# Real-time notification feed (apps.communication.feed)
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_PURGE_DAYS = 365
+
+# Finance dashboard summaries (apps.finance.dashboard), in seconds
+FINANCE_DASHBOARD_CACHE_TIMEOUT = 300
+
+# Days between reminders for an overdue invoice (apps.finance.overdue)
+FINANCE_OVERDUE_REMINDER_INTERVAL_DAYS = 7
+
+# Queued Paystack webhook processing (apps.finance.webhooks): attempts before
+# an event is dead-lettered, base retry delay in seconds (doubled per attempt)
+# and worker lease in seconds
+PAYSTACK_WEBHOOK_MAX_ATTEMPTS = 5
+PAYSTACK_WEBHOOK_RETRY_DELAY = 30
+PAYSTACK_WEBHOOK_LEASE_SECONDS = 300
+
+# Paystack HTTP client: connection pool per worker process, (connect, read)
+# timeouts, retries for idempotent calls and their base backoff in seconds,
+# circuit breaker and cache TTL for bank lookups
+PAYSTACK_HTTP_POOL_SIZE = 10
+PAYSTACK_HTTP_TIMEOUT = (3.05, 10)
+PAYSTACK_HTTP_RETRIES = 2
+PAYSTACK_HTTP_BACKOFF = 0.25
+PAYSTACK_CIRCUIT_FAILURES = 5
+PAYSTACK_CIRCUIT_RESET_SECONDS = 30
+PAYSTACK_CACHE_TIMEOUT = 300
+
+# PDF rendering (apps.core.documents): rendering processes (None uses the CPU
+# count) and the storage prefix for cached documents
+DOCUMENT_RENDER_WORKERS = None
+DOCUMENT_CACHE_DIR = 'documents/cache'
+
+# Responsive images (apps.core.images): widths generated for static images
+# under IMAGE_VARIANT_STATIC_DIRS at collectstatic, square thumbnail sizes for
+# uploads, output formats (AVIF is skipped if Pillow cannot encode it) and
+# encoding threads (0 generates upload thumbnails inline)
+IMAGE_VARIANT_STATIC_DIRS = ('images/',)
+IMAGE_VARIANT_WIDTHS = (320, 640, 1024, 1600)
+IMAGE_UPLOAD_SIZES = (48, 96, 192)
+IMAGE_VARIANT_FORMATS = ('avif', 'webp')
+IMAGE_VARIANT_WORKERS = 2
+
+# Soft-deleted rows (and archived audit entries / closed chat rooms) older
+# than this are moved to ArchivedRecord by the archive_records command
+ARCHIVE_AFTER_DAYS = 180
+
+# Audit log (apps.audit.switch): set AUDIT_LOG_ENABLED=false to stop writing
+# an audit row for every model save and delete in this process
+AUDIT_LOG_ENABLED = os.environ.get("AUDIT_LOG_ENABLED", "True").lower() in ('true', '1', 't')
+
+# Query budgets (apps.core.querybudget): the most queries a page may run, by
+# URL name. QueryBudgetMiddleware (development) logs requests over budget or
+# running one statement QUERY_REPEAT_THRESHOLD times; the page tests in
+# apps/core/tests.py fail on them.
+QUERY_BUDGET_DEFAULT = 40
+QUERY_REPEAT_THRESHOLD = 5
+QUERY_BUDGETS = {
+    'users:dashboard': 35,
+    'users:role_list': 15,
+    'academics:dashboard': 50,
+    'academics:session_list': 22,
+    'academics:subject_list': 15,
+    'academics:class_list': 15,
+    'academics:student_list': 15,
+    'academics:teacher_list': 15,
+    'academics:enrollment_list': 15,
+    'academics:academic_calendar': 15,
+    'academics:timetable_list': 12,
+    'attendance:dashboard': 15,
+    'assessment:dashboard': 12,
+    'assessment:exam_list': 15,
+    'assessment:assignment_list': 15,
+    'finance:dashboard': 15,
+    'finance:student_invoices': 10,
+    'library:dashboard': 18,
+    'library:book_list': 15,
+    'library:borrowrecord_list': 10,
+    'communication:notification_list': 12,
+    'communication:realtime_notification_list': 12,
+    'transport:dashboard': 25,
+    'transport:route_list': 35,
+    'transport:route_optimization': 15,
+    'transport:vehicle_list': 12,
+    'hostels:dashboard': 20,
+    'hostels:hostel_list': 12,
+    'activities:activity_list': 12,
+    'activities:enrollment_list': 12,
+    'core:super_admin_dashboard': 20,
+    'support:home': 5,
+    'support:faq_list': 8,
+    'support:article_list': 8,
+    'support:legal_documents_list': 3,
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -161,6 +295,7 @@ AUTH_USER_MODEL = 'users.User'
 
 # Authentication backends — allows login with username OR email
 AUTHENTICATION_BACKENDS = [
+    'apps.users.backends.RolePermissionBackend',
     'apps.users.backends.EmailOrUsernameBackend',
     'django.contrib.auth.backends.ModelBackend',  # Keep as fallback for admin
 ]
@@ -2,6 +2,10 @@ from .base import *
 
 DEBUG = True
 
+# Report pages over their query budget (see apps/core/querybudget.py), right
+# after RequestContextMiddleware so reports carry the request id
+MIDDLEWARE = [MIDDLEWARE[0], "apps.core.querybudget.QueryBudgetMiddleware", *MIDDLEWARE[1:]]
+
 # Static files for development
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
@@ -42,6 +42,16 @@ ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split(',')
 
 # Static files for production
 STATIC_ROOT = BASE_DIR / "staticfiles"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # WhiteNoise manifest storage that also writes WebP/AVIF image variants
+    "staticfiles": {"BACKEND": "apps.core.static_storage.VariantStaticFilesStorage"},
+}
+
+# Caches shared by every worker: Redis when REDIS_URL is set, files otherwise
+if 'CACHE_BACKEND' not in os.environ:
+    CACHE_BACKEND = 'redis' if os.environ.get('REDIS_URL') else 'file'
+    CACHES['default'] = {**CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'school'}
 
 # Security settings for production
 CSRF_COOKIE_SECURE = True
@@ -75,9 +85,13 @@ LOGGING = {
         "handlers": ["console", "file"],
         "level": "WARNING",
     },
+    "filters": {
+        # Adds the id of the request being served (apps.core.context)
+        "request_context": {"()": "apps.core.context.RequestContextFilter"},
+    },
     "formatters": {
         "verbose": {
-            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}",
+            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {request_id} {message}",
             "style": "{",
         },
         "simple": {
@@ -98,6 +112,7 @@ LOGGING = {
             "maxBytes": 1024 * 1024 * 5,  # 5 MB
             "backupCount": 5,
             "formatter": "verbose",
+            "filters": ["request_context"],
         },
     },
     "loggers": {
@@ -2,6 +2,11 @@ import os
 import sys
 from pathlib import Path
 
+# Standalone settings. Application tunables (chat presence, caches, query
+# budgets, ...) are defined once in base.py, which config.development and
+# config.production build on; everything below overrides it.
+from .base import *  # noqa: F401,F403
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -66,12 +71,14 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 # Middleware
 MIDDLEWARE = [
+    "apps.core.context.RequestContextMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # For serving static files
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.academics.registry.CurrentSessionMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 
@@ -149,6 +156,36 @@ else:
         },
     }
 
+# Caches (apps.core.caching): 'default' is shared between processes and
+# 'local' is per-process memory for hot values such as rendered navigation.
+# CACHE_BACKEND picks the shared backend: locmem, file (CACHE_DIR) or redis
+# (REDIS_URL).
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file' if ON_PYTHONANYWHERE else 'locmem')
+CACHES = {
+    'default': {**CACHE_BACKENDS[CACHE_BACKEND], 'KEY_PREFIX': 'school'},
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+CACHE_DEFAULT_TIMEOUT = 300
+FRAGMENT_CACHE_TIMEOUT = 3600
+
 # ============================
 # PASSWORD VALIDATION
 # ============================
@@ -194,8 +231,12 @@ STATICFILES_DIRS = [
 STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_ROOT = BASE_DIR / "media"
 
-# WhiteNoise configuration for static files
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise manifest storage for static files, which also writes WebP/AVIF
+# variants of static images (apps.core.static_storage)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "apps.core.static_storage.VariantStaticFilesStorage"},
+}
 
 # ============================
 # AUTHENTICATION
@@ -206,6 +247,7 @@ AUTH_USER_MODEL = 'users.User'
 
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
+    'apps.users.backends.RolePermissionBackend',
     'apps.users.backends.EmailOrUsernameBackend',
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
@@ -381,9 +423,13 @@ logs_dir.mkdir(exist_ok=True)
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        # Adds the id of the request being served (apps.core.context)
+        "request_context": {"()": "apps.core.context.RequestContextFilter"},
+    },
     "formatters": {
         "verbose": {
-            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}",
+            "format": "{levelname} {asctime} {module} {process:d} {thread:d} {request_id} {message}",
             "style": "{",
         },
         "simple": {
@@ -404,6 +450,7 @@ LOGGING = {
             "maxBytes": 1024 * 1024 * 5,  # 5 MB
             "backupCount": 5,
             "formatter": "verbose",
+            "filters": ["request_context"],
         },
         "mail_admins": {
             "level": "ERROR",
@@ -373,7 +373,7 @@ class ProjectSetup:
             (f'"{self.python_executable}" manage.py assign_role_permissions',
              "Assigning appropriate permissions to all staff roles"),
             (f'"{self.python_executable}" manage.py sync_permissions',
-             "Synchronizing user permissions based on their roles"),
+             "Refreshing cached role permissions"),
             (f'"{self.python_executable}" manage.py populate_exam_types',
              "Creating default exam types for assessment system"),
             (f'"{self.python_executable}" manage.py create_system_kpis',